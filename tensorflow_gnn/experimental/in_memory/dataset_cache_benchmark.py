@@ -0,0 +1,151 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Measures cold vs warm loading of in-memory graph data.
+
+Writes a random graph with the sizes of ogbn-arxiv (by default) in the format
+of processed OGB datasets (a pickled dict of numpy arrays), then measures:
+
+  * cold: reading it and converting it like `OgbnData` does,
+  * saving it with `datasets.save_graph_data_cache()`,
+  * warm: reading it with `datasets.CachedNodeClassificationGraphData`.
+
+Both loads are timed until node features, edge lists, splits and labels are
+available as `tf.Tensor`s.
+
+```
+python -m tensorflow_gnn.experimental.in_memory.dataset_cache_benchmark \
+  --output_dir=/tmp/dataset_cache_benchmark
+```
+"""
+
+import os
+import pickle
+import time
+from typing import Any, Mapping, MutableMapping, Tuple
+
+from absl import app
+from absl import flags
+import numpy as np
+import tensorflow as tf
+
+from tensorflow_gnn.experimental.in_memory import datasets
+
+_OUTPUT_DIR = flags.DEFINE_string(
+    'output_dir', '/tmp/dataset_cache_benchmark',
+    'Directory for the source dataset and the cache.')
+_NUM_NODES = flags.DEFINE_integer(
+    'num_nodes', 169_343, 'Number of nodes (default: as ogbn-arxiv).')
+_NUM_EDGES = flags.DEFINE_integer(
+    'num_edges', 1_166_243, 'Number of edges (default: as ogbn-arxiv).')
+_FEATURE_DIM = flags.DEFINE_integer(
+    'feature_dim', 128, 'Dimension of node features.')
+_NUM_CLASSES = 40
+
+
+class PickledOgbDataset:
+  """Mimics `ogb.nodeproppred.NodePropPredDataset` with a pickled graph."""
+
+  def __init__(self, path: str):
+    with open(path, 'rb') as f:
+      self._graph, self._labels, self._idx_split = pickle.load(f)
+    self.num_classes = _NUM_CLASSES
+
+  def __getitem__(self, index: int) -> Tuple[Mapping[str, Any], np.ndarray]:
+    assert index == 0
+    return self._graph, self._labels
+
+  def get_idx_split(self) -> MutableMapping[str, np.ndarray]:
+    return dict(self._idx_split)
+
+
+class PickledOgbnData(datasets.OgbnData):
+  """`OgbnData` converting a `PickledOgbDataset`."""
+
+  def __init__(self, path: str):  # pylint: disable=super-init-not-called
+    datasets.NodeClassificationGraphData.__init__(self)
+    self.ogb_dataset = PickledOgbDataset(path)
+    self._graph, self._node_labels, self._node_split, self._labeled_nodeset = (
+        datasets.OgbnData._to_heterogeneous(self.ogb_dataset))  # pylint: disable=protected-access
+    self._node_labels = self._node_labels[:, 0]
+    self._train_labels = np.copy(self._node_labels)
+    self._train_labels[self._node_split.test] = -1
+    self._train_labels = tf.convert_to_tensor(self._train_labels)
+    self._node_labels = tf.convert_to_tensor(self._node_labels)
+
+
+def write_source_dataset(path: str):
+  rng = np.random.default_rng(42)
+  num_nodes = _NUM_NODES.value
+  graph = {
+      'num_nodes': num_nodes,
+      'edge_index': rng.integers(0, num_nodes, [2, _NUM_EDGES.value]),
+      'node_feat': rng.standard_normal(
+          [num_nodes, _FEATURE_DIM.value], dtype=np.float32),
+      'node_year': rng.integers(1990, 2020, [num_nodes, 1]),
+  }
+  labels = rng.integers(0, _NUM_CLASSES, [num_nodes, 1])
+  permutation = rng.permutation(num_nodes)
+  num_train, num_valid = int(0.54 * num_nodes), int(0.18 * num_nodes)
+  idx_split = {'train': permutation[:num_train],
+               'valid': permutation[num_train:num_train + num_valid],
+               'test': permutation[num_train + num_valid:]}
+  with open(path, 'wb') as f:
+    pickle.dump((graph, labels, idx_split), f, protocol=4)
+
+
+def materialize(graph_data: datasets.NodeClassificationGraphData):
+  """Accesses all tensors of `graph_data`."""
+  tensors = [graph_data.node_features_dicts_without_labels(),
+             graph_data.edge_lists(), graph_data.node_split(),
+             graph_data.labels(), graph_data.test_labels()]
+  for tensor in tf.nest.flatten(tensors):
+    tensor.numpy()
+
+
+def timed(fn) -> float:
+  start = time.perf_counter()
+  fn()
+  return time.perf_counter() - start
+
+
+def main(argv):
+  del argv
+  os.makedirs(_OUTPUT_DIR.value, exist_ok=True)
+  source_path = os.path.join(_OUTPUT_DIR.value, 'source.pkl')
+  cache_path = os.path.join(_OUTPUT_DIR.value, 'cache')
+  write_source_dataset(source_path)
+  # Initializes TensorFlow outside of timed code.
+  tf.convert_to_tensor(np.zeros([1])).numpy()
+
+  graph_data = None
+  def load_cold():
+    nonlocal graph_data
+    graph_data = PickledOgbnData(source_path)
+    materialize(graph_data)
+  cold_seconds = timed(load_cold)
+  save_seconds = timed(
+      lambda: datasets.save_graph_data_cache(graph_data, cache_path))
+  warm_seconds = timed(lambda: materialize(
+      datasets.CachedNodeClassificationGraphData(cache_path)))
+
+  print(f'{_NUM_NODES.value} nodes, {_NUM_EDGES.value} edges, '
+        f'{_FEATURE_DIM.value} features')
+  print(f'cold (unpickle and convert): {cold_seconds:.3f}s')
+  print(f'save cache: {save_seconds:.3f}s')
+  print(f'warm (load cache): {warm_seconds:.3f}s')
+
+
+if __name__ == '__main__':
+  app.run(main)
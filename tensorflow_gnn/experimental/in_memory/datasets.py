@@ -49,6 +49,11 @@ Concrete implementations:
     * `PlanetoidGraphData`: wraps graph data that are popularized by GCN paper
       (cora, citeseer, pubmed).
 
+    * `CachedNodeClassificationGraphData`: reads arrays of any of the above,
+      saved by `save_graph_data_cache()`, without converting the source data
+      again. `get_in_memory_graph_data(name, cache_dir=...)` creates and uses
+      such caches.
+
 
 # Usage Example.
 
@@ -98,10 +103,12 @@ graph_tensor = graph_data.as_graph_tensor()
 """
 import copy
 import functools
+import json
 import os
 import pickle
+import shutil
 import sys
-from typing import Any, List, Mapping, MutableMapping, NamedTuple, Tuple, Union, Optional
+from typing import Any, Callable, List, Mapping, MutableMapping, NamedTuple, Tuple, Union, Optional
 import urllib.request
 
 import numpy as np
@@ -110,12 +117,24 @@ import tensorflow as tf
 import tensorflow_gnn as tfgnn
 from tensorflow_gnn.experimental.in_memory import reader_utils
 
+# Name of the edge feature holding edge weights, as in the Beam sampler.
+EDGE_WEIGHT_FEATURE_NAME = 'weight'
+# Name of the edge feature holding edge timestamps.
+EDGE_TIMESTAMP_FEATURE_NAME = 'timestamp'
+
+# Version of the files written by `save_graph_data_cache()`. It must be
+# incremented whenever their format, or the conversion of source datasets,
+# changes, so that `get_in_memory_graph_data()` does not read stale caches.
+GRAPH_DATA_CACHE_VERSION = 2
+_CACHE_METADATA_FILENAME = 'metadata.json'
+
 
 class InMemoryGraphData:
   """Abstract class for hold a graph data in-memory (nodes, edges, features).
 
   Subclasses must implement methods `node_features_dicts()`, `node_counts()`,
-  `edge_lists()`, `node_sets()`, and optionally, `context()`. They inherit
+  `edge_lists()`, `node_sets()`, and optionally, `context()`, `edge_weights()`,
+  `edge_timestamps()` and `node_timestamps()`. They inherit
   methods `graph_schema()`, `edge_sets()`, and `as_graph_tensor()` based on
   those.
   """
@@ -124,6 +143,9 @@ class InMemoryGraphData:
                add_self_loops: bool = False):
     self._make_undirected = make_undirected
     self._add_self_loops = add_self_loops
+    # Memoized edge sets and node counts, shared with the copies made by
+    # `with_*()` calls (see `_cached()`).
+    self._graph_data_cache = {}
 
   def with_undirected_edges(self, make_undirected: bool) -> 'InMemoryGraphData':
     """Returns same graph data but with undirected edges added (or removed).
@@ -205,9 +227,42 @@ class InMemoryGraphData:
     """
     raise NotImplementedError()
 
+  def edge_weights(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
+    """Returns dict from edge set name to float Tensor of shape (num_edges,).
+
+    Weights are aligned with the columns of the corresponding `edge_lists()`
+    tensor and are exposed as edge feature `EDGE_WEIGHT_FEATURE_NAME` of
+    `edge_sets()`. They are used by weighted and top-k sampling strategies. Edge
+    sets without weights (the default for all edge sets) have unit weights.
+    """
+    return {}
+
+  def edge_timestamps(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
+    """Returns dict from edge set name to numeric Tensor of shape (num_edges,).
+
+    Timestamps are aligned with the columns of the corresponding `edge_lists()`
+    tensor and are exposed as edge feature `EDGE_TIMESTAMP_FEATURE_NAME` of
+    `edge_sets()`. Self-loops get the smallest value of the dtype. Temporal
+    sampling only samples edges older than the timestamps of seed nodes (see
+    `node_timestamps()`). Edge sets without timestamps (the default for all
+    edge sets) are sampled regardless of time.
+    """
+    return {}
+
+  def node_timestamps(self) -> Mapping[tfgnn.NodeSetName, tf.Tensor]:
+    """Returns dict from node set name to numeric Tensor of shape (num_nodes,).
+
+    Timestamps of nodes (e.g., the event times of transactions) are used as the
+    timestamps of seed nodes by temporal sampling, so that subgraphs only hold
+    edges (of edge sets with `edge_timestamps()`) older than their seed nodes.
+    They have the dtype of edge timestamps. By default, no node set has
+    timestamps.
+    """
+    return {}
+
   def node_sets(self) -> MutableMapping[tfgnn.NodeSetName, tfgnn.NodeSet]:
     """Returns node sets of entire graph (dict: node set name -> NodeSet)."""
-    node_counts = self.node_counts()
+    node_counts = self._cached_node_counts()
     features_dicts = self.node_features_dicts()
     node_set_names = set(node_counts.keys()).union(features_dicts.keys())
     return (
@@ -236,44 +291,132 @@ class InMemoryGraphData:
           node_features.features[feat_name].shape.dim.add().size = dim
 
     # Populate edge specs.
+    weighted_edge_set_names = self.edge_weights().keys()
+    edge_timestamps = self.edge_timestamps()
     for edge_type in self.edge_lists().keys():
       src_node_set_name, edge_set_name, dst_node_set_name = edge_type
       # Populate edges with adjacency and it transpose.
+      edge_set_names = [edge_set_name]
       schema.edge_sets[edge_set_name].source = src_node_set_name
       schema.edge_sets[edge_set_name].target = dst_node_set_name
       if not self._make_undirected:
+        edge_set_names.append('rev_' + edge_set_name)
         schema.edge_sets['rev_' + edge_set_name].source = dst_node_set_name
         schema.edge_sets['rev_' + edge_set_name].target = src_node_set_name
+      if edge_set_name in weighted_edge_set_names:
+        for name in edge_set_names:
+          schema.edge_sets[name].features[EDGE_WEIGHT_FEATURE_NAME].dtype = (
+              tf.float32.as_datatype_enum)
+      if edge_set_name in edge_timestamps:
+        for name in edge_set_names:
+          schema.edge_sets[name].features[EDGE_TIMESTAMP_FEATURE_NAME].dtype = (
+              edge_timestamps[edge_set_name].dtype.as_datatype_enum)
 
     return schema
 
   def edge_sets(self) -> MutableMapping[tfgnn.EdgeSetName, tfgnn.EdgeSet]:
-    """Returns edge sets of entire graph (dict: edge set name -> EdgeSet)."""
+    """Returns edge sets of entire graph (dict: edge set name -> EdgeSet).
+
+    Edge sets are materialized on first call and memoized. Edge sets "rev_*"
+    share endpoint, weight and timestamp tensors with the edge sets they
+    reverse.
+    """
+    edge_sets = self._cached(
+        ('edge_sets', self._make_undirected, self._add_self_loops),
+        self._make_edge_sets)
+    return dict(edge_sets)
+
+  def _make_edge_sets(self) -> Mapping[tfgnn.EdgeSetName, tfgnn.EdgeSet]:
     edge_sets = {}
-    node_counts = self.node_counts() if self._add_self_loops else None
-    for edge_type, edge_list in self.edge_lists().items():
+    for edge_type in self.edge_lists().keys():
       (source_node_set_name, edge_set_name, target_node_set_name) = edge_type
-
-      if self._make_undirected and source_node_set_name == target_node_set_name:
-        edge_list = tf.concat([edge_list, edge_list[::-1]], axis=-1)
-      if self._add_self_loops and source_node_set_name == target_node_set_name:
-        all_nodes = tf.range(node_counts[source_node_set_name],
-                             dtype=edge_list.dtype)
-        self_connections = tf.stack([all_nodes, all_nodes], axis=0)
-        edge_list = tf.concat([edge_list, self_connections], axis=-1)
+      source, target, features = self._edge_set_fields(edge_type)
+      sizes = tf.shape(source)[:1]
       edge_sets[edge_set_name] = tfgnn.EdgeSet.from_fields(
-          sizes=tf.shape(edge_list)[1:2],
+          sizes=sizes,
+          features=features,
           adjacency=tfgnn.Adjacency.from_indices(
-              source=(source_node_set_name, edge_list[0]),
-              target=(target_node_set_name, edge_list[1])))
+              source=(source_node_set_name, source),
+              target=(target_node_set_name, target)))
       if not self._make_undirected:
         edge_sets['rev_' + edge_set_name] = tfgnn.EdgeSet.from_fields(
-            sizes=tf.shape(edge_list)[1:2],
+            sizes=sizes,
+            features=features,
             adjacency=tfgnn.Adjacency.from_indices(
-                source=(target_node_set_name, edge_list[1]),
-                target=(source_node_set_name, edge_list[0])))
+                source=(target_node_set_name, target),
+                target=(source_node_set_name, source)))
     return edge_sets
 
+  def _edge_set_fields(
+      self,
+      edge_type: Tuple[tfgnn.NodeSetName, tfgnn.EdgeSetName,
+                       tfgnn.NodeSetName]
+  ) -> Tuple[tf.Tensor, tf.Tensor, Mapping[tfgnn.FieldName, tf.Tensor]]:
+    """Returns memoized source and target indices and features of edge set."""
+    source_node_set_name, edge_set_name, target_node_set_name = edge_type
+    homogeneous = source_node_set_name == target_node_set_name
+    make_undirected = self._make_undirected and homogeneous
+    add_self_loops = self._add_self_loops and homogeneous
+
+    def make_fields():
+      edge_list = self.edge_lists()[edge_type]
+      edge_weights = self.edge_weights().get(edge_set_name, None)
+      edge_timestamps = self.edge_timestamps().get(edge_set_name, None)
+      sources = [edge_list[0]]
+      targets = [edge_list[1]]
+      weights = [] if edge_weights is None else [
+          tf.cast(edge_weights, tf.float32)]
+      timestamps = [] if edge_timestamps is None else [edge_timestamps]
+      if make_undirected:
+        sources.append(edge_list[1])
+        targets.append(edge_list[0])
+        weights = weights * 2
+        timestamps = timestamps * 2
+      if add_self_loops:
+        all_nodes = tf.range(
+            self._cached_node_counts()[source_node_set_name],
+            dtype=edge_list.dtype)
+        sources.append(all_nodes)
+        targets.append(all_nodes)
+        if weights:
+          weights.append(tf.ones(tf.shape(all_nodes), tf.float32))
+        if timestamps:
+          # Self-loops are older than any seed node.
+          timestamps.append(tf.fill(tf.shape(all_nodes),
+                                    tf.constant(edge_timestamps.dtype.min,
+                                                edge_timestamps.dtype)))
+      features = {}
+      if weights:
+        features[EDGE_WEIGHT_FEATURE_NAME] = _concat(weights)
+      if timestamps:
+        features[EDGE_TIMESTAMP_FEATURE_NAME] = _concat(timestamps)
+      return _concat(sources), _concat(targets), features
+
+    # Edge sets not affected by `with_*()` calls are shared between variants.
+    return self._cached(
+        ('edge_set_fields', edge_type, make_undirected, add_self_loops),
+        make_fields)
+
+  def _cached_node_counts(self) -> Mapping[tfgnn.NodeSetName, int]:
+    return self._cached(('node_counts',), self.node_counts)
+
+  def _cached(self, key: Tuple[Any, ...], compute_fn: Callable[[], Any]) -> Any:
+    """Returns `compute_fn()`, memoized by `key`.
+
+    The cache is shared with the copies made by `with_*()` calls, so `key` must
+    include all the state that the result depends on.
+
+    Args:
+      key: Cache key.
+      compute_fn: Computes the value if it is not cached.
+    """
+    cache = self.__dict__.get('_graph_data_cache', None)
+    if cache is None:  # Subclass did not call `InMemoryGraphData.__init__`.
+      cache = self._graph_data_cache = {}
+    if key not in cache:
+      cache[key] = compute_fn()
+    return cache[key]
+
 
 class NodeSplit(NamedTuple):
   """Contains 1D int tensors holding positions of {train, valid, test} nodes.
@@ -789,7 +932,162 @@ class PlanetoidGraphData(NodeClassificationGraphData):
     return self._node_labels
 
 
-def get_in_memory_graph_data(dataset_name) -> InMemoryGraphData:
+def save_graph_data_cache(graph_data: NodeClassificationGraphData, path: str):
+  """Writes arrays of `graph_data` for `CachedNodeClassificationGraphData`.
+
+  Node features (without labels), edge lists, edge weights and timestamps, node
+  timestamps, node splits and labels are written as `.npy` files into directory
+  `path`, along with file "metadata.json". Files are written into a temporary
+  directory, which then replaces `path`.
+
+  Args:
+    graph_data: Graph data to save.
+    path: Local directory of the cache.
+  """
+  tmp_path = '%s.tmp-%d' % (path, os.getpid())
+  if os.path.exists(tmp_path):
+    shutil.rmtree(tmp_path)
+  os.makedirs(tmp_path)
+  filenames = []
+
+  def save(value: Any) -> str:
+    filename = '%d.npy' % len(filenames)
+    np.save(os.path.join(tmp_path, filename), np.asarray(value))
+    filenames.append(filename)
+    return filename
+
+  node_split = graph_data.node_split()
+  metadata = {
+      'version': GRAPH_DATA_CACHE_VERSION,
+      'num_classes': int(graph_data.num_classes()),
+      'labeled_nodeset': graph_data.labeled_nodeset,
+      'node_counts': {name: int(count)
+                      for name, count in graph_data.node_counts().items()},
+      'node_features': {
+          node_set_name: {name: save(value) for name, value in features.items()}
+          for node_set_name, features
+          in graph_data.node_features_dicts_without_labels().items()},
+      'edge_lists': [
+          [source_name, edge_set_name, target_name, save(edges)]
+          for (source_name, edge_set_name, target_name), edges
+          in graph_data.edge_lists().items()],
+      'edge_weights': {name: save(weights)
+                       for name, weights in graph_data.edge_weights().items()},
+      'edge_timestamps': {
+          name: save(timestamps)
+          for name, timestamps in graph_data.edge_timestamps().items()},
+      'node_timestamps': {
+          name: save(timestamps)
+          for name, timestamps in graph_data.node_timestamps().items()},
+      'node_split': {split: save(getattr(node_split, split))
+                     for split in NodeSplit._fields},
+      'labels': save(graph_data.labels()),
+      'test_labels': save(graph_data.test_labels()),
+  }
+  with open(os.path.join(tmp_path, _CACHE_METADATA_FILENAME), 'w') as f:
+    json.dump(metadata, f)
+
+  if os.path.exists(path):
+    shutil.rmtree(path)
+  os.rename(tmp_path, path)
+
+
+class CachedNodeClassificationGraphData(NodeClassificationGraphData):
+  """Node classification graph data written by `save_graph_data_cache()`.
+
+  Arrays are memory-mapped, and converted to `tf.Tensor`s on first use, so
+  loading takes time independent of the size of the graph and no conversion of
+  the source dataset is repeated.
+  """
+
+  def __init__(self, path: str):
+    super().__init__()
+    with open(os.path.join(path, _CACHE_METADATA_FILENAME)) as f:
+      self._metadata = json.load(f)
+    if self._metadata.get('version') != GRAPH_DATA_CACHE_VERSION:
+      raise ValueError(
+          'Graph data cache %s has version %s, expected %d.' % (
+              path, self._metadata.get('version'), GRAPH_DATA_CACHE_VERSION))
+    self._path = path
+
+  def _load(self, filename: str) -> tf.Tensor:
+    return self._cached(('cached_array', filename), lambda: as_tensor(np.load(
+        os.path.join(self._path, filename), mmap_mode='r')))
+
+  def num_classes(self) -> int:
+    return self._metadata['num_classes']
+
+  @property
+  def labeled_nodeset(self) -> tfgnn.NodeSetName:
+    return self._metadata['labeled_nodeset']
+
+  def node_counts(self) -> Mapping[tfgnn.NodeSetName, int]:
+    return dict(self._metadata['node_counts'])
+
+  def node_features_dicts_without_labels(self) -> Mapping[
+      tfgnn.NodeSetName, MutableMapping[tfgnn.FieldName, tf.Tensor]]:
+    return {
+        node_set_name: {name: self._load(filename)
+                        for name, filename in features.items()}
+        for node_set_name, features in self._metadata['node_features'].items()}
+
+  def edge_lists(self) -> Mapping[
+      Tuple[tfgnn.NodeSetName, tfgnn.EdgeSetName, tfgnn.NodeSetName],
+      tf.Tensor]:
+    return {(source_name, edge_set_name, target_name): self._load(filename)
+            for source_name, edge_set_name, target_name, filename
+            in self._metadata['edge_lists']}
+
+  def edge_weights(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
+    return {name: self._load(filename)
+            for name, filename in self._metadata['edge_weights'].items()}
+
+  def edge_timestamps(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
+    return {name: self._load(filename)
+            for name, filename in self._metadata['edge_timestamps'].items()}
+
+  def node_timestamps(self) -> Mapping[tfgnn.NodeSetName, tf.Tensor]:
+    return {name: self._load(filename)
+            for name, filename in self._metadata['node_timestamps'].items()}
+
+  def node_split(self) -> NodeSplit:
+    return NodeSplit(**{split: self._load(filename) for split, filename
+                        in self._metadata['node_split'].items()})
+
+  def labels(self) -> tf.Tensor:
+    return self._load(self._metadata['labels'])
+
+  def test_labels(self) -> tf.Tensor:
+    return self._load(self._metadata['test_labels'])
+
+
+def _has_graph_data_cache(path: str) -> bool:
+  try:
+    with open(os.path.join(path, _CACHE_METADATA_FILENAME)) as f:
+      return json.load(f).get('version') == GRAPH_DATA_CACHE_VERSION
+  except (OSError, ValueError):
+    return False
+
+
+def get_in_memory_graph_data(
+    dataset_name, cache_dir: Optional[str] = None) -> InMemoryGraphData:
+  """Returns graph data of `dataset_name`.
+
+  Args:
+    dataset_name: Name of an OGB node classification dataset ("ogbn-*"), or of
+      a Planetoid dataset ("cora", "citeseer", "pubmed").
+    cache_dir: If set, the converted dataset is saved (on first use) into and
+      loaded from directory `<cache_dir>/<dataset_name>/v<version>`, as
+      `CachedNodeClassificationGraphData`.
+  """
+  if cache_dir is not None:
+    path = os.path.join(
+        cache_dir, dataset_name, 'v%d' % GRAPH_DATA_CACHE_VERSION)
+    if not _has_graph_data_cache(path):
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      save_graph_data_cache(get_in_memory_graph_data(dataset_name), path)
+    return CachedNodeClassificationGraphData(path)
+
   if dataset_name.startswith('ogbn-'):
     return OgbnData(dataset_name)
   elif dataset_name in ('cora', 'citeseer', 'pubmed'):
@@ -798,6 +1096,10 @@ def get_in_memory_graph_data(dataset_name) -> InMemoryGraphData:
     raise ValueError('Unknown Dataset name: ' + dataset_name)
 
 
+def _concat(tensors: List[tf.Tensor]) -> tf.Tensor:
+  return tensors[0] if len(tensors) == 1 else tf.concat(tensors, 0)
+
+
 # Shorthand. Can be replaced with: `as_tensor = tf.convert_to_tensor`.
 def as_tensor(obj: Any) -> tf.Tensor:
   """short-hand for tf.convert_to_tensor."""
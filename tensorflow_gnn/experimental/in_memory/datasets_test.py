@@ -0,0 +1,224 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for datasets."""
+
+import json
+import os
+from typing import Mapping, MutableMapping, Tuple
+from unittest import mock
+
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+
+from tensorflow_gnn.experimental.in_memory import datasets
+
+
+class ToyGraphData(datasets.InMemoryGraphData):
+  """Homogeneous "links" among 3 nodes and heterogeneous "owns" to 2 items."""
+
+  def __init__(self):
+    super().__init__()
+    # Shared with copies made by `with_*()` calls.
+    self.edge_lists_calls = []
+
+  def node_counts(self) -> Mapping[tfgnn.NodeSetName, int]:
+    return {'nodes': 3, 'items': 2}
+
+  def node_features_dicts(self) -> Mapping[
+      tfgnn.NodeSetName, MutableMapping[tfgnn.FieldName, tf.Tensor]]:
+    return {}
+
+  def edge_lists(self) -> Mapping[Tuple[str, str, str], tf.Tensor]:
+    self.edge_lists_calls.append(1)
+    return {
+        ('nodes', 'links', 'nodes'): tf.constant([[0, 1], [1, 2]]),
+        ('nodes', 'owns', 'items'): tf.constant([[0, 2], [1, 0]]),
+    }
+
+  def edge_weights(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
+    return {'links': tf.constant([0.5, 2.0])}
+
+  def edge_timestamps(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
+    return {'links': tf.constant([20, 10], tf.int64)}
+
+
+class ToyNodeClassificationData(datasets.NodeClassificationGraphData):
+  """ToyGraphData with labels on "nodes"."""
+
+  def __init__(self):
+    super().__init__()
+    self._graph_data = ToyGraphData()
+
+  def num_classes(self) -> int:
+    return 2
+
+  def node_features_dicts_without_labels(self) -> Mapping[
+      tfgnn.NodeSetName, MutableMapping[tfgnn.FieldName, tf.Tensor]]:
+    return {'nodes': {'feat': tf.constant([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]]),
+                      '#id': tf.range(3)}}
+
+  def node_counts(self) -> Mapping[tfgnn.NodeSetName, int]:
+    return self._graph_data.node_counts()
+
+  def edge_lists(self) -> Mapping[Tuple[str, str, str], tf.Tensor]:
+    return self._graph_data.edge_lists()
+
+  def edge_weights(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
+    return self._graph_data.edge_weights()
+
+  def edge_timestamps(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
+    return self._graph_data.edge_timestamps()
+
+  def node_timestamps(self) -> Mapping[tfgnn.NodeSetName, tf.Tensor]:
+    return {'nodes': tf.constant([15, 25, 5], tf.int64)}
+
+  def node_split(self) -> datasets.NodeSplit:
+    return datasets.NodeSplit(train=tf.constant([0]),
+                              validation=tf.constant([1]),
+                              test=tf.constant([2]))
+
+  @property
+  def labeled_nodeset(self) -> tfgnn.NodeSetName:
+    return 'nodes'
+
+  def labels(self) -> tf.Tensor:
+    return tf.constant([1, 0, -1])
+
+  def test_labels(self) -> tf.Tensor:
+    return tf.constant([1, 0, 1])
+
+
+class InMemoryGraphDataTest(tf.test.TestCase):
+
+  def assertEdges(self, edge_set, source, target):
+    self.assertAllEqual(edge_set.adjacency.source, source)
+    self.assertAllEqual(edge_set.adjacency.target, target)
+
+  def test_edge_sets(self):
+    edge_sets = ToyGraphData().edge_sets()
+    self.assertSameElements(['links', 'rev_links', 'owns', 'rev_owns'],
+                            edge_sets.keys())
+    self.assertEdges(edge_sets['links'], [0, 1], [1, 2])
+    self.assertEdges(edge_sets['rev_links'], [1, 2], [0, 1])
+    self.assertEdges(edge_sets['rev_owns'], [1, 0], [0, 2])
+    self.assertEqual(edge_sets['rev_owns'].adjacency.source_name, 'items')
+    self.assertAllEqual(edge_sets['rev_links']['weight'], [0.5, 2.0])
+    self.assertAllEqual(edge_sets['rev_links']['timestamp'], [20, 10])
+    self.assertNotIn('timestamp', edge_sets['owns'].features)
+    self.assertAllEqual(edge_sets['owns'].sizes, [2])
+
+  def test_undirected_edges_and_self_loops(self):
+    graph_data = ToyGraphData().with_undirected_edges(True).with_self_loops(
+        True)
+    edge_sets = graph_data.edge_sets()
+    self.assertSameElements(['links', 'owns'], edge_sets.keys())
+    self.assertEdges(edge_sets['links'], [0, 1, 1, 2, 0, 1, 2],
+                     [1, 2, 0, 1, 0, 1, 2])
+    self.assertAllEqual(edge_sets['links']['weight'],
+                        [0.5, 2.0, 0.5, 2.0, 1.0, 1.0, 1.0])
+    min_timestamp = tf.int64.min
+    self.assertAllEqual(edge_sets['links']['timestamp'],
+                        [20, 10, 20, 10] + [min_timestamp] * 3)
+    self.assertAllEqual(edge_sets['links'].sizes, [7])
+    # Heterogeneous edge sets are not affected.
+    self.assertEdges(edge_sets['owns'], [0, 2], [1, 0])
+
+  def test_edge_sets_are_memoized(self):
+    graph_data = ToyGraphData()
+    edge_sets = graph_data.edge_sets()
+    self.assertLen(graph_data.edge_lists_calls, 3)
+    self.assertIs(graph_data.edge_sets()['links'], edge_sets['links'])
+    graph_data.as_graph_tensor()
+    self.assertLen(graph_data.edge_lists_calls, 3)
+    # The result can be modified by callers.
+    del edge_sets['links']
+    self.assertIn('links', graph_data.edge_sets())
+
+  def test_variants_share_unaffected_edge_sets(self):
+    graph_data = ToyGraphData()
+    graph_data.edge_sets()
+    self.assertLen(graph_data.edge_lists_calls, 3)
+    self_loops_edge_sets = graph_data.with_self_loops(True).edge_sets()
+    # Only the homogeneous edge set is materialized again.
+    self.assertLen(graph_data.edge_lists_calls, 5)
+    self.assertEdges(self_loops_edge_sets['links'], [0, 1, 0, 1, 2],
+                     [1, 2, 0, 1, 2])
+    self.assertEdges(self_loops_edge_sets['owns'], [0, 2], [1, 0])
+    self.assertEdges(graph_data.edge_sets()['links'], [0, 1], [1, 2])
+
+
+class GraphDataCacheTest(tf.test.TestCase):
+
+  def assertSameGraphData(self, actual, expected):
+    self.assertEqual(actual.num_classes(), expected.num_classes())
+    self.assertEqual(actual.labeled_nodeset, expected.labeled_nodeset)
+    self.assertEqual(actual.node_counts(), expected.node_counts())
+    self.assertEqual(actual.graph_schema(), expected.graph_schema())
+    for split in ('train', 'validation', 'test'):
+      graph = actual.with_split(split).with_labels_as_features(
+          True).as_graph_tensor()
+      expected_graph = expected.with_split(split).with_labels_as_features(
+          True).as_graph_tensor()
+      tf.nest.assert_same_structure(graph, expected_graph,
+                                    expand_composites=True)
+      for value, expected_value in zip(
+          tf.nest.flatten(graph, expand_composites=True),
+          tf.nest.flatten(expected_graph, expand_composites=True)):
+        self.assertAllEqual(value, expected_value)
+
+  def test_save_and_load(self):
+    path = os.path.join(self.get_temp_dir(), 'toy')
+    datasets.save_graph_data_cache(ToyNodeClassificationData(), path)
+    # Overwrites the previous cache.
+    datasets.save_graph_data_cache(ToyNodeClassificationData(), path)
+    graph_data = datasets.CachedNodeClassificationGraphData(path)
+    self.assertSameGraphData(graph_data, ToyNodeClassificationData())
+    self.assertAllEqual(graph_data.edge_weights()['links'], [0.5, 2.0])
+    self.assertAllEqual(graph_data.edge_timestamps()['links'], [20, 10])
+    self.assertAllEqual(graph_data.node_timestamps()['nodes'], [15, 25, 5])
+    self.assertAllEqual(graph_data.node_split().test, [2])
+
+  def test_version_mismatch(self):
+    path = os.path.join(self.get_temp_dir(), 'old')
+    datasets.save_graph_data_cache(ToyNodeClassificationData(), path)
+    metadata_path = os.path.join(path, 'metadata.json')
+    with open(metadata_path) as f:
+      metadata = json.load(f)
+    metadata['version'] = 0
+    with open(metadata_path, 'w') as f:
+      json.dump(metadata, f)
+    with self.assertRaisesRegex(ValueError, 'has version 0'):
+      datasets.CachedNodeClassificationGraphData(path)
+
+  def test_get_in_memory_graph_data_with_cache_dir(self):
+    cache_dir = os.path.join(self.get_temp_dir(), 'cache')
+    with mock.patch.object(
+        datasets, 'OgbnData',
+        side_effect=lambda name: ToyNodeClassificationData()) as ogbn_data:
+      for _ in range(2):
+        graph_data = datasets.get_in_memory_graph_data(
+            'ogbn-toy', cache_dir=cache_dir)
+        self.assertIsInstance(graph_data,
+                              datasets.CachedNodeClassificationGraphData)
+        self.assertSameGraphData(graph_data, ToyNodeClassificationData())
+      # The source dataset is converted only once.
+      ogbn_data.assert_called_once_with('ogbn-toy')
+    self.assertTrue(os.path.exists(os.path.join(
+        cache_dir, 'ogbn-toy', 'v%d' % datasets.GRAPH_DATA_CACHE_VERSION,
+        'metadata.json')))
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -0,0 +1,345 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Node feature stores for features that do not fit in memory.
+
+`GraphSampler` gathers node features from the in-memory tensors of
+`InMemoryGraphData.node_features_dicts()`. Large features (e.g., text
+embeddings of all nodes) can instead be kept on disk, in a `NodeFeatureStore`
+passed to the sampler as `GraphSampler(..., node_feature_store=store)`. Its
+features are added to the in-memory features of sampled subgraphs.
+
+`MemmapNodeFeatureStore` reads features from memory-mapped `.npy` shards (e.g.,
+written by `save_node_features()`) and keeps recently used rows in an LRU cache.
+Rows can be prefetched in background threads, which `as_dataset()` of
+`NodeClassificationGraphSampler` uses to read features of one batch while the
+next batch is sampled.
+
+```
+paths = feature_store.save_node_features(
+    {'paper': {'embedding': embeddings}}, '/tmp/features',
+    rows_per_shard=1_000_000)
+store = feature_store.MemmapNodeFeatureStore(paths, cache_size=100_000)
+sampler = int_arithmetic_sampler.NodeClassificationGraphSampler(
+    graph_data, node_feature_store=store)
+```
+"""
+
+import collections
+from concurrent import futures
+import os
+import threading
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+
+# Node set name -> feature name -> paths of `.npy` shards, in order of rows.
+ShardPaths = Mapping[tfgnn.NodeSetName, Mapping[tfgnn.FieldName, Sequence[str]]]
+
+
+class NodeFeatureStore:
+  """Abstract class for node features gathered by node IDs.
+
+  Subclasses must implement `feature_specs()` and `gather()`, and optionally,
+  `prefetch()`. They inherit the TensorFlow methods
+  `gather_node_features_dict()` and `prefetch_node_features()`, which wrap them
+  in `tf.numpy_function`.
+  """
+
+  def feature_specs(self) -> Mapping[
+      tfgnn.NodeSetName, Mapping[tfgnn.FieldName, tf.TensorSpec]]:
+    """Returns 2-level dict: NodeSetName->FeatureName->spec of one node."""
+    raise NotImplementedError()
+
+  def gather(self, node_set_name: tfgnn.NodeSetName,
+             node_ids: np.ndarray) -> Mapping[tfgnn.FieldName, np.ndarray]:
+    """Returns features of nodes `node_ids` (int vector) of node set."""
+    raise NotImplementedError()
+
+  def prefetch(self, node_set_name: tfgnn.NodeSetName, node_ids: np.ndarray):
+    """Starts loading features of nodes that will be gathered soon."""
+    del node_set_name, node_ids
+
+  def gather_node_features_dict(
+      self, node_set_name: tfgnn.NodeSetName,
+      node_idx: tf.Tensor) -> Dict[tfgnn.FieldName, tf.Tensor]:
+    """Returns features with leading dimensions equal to shape of `node_idx`.
+
+    Can be used as `node_features_fn` of `TypedWalkTree.as_graph_tensor()`.
+
+    Args:
+      node_set_name: Name of node set.
+      node_idx: int tensor with node IDs.
+    """
+    specs = self.feature_specs().get(node_set_name, {})
+    if not specs:
+      return {}
+    names = list(specs.keys())
+
+    def gather_fn(node_ids: np.ndarray) -> List[np.ndarray]:
+      features = self.gather(node_set_name, node_ids)
+      return [features[name] for name in names]
+
+    values = tf.numpy_function(
+        gather_fn, [tf.reshape(node_idx, [-1])],
+        [specs[name].dtype for name in names], stateful=True)
+    if not isinstance(values, list):  # Single feature.
+      values = [values]
+    features = {}
+    for name, value in zip(names, values):
+      spec_shape = specs[name].shape
+      value = tf.reshape(value, tf.concat(
+          [tf.shape(node_idx), tf.constant(spec_shape.as_list(), tf.int32)],
+          0))
+      value.set_shape(node_idx.shape.concatenate(spec_shape))
+      features[name] = value
+    return features
+
+  def prefetch_node_features(self, node_set_name: tfgnn.NodeSetName,
+                             node_idx: tf.Tensor) -> tf.Tensor:
+    """Calls `prefetch()` from TensorFlow. Returns a dummy int32 scalar."""
+    def prefetch_fn(node_ids: np.ndarray) -> np.ndarray:
+      self.prefetch(node_set_name, node_ids)
+      return np.zeros([], np.int32)
+
+    return tf.numpy_function(
+        prefetch_fn, [tf.reshape(node_idx, [-1])], tf.int32, stateful=True)
+
+
+class _LruRows:
+  """LRU cache of feature rows of one node set, keyed by node ID."""
+
+  def __init__(self, capacity: int, specs: Mapping[str, tf.TensorSpec]):
+    self.capacity = capacity
+    self.slots = collections.OrderedDict()  # Node ID -> slot in `values`.
+    self.values = {
+        name: np.empty([capacity] + spec.shape.as_list(),
+                       spec.dtype.as_numpy_dtype)
+        for name, spec in specs.items()}
+
+  def lookup(self, node_ids: np.ndarray) -> np.ndarray:
+    """Returns slots of `node_ids` (-1 if missing), marking them as used."""
+    slots = np.full(node_ids.shape, -1, np.int64)
+    for i, node_id in enumerate(node_ids.tolist()):
+      slot = self.slots.get(node_id)
+      if slot is not None:
+        self.slots.move_to_end(node_id)
+        slots[i] = slot
+    return slots
+
+  def insert(self, node_ids: np.ndarray, rows: Mapping[str, np.ndarray]):
+    """Caches `rows` of `node_ids`, evicting least recently used rows."""
+    if self.capacity == 0:
+      return
+    node_ids = node_ids[-self.capacity:]
+    rows = {name: value[-self.capacity:] for name, value in rows.items()}
+    slots = np.empty(node_ids.shape, np.int64)
+    for i, node_id in enumerate(node_ids.tolist()):
+      slot = self.slots.pop(node_id, None)
+      if slot is None:
+        if len(self.slots) < self.capacity:
+          slot = len(self.slots)
+        else:
+          _, slot = self.slots.popitem(last=False)
+      self.slots[node_id] = slot
+      slots[i] = slot
+    for name, value in rows.items():
+      self.values[name][slots] = value
+
+
+class MemmapNodeFeatureStore(NodeFeatureStore):
+  """Node features read from memory-mapped `.npy` shards.
+
+  All features of a node set must be split into shards with the same numbers of
+  rows. Shard `i` of a feature holds rows of nodes with IDs from the total
+  number of rows in shards `0..i-1`. Up to `cache_size` most recently gathered
+  rows of every node set are kept in memory.
+  """
+
+  def __init__(self, shard_paths: ShardPaths, cache_size: int = 0,
+               num_prefetch_threads: int = 1):
+    """Opens shards.
+
+    Args:
+      shard_paths: Node set name -> feature name -> paths of `.npy` shards.
+      cache_size: Maximum number of cached rows per node set.
+      num_prefetch_threads: Number of threads loading prefetched rows.
+    """
+    self._shards = {}
+    self._shard_offsets = {}
+    self._specs = {}
+    for node_set_name, features in shard_paths.items():
+      self._shards[node_set_name] = {
+          name: [np.load(path, mmap_mode='r') for path in paths]
+          for name, paths in features.items()}
+      shard_sizes = None
+      specs = {}
+      for name, shards in self._shards[node_set_name].items():
+        sizes = [shard.shape[0] for shard in shards]
+        if shard_sizes is not None and sizes != shard_sizes:
+          raise ValueError(
+              f'Features of node set "{node_set_name}" have different shard '
+              f'sizes: {shard_sizes} and {sizes} (feature "{name}").')
+        shard_sizes = sizes
+        specs[name] = tf.TensorSpec(shards[0].shape[1:], shards[0].dtype)
+      self._shard_offsets[node_set_name] = np.cumsum([0] + shard_sizes)
+      self._specs[node_set_name] = specs
+
+    self._lock = threading.Lock()
+    self._caches = {node_set_name: _LruRows(cache_size, specs)
+                    for node_set_name, specs in self._specs.items()}
+    # Node set name -> node ID -> future of prefetch loading the node.
+    self._pending = collections.defaultdict(dict)
+    self._executor = futures.ThreadPoolExecutor(num_prefetch_threads)
+
+  @classmethod
+  def from_directory(cls, directory: str,
+                     **kwargs) -> 'MemmapNodeFeatureStore':
+    """Opens shards written by `save_node_features(..., directory)`."""
+    return cls(_list_shard_paths(directory), **kwargs)
+
+  def feature_specs(self) -> Mapping[
+      tfgnn.NodeSetName, Mapping[tfgnn.FieldName, tf.TensorSpec]]:
+    return self._specs
+
+  def num_nodes(self, node_set_name: tfgnn.NodeSetName) -> int:
+    return int(self._shard_offsets[node_set_name][-1])
+
+  def _read(self, node_set_name: tfgnn.NodeSetName,
+            node_ids: np.ndarray) -> Dict[str, np.ndarray]:
+    """Reads rows of sorted `node_ids` from shards."""
+    offsets = self._shard_offsets[node_set_name]
+    if node_ids.size and (node_ids[0] < 0 or node_ids[-1] >= offsets[-1]):
+      raise ValueError(
+          f'Node IDs of node set "{node_set_name}" must be in '
+          f'[0, {offsets[-1]}).')
+    shard_ids = np.searchsorted(offsets, node_ids, side='right') - 1
+    rows = {}
+    for name, shards in self._shards[node_set_name].items():
+      value = np.empty([node_ids.size] + list(shards[0].shape[1:]),
+                       shards[0].dtype)
+      for shard_id in np.unique(shard_ids):
+        mask = shard_ids == shard_id
+        value[mask] = shards[shard_id][node_ids[mask] - offsets[shard_id]]
+      rows[name] = value
+    return rows
+
+  def _load(self, node_set_name: tfgnn.NodeSetName, node_ids: np.ndarray):
+    """Reads rows of sorted `node_ids` into the cache."""
+    try:
+      rows = self._read(node_set_name, node_ids)
+      with self._lock:
+        self._caches[node_set_name].insert(node_ids, rows)
+    finally:
+      with self._lock:
+        pending = self._pending[node_set_name]
+        for node_id in node_ids.tolist():
+          pending.pop(node_id, None)
+
+  def prefetch(self, node_set_name: tfgnn.NodeSetName, node_ids: np.ndarray):
+    node_ids = np.unique(np.asarray(node_ids, np.int64))
+    with self._lock:
+      cache = self._caches[node_set_name]
+      pending = self._pending[node_set_name]
+      missing = [node_id for node_id in node_ids.tolist()
+                 if node_id not in cache.slots and node_id not in pending]
+      if not missing:
+        return
+      missing = np.array(missing, np.int64)
+      future = self._executor.submit(self._load, node_set_name, missing)
+      for node_id in missing.tolist():
+        pending[node_id] = future
+
+  def gather(self, node_set_name: tfgnn.NodeSetName,
+             node_ids: np.ndarray) -> Mapping[tfgnn.FieldName, np.ndarray]:
+    unique_ids, inverse = np.unique(
+        np.asarray(node_ids, np.int64).reshape([-1]), return_inverse=True)
+    with self._lock:
+      pending = self._pending[node_set_name]
+      waiting = {pending[node_id] for node_id in unique_ids.tolist()
+                 if node_id in pending}
+    futures.wait(waiting)
+
+    cache = self._caches[node_set_name]
+    rows = {}
+    with self._lock:
+      slots = cache.lookup(unique_ids)
+      hits = slots >= 0
+      for name, spec in self._specs[node_set_name].items():
+        value = np.empty([unique_ids.size] + spec.shape.as_list(),
+                         spec.dtype.as_numpy_dtype)
+        value[hits] = cache.values[name][slots[hits]]
+        rows[name] = value
+    misses = ~hits
+    if np.any(misses):
+      missing_rows = self._read(node_set_name, unique_ids[misses])
+      with self._lock:
+        cache.insert(unique_ids[misses], missing_rows)
+      for name, value in missing_rows.items():
+        rows[name][misses] = value
+    return {name: value[inverse] for name, value in rows.items()}
+
+
+def save_node_features(
+    node_features_dicts: Mapping[
+        tfgnn.NodeSetName, Mapping[tfgnn.FieldName, tf.Tensor]],
+    directory: str,
+    rows_per_shard: Optional[int] = None) -> Dict[
+        tfgnn.NodeSetName, Dict[tfgnn.FieldName, List[str]]]:
+  """Writes node features as `.npy` shards for `MemmapNodeFeatureStore`.
+
+  Shards are written to `<directory>/<node set name>/<feature name>/`.
+
+  Args:
+    node_features_dicts: Node set name -> feature name -> feature values, with
+      leading dimension equal to the number of nodes (e.g., as returned by
+      `InMemoryGraphData.node_features_dicts()`).
+    directory: Output directory.
+    rows_per_shard: Maximum number of rows per shard. If not set, each feature
+      is written to a single shard.
+
+  Returns:
+    Node set name -> feature name -> paths of shards.
+  """
+  shard_paths = collections.defaultdict(dict)
+  for node_set_name, features in node_features_dicts.items():
+    for name, value in features.items():
+      value = np.asarray(value)
+      feature_dir = os.path.join(directory, node_set_name, name)
+      os.makedirs(feature_dir, exist_ok=True)
+      step = rows_per_shard or max(value.shape[0], 1)
+      starts = range(0, max(value.shape[0], 1), step)
+      paths = []
+      for shard_id, start in enumerate(starts):
+        path = os.path.join(
+            feature_dir, f'shard-{shard_id:05d}-of-{len(starts):05d}.npy')
+        np.save(path, value[start:start + step])
+        paths.append(path)
+      shard_paths[node_set_name][name] = paths
+  return dict(shard_paths)
+
+
+def _list_shard_paths(directory: str) -> ShardPaths:
+  shard_paths = collections.defaultdict(dict)
+  for node_set_name in sorted(os.listdir(directory)):
+    node_set_dir = os.path.join(directory, node_set_name)
+    for name in sorted(os.listdir(node_set_dir)):
+      feature_dir = os.path.join(node_set_dir, name)
+      shard_paths[node_set_name][name] = [
+          os.path.join(feature_dir, filename)
+          for filename in sorted(os.listdir(feature_dir))
+          if filename.endswith('.npy')]
+  return dict(shard_paths)
@@ -0,0 +1,207 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for feature_store."""
+
+from typing import Mapping, MutableMapping, Tuple
+
+from absl.testing import parameterized
+import numpy as np
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+
+from tensorflow_gnn.experimental.in_memory import datasets
+from tensorflow_gnn.experimental.in_memory import feature_store
+from tensorflow_gnn.experimental.in_memory import int_arithmetic_sampler as ia_sampler
+from tensorflow_gnn.sampler import sampling_spec_builder
+
+_NUM_NODES = 10
+
+
+def _embeddings() -> np.ndarray:
+  return np.arange(3 * _NUM_NODES, dtype=np.float32).reshape([_NUM_NODES, 3])
+
+
+class ToyRingData(datasets.NodeClassificationGraphData):
+  """Directed ring of 10 nodes, each linked to the next two nodes."""
+
+  def num_classes(self) -> int:
+    return 3
+
+  def node_features_dicts_without_labels(self) -> Mapping[
+      tfgnn.NodeSetName, MutableMapping[str, tf.Tensor]]:
+    return {'nodes': {'id': tf.range(_NUM_NODES)}}
+
+  def node_counts(self) -> Mapping[tfgnn.NodeSetName, int]:
+    return {'nodes': _NUM_NODES}
+
+  def edge_lists(self) -> Mapping[Tuple[str, str, str], tf.Tensor]:
+    source = np.repeat(np.arange(_NUM_NODES), 2)
+    target = (source + np.tile([1, 2], _NUM_NODES)) % _NUM_NODES
+    return {
+        ('nodes', 'edges', 'nodes'): tf.constant(np.stack([source, target]))}
+
+  def node_split(self) -> datasets.NodeSplit:
+    return datasets.NodeSplit(
+        train=tf.range(8, dtype=tf.int64),
+        validation=tf.constant([8], tf.int64),
+        test=tf.constant([9], tf.int64))
+
+  @property
+  def labeled_nodeset(self) -> tfgnn.NodeSetName:
+    return 'nodes'
+
+  def labels(self) -> tf.Tensor:
+    return tf.range(_NUM_NODES) % 3
+
+  def test_labels(self) -> tf.Tensor:
+    return self.labels()
+
+
+class MemmapNodeFeatureStoreTest(tf.test.TestCase, parameterized.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.directory = self.get_temp_dir()
+    self.shard_paths = feature_store.save_node_features(
+        {'nodes': {'embedding': _embeddings(),
+                   'name': np.array([f'n{i}' for i in range(_NUM_NODES)])}},
+        self.directory, rows_per_shard=4)
+
+  def make_store(self, **kwargs) -> feature_store.MemmapNodeFeatureStore:
+    store = feature_store.MemmapNodeFeatureStore(self.shard_paths, **kwargs)
+    # Counts rows read from shards.
+    self.rows_read = []
+    read = store._read
+    def counting_read(node_set_name, node_ids):
+      self.rows_read.extend(node_ids.tolist())
+      return read(node_set_name, node_ids)
+    store._read = counting_read
+    return store
+
+  def test_save_node_features(self):
+    self.assertLen(self.shard_paths['nodes']['embedding'], 3)
+    self.assertEqual(np.load(self.shard_paths['nodes']['embedding'][2]).shape,
+                     (2, 3))
+    store = feature_store.MemmapNodeFeatureStore.from_directory(self.directory)
+    self.assertEqual(store.num_nodes('nodes'), _NUM_NODES)
+    self.assertEqual(
+        store.feature_specs(),
+        {'nodes': {'embedding': tf.TensorSpec([3], tf.float32),
+                   'name': tf.TensorSpec([], tf.string)}})
+
+  @parameterized.named_parameters(('NoCache', 0), ('Cache', 4))
+  def test_gather(self, cache_size):
+    store = self.make_store(cache_size=cache_size)
+    for _ in range(2):
+      features = store.gather('nodes', np.array([9, 0, 4, 9, 5]))
+      self.assertAllEqual(features['embedding'], _embeddings()[[9, 0, 4, 9, 5]])
+      self.assertAllEqual(features['name'], [b'n9', b'n0', b'n4', b'n9', b'n5'])
+
+  def test_lru_cache(self):
+    store = self.make_store(cache_size=3)
+    store.gather('nodes', np.array([1, 2, 3]))
+    store.gather('nodes', np.array([1]))  # Node 2 is now least recently used.
+    store.gather('nodes', np.array([4]))
+    self.assertEqual(self.rows_read, [1, 2, 3, 4])
+    features = store.gather('nodes', np.array([1, 3, 4, 2]))
+    self.assertEqual(self.rows_read, [1, 2, 3, 4, 2])
+    self.assertAllEqual(features['embedding'], _embeddings()[[1, 3, 4, 2]])
+
+  def test_prefetch(self):
+    store = self.make_store(cache_size=5)
+    store.prefetch('nodes', np.array([7, 3, 7]))
+    store.prefetch('nodes', np.array([3, 8]))
+    features = store.gather('nodes', np.array([8, 3, 7]))
+    self.assertAllEqual(features['embedding'], _embeddings()[[8, 3, 7]])
+    self.assertEqual(self.rows_read, [3, 7, 8])
+
+  def test_gather_node_features_dict(self):
+    store = self.make_store()
+    features = tf.function(store.gather_node_features_dict)(
+        'nodes', tf.constant([[2, 5], [0, 2]]))
+    self.assertEqual(features['embedding'].shape, [2, 2, 3])
+    self.assertAllEqual(features['embedding'],
+                        _embeddings()[np.array([[2, 5], [0, 2]])])
+    self.assertAllEqual(features['name'], [[b'n2', b'n5'], [b'n0', b'n2']])
+    self.assertEmpty(store.gather_node_features_dict('other', tf.constant([0])))
+
+  def test_invalid_node_ids(self):
+    store = self.make_store()
+    with self.assertRaisesRegex(ValueError, r'must be in \[0, 10\)'):
+      store.gather('nodes', np.array([3, 10]))
+
+  def test_mismatched_shards(self):
+    paths = feature_store.save_node_features(
+        {'nodes': {'other': np.zeros([_NUM_NODES])}}, self.directory,
+        rows_per_shard=5)
+    with self.assertRaisesRegex(ValueError, 'different shard sizes'):
+      feature_store.MemmapNodeFeatureStore(
+          {'nodes': dict(self.shard_paths['nodes'], **paths['nodes'])})
+
+
+class GraphSamplerWithFeatureStoreTest(tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    shard_paths = feature_store.save_node_features(
+        {'nodes': {'embedding': _embeddings()}},
+        self.get_temp_dir(), rows_per_shard=3)
+    self.store = feature_store.MemmapNodeFeatureStore(
+        shard_paths, cache_size=4)
+    self.graph_data = ToyRingData()
+    self.sampler = ia_sampler.NodeClassificationGraphSampler(
+        self.graph_data, node_feature_store=self.store)
+    self.spec = sampling_spec_builder.SamplingSpecBuilder(
+        self.graph_data.graph_schema(),
+        default_strategy=sampling_spec_builder.SamplingStrategy.RANDOM_UNIFORM,
+    ).seed('nodes').sample(2, 'edges').sample(2, 'edges').build()
+
+  def assertFeatures(self, features: Mapping[str, tf.Tensor]):
+    node_ids = features['id']
+    self.assertAllEqual(features['embedding'],
+                        tf.gather(_embeddings(), node_ids))
+    if 'label' in features:
+      self.assertAllEqual(features['label'], node_ids % 3)
+
+  def test_sample_sub_graph(self):
+    graph = self.sampler.sample_sub_graph(tf.constant([3]), self.spec)
+    self.assertFeatures(graph.node_sets['nodes'].features)
+
+  def test_as_dataset(self):
+    dataset = self.sampler.as_dataset(
+        self.spec, pop_labels_from_graph=False, num_seed_nodes=2,
+        repeat=False, shuffle=False, global_id_feature_name='#global_id')
+    num_graphs = 0
+    for graph in dataset:
+      num_graphs += 1
+      node_set = graph.node_sets['nodes']
+      self.assertSameElements(['id', 'label', 'embedding', '#global_id'],
+                              node_set.features.keys())
+      self.assertFeatures(node_set.features)
+      self.assertAllEqual(node_set['#global_id'], node_set['id'])
+    self.assertEqual(num_graphs, 4)  # 8 training nodes.
+
+  def test_as_batched_dataset(self):
+    dataset = self.sampler.as_batched_dataset(
+        self.spec, batch_size=4, repeat=False)
+    for graph, _, _ in dataset:
+      # The last graph component holds padding nodes, without features.
+      num_nodes = tf.reduce_sum(graph.node_sets['nodes'].sizes[:-1])
+      self.assertFeatures({name: value[:num_nodes] for name, value
+                           in graph.node_sets['nodes'].features.items()})
+
+
+if __name__ == '__main__':
+  tf.test.main()
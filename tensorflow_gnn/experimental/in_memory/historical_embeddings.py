@@ -0,0 +1,190 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Historical embeddings of nodes for training on sampled subgraphs.
+
+Training an `L`-layer GNN on subgraphs sampled `L` hops around each seed node
+recomputes the deep-layer states of popular neighbors in every batch. Following
+GNNAutoScale (Fey et al, ICML'21), `HistoricalEmbeddings` keeps the node states
+output by one layer of the model in a table, keyed by node ID in the in-memory
+graph, and replaces the freshly computed states of outer-hop nodes (whose
+neighborhoods were sampled partially, or not at all) by their states from
+earlier training steps. This allows sampling fewer hops than the model has
+layers.
+
+
+# Usage Example
+
+```
+sampler = int_arithmetic_sampler.NodeClassificationGraphSampler(graph_data)
+dataset = sampler.as_dataset(
+    sampling_spec,  # E.g., with one hop only.
+    global_id_feature_name='#global_id', hop_feature_name='#hop')
+
+model_layers = []
+for _ in range(num_layers):
+  model_layers.append(make_graph_update())
+  model_layers.append(historical_embeddings.HistoricalEmbeddings(
+      graph_data.node_counts(), max_fresh_hop=0, max_staleness=100))
+```
+
+Seed nodes (at hop 0) compute all their states from the subgraph, and store
+them in the tables. Nodes at larger hops use states stored within the last
+`max_staleness` training steps, if any, to feed the next layer.
+"""
+
+from typing import Mapping, Optional, Sequence
+
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+
+
+@tf.keras.utils.register_keras_serializable(package='GNN>in_memory')
+class HistoricalEmbeddings(tf.keras.layers.Layer):
+  """Caches node states across training steps, by global node ID.
+
+  The layer is inserted between the layers of a model, and called on the
+  `GraphTensor` they output. For each node set, it expects features with
+  node IDs in the in-memory graph and with the number of hops from the seed,
+  as output by `TypedWalkTree.as_graph_tensor()` or
+  `NodeClassificationGraphSampler.as_dataset()` when called with
+  `global_id_feature_name` and `hop_feature_name`.
+
+  On each call, the state of every node within `max_fresh_hop` hops of the seed
+  is written to the table, together with the current step. The state of every
+  other node is replaced by its state from the table, if it was written no
+  longer than `max_staleness` steps ago. Replaced states are constants, i.e.,
+  gradients do not flow into earlier batches.
+
+  Init args:
+    node_counts: Number of nodes of each node set in the in-memory graph, e.g.,
+      `graph_data.node_counts()`.
+    max_fresh_hop: Nodes at up to this many hops from the seed have their
+      states computed from the subgraph and stored.
+    max_staleness: If set, states stored more than this many steps ago are not
+      used. One step is one call of this layer while training.
+    node_set_names: Node sets to cache. Defaults to all in `node_counts`.
+    feature_name: The node feature with the states.
+    global_id_feature_name: The node feature with node IDs in the in-memory
+      graph.
+    hop_feature_name: The node feature with the number of hops from the seed.
+
+  Call returns:
+    The input `GraphTensor` with feature `feature_name` replaced, as described.
+  """
+
+  def __init__(self,
+               node_counts: Mapping[tfgnn.NodeSetName, int],
+               *,
+               max_fresh_hop: int = 0,
+               max_staleness: Optional[int] = None,
+               node_set_names: Optional[Sequence[tfgnn.NodeSetName]] = None,
+               feature_name: tfgnn.FieldName = tfgnn.HIDDEN_STATE,
+               global_id_feature_name: tfgnn.FieldName = '#global_id',
+               hop_feature_name: tfgnn.FieldName = '#hop',
+               **kwargs):
+    super().__init__(**kwargs)
+    if max_fresh_hop < 0:
+      raise ValueError(
+          f'max_fresh_hop must be non-negative, got {max_fresh_hop}.')
+    if max_staleness is not None and max_staleness < 0:
+      raise ValueError(
+          f'max_staleness must be non-negative, got {max_staleness}.')
+    self._node_counts = dict(node_counts)
+    self._max_fresh_hop = max_fresh_hop
+    self._max_staleness = max_staleness
+    self._node_set_names = (sorted(self._node_counts) if node_set_names is None
+                            else list(node_set_names))
+    self._feature_name = feature_name
+    self._global_id_feature_name = global_id_feature_name
+    self._hop_feature_name = hop_feature_name
+    self._step = None
+    self._tables = {}        # Node set name -> stored states.
+    self._last_updates = {}  # Node set name -> step of last write, or -1.
+
+  def get_config(self):
+    return dict(
+        node_counts=self._node_counts,
+        max_fresh_hop=self._max_fresh_hop,
+        max_staleness=self._max_staleness,
+        node_set_names=self._node_set_names,
+        feature_name=self._feature_name,
+        global_id_feature_name=self._global_id_feature_name,
+        hop_feature_name=self._hop_feature_name,
+        **super().get_config())
+
+  def _maybe_create_tables(self, graph: tfgnn.GraphTensor):
+    """Creates the tables, once the shapes of node states are known."""
+    # NOTE: When loading a SavedModel, `self._step` may get restored before
+    # the call that creates the tables.
+    if self._step is None:
+      self._step = self.add_weight(
+          name='step', shape=[], dtype=tf.int64, trainable=False,
+          initializer=tf.keras.initializers.Zeros())
+    for node_set_name in self._node_set_names:
+      if node_set_name in self._tables:
+        continue
+      state = graph.node_sets[node_set_name][self._feature_name]
+      if not state.shape[1:].is_fully_defined():
+        raise ValueError(
+            f'HistoricalEmbeddings requires states of fully defined shape, '
+            f'got {state.shape} for node set "{node_set_name}".')
+      num_nodes = self._node_counts[node_set_name]
+      self._tables[node_set_name] = self.add_weight(
+          name=f'states_{node_set_name}',
+          shape=[num_nodes] + state.shape[1:].as_list(),
+          dtype=state.dtype, trainable=False,
+          initializer=tf.keras.initializers.Zeros())
+      self._last_updates[node_set_name] = self.add_weight(
+          name=f'last_update_{node_set_name}', shape=[num_nodes],
+          dtype=tf.int64, trainable=False,
+          initializer=tf.keras.initializers.Constant(-1))
+
+  def call(self, graph: tfgnn.GraphTensor, training=None) -> tfgnn.GraphTensor:
+    self._maybe_create_tables(graph)
+    if training:
+      step = self._step.assign_add(1)
+    else:
+      step = self._step.read_value()
+
+    node_set_features = {}
+    for node_set_name in self._node_set_names:
+      node_set = graph.node_sets[node_set_name]
+      state = node_set[self._feature_name]
+      node_ids = tf.cast(node_set[self._global_id_feature_name], tf.int64)
+      is_fresh = node_set[self._hop_feature_name] <= self._max_fresh_hop
+      table = self._tables[node_set_name]
+      last_update = self._last_updates[node_set_name]
+
+      if training:
+        fresh_ids = tf.boolean_mask(node_ids, is_fresh)
+        table.scatter_update(tf.IndexedSlices(
+            tf.cast(tf.boolean_mask(state, is_fresh), table.dtype), fresh_ids))
+        last_update.scatter_update(tf.IndexedSlices(
+            tf.fill(tf.shape(fresh_ids), step), fresh_ids))
+
+      updated_at = tf.gather(last_update, node_ids)
+      use_stored = tf.logical_and(tf.logical_not(is_fresh), updated_at >= 0)
+      if self._max_staleness is not None:
+        use_stored = tf.logical_and(
+            use_stored, step - updated_at <= self._max_staleness)
+      stored = tf.cast(tf.stop_gradient(tf.gather(table, node_ids)),
+                       state.dtype)
+      use_stored = tf.reshape(
+          use_stored, [-1] + [1] * (state.shape.rank - 1))
+      features = dict(node_set.features)
+      features[self._feature_name] = tf.where(use_stored, stored, state)
+      node_set_features[node_set_name] = features
+
+    return graph.replace_features(node_sets=node_set_features)
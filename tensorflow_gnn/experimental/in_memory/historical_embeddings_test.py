@@ -0,0 +1,127 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for historical_embeddings."""
+
+import os
+
+from absl.testing import parameterized
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+
+from tensorflow_gnn.experimental.in_memory import historical_embeddings
+
+
+def _make_graph(global_ids, hops, states):
+  return tfgnn.GraphTensor.from_pieces(node_sets={
+      'nodes': tfgnn.NodeSet.from_fields(
+          sizes=tf.constant([len(global_ids)]),
+          features={
+              '#global_id': tf.constant(global_ids, tf.int32),
+              '#hop': tf.constant(hops, tf.int32),
+              tfgnn.HIDDEN_STATE: tf.constant(states, tf.float32),
+          })})
+
+
+class HistoricalEmbeddingsTest(tf.test.TestCase, parameterized.TestCase):
+
+  def test_reads_stored_states_of_outer_hops(self):
+    layer = historical_embeddings.HistoricalEmbeddings({'nodes': 5})
+    # Nodes 1 and 3 are seeds: their states get stored.
+    graph = _make_graph([1, 3, 4], [0, 0, 1], [[1., 1.], [3., 3.], [4., 4.]])
+    result = layer(graph, training=True)
+    self.assertAllEqual(result.node_sets['nodes'][tfgnn.HIDDEN_STATE],
+                        [[1., 1.], [3., 3.], [4., 4.]])
+
+    # Node 3 is at hop 1 now, and gets its state from the previous batch.
+    # Node 0 was never stored and keeps its state.
+    graph = _make_graph([0, 3, 4], [0, 1, 1], [[0., 0.], [9., 9.], [8., 8.]])
+    result = layer(graph, training=True)
+    self.assertAllEqual(result.node_sets['nodes'][tfgnn.HIDDEN_STATE],
+                        [[0., 0.], [3., 3.], [8., 8.]])
+    self.assertEqual(layer.weights[0].numpy(), 2)  # Step counter.
+
+  def test_max_staleness(self):
+    layer = historical_embeddings.HistoricalEmbeddings(
+        {'nodes': 3}, max_staleness=1)
+    layer(_make_graph([2], [0], [[2.]]), training=True)
+    graph = _make_graph([2], [1], [[5.]])
+    self.assertAllEqual(
+        layer(graph, training=True).node_sets['nodes'][tfgnn.HIDDEN_STATE],
+        [[2.]])
+    self.assertAllEqual(
+        layer(graph, training=True).node_sets['nodes'][tfgnn.HIDDEN_STATE],
+        [[5.]])
+
+  def test_no_updates_outside_training(self):
+    layer = historical_embeddings.HistoricalEmbeddings(
+        {'nodes': 3}, max_fresh_hop=1)
+    layer(_make_graph([0, 1], [0, 1], [[1.], [2.]]), training=False)
+    graph = _make_graph([0, 1], [2, 2], [[7.], [7.]])
+    self.assertAllEqual(
+        layer(graph, training=False).node_sets['nodes'][tfgnn.HIDDEN_STATE],
+        [[7.], [7.]])
+    layer(_make_graph([0, 1], [0, 1], [[1.], [2.]]), training=True)
+    self.assertAllEqual(
+        layer(graph, training=False).node_sets['nodes'][tfgnn.HIDDEN_STATE],
+        [[1.], [2.]])
+
+  def test_no_gradient_into_stored_states(self):
+    layer = historical_embeddings.HistoricalEmbeddings({'nodes': 3})
+    layer(_make_graph([0], [0], [[1.]]), training=True)
+    states = tf.constant([[3.], [4.]])
+    with tf.GradientTape() as tape:
+      tape.watch(states)
+      graph = _make_graph([0, 1], [1, 1], [[0.], [0.]]).replace_features(
+          node_sets={'nodes': {'#global_id': tf.constant([0, 1]),
+                               '#hop': tf.constant([1, 1]),
+                               tfgnn.HIDDEN_STATE: states}})
+      result = layer(graph, training=True)
+      loss = tf.reduce_sum(result.node_sets['nodes'][tfgnn.HIDDEN_STATE])
+    self.assertAllEqual(tape.gradient(loss, states), [[0.], [1.]])
+
+  @parameterized.named_parameters(
+      ('NegativeHop', dict(max_fresh_hop=-1), 'max_fresh_hop'),
+      ('NegativeStaleness', dict(max_staleness=-1), 'max_staleness'))
+  def test_invalid_arguments(self, kwargs, regex):
+    with self.assertRaisesRegex(ValueError, regex):
+      historical_embeddings.HistoricalEmbeddings({'nodes': 3}, **kwargs)
+
+  def test_checkpoint(self):
+    layer = historical_embeddings.HistoricalEmbeddings({'nodes': 3})
+    layer(_make_graph([1], [0], [[1., 2.]]), training=True)
+    path = tf.train.Checkpoint(layer=layer).save(
+        os.path.join(self.get_temp_dir(), 'ckpt'))
+
+    restored = historical_embeddings.HistoricalEmbeddings({'nodes': 3})
+    tf.train.Checkpoint(layer=restored).restore(path)
+    result = restored(_make_graph([1], [1], [[0., 0.]]))
+    self.assertAllEqual(result.node_sets['nodes'][tfgnn.HIDDEN_STATE],
+                        [[1., 2.]])
+
+  def test_keras_save_and_load(self):
+    graph = _make_graph([1], [0], [[1., 2.]])
+    inputs = tf.keras.layers.Input(type_spec=graph.spec)
+    layer = historical_embeddings.HistoricalEmbeddings({'nodes': 3})
+    model = tf.keras.Model(inputs, layer(inputs))
+    export_dir = os.path.join(self.get_temp_dir(), 'model')
+    model.save(export_dir, include_optimizer=False)
+    restored = tf.keras.models.load_model(export_dir)
+    result = restored(_make_graph([1], [1], [[3., 4.]]))
+    self.assertAllEqual(result.node_sets['nodes'][tfgnn.HIDDEN_STATE],
+                        [[3., 4.]])
+
+
+if __name__ == '__main__':
+  tf.test.main()
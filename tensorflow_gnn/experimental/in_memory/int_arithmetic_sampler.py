@@ -35,6 +35,10 @@ For node classification tasks, the following are also provided:
 2. Method `NodeClassificationGraphSampler.as_dataset` show-cases how to create
    `tf.data.Dataset` of sampled subgraphs.
 
+3. Method `NodeClassificationGraphSampler.as_batched_dataset` creates
+   `tf.data.Dataset` of batches of independent per-seed subgraphs, sampled in
+   parallel and padded to static sizes, for high-throughput training.
+
 
 # Usage Examples
 
@@ -208,7 +212,9 @@ import scipy.sparse as ssp
 import tensorflow as tf
 import tensorflow_gnn as tfgnn
 from tensorflow_gnn.experimental.in_memory import datasets
+from tensorflow_gnn.experimental.in_memory import feature_store
 from tensorflow_gnn.experimental.in_memory import reader_utils
+from tensorflow_gnn.graph import batching_utils
 from tensorflow_gnn.graph import tensor_utils as utils
 from tensorflow_gnn.sampler import sampling_spec_pb2
 
@@ -282,13 +288,21 @@ class TypedWalkTree:
   store node features or labels. On the other hand, this class is populated by
   `GraphSampler`, by merging tree paths of node IDs (contained in
   `TypedWalkTree`) with node features & labels, into `GraphTensor` instances.
+
+  Sampling steps with several inputs (e.g., built with
+  `SamplingSpecBuilder.join()`) turn the walk into a DAG: `add_merge()` records
+  the union of nodes of several trees as a tree in `merged_steps` of the first
+  one, from which the next steps are sampled.
   """
 
   def __init__(self, nodes: tf.Tensor, owner: Optional['GraphSampler'] = None,
-               valid_mask: Optional[tf.Tensor] = None):
+               valid_mask: Optional[tf.Tensor] = None,
+               hops: Optional[tf.Tensor] = None):
     self._nodes: tf.Tensor = nodes
     self._next_steps: List[Tuple[tfgnn.EdgeSetName, TypedWalkTree]] = []
+    self._merged_steps: List[TypedWalkTree] = []
     self._owner: Optional[GraphSampler] = owner
+    self._hops = tf.constant(0, tf.int32) if hops is None else hops
     if valid_mask is None:
       shape = nodes.shape if nodes.shape[0] is not None else tf.shape(nodes)
       self._valid_mask = tf.ones(shape=shape, dtype=tf.bool)
@@ -349,6 +363,16 @@ class TypedWalkTree:
   def next_steps(self) -> List[Tuple[tfgnn.EdgeSetName, 'TypedWalkTree']]:
     return self._next_steps
 
+  @property
+  def merged_steps(self) -> List['TypedWalkTree']:
+    """Trees with unions of nodes of this and other trees (see `add_merge`)."""
+    return self._merged_steps
+
+  @property
+  def hops(self) -> tf.Tensor:
+    """int32 number of hops from the seed, broadcastable to shape of `nodes`."""
+    return self._hops
+
   def add_step(self, edge_set_name: tfgnn.EdgeSetName, nodes: tf.Tensor,
                valid_mask: Optional[tf.Tensor] = None,
                inherit_validity: bool = True) -> 'TypedWalkTree':
@@ -359,10 +383,121 @@ class TypedWalkTree:
     if inherit_validity:
       valid_mask = tf.logical_and(tf.expand_dims(self.valid_mask, -1),
                                   valid_mask)
-    child_tree = TypedWalkTree(nodes, owner=self._owner, valid_mask=valid_mask)
+    child_tree = TypedWalkTree(
+        nodes, owner=self._owner, valid_mask=valid_mask,
+        hops=_expand_hops(self._hops) + 1)
     self._next_steps.append((edge_set_name, child_tree))
     return child_tree
 
+  def add_merge(self, other_trees: List['TypedWalkTree'],
+                num_nodes: int, fixed_shape: bool = False) -> 'TypedWalkTree':
+    """Adds union of nodes of this and `other_trees` as a new `TypedWalkTree`.
+
+    The walk becomes a DAG: nodes reached by several sampling paths are merged
+    into one tree, so that the next steps sample their neighbors once. The union
+    is computed for each seed node independently (i.e., along the leading
+    dimension of `nodes`) and contains only valid nodes, each of them once, in
+    the order of their first appearance. The union is returned as a tree with
+    nodes shaped `[B, max_union_size]`, with `valid_mask` marking the padding,
+    and with `hops` holding the smallest number of hops to each node. The tree
+    is recorded in `merged_steps` of this tree.
+
+    Args:
+      other_trees: Trees with nodes from the same node set as this tree, and
+        the same leading dimension `B`.
+      num_nodes: Number of nodes in the node set.
+      fixed_shape: If set, the union is shaped `[B, total_size]`, where
+        `total_size` is the total number of nodes per seed node of all trees,
+        and is computed by sorting, which keeps shapes static (e.g., for XLA).
+        Then the valid nodes are ordered by their IDs, and padding can be
+        anywhere.
+
+    Returns:
+      Newly-constructed `TypedWalkTree` holding the union of nodes.
+    """
+    trees = [self] + list(other_trees)
+    batch_size = tf.shape(self.nodes)[0]
+
+    def flatten(values: tf.Tensor, tree: TypedWalkTree) -> tf.Tensor:
+      values = tf.broadcast_to(values, tf.shape(tree.nodes))
+      return tf.reshape(values, tf.stack([batch_size, -1]))
+
+    nodes = tf.concat([flatten(t.nodes, t) for t in trees], 1)
+    valid_mask = tf.concat([flatten(t.valid_mask, t) for t in trees], 1)
+    hops = tf.concat([flatten(t.hops, t) for t in trees], 1)
+    if fixed_shape:
+      merged_tree = self._sorted_union(nodes, valid_mask, hops, num_nodes)
+      self._merged_steps.append(merged_tree)
+      return merged_tree
+    # Node IDs combined with positions of their seeds are unique keys of nodes
+    # within each seed's walk. The keys are ordered by seeds, as `nodes`.
+    seed_positions = tf.broadcast_to(
+        tf.expand_dims(tf.range(tf.shape(nodes, out_type=tf.int64)[0]), -1),
+        tf.shape(nodes, out_type=tf.int64))
+    keys = tf.boolean_mask(seed_positions * num_nodes + tf.cast(
+        nodes, tf.int64), valid_mask)
+    unique_keys, unique_indices = tf.unique(keys, out_idx=tf.int64)
+    min_hops = tf.math.unsorted_segment_min(
+        tf.boolean_mask(hops, valid_mask), unique_indices,
+        tf.size(unique_keys, out_type=tf.int64))
+
+    def to_dense(values: tf.Tensor) -> tf.Tensor:
+      return tf.RaggedTensor.from_value_rowids(
+          values, unique_keys // num_nodes,
+          nrows=tf.cast(batch_size, tf.int64)).to_tensor()
+
+    merged_nodes = to_dense(tf.cast(unique_keys % num_nodes, self.nodes.dtype))
+    merged_valid_mask = to_dense(tf.ones_like(unique_keys, tf.bool))
+    merged_tree = TypedWalkTree(
+        merged_nodes, owner=self._owner, valid_mask=merged_valid_mask,
+        hops=to_dense(min_hops))
+    self._merged_steps.append(merged_tree)
+    return merged_tree
+
+  def _sorted_union(self, nodes: tf.Tensor, valid_mask: tf.Tensor,
+                    hops: tf.Tensor, num_nodes: int) -> 'TypedWalkTree':
+    """Returns fixed-shape union of `nodes` along their last dimension."""
+    # Sorts nodes of each seed by hops, then (stably) by IDs with invalid nodes
+    # last, so that the first of equal nodes has the smallest number of hops.
+    keys = tf.where(valid_mask, tf.cast(nodes, tf.int64),
+                    tf.constant(num_nodes, tf.int64))
+    order = tf.argsort(hops, axis=1, stable=True)
+    order = tf.gather(
+        order,
+        tf.argsort(tf.gather(keys, order, batch_dims=1), axis=1, stable=True),
+        batch_dims=1)
+    keys = tf.gather(keys, order, batch_dims=1)
+    is_first = tf.concat(
+        [tf.ones_like(keys[:, :1], tf.bool), keys[:, 1:] != keys[:, :-1]], 1)
+    merged_valid_mask = tf.logical_and(is_first, keys < num_nodes)
+    merged_nodes = tf.where(merged_valid_mask, keys, tf.zeros_like(keys))
+    return TypedWalkTree(
+        tf.cast(merged_nodes, self.nodes.dtype), owner=self._owner,
+        valid_mask=merged_valid_mask,
+        hops=tf.gather(hops, order, batch_dims=1))
+
+  def map_nodes(
+      self,
+      fn: Callable[[tf.Tensor, tfgnn.NodeSetName], tf.Tensor],
+      node_set_name: tfgnn.NodeSetName) -> 'TypedWalkTree':
+    """Returns copy of this walk, with `fn(nodes, node_set_name)` as nodes.
+
+    Args:
+      fn: Function which maps nodes of a tree to nodes of the same shape.
+      node_set_name: Name of node set of nodes of this tree.
+    """
+    mapped_tree = TypedWalkTree(
+        fn(self.nodes, node_set_name), owner=self._owner,
+        valid_mask=self.valid_mask, hops=self.hops)
+    for edge_set_name, child_tree in self._next_steps:
+      mapped_tree._next_steps.append((  # Same class. pylint: disable=protected-access
+          edge_set_name,
+          child_tree.map_nodes(fn, self._owner.edge_types[edge_set_name][1])))
+    for merged_tree in self._merged_steps:
+      mapped_tree._merged_steps.append(  # Same class. pylint: disable=protected-access
+          merged_tree.map_nodes(fn, node_set_name))
+    return mapped_tree
+
   def get_edge_lists(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
     """Constructs sampled edge lists.
 
@@ -392,12 +527,68 @@ class TypedWalkTree:
 
       edge_lists[edge_set_name].append(reshaped)
       child_tree._get_edge_lists_recursive(edge_lists)  # Same class. pylint: disable=protected-access
+    for merged_tree in self._merged_steps:
+      merged_tree._get_edge_lists_recursive(edge_lists)  # Same class. pylint: disable=protected-access
+
+  def get_node_hops(self) -> Mapping[tfgnn.NodeSetName, Tuple[tf.Tensor,
+                                                               tf.Tensor]]:
+    """Returns the number of hops from the seed to every traversed node.
+
+    Returns:
+      dict with keys being node set names and values being pairs of int vectors
+      `(node_ids, hops)`. If a node was reached along several paths, then it is
+      listed once per path, with the length of each path.
+    """
+    if not self._next_steps:
+      return {}
+    root_node_set_name = self._owner.edge_types[self._next_steps[0][0]][0]
+    node_hops = collections.defaultdict(list)
+    self._get_node_hops_recursive(node_hops, root_node_set_name)
+    return {node_set_name: (tf.concat([ids for ids, _ in pairs], 0),
+                            tf.concat([hops for _, hops in pairs], 0))
+            for node_set_name, pairs in node_hops.items()}
+
+  def _get_node_hops_recursive(
+      self,
+      node_hops: MutableMapping[tfgnn.NodeSetName,
+                                List[Tuple[tf.Tensor, tf.Tensor]]],
+      node_set_name: tfgnn.NodeSetName):
+    """Recursively accumulates into `node_hops` the valid traversed nodes."""
+    valid_mask = tf.reshape(self.valid_mask, [-1])
+    node_ids = tf.boolean_mask(tf.reshape(self.nodes, [-1]), valid_mask)
+    hops = tf.reshape(tf.broadcast_to(self.hops, tf.shape(self.nodes)), [-1])
+    node_hops[node_set_name].append(
+        (node_ids, tf.boolean_mask(hops, valid_mask)))
+    for edge_set_name, child_tree in self._next_steps:
+      child_tree._get_node_hops_recursive(  # Same class. pylint: disable=protected-access
+          node_hops, self._owner.edge_types[edge_set_name][1])
+    for merged_tree in self._merged_steps:
+      merged_tree._get_node_hops_recursive(node_hops, node_set_name)  # Same class. pylint: disable=protected-access
+
+  def get_trees(self, node_set_name: tfgnn.NodeSetName) -> List[
+      Tuple[tfgnn.NodeSetName, 'TypedWalkTree']]:
+    """Returns this and all following trees, with names of their node sets.
+
+    Trees are listed in the order in which `map_nodes()` maps them.
+
+    Args:
+      node_set_name: Name of node set of nodes of this tree.
+    """
+    trees = [(node_set_name, self)]
+    for edge_set_name, child_tree in self._next_steps:
+      trees.extend(
+          child_tree.get_trees(self._owner.edge_types[edge_set_name][1]))
+    for merged_tree in self._merged_steps:
+      trees.extend(merged_tree.get_trees(node_set_name))
+    return trees
 
   def as_graph_tensor(
       self,
       node_features_fn: Callable[
           [tfgnn.NodeSetName, tf.Tensor], Mapping[tfgnn.FieldName, tf.Tensor]],
-      static_sizes: bool = False
+      static_sizes: bool = False,
+      global_id_feature_name: Optional[tfgnn.FieldName] = None,
+      hop_feature_name: Optional[tfgnn.FieldName] = None,
       ) -> tfgnn.GraphTensor:
     """Converts the randomly traversed walk tree into a `GraphTensor`.
 
@@ -411,6 +602,11 @@ class TypedWalkTree:
         nodes and edges. Specifically, nodes can be repeated. If not set, then
         even if random trees discover some node multiple times, then it would
         only appear once in node features.
+      global_id_feature_name: If set, every node set gets a feature with this
+        name, holding the node IDs in the in-memory graph (as opposed to the
+        positions of the nodes in the output `GraphTensor`).
+      hop_feature_name: If set, every node set gets an int32 feature with this
+        name, holding the smallest number of hops from the seed to the node.
 
     Returns:
       newly-constructed tfgnn.GraphTensor.
@@ -436,6 +632,7 @@ class TypedWalkTree:
     unique_node_ids = {name: tf.sort(maybe_unique(tf.concat(values, 0)))
                        for name, values in unique_node_ids.items()}
 
+    node_hops = self.get_node_hops() if hop_feature_name is not None else None
     node_sets = {}
     for node_set_name, node_ids in unique_node_ids.items():
       if node_ids.shape[0]:
@@ -443,9 +640,14 @@ class TypedWalkTree:
       else:
         sizes = tf.shape(node_ids)
 
+      features = dict(node_features_fn(node_set_name, node_ids))
+      if global_id_feature_name is not None:
+        features[global_id_feature_name] = node_ids
+      if hop_feature_name is not None:
+        features[hop_feature_name] = _min_hops(node_hops[node_set_name],
+                                               node_ids)
       node_sets[node_set_name] = tfgnn.NodeSet.from_fields(
-          sizes=sizes,
-          features=node_features_fn(node_set_name, node_ids))
+          sizes=sizes, features=features)
 
     edge_sets = {}
     for edge_set_name, edges in edge_lists.items():
@@ -466,11 +668,63 @@ class TypedWalkTree:
     return graph_tensor
 
 
+def _expand_hops(hops: tf.Tensor) -> tf.Tensor:
+  """Returns `hops` broadcastable to shape of nodes of the next step."""
+  if hops.shape.rank == 0:
+    return hops
+  return tf.expand_dims(hops, -1)
+
+
+def _expand_to_rank(values: tf.Tensor, rank: int) -> tf.Tensor:
+  """Returns `values` with trailing axes of size 1 added, up to `rank`."""
+  return values[(Ellipsis,) + (tf.newaxis,) * (rank - values.shape.rank)]
+
+
+def _prefix_sum(values: tf.Tensor) -> tf.Tensor:
+  """Returns inclusive prefix sums of `values` along the last axis.
+
+  Unlike `tf.math.cumsum()`, it takes log(n) steps with linear cost when
+  compiled with XLA.
+
+  Args:
+    values: tensor with static size of the last axis.
+  """
+  size = values.shape[-1]
+  paddings = [[0, 0]] * (values.shape.rank - 1)
+  shift = 1
+  while shift < size:
+    values += tf.pad(values[..., :-shift], paddings + [[shift, 0]])
+    shift *= 2
+  return values
+
+
+def _min_hops(node_hops: Tuple[tf.Tensor, tf.Tensor],
+              node_ids: tf.Tensor) -> tf.Tensor:
+  """Returns the smallest hop in `node_hops` for each of `node_ids`."""
+  all_node_ids, hops = node_hops
+  unique_node_ids = tf.sort(tf.unique(all_node_ids).y)
+  min_hops = tf.math.unsorted_segment_min(
+      hops, tf.searchsorted(unique_node_ids, all_node_ids),
+      tf.shape(unique_node_ids)[0])
+  return tf.gather(min_hops, tf.searchsorted(unique_node_ids, node_ids))
+
+
 class EdgeSampling(enum.Enum):
   WITH_REPLACEMENT = 'with_replacement'
   WITHOUT_REPLACEMENT = 'without_replacement'
 
 
+_SUPPORTED_STRATEGIES = (
+    sampling_spec_pb2.SamplingStrategy.RANDOM_UNIFORM,
+    sampling_spec_pb2.SamplingStrategy.RANDOM_WEIGHTED,
+    sampling_spec_pb2.SamplingStrategy.TOP_K,
+)
+
+# Feature holding node IDs between the sampling and the gathering of features
+# from `GraphSampler.node_feature_store`.
+_STORE_NODE_ID_FEATURE_NAME = '_node_feature_store_ids'
+
+
 class EdgeSampler(tf.keras.layers.Layer):
   """Samples neighbors given nodes. Follows Edge-sampling API.
 
@@ -541,18 +795,37 @@ class GraphSampler:
   Sub-graphs are encoded as `GraphTensor` or tf.data.Dataset. Random walks are
   performed using `TypedWalkTree`. Input data graph must be an instance of
   `Dataset`.
+
+  Node features are gathered from `graph_data.node_features_dicts()` and, if
+  given, from `node_feature_store` (e.g., for features that do not fit in
+  memory; see `feature_store.MemmapNodeFeatureStore`).
+
+  Edge sets with timestamps (`graph_data.edge_timestamps()`) are sampled
+  temporally, from seed nodes with timestamps (`graph_data.node_timestamps()`):
+  every hop only samples edges older than the seed node (see
+  `sample_walk_tree()`).
   """
 
   def __init__(self,
                graph_data: datasets.InMemoryGraphData,
                reduce_memory_footprint: bool = True,
-               sampling_mode: EdgeSampling = EdgeSampling.WITHOUT_REPLACEMENT):
+               sampling_mode: EdgeSampling = EdgeSampling.WITHOUT_REPLACEMENT,
+               node_feature_store: Optional[
+                   feature_store.NodeFeatureStore] = None):
     self.graph_data = graph_data
     self.sampling_mode = sampling_mode
+    self.node_feature_store = node_feature_store
     self.edge_types = {}  # edge set name -> (src node set name, dst *).
     self.adjacency = {}
+    weighted_adjacency = {}
+    # Node set name -> timestamps of its nodes, used for seed nodes.
+    self.node_timestamps = dict(graph_data.node_timestamps())
+    # Edge set name -> (degrees, targets, timestamps) with all edges, including
+    # duplicates (which are separate events), sorted by source and timestamp.
+    temporal_edges = {}
 
     all_node_counts = graph_data.node_counts()
+    self.node_counts = dict(all_node_counts)  # node set name -> num nodes.
     edge_sets = graph_data.edge_sets()
     for edge_set_name, edge_set in edge_sets.items():
       self.edge_types[edge_set_name] = (edge_set.adjacency.source_name,
@@ -565,6 +838,19 @@ class GraphSampler:
       self.adjacency[edge_set_name] = ssp.csr_matrix(
           (np.ones(edges_src.shape, dtype='int8'), (edges_src, edges_tgt)),
           shape=(size_src, size_tgt))
+      if datasets.EDGE_WEIGHT_FEATURE_NAME in edge_set.features:
+        edge_weights = edge_set.features[datasets.EDGE_WEIGHT_FEATURE_NAME]
+        # Weights of duplicate edges are summed, as duplicates are merged.
+        weighted_adjacency[edge_set_name] = ssp.csr_matrix(
+            (edge_weights.numpy().astype('float64'), (edges_src, edges_tgt)),
+            shape=(size_src, size_tgt))
+      if datasets.EDGE_TIMESTAMP_FEATURE_NAME in edge_set.features:
+        edge_timestamps = edge_set.features[
+            datasets.EDGE_TIMESTAMP_FEATURE_NAME].numpy()
+        order = np.lexsort((edge_timestamps, edges_src))
+        temporal_edges[edge_set_name] = (
+            np.bincount(edges_src, minlength=size_src).astype('int64'),
+            edges_tgt[order], edge_timestamps[order])
 
     if not edge_sets:
       raise ValueError('graph_data has no edge-sets.')
@@ -573,9 +859,41 @@ class GraphSampler:
     self.edge_lists = {}      # Edge set name -> (optional src_ids, target_ids).
     self.degrees = {}         # Edge set name -> [deg_1, deg_2, ... deg_|V|].
     self.degrees_cumsum = {}  # Edge set name -> [0, deg_1, deg_1+deg_2. ...].
+    # Edge set name -> weights of edges, ordered as `edge_lists`. Edge sets
+    # without weights are missing and have unit weights.
+    self.edge_weights = {}
+    # Edge set name -> [0, w_1, w_1+w_2, ...] (float64) over edge weights.
+    self.edge_weights_cumsum = {}
+    # Edge set name -> target ids of edges sorted by timestamp per source node,
+    # for edge sets with timestamps. They have their own `temporal_degrees`,
+    # `temporal_degrees_cumsum` and timestamps `edge_timestamps`.
+    self.temporal_edge_lists = {}
+    self.temporal_degrees = {}
+    self.temporal_degrees_cumsum = {}
+    self.edge_timestamps = {}
+    # Edge set name -> largest temporal degree (int), which bounds the number
+    # of steps of binary searches over the edges of a node.
+    self.max_temporal_degrees = {}
+    for edge_set_name, (degrees, targets, timestamps) in temporal_edges.items():
+      self.temporal_edge_lists[edge_set_name] = as_tensor(targets)
+      self.temporal_degrees[edge_set_name] = as_tensor(degrees)
+      self.temporal_degrees_cumsum[edge_set_name] = as_tensor(
+          np.cumsum(degrees) - degrees)
+      self.edge_timestamps[edge_set_name] = as_tensor(timestamps)
+      self.max_temporal_degrees[edge_set_name] = int(degrees.max(initial=0))
     for edge_set_name, csr_adj in self.adjacency.items():
       csr_adj = csr_adj > 0  # Binarize.
+      csr_adj.sort_indices()
       nonzero_rows, nonzero_cols = csr_adj.nonzero()
+      if edge_set_name in weighted_adjacency:
+        # Same sparsity structure as `csr_adj` (explicit zeros are kept).
+        csr_weights = weighted_adjacency[edge_set_name]
+        csr_weights.sum_duplicates()
+        csr_weights.sort_indices()
+        self.edge_weights[edge_set_name] = as_tensor(
+            csr_weights.data.astype('float32'))
+        self.edge_weights_cumsum[edge_set_name] = as_tensor(
+            np.concatenate([[0.0], np.cumsum(csr_weights.data)]))
       self.edge_lists[edge_set_name] = (
           None if reduce_memory_footprint else as_tensor(nonzero_rows),
           as_tensor(nonzero_cols))
@@ -591,10 +909,9 @@ class GraphSampler:
                         edge_set_name: Optional[tfgnn.EdgeSetName] = None,
                         sampling_mode=None) -> EdgeSampler:
     """Makes layer out of `sample_one_hop`."""
-    available_edge_set_names = self.graph_data.edge_sets().keys()
+    available_edge_set_names = self.edge_types.keys()
     # Validation.
     if edge_set_name is None:
-      available_edge_set_names = self.graph_data.edge_sets().keys()
       if len(available_edge_set_names) > 1:
         raise ValueError(
             'You must provide `edge_set_name` as your graph has multiple edge '
@@ -630,23 +947,82 @@ class GraphSampler:
       self, source_nodes: tf.Tensor, edge_set_name: tfgnn.EdgeSetName,
       sample_size: int,
       sampling_mode: Optional[EdgeSampling] = None,
-      validate=True) -> Tuple[tf.Tensor, tf.Tensor]:
-    """Like sample_one_hop(), but returns also `valid_mask`, per header doc."""
+      validate=True,
+      strategy: sampling_spec_pb2.SamplingStrategy = (
+          sampling_spec_pb2.SamplingStrategy.RANDOM_UNIFORM),
+      cutoff_timestamps: Optional[tf.Tensor] = None,
+  ) -> Tuple[tf.Tensor, tf.Tensor]:
+    """Like sample_one_hop(), but returns also `valid_mask`, per header doc.
+
+    Args:
+      source_nodes: int tensor of node positions in the source node set.
+      edge_set_name: name of edge set to sample from.
+      sample_size: number of edges to sample for each source node.
+      sampling_mode: `EdgeSampling`. Defaults to the mode of the sampler.
+      validate: if True, invalid samples are replaced by the first edge of the
+        edge set, so they always point to an existing target node.
+      strategy: one of `RANDOM_UNIFORM`, `RANDOM_WEIGHTED` or `TOP_K`. The
+        latter two use edge weights (`edge_weights()` of graph data, or unit
+        weights), as the Beam sampler. `RANDOM_WEIGHTED` samples edges with
+        probabilities proportional to their weights, with or without
+        replacement per `sampling_mode`, and never samples edges with zero
+        weight. `TOP_K` deterministically takes edges with the largest weights.
+        Without replacement and for `TOP_K`, nodes with at most `sample_size`
+        candidate edges get each of them exactly once.
+      cutoff_timestamps: If set, and the edge set has timestamps (see
+        `InMemoryGraphData.edge_timestamps()`), only edges with timestamps
+        strictly smaller than these (broadcastable to `source_nodes`) are
+        candidates, and duplicate edges are distinct candidates. Then,
+        `RANDOM_UNIFORM` samples among the candidates and `TOP_K` takes the most
+        recent candidates; `RANDOM_WEIGHTED` is not supported. Edge sets without
+        timestamps are sampled regardless of `cutoff_timestamps`.
+
+    Returns:
+      Tuple of target nodes and their valid mask, both of shape
+      `source_nodes.shape + [sample_size]`.
+    """
     if sampling_mode is None:
       sampling_mode = self.sampling_mode
 
-    all_degrees = self.degrees[edge_set_name]
-    node_degrees = tf.gather(all_degrees, source_nodes)
-
-    offsets = self.degrees_cumsum[edge_set_name]
+    temporal = (cutoff_timestamps is not None
+                and edge_set_name in self.edge_timestamps)
+    if temporal:
+      if strategy == sampling_spec_pb2.SamplingStrategy.RANDOM_WEIGHTED:
+        raise ValueError(
+            f'Edge set "{edge_set_name}" has timestamps, which do not support '
+            'sampling strategy RANDOM_WEIGHTED.')
+      node_offsets, node_degrees = self._get_older_edges(
+          source_nodes, edge_set_name, cutoff_timestamps)
+      nonzero_cols = self.temporal_edge_lists[edge_set_name]
+    else:
+      node_degrees = tf.gather(self.degrees[edge_set_name], source_nodes)
+      node_offsets = tf.gather(self.degrees_cumsum[edge_set_name], source_nodes)
+      nonzero_cols = self.edge_lists[edge_set_name][1]
 
-    if source_nodes.shape[0] is None:
+    if not source_nodes.shape.is_fully_defined():
       newshape = tf.shape(source_nodes)
       newshape = tf.concat([newshape, [sample_size]], axis=0)
     else:
       newshape = source_nodes.shape + [sample_size]
 
-    if sampling_mode == EdgeSampling.WITH_REPLACEMENT:
+    if strategy not in _SUPPORTED_STRATEGIES:
+      raise ValueError(
+          f'Unsupported sampling strategy {strategy}. Expected one of: '
+          + ', '.join(sampling_spec_pb2.SamplingStrategy.Name(s)
+                      for s in _SUPPORTED_STRATEGIES))
+
+    if temporal and strategy == sampling_spec_pb2.SamplingStrategy.TOP_K:
+      # The most recent candidates are the last ones, in reverse order.
+      ranks = tf.range(sample_size, dtype=node_degrees.dtype)
+      node_degrees_expanded = tf.expand_dims(node_degrees, -1)
+      valid_mask = ranks < node_degrees_expanded
+      sample_indices = tf.expand_dims(node_offsets, -1) + tf.maximum(
+          node_degrees_expanded - 1 - ranks, 0)
+    elif strategy != sampling_spec_pb2.SamplingStrategy.RANDOM_UNIFORM:
+      sample_indices, valid_mask = self._sample_weighted_edge_indices(
+          source_nodes, edge_set_name, sample_size, newshape,
+          strategy=strategy, sampling_mode=sampling_mode)
+    elif sampling_mode == EdgeSampling.WITH_REPLACEMENT:
       sample_indices = tf.random.uniform(
           shape=newshape, minval=0, maxval=1,
           dtype=tf.float32)
@@ -664,8 +1040,7 @@ class GraphSampler:
       valid_mask = sample_indices < node_degrees_expanded
 
       # Shape: (sample_size, nodes_reshaped.shape[0])
-      sample_indices += tf.expand_dims(tf.gather(offsets, source_nodes), -1)
-      nonzero_cols = self.edge_lists[edge_set_name][1]
+      sample_indices += tf.expand_dims(node_offsets, -1)
     elif sampling_mode == EdgeSampling.WITHOUT_REPLACEMENT:
       # shape=(total_input_nodes).
       nodes_reshaped = tf.reshape(source_nodes, [-1])
@@ -731,14 +1106,12 @@ class GraphSampler:
       # Shape: (sample_size, total_input_nodes)
       sample_indices = adjusted_sample_indices
 
-      sample_indices += tf.expand_dims(tf.gather(offsets, nodes_reshaped), 0)
+      sample_indices += tf.expand_dims(tf.reshape(node_offsets, [-1]), 0)
       sample_indices = tf.reshape(tf.transpose(sample_indices),
                                   newshape)
 
       if valid_mask.shape != sample_indices.shape:
-        valid_mask = tf.reshape(valid_mask, sample_indices.shape)
-
-      nonzero_cols = self.edge_lists[edge_set_name][1]
+        valid_mask = tf.reshape(valid_mask, tf.shape(sample_indices))
     else:
       raise ValueError('Unknown sampling ' + str(sampling_mode))
 
@@ -754,9 +1127,144 @@ class GraphSampler:
 
     return next_nodes, valid_mask
 
+  def _get_older_edges(
+      self, source_nodes: tf.Tensor, edge_set_name: tfgnn.EdgeSetName,
+      cutoff_timestamps: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor]:
+    """Returns offsets and numbers of edges older than cutoff, per node.
+
+    Edges of each node are sorted by timestamp in `temporal_edge_lists`, so the
+    edges older than the cutoff are a prefix, whose length is found by a binary
+    search over all nodes at once. It takes a static number of steps (the bit
+    length of the largest degree), with one gather per step, so it compiles
+    with XLA.
+
+    Args:
+      source_nodes: int tensor of node positions in the source node set.
+      edge_set_name: name of edge set with timestamps.
+      cutoff_timestamps: timestamps broadcastable to `source_nodes`.
+
+    Returns:
+      Tuple of offsets of the edges of `source_nodes` in `temporal_edge_lists`
+      and the numbers of their edges older than the cutoff, both shaped as
+      `source_nodes`.
+    """
+    timestamps = self.edge_timestamps[edge_set_name]
+    node_offsets = tf.gather(
+        self.temporal_degrees_cumsum[edge_set_name], source_nodes)
+    node_degrees = tf.gather(self.temporal_degrees[edge_set_name], source_nodes)
+    cutoff_timestamps = tf.broadcast_to(
+        tf.cast(cutoff_timestamps, timestamps.dtype), tf.shape(source_nodes))
+    last_edge = tf.maximum(
+        tf.size(timestamps, out_type=node_offsets.dtype) - 1, 0)
+    num_older = tf.zeros_like(node_degrees)
+    max_degree = self.max_temporal_degrees[edge_set_name]
+    for shift in reversed(range(max_degree.bit_length())):
+      candidate = num_older + (1 << shift)
+      edge_timestamps = tf.gather(
+          timestamps, tf.minimum(node_offsets + candidate - 1, last_edge))
+      num_older = tf.where(
+          tf.logical_and(candidate <= node_degrees,
+                         edge_timestamps < cutoff_timestamps),
+          candidate, num_older)
+    return node_offsets, num_older
+
+  def _sample_weighted_edge_indices(
+      self, source_nodes: tf.Tensor, edge_set_name: tfgnn.EdgeSetName,
+      sample_size: int, newshape: Union[tf.Tensor, tf.TensorShape], *,
+      strategy: sampling_spec_pb2.SamplingStrategy,
+      sampling_mode: EdgeSampling) -> Tuple[tf.Tensor, tf.Tensor]:
+    """Returns positions of sampled edges in `edge_lists` and valid mask.
+
+    Weighted sampling with replacement draws from the cumulative distribution
+    of edge weights of each node, using binary search over `edge_weights_cumsum`
+    of the edge set. Weighted sampling without replacement and top-k sampling
+    rank all edges of each source node by keys and take the first
+    `sample_size`. For weighted sampling keys are `log(u) / weight` for uniform
+    random `u` (Efraimidis & Spirakis), as in the Beam sampler.
+
+    Args:
+      source_nodes: int tensor of node positions in the source node set.
+      edge_set_name: name of edge set to sample from.
+      sample_size: number of edges to sample for each source node.
+      newshape: shape of the result, `source_nodes.shape + [sample_size]`.
+      strategy: `RANDOM_WEIGHTED` or `TOP_K`.
+      sampling_mode: for `RANDOM_WEIGHTED`, with or without replacement.
+
+    Returns:
+      Tuple of int64 edge positions and their valid mask, both of `newshape`.
+    """
+    nodes = tf.reshape(source_nodes, [-1])
+    node_degrees = tf.gather(self.degrees[edge_set_name], nodes)
+    node_offsets = tf.gather(self.degrees_cumsum[edge_set_name], nodes)
+    if (strategy == sampling_spec_pb2.SamplingStrategy.RANDOM_WEIGHTED and
+        sampling_mode == EdgeSampling.WITH_REPLACEMENT):
+      if edge_set_name in self.edge_weights_cumsum:
+        weights_cumsum = self.edge_weights_cumsum[edge_set_name]
+      else:
+        num_edges = tf.size(
+            self.edge_lists[edge_set_name][1], out_type=tf.int64)
+        weights_cumsum = tf.range(num_edges + 1, dtype=tf.float64)
+      low = tf.expand_dims(tf.gather(weights_cumsum, node_offsets), -1)
+      high = tf.expand_dims(
+          tf.gather(weights_cumsum, node_offsets + node_degrees), -1)
+      rand = tf.random.uniform(
+          tf.stack([tf.size(nodes), sample_size]), dtype=tf.float64)
+      # Edge `i` is sampled if `weights_cumsum[i] <= value < cumsum[i + 1]`, so
+      # edges with zero weight are never sampled.
+      values = low + rand * (high - low)
+      sample_indices = tf.searchsorted(
+          weights_cumsum[1:], tf.reshape(values, [-1]), side='right',
+          out_type=tf.int64)
+      sample_indices = tf.clip_by_value(
+          tf.reshape(sample_indices, tf.shape(values)),
+          tf.expand_dims(node_offsets, -1),
+          tf.expand_dims(node_offsets + tf.maximum(node_degrees, 1) - 1, -1))
+      valid_mask = tf.broadcast_to(high > low, tf.shape(values))
+    elif strategy in (sampling_spec_pb2.SamplingStrategy.RANDOM_WEIGHTED,
+                      sampling_spec_pb2.SamplingStrategy.TOP_K):
+      # All edges of source nodes, grouped by source node.
+      edge_indices = tf.ragged.range(
+          node_offsets, node_offsets + node_degrees)
+      edge_rows = edge_indices.value_rowids()
+      edge_indices = edge_indices.flat_values
+      if edge_set_name in self.edge_weights:
+        weights = tf.cast(
+            tf.gather(self.edge_weights[edge_set_name], edge_indices),
+            tf.float64)
+      else:
+        weights = tf.ones(tf.shape(edge_indices), tf.float64)
+      if strategy == sampling_spec_pb2.SamplingStrategy.TOP_K:
+        keys = weights
+        num_candidates = node_degrees
+      else:
+        rand = tf.random.uniform(tf.shape(weights), dtype=tf.float64)
+        keys = tf.where(weights > 0, tf.math.log(rand) / weights,
+                        tf.constant(-np.inf, dtype=tf.float64))
+        # Edges with zero weight are never sampled.
+        num_candidates = tf.math.unsorted_segment_sum(
+            tf.cast(weights > 0, node_degrees.dtype), edge_rows,
+            tf.size(nodes, out_type=edge_rows.dtype))
+      # Sorts edges by keys in descending order within each source node.
+      order = tf.argsort(keys, direction='DESCENDING', stable=True)
+      order = tf.gather(
+          order, tf.argsort(tf.gather(edge_rows, order), stable=True))
+      sorted_edge_indices = tf.RaggedTensor.from_row_lengths(
+          tf.gather(edge_indices, order), node_degrees, validate=False)
+      sample_indices = sorted_edge_indices[:, :sample_size].to_tensor(
+          shape=[None, sample_size])
+      valid_mask = tf.sequence_mask(
+          tf.minimum(num_candidates, sample_size), sample_size)
+    else:
+      raise ValueError(f'Unsupported sampling strategy {strategy}.')
+
+    return (tf.reshape(sample_indices, newshape),
+            tf.reshape(valid_mask, newshape))
+
   def sample_walk_tree(
       self, node_idx: tf.Tensor, sampling_spec: sampling_spec_pb2.SamplingSpec,
-      sampling_mode: Optional[EdgeSampling] = None) -> TypedWalkTree:
+      sampling_mode: Optional[EdgeSampling] = None,
+      fixed_shape: bool = False,
+      seed_timestamps: Optional[tf.Tensor] = None) -> TypedWalkTree:
     """Returns `TypedWalkTree` where `nodes` are seed root-nodes.
 
     Args:
@@ -765,12 +1273,25 @@ class GraphSampler:
       sampling_spec: to guide sampling (number of hops & number of nodes per
         hop). It can be built using `sampling_spec_builder`.
       sampling_mode: to spcify with or without replacement.
+      fixed_shape: Forwarded to `TypedWalkTree.add_merge()`. With `node_idx` of
+        static shape and `RANDOM_UNIFORM` sampling, all nodes of the tree then
+        have static shapes.
+      seed_timestamps: Timestamps of seed nodes, shaped as `node_idx`. If set,
+        every hop only samples edges (of edge sets with timestamps) older than
+        the seed node of its tree, as `cutoff_timestamps` of
+        `sample_one_hop_with_valid_mask`. Defaults to the `node_timestamps()`
+        of graph data for the seed node set, if any.
 
     Returns:
-      `TypedWalkTree` where each edge is sampled uniformly.
+      `TypedWalkTree` where edges are sampled per `strategy` of sampling ops
+      (see `sample_one_hop_with_valid_mask`).
     """
     op_name_to_tree: MutableMapping[str, TypedWalkTree] = {}
     seed_op_names = []
+    seed_node_set_name = sampling_spec.seed_op.node_set_name
+    if seed_timestamps is None and seed_node_set_name in self.node_timestamps:
+      seed_timestamps = tf.gather(
+          self.node_timestamps[seed_node_set_name], node_idx)
 
     def process_seed_op(sampling_op: sampling_spec_pb2.SeedOp):
       seed_op_names.append(sampling_op.op_name)
@@ -779,21 +1300,29 @@ class GraphSampler:
     def process_sampling_op(sampling_op: sampling_spec_pb2.SamplingOp):
       parent_trees = [op_name_to_tree[op_name]
                       for op_name in sampling_op.input_op_names]
-      if len(parent_trees) > 1:
+      if sampling_op.strategy not in _SUPPORTED_STRATEGIES:
         raise ValueError(
-            'Multiple paths for sampling is not yet supported. To support, you '
-            'can extend TypedWalkTree into WalkDAG.')
-      if (sampling_op.strategy !=
-          sampling_spec_pb2.SamplingStrategy.RANDOM_UNIFORM):
-        raise ValueError('sampling_op.strategy must be "RANDOM_UNIFORM".')
-      parent_trees = parent_trees[:1]
-      parent_nodes = [tree.nodes for tree in parent_trees]
-      parent_nodes = tf.concat(parent_nodes, axis=1)
+            'sampling_op.strategy must be one of "RANDOM_UNIFORM", '
+            '"RANDOM_WEIGHTED" or "TOP_K".')
+      if len(parent_trees) > 1:
+        # Nodes reached by several paths are sampled once per seed node.
+        source_node_set_name = self.edge_types[sampling_op.edge_set_name][0]
+        parent_tree = parent_trees[0].add_merge(
+            parent_trees[1:],
+            self.node_counts[source_node_set_name], fixed_shape=fixed_shape)
+      else:
+        parent_tree = parent_trees[0]
 
+      cutoff_timestamps = None
+      if seed_timestamps is not None:
+        # Nodes of every tree are indexed by their seed nodes first.
+        cutoff_timestamps = _expand_to_rank(
+            seed_timestamps, parent_tree.nodes.shape.rank)
       next_nodes, valid_mask = self.sample_one_hop_with_valid_mask(
-          parent_nodes, sampling_op.edge_set_name,
-          sample_size=sampling_op.sample_size, sampling_mode=sampling_mode)
-      child_tree = parent_trees[0].add_step(
+          parent_tree.nodes, sampling_op.edge_set_name,
+          sample_size=sampling_op.sample_size, sampling_mode=sampling_mode,
+          strategy=sampling_op.strategy, cutoff_timestamps=cutoff_timestamps)
+      child_tree = parent_tree.add_step(
           sampling_op.edge_set_name, next_nodes, valid_mask=valid_mask)
 
       op_name_to_tree[sampling_op.op_name] = child_tree
@@ -812,6 +1341,9 @@ class GraphSampler:
       node_feature_gather_fn: Optional[
           Callable[[str, tf.Tensor], Mapping[str, tf.Tensor]]] = None,
       static_sizes: bool = False,
+      global_id_feature_name: Optional[tfgnn.FieldName] = None,
+      hop_feature_name: Optional[tfgnn.FieldName] = None,
+      seed_timestamps: Optional[tf.Tensor] = None,
       ) -> tfgnn.GraphTensor:
     """Samples GraphTensor starting from seed nodes `node_idx`.
 
@@ -828,23 +1360,59 @@ class GraphSampler:
         same number of times (+/- 1, if sample_size % neighbors != 0).
       node_feature_gather_fn: Forwarded to as_graph_tensor.
       static_sizes: Forwarded to as_graph_tensor.
+      global_id_feature_name: Forwarded to as_graph_tensor.
+      hop_feature_name: Forwarded to as_graph_tensor.
+      seed_timestamps: Forwarded to sample_walk_tree.
 
     Returns:
       `tfgnn.GraphTensor` containing subgraphs traversed as random trees rooted
       on input `node_idx`.
     """
     walk_tree = self.sample_walk_tree(
-        node_idx, sampling_spec=sampling_spec, sampling_mode=sampling_mode)
+        node_idx, sampling_spec=sampling_spec, sampling_mode=sampling_mode,
+        seed_timestamps=seed_timestamps)
     return walk_tree.as_graph_tensor(
         node_feature_gather_fn or self.gather_node_features_dict,
-        static_sizes=static_sizes)
+        static_sizes=static_sizes,
+        global_id_feature_name=global_id_feature_name,
+        hop_feature_name=hop_feature_name)
 
   def gather_node_features_dict(self, node_set_name, node_idx):
+    features = self._gather_in_memory_node_features_dict(
+        node_set_name, node_idx)
+    if self.node_feature_store is not None:
+      features.update(self.node_feature_store.gather_node_features_dict(
+          node_set_name, node_idx))
+    return features
+
+  def _gather_in_memory_node_features_dict(self, node_set_name, node_idx):
     features = self.graph_data.node_features_dicts().get(node_set_name, {})
     features = {feature_name: tf.gather(feature_value, node_idx)
                 for feature_name, feature_value in features.items()}
     return features
 
+  def _gather_and_prefetch_node_features_dict(self, node_set_name, node_idx):
+    """Gathers in-memory features and starts prefetching stored features."""
+    prefetched = self.node_feature_store.prefetch_node_features(
+        node_set_name, node_idx)
+    with tf.control_dependencies([prefetched]):
+      features = self._gather_in_memory_node_features_dict(
+          node_set_name, node_idx)
+      features[_STORE_NODE_ID_FEATURE_NAME] = tf.identity(node_idx)
+    return features
+
+  def _add_stored_node_features(
+      self, graph: tfgnn.GraphTensor) -> tfgnn.GraphTensor:
+    """Adds store features to graph from `_gather_and_prefetch_*` above."""
+    node_sets = {}
+    for node_set_name, node_set in graph.node_sets.items():
+      features = dict(node_set.features)
+      node_ids = features.pop(_STORE_NODE_ID_FEATURE_NAME)
+      features.update(self.node_feature_store.gather_node_features_dict(
+          node_set_name, node_ids))
+      node_sets[node_set_name] = features
+    return graph.replace_features(node_sets=node_sets)
+
   def create_context(
       self, sampled_node_ids: Mapping[str, tf.Tensor], seed_nodes: tf.Tensor):
     """Create `tfgnn.Context` for `GraphTensor` seeded at `seed_nodes`.
@@ -867,8 +1435,9 @@ class NodeClassificationGraphSampler(GraphSampler):
     super().__init__(graph_data, **sampler_kwargs)
     self.graph_data = graph_data
 
-  def gather_node_features_dict(self, node_set_name, node_idx):
-    features = super().gather_node_features_dict(node_set_name, node_idx)
+  def _gather_in_memory_node_features_dict(self, node_set_name, node_idx):
+    features = super()._gather_in_memory_node_features_dict(
+        node_set_name, node_idx)
     if node_set_name == self.graph_data.labeled_nodeset:
       features['label'] = tf.gather(self.graph_data.labels(), node_idx)
 
@@ -910,6 +1479,8 @@ class NodeClassificationGraphSampler(GraphSampler):
       sampling_mode=EdgeSampling.WITH_REPLACEMENT,
       repeat: Union[bool, int] = True, shuffle=True,
       static_sizes: bool = False,
+      global_id_feature_name: Optional[tfgnn.FieldName] = None,
+      hop_feature_name: Optional[tfgnn.FieldName] = None,
       ) -> tf.data.Dataset:
     """Returns dataset with elements (`GraphTensor`, labels), seeded at `split`.
 
@@ -938,6 +1509,8 @@ class NodeClassificationGraphSampler(GraphSampler):
         not be repeated.
       shuffle: If set, the nodes will be shuffled.
       static_sizes: Forwarded to sample_sub_graph.
+      global_id_feature_name: Forwarded to sample_sub_graph.
+      hop_feature_name: Forwarded to sample_sub_graph.
     """
     graph_data = self.graph_data.with_labels_as_features(True)
     seed_nodes = self._get_seed_nodes()
@@ -958,9 +1531,24 @@ class NodeClassificationGraphSampler(GraphSampler):
 
     dataset = dataset.batch(num_seed_nodes)
 
-    dataset = dataset.map(functools.partial(
-        self.sample_sub_graph, sampling_mode=sampling_mode,
-        sampling_spec=sampling_spec, static_sizes=static_sizes))
+    if self.node_feature_store is None:
+      dataset = dataset.map(functools.partial(
+          self.sample_sub_graph, sampling_mode=sampling_mode,
+          sampling_spec=sampling_spec, static_sizes=static_sizes,
+          global_id_feature_name=global_id_feature_name,
+          hop_feature_name=hop_feature_name))
+    else:
+      # Stored features are gathered in a later stage than sampling, so that
+      # reading features of one subgraph (prefetched when it was sampled)
+      # overlaps with sampling the next subgraph.
+      dataset = dataset.map(functools.partial(
+          self.sample_sub_graph, sampling_mode=sampling_mode,
+          sampling_spec=sampling_spec, static_sizes=static_sizes,
+          node_feature_gather_fn=self._gather_and_prefetch_node_features_dict,
+          global_id_feature_name=global_id_feature_name,
+          hop_feature_name=hop_feature_name))
+      dataset = dataset.prefetch(tf.data.AUTOTUNE)
+      dataset = dataset.map(self._add_stored_node_features)
 
     if pop_labels_from_graph:
       num_classes = graph_data.num_classes()
@@ -969,6 +1557,520 @@ class NodeClassificationGraphSampler(GraphSampler):
 
     return dataset
 
+  def as_batched_dataset(
+      self,
+      sampling_spec: sampling_spec_pb2.SamplingSpec,
+      batch_size: Optional[int] = None,
+      *,
+      size_constraints: Optional[tfgnn.SizeConstraints] = None,
+      pop_labels_from_graph: bool = True,
+      sampling_mode=EdgeSampling.WITH_REPLACEMENT,
+      repeat: Union[bool, int] = True, shuffle=True,
+      num_parallel_calls: int = tf.data.AUTOTUNE,
+      deterministic: bool = False,
+      global_id_feature_name: Optional[tfgnn.FieldName] = None,
+      hop_feature_name: Optional[tfgnn.FieldName] = None,
+      jit_compile: bool = False,
+      ) -> tf.data.Dataset:
+    """Returns dataset of batched subgraphs padded to static sizes.
+
+    Unlike `as_dataset()`, which samples one subgraph around `num_seed_nodes`
+    seeds, this samples an independent subgraph for every seed node and
+    returns them as graph components of a scalar `GraphTensor`. Subgraphs of
+    all seed nodes in a batch are sampled together with vectorized ops, and
+    `num_parallel_calls` batches are sampled in parallel. Every batch is padded
+    with `tfgnn.pad_to_total_sizes()`, so that all batches have the same static
+    sizes of node sets and edge sets. The seed nodes are shuffled by drawing a
+    random permutation for each epoch, which does not need a shuffle buffer.
+    Batches are prefetched.
+
+    Subgraphs are batched either by `batch_size` or by `size_constraints`
+    (exactly one must be set):
+
+      * With `batch_size`, every batch has `batch_size` subgraphs and is padded
+        to the maximum sizes allowed by the `sampling_spec` (see
+        `get_size_constraints()`). The last incomplete batch is dropped.
+      * With `size_constraints`, subgraphs are batched by `dynamic_batch()`,
+        as many as fit the `size_constraints`, and padded to them.
+
+    Padding adds graph components to the end of each batch. Context feature
+    "seed_nodes.<labeledNodeSetName>" holds the positions of seed nodes in the
+    batch (one per graph component). If `pop_labels_from_graph == True`
+    (default), the dataset yields triplets `(GraphTensor, labels, weights)`,
+    where `labels` has shape `[num_components, 1, num_classes]` and `weights`
+    with shape `[num_components, 1]` is 1.0 for sampled graph components and
+    0.0 for padding, suitable as Keras sample weights. Otherwise, the dataset
+    yields `GraphTensor`s with labels as node features.
+
+    Args:
+      sampling_spec: SamplingSpec proto to indicate number of hops and number of
+        samples per hop.
+      batch_size: The number of subgraphs in each batch.
+      size_constraints: The total sizes of batches, for dynamic batching.
+      pop_labels_from_graph: If set (default), the labels of seed nodes are
+        returned separately, along with their weights, as described above.
+      sampling_mode: to indicate sampling with VS without replacement.
+      repeat: If True, then the dataset will be infinitely repeated. If an int,
+        then dataset will be repeated this many times. If False, dataset will
+        not be repeated.
+      shuffle: If set, the seed nodes will be shuffled for every epoch.
+      num_parallel_calls: The number of subgraphs sampled in parallel.
+      deterministic: If set, subgraphs are returned in the order of their seed
+        nodes. Otherwise, subgraphs sampled faster can be returned first.
+      global_id_feature_name: Forwarded to sample_sub_graph.
+      hop_feature_name: Forwarded to sample_sub_graph.
+      jit_compile: If set, subgraphs are sampled with static shapes and padded
+        as they are sampled, by a function compiled with XLA, which saves the
+        dispatch of many small ops per batch (see
+        `_sample_padded_components()`). Node features are gathered outside of
+        XLA. Requires `batch_size` and `RANDOM_UNIFORM` sampling. Padding edges
+        differ from those inserted by `tfgnn.pad_to_total_sizes()`.
+    """
+    if (batch_size is None) == (size_constraints is None):
+      raise ValueError(
+          'Exactly one of `batch_size` or `size_constraints` must be set.')
+    if jit_compile:
+      if batch_size is None:
+        raise ValueError('`jit_compile=True` requires `batch_size`.')
+      if any(sampling_op.strategy !=
+             sampling_spec_pb2.SamplingStrategy.RANDOM_UNIFORM
+             for sampling_op in sampling_spec.sampling_ops):
+        raise ValueError(
+            '`jit_compile=True` supports only "RANDOM_UNIFORM" sampling ops.')
+    if batch_size is not None:
+      size_constraints = self.get_size_constraints(sampling_spec, batch_size)
+
+    seed_nodes = self._get_seed_nodes()
+    dataset = tf.data.Dataset.from_tensors(seed_nodes)
+    if repeat:
+      if isinstance(repeat, bool) and repeat:
+        dataset = dataset.repeat()
+      else:
+        dataset = dataset.repeat(repeat)
+    if shuffle:
+      dataset = dataset.map(tf.random.shuffle)
+    dataset = dataset.unbatch()
+
+    # Subgraphs of all seed nodes in a batch are sampled together. With dynamic
+    # batching, each batch of one subgraph is a scalar graph tensor to batch.
+    dataset = dataset.batch(batch_size or 1, drop_remainder=True)
+    if jit_compile:
+      @tf.function(jit_compile=True)
+      def sample_fn(seed_nodes):
+        return self._sample_padded_components(
+            seed_nodes, sampling_spec=sampling_spec,
+            sampling_mode=sampling_mode,
+            with_hops=hop_feature_name is not None)
+
+      dataset = dataset.map(
+          functools.partial(
+              self._sample_padded_graph, sample_fn=sample_fn,
+              global_id_feature_name=global_id_feature_name,
+              hop_feature_name=hop_feature_name,
+              pop_labels_from_graph=pop_labels_from_graph),
+          num_parallel_calls=num_parallel_calls, deterministic=deterministic)
+      return dataset.prefetch(tf.data.AUTOTUNE)
+
+    dataset = dataset.map(
+        functools.partial(
+            self._sample_components, sampling_spec=sampling_spec,
+            sampling_mode=sampling_mode,
+            global_id_feature_name=global_id_feature_name,
+            hop_feature_name=hop_feature_name),
+        num_parallel_calls=num_parallel_calls, deterministic=deterministic)
+    if batch_size is None:
+      dataset = batching_utils.dynamic_batch(dataset, size_constraints)
+      dataset = dataset.map(self._merge_components)
+
+    dataset = dataset.map(
+        functools.partial(
+            self._pad, size_constraints=size_constraints,
+            pop_labels_from_graph=pop_labels_from_graph),
+        num_parallel_calls=num_parallel_calls, deterministic=deterministic)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+  def get_size_constraints(
+      self, sampling_spec: sampling_spec_pb2.SamplingSpec,
+      batch_size: int) -> tfgnn.SizeConstraints:
+    """Returns total sizes for padding `batch_size` sampled subgraphs.
+
+    Each subgraph sampled with `sampling_spec` around one seed node has at most
+    as many edges as sampled along all paths of the `sampling_spec`. The sizes
+    allow one more graph component and one more node in each node set for
+    padding.
+
+    Args:
+      sampling_spec: SamplingSpec proto used to sample the subgraphs.
+      batch_size: The number of subgraphs sampled around one seed node each.
+    """
+    op_sizes = {}  # Op name -> max number of nodes sampled by op per seed.
+    max_num_nodes = collections.defaultdict(int)
+    max_num_edges = collections.defaultdict(int)
+
+    def process_seed_op(seed_op: sampling_spec_pb2.SeedOp):
+      op_sizes[seed_op.op_name] = 1
+      max_num_nodes[seed_op.node_set_name] += 1
+
+    def process_sampling_op(sampling_op: sampling_spec_pb2.SamplingOp):
+      num_edges = sampling_op.sample_size * sum(
+          op_sizes[op_name] for op_name in sampling_op.input_op_names)
+      op_sizes[sampling_op.op_name] = num_edges
+      max_num_edges[sampling_op.edge_set_name] += num_edges
+      max_num_nodes[self.edge_types[sampling_op.edge_set_name][1]] += num_edges
+
+    process_sampling_spec_topologically(
+        sampling_spec, process_callback=process_sampling_op,
+        init_callback=process_seed_op)
+
+    node_set_names = set()
+    for edge_set_name in max_num_edges:
+      node_set_names.update(self.edge_types[edge_set_name])
+    return tfgnn.SizeConstraints(
+        total_num_components=batch_size + 1,
+        total_num_nodes={
+            node_set_name: batch_size * max_num_nodes[node_set_name] + 1
+            for node_set_name in node_set_names},
+        total_num_edges={
+            edge_set_name: batch_size * num_edges
+            for edge_set_name, num_edges in max_num_edges.items()})
+
+  def _sample_components(
+      self, seed_nodes: tf.Tensor, *,
+      sampling_spec: sampling_spec_pb2.SamplingSpec,
+      sampling_mode: Optional[EdgeSampling],
+      global_id_feature_name: Optional[tfgnn.FieldName],
+      hop_feature_name: Optional[tfgnn.FieldName]) -> tfgnn.GraphTensor:
+    """Samples independent subgraphs around seed nodes as graph components.
+
+    The walk tree is sampled for all seed nodes at once. Then each node ID is
+    replaced by the key `component * num_nodes + node_id`, where `component` is
+    the position of its seed node, so that nodes are deduplicated only within
+    the subgraph of each seed node, and sorted keys group nodes by components.
+
+    Args:
+      seed_nodes: int vector of seed nodes, one per graph component.
+      sampling_spec: Forwarded to sample_walk_tree.
+      sampling_mode: Forwarded to sample_walk_tree.
+      global_id_feature_name: As for `TypedWalkTree.as_graph_tensor`.
+      hop_feature_name: As for `TypedWalkTree.as_graph_tensor`.
+
+    Returns:
+      Scalar `GraphTensor` with one graph component per seed node.
+    """
+    node_counts = self.graph_data.node_counts()
+    num_components = tf.size(seed_nodes, out_type=tf.int64)
+
+    def to_keys(nodes: tf.Tensor, node_set_name: tfgnn.NodeSetName):
+      components = tf.range(num_components)
+      components = tf.reshape(components, [-1] + [1] * (nodes.shape.rank - 1))
+      return components * node_counts[node_set_name] + tf.cast(
+          nodes, tf.int64)
+
+    walk_tree = self.sample_walk_tree(
+        seed_nodes, sampling_spec=sampling_spec, sampling_mode=sampling_mode)
+    seed_node_set_name = sampling_spec.seed_op.node_set_name
+    keyed_tree = walk_tree.map_nodes(to_keys, seed_node_set_name)
+    seed_keys = keyed_tree.nodes
+    edge_lists = keyed_tree.get_edge_lists()
+
+    # Node set name -> sorted unique node keys. Seed nodes are always included,
+    # even if no edges were sampled for them.
+    node_keys = collections.defaultdict(list)
+    node_keys[seed_node_set_name].append(seed_keys)
+    for edge_set_name, edges in edge_lists.items():
+      src_set_name, dst_set_name = self.edge_types[edge_set_name]
+      node_keys[src_set_name].append(edges[0])
+      node_keys[dst_set_name].append(edges[1])
+    node_keys = {name: tf.sort(tf.unique(tf.concat(keys, 0)).y)
+                 for name, keys in node_keys.items()}
+
+    def component_sizes(keys: tf.Tensor, node_set_name: tfgnn.NodeSetName):
+      return tf.math.unsorted_segment_sum(
+          tf.ones_like(keys, tf.int32), keys // node_counts[node_set_name],
+          num_components)
+
+    node_hops = (keyed_tree.get_node_hops()
+                 if hop_feature_name is not None else None)
+    node_sets = {}
+    for node_set_name, keys in node_keys.items():
+      node_ids = keys % node_counts[node_set_name]
+      features = dict(self.gather_node_features_dict(node_set_name, node_ids))
+      if global_id_feature_name is not None:
+        features[global_id_feature_name] = node_ids
+      if hop_feature_name is not None:
+        features[hop_feature_name] = _min_hops(node_hops[node_set_name], keys)
+      node_sets[node_set_name] = tfgnn.NodeSet.from_fields(
+          sizes=component_sizes(keys, node_set_name), features=features)
+
+    edge_sets = {}
+    for edge_set_name, edges in edge_lists.items():
+      src_set_name, dst_set_name = self.edge_types[edge_set_name]
+      # Edges are grouped by components, as their source nodes.
+      order = tf.argsort(edges[0] // node_counts[src_set_name], stable=True)
+      edges = tf.gather(edges, order, axis=1)
+      edge_sets[edge_set_name] = tfgnn.EdgeSet.from_fields(
+          sizes=component_sizes(edges[0], src_set_name),
+          adjacency=tfgnn.Adjacency.from_indices(
+              source=(src_set_name,
+                      tf.searchsorted(node_keys[src_set_name], edges[0])),
+              target=(dst_set_name,
+                      tf.searchsorted(node_keys[dst_set_name], edges[1]))))
+
+    labeled_nodeset = self.graph_data.labeled_nodeset
+    seed_node_positions = tf.searchsorted(node_keys[labeled_nodeset], seed_keys)
+    context = tfgnn.Context.from_fields(
+        sizes=tf.ones_like(seed_node_positions),
+        features={
+            'seed_nodes.' + labeled_nodeset:
+                tf.expand_dims(seed_node_positions, -1)
+        })
+    return tfgnn.GraphTensor.from_pieces(
+        node_sets=node_sets, edge_sets=edge_sets, context=context)
+
+  def _sample_padded_components(
+      self, seed_nodes: tf.Tensor, *,
+      sampling_spec: sampling_spec_pb2.SamplingSpec,
+      sampling_mode: Optional[EdgeSampling],
+      with_hops: bool) -> Mapping[str, Any]:
+    """Fixed-shape version of `_sample_components()`, which XLA can compile.
+
+    Samples independent subgraphs around seed nodes as `_sample_components()`
+    does, and returns them padded as `_pad()` pads them to
+    `get_size_constraints(sampling_spec, batch_size)`, but as tensors of static
+    shapes. Instead of `tf.unique()`, the keys of nodes (with the largest int64
+    as the key of invalid nodes) are sorted, and the first of equal keys are
+    compacted to the front with a segment min. Instead of `tf.searchsorted()`,
+    the positions of sorted keys are mapped back onto the walk tree, from which
+    edges between positions are taken. (On CPU, XLA compiles `tf.searchsorted()`
+    and `tf.math.cumsum()` to ops with quadratic cost.) There is one more node
+    than nodes sampled along all paths, so at least one padding node. Padding
+    nodes and edges are in the last graph component. Padding edges link the
+    last padding node to itself.
+
+    Args:
+      seed_nodes: int vector of seed nodes, of static size `batch_size`.
+      sampling_spec: Forwarded to sample_walk_tree. Sampling ops must be
+        `RANDOM_UNIFORM`.
+      sampling_mode: Forwarded to sample_walk_tree.
+      with_hops: If set, the smallest number of hops to each node is returned.
+
+    Returns:
+      dict with "node_ids", "node_sizes" and (if `with_hops`) "hops", mapping
+      node set names to int vectors, with "edge_sizes" and "edges", mapping edge
+      set names to int vectors and to pairs of source and target positions, and
+      with "seed_positions", the positions of seed nodes.
+    """
+    node_counts = self.graph_data.node_counts()
+    batch_size = seed_nodes.shape[0]
+    num_components = batch_size + 1
+    padding_key = tf.int64.max
+
+    def to_keys(nodes: tf.Tensor, node_set_name: tfgnn.NodeSetName):
+      components = tf.range(batch_size, dtype=tf.int64)
+      components = tf.reshape(components, [-1] + [1] * (nodes.shape.rank - 1))
+      return components * node_counts[node_set_name] + tf.cast(
+          nodes, tf.int64)
+
+    walk_tree = self.sample_walk_tree(
+        seed_nodes, sampling_spec=sampling_spec, sampling_mode=sampling_mode,
+        fixed_shape=True)
+    seed_node_set_name = sampling_spec.seed_op.node_set_name
+    keyed_tree = walk_tree.map_nodes(to_keys, seed_node_set_name)
+
+    trees = keyed_tree.get_trees(seed_node_set_name)
+    merged_trees = set()
+    for _, tree in trees:
+      merged_trees.update(id(merged_tree) for merged_tree in tree.merged_steps)
+
+    def flatten(values: tf.Tensor, tree: TypedWalkTree) -> tf.Tensor:
+      return tf.reshape(tf.broadcast_to(values, tree.nodes.shape), [-1])
+
+    result = collections.defaultdict(dict)
+    positions = {}  # Node set name -> positions of nodes of its trees.
+    padding_positions = {}  # Node set name -> position of the last node.
+    for node_set_name in dict.fromkeys(name for name, _ in trees):
+      node_set_trees = [tree for name, tree in trees if name == node_set_name]
+      keys = tf.concat([flatten(t.nodes, t) for t in node_set_trees], 0)
+      hops = tf.concat([flatten(t.hops, t) for t in node_set_trees], 0)
+      valid_mask = tf.concat(
+          [flatten(t.valid_mask, t) for t in node_set_trees], 0)
+      # Nodes of merged trees are also in the trees they were merged from, so
+      # only the others are counted to find the (static) number of nodes.
+      size = sum(tree.nodes.shape.num_elements() for tree in node_set_trees
+                 if id(tree) not in merged_trees)
+      padding_positions[node_set_name] = size
+      keys = tf.where(valid_mask, keys, tf.constant(padding_key, tf.int64))
+      order = tf.argsort(keys)
+      keys = tf.gather(keys, order)
+      is_new = keys != tf.concat([tf.constant([-1], tf.int64), keys[:-1]], 0)
+      # Position of every key among the unique keys. Invalid keys are sorted
+      # last and go to the extra segment `size`, which is a padding node.
+      segments = tf.where(keys != padding_key,
+                          _prefix_sum(tf.cast(is_new, tf.int32)) - 1, size)
+      positions[node_set_name] = tf.split(
+          tf.scatter_nd(tf.expand_dims(order, -1), segments, [keys.shape[0]]),
+          [tree.nodes.shape.num_elements() for tree in node_set_trees])
+      # Empty segments get the largest int64, i.e., the padding key.
+      keys = tf.math.unsorted_segment_min(keys, segments, size + 1)
+      is_node = keys != padding_key
+      components = tf.where(is_node, keys // node_counts[node_set_name],
+                            tf.constant(batch_size, tf.int64))
+      result['node_ids'][node_set_name] = tf.where(
+          is_node, keys % node_counts[node_set_name], tf.zeros_like(keys))
+      result['node_sizes'][node_set_name] = tf.math.unsorted_segment_sum(
+          tf.ones_like(keys, tf.int32), components, num_components)
+      if with_hops:
+        hops = tf.math.unsorted_segment_min(
+            tf.gather(hops, order), segments, size + 1)
+        result['hops'][node_set_name] = tf.where(
+            is_node, hops, tf.zeros_like(hops))
+
+    # The walk tree with positions of nodes as nodes, hence with edges between
+    # positions (as `tf.searchsorted()` would find them).
+    chunks = {name: iter(values) for name, values in positions.items()}
+    positions_tree = keyed_tree.map_nodes(
+        lambda nodes, name: tf.reshape(next(chunks[name]), nodes.shape),
+        seed_node_set_name)
+    # Edge set name -> triplets `(source, target, valid_mask)` of edges sampled
+    # from each tree, shaped `[batch_size, num_edges_per_seed]`.
+    edge_lists = collections.defaultdict(list)
+    for _, tree in positions_tree.get_trees(seed_node_set_name):
+      for edge_set_name, child_tree in tree.next_steps:
+        source = tf.broadcast_to(
+            tf.expand_dims(tree.nodes, -1), child_tree.nodes.shape)
+        edge_lists[edge_set_name].append(tuple(
+            tf.reshape(values, [batch_size, -1]) for values in (
+                source, child_tree.nodes, child_tree.valid_mask)))
+    for edge_set_name, triplets in edge_lists.items():
+      src_set_name, dst_set_name = self.edge_types[edge_set_name]
+      source, target, valid_mask = (tf.concat(values, 1)
+                                    for values in zip(*triplets))
+      num_edges = valid_mask.shape.num_elements()
+      # Valid edges are grouped by components (rows), followed by the invalid
+      # edges as padding. Their positions are counted rather than sorted.
+      is_valid = tf.cast(valid_mask, tf.int32)
+      is_invalid = 1 - is_valid
+      num_valid = tf.reduce_sum(is_valid, 1)
+      num_invalid = tf.reduce_sum(is_invalid, 1)
+      valid_offsets = _prefix_sum(num_valid) - num_valid
+      invalid_offsets = (tf.reduce_sum(num_valid) + _prefix_sum(num_invalid)
+                         - num_invalid)
+      edge_positions = tf.where(
+          valid_mask,
+          tf.expand_dims(valid_offsets, -1) + _prefix_sum(is_valid) - 1,
+          tf.expand_dims(invalid_offsets, -1) + _prefix_sum(is_invalid) - 1)
+      edge_positions = tf.reshape(edge_positions, [-1, 1])
+      result['edges'][edge_set_name] = tuple(
+          tf.scatter_nd(
+              edge_positions,
+              tf.reshape(tf.where(valid_mask, node_positions,
+                                  padding_positions[node_set_name]), [-1]),
+              [num_edges])
+          for node_positions, node_set_name in ((source, src_set_name),
+                                                (target, dst_set_name)))
+      result['edge_sizes'][edge_set_name] = tf.concat(
+          [num_valid, [num_edges - tf.reduce_sum(num_valid)]], 0)
+    # Seeds are the nodes of the root of the tree.
+    result['seed_positions'] = positions_tree.nodes
+    return dict(result)
+
+  def _sample_padded_graph(
+      self, seed_nodes: tf.Tensor, *,
+      sample_fn: Callable[[tf.Tensor], Mapping[str, Any]],
+      global_id_feature_name: Optional[tfgnn.FieldName],
+      hop_feature_name: Optional[tfgnn.FieldName],
+      pop_labels_from_graph: bool):
+    """Builds padded `GraphTensor` from `_sample_padded_components()`.
+
+    Args:
+      seed_nodes: int vector of seed nodes, one per graph component.
+      sample_fn: `_sample_padded_components()`, e.g., compiled with XLA.
+      global_id_feature_name: As for `TypedWalkTree.as_graph_tensor`.
+      hop_feature_name: As for `TypedWalkTree.as_graph_tensor`.
+      pop_labels_from_graph: If set, labels of seed nodes are popped, as by
+        `_pad()`.
+
+    Returns:
+      Scalar `GraphTensor` with one graph component per seed node and one more
+      for padding, or a triplet `(GraphTensor, labels, weights)`.
+    """
+    sample = sample_fn(seed_nodes)
+    batch_size = seed_nodes.shape[0]
+
+    node_sets = {}
+    for node_set_name, node_ids in sample['node_ids'].items():
+      sizes = sample['node_sizes'][node_set_name]
+      # Padding nodes have zero features, as from `tfgnn.pad_to_total_sizes()`.
+      is_node = tf.range(tf.size(node_ids)) < tf.reduce_sum(sizes[:-1])
+      features = {}
+      for feature_name, value in self.gather_node_features_dict(
+          node_set_name, node_ids).items():
+        mask = tf.reshape(is_node, [-1] + [1] * (value.shape.rank - 1))
+        features[feature_name] = tf.where(mask, value, tf.zeros_like(value))
+      if global_id_feature_name is not None:
+        features[global_id_feature_name] = node_ids
+      if hop_feature_name is not None:
+        features[hop_feature_name] = sample['hops'][node_set_name]
+      node_sets[node_set_name] = tfgnn.NodeSet.from_fields(
+          sizes=sizes, features=features)
+
+    edge_sets = {}
+    for edge_set_name, (source, target) in sample['edges'].items():
+      src_set_name, dst_set_name = self.edge_types[edge_set_name]
+      edge_sets[edge_set_name] = tfgnn.EdgeSet.from_fields(
+          sizes=sample['edge_sizes'][edge_set_name],
+          adjacency=tfgnn.Adjacency.from_indices(
+              source=(src_set_name, source), target=(dst_set_name, target)))
+
+    labeled_nodeset = self.graph_data.labeled_nodeset
+    seed_node_positions = tf.concat(
+        [sample['seed_positions'],
+         tf.zeros([1], sample['seed_positions'].dtype)], 0)
+    context = tfgnn.Context.from_fields(
+        sizes=tf.ones_like(seed_node_positions),
+        features={
+            'seed_nodes.' + labeled_nodeset:
+                tf.expand_dims(seed_node_positions, -1)
+        })
+    graph = tfgnn.GraphTensor.from_pieces(
+        node_sets=node_sets, edge_sets=edge_sets, context=context)
+    if not pop_labels_from_graph:
+      return graph
+    return self._pop_labels(graph, tf.range(batch_size + 1) < batch_size)
+
+  def _merge_components(self, graph: tfgnn.GraphTensor) -> tfgnn.GraphTensor:
+    """Merges batch of subgraphs into components of a scalar graph."""
+    graph = graph.merge_batch_to_components()
+    # Seed node positions are relative to each subgraph: offsets them by the
+    # number of nodes in all previous subgraphs.
+    node_set_name = self.graph_data.labeled_nodeset
+    seed_feature_name = 'seed_nodes.' + node_set_name
+    seed_node_positions = graph.context[seed_feature_name]
+    offsets = tf.math.cumsum(
+        graph.node_sets[node_set_name].sizes, exclusive=True)
+    context_features = dict(graph.context.features)
+    context_features[seed_feature_name] = seed_node_positions + tf.cast(
+        tf.expand_dims(offsets, -1), seed_node_positions.dtype)
+    return graph.replace_features(context=context_features)
+
+  def _pad(
+      self, graph: tfgnn.GraphTensor, *,
+      size_constraints: tfgnn.SizeConstraints,
+      pop_labels_from_graph: bool):
+    """Pads graph to total sizes and optionally pops labels of seed nodes."""
+    graph, mask = tfgnn.pad_to_total_sizes(graph, size_constraints)
+    if not pop_labels_from_graph:
+      return graph
+    return self._pop_labels(graph, mask)
+
+  def _pop_labels(self, graph: tfgnn.GraphTensor, mask: tf.Tensor):
+    """Pops labels of seed nodes, with weights 0.0 where `mask` is False."""
+    graph, labels = reader_utils.pop_labels_from_graph(
+        self.graph_data.num_classes(), graph,
+        node_set_name=self.graph_data.labeled_nodeset)
+    weights = tf.expand_dims(tf.cast(mask, tf.float32), -1)
+    return graph, labels, weights
+
 
 # Can be replaced with: `_t = tf.convert_to_tensor`.
 def as_tensor(obj: Any) -> tf.Tensor:
@@ -83,6 +83,108 @@ class ToyDataset(datasets.InMemoryGraphData):
     }
 
 
+class ToyNodeClassificationDataset(datasets.NodeClassificationGraphData):
+  """Directed ring of 10 nodes, each linked to the next two nodes."""
+
+  def __init__(self):
+    super().__init__()
+    self.num_nodes = 10
+    source = np.repeat(np.arange(self.num_nodes), 2)
+    target = (source + np.tile([1, 2], self.num_nodes)) % self.num_nodes
+    self.edgelist = tf.convert_to_tensor(np.stack([source, target]))
+
+  def num_classes(self) -> int:
+    return 3
+
+  def node_features_dicts_without_labels(self) -> Mapping[
+      tfgnn.NodeSetName, MutableMapping[str, tf.Tensor]]:
+    return {'nodes': {'#id': tf.range(self.num_nodes)}}
+
+  def node_counts(self) -> Mapping[tfgnn.NodeSetName, int]:
+    return {'nodes': self.num_nodes}
+
+  def edge_lists(self) -> Mapping[Tuple[str, str, str], tf.Tensor]:
+    return {('nodes', 'edges', 'nodes'): self.edgelist}
+
+  def node_split(self) -> datasets.NodeSplit:
+    return datasets.NodeSplit(
+        train=tf.range(8, dtype=tf.int64),
+        validation=tf.constant([8], tf.int64),
+        test=tf.constant([9], tf.int64))
+
+  @property
+  def labeled_nodeset(self) -> tfgnn.NodeSetName:
+    return 'nodes'
+
+  def labels(self) -> tf.Tensor:
+    return tf.range(self.num_nodes) % 3
+
+  def test_labels(self) -> tf.Tensor:
+    return self.labels()
+
+
+class WeightedStarDataset(datasets.InMemoryGraphData):
+  """Node 0 linked to nodes 1..4 with weights 0, 1, 2, 5; node 5 to node 1."""
+
+  def node_counts(self) -> Mapping[tfgnn.NodeSetName, int]:
+    return {'nodes': 6}
+
+  def node_features_dicts(self) -> Mapping[
+      tfgnn.NodeSetName, MutableMapping[str, tf.Tensor]]:
+    return {'nodes': {'#id': tf.range(6)}}
+
+  def edge_lists(self) -> Mapping[Tuple[str, str, str], tf.Tensor]:
+    return {('nodes', 'edges', 'nodes'): tf.constant(
+        [[0, 0, 0, 0, 5], [1, 2, 3, 4, 1]])}
+
+  def edge_weights(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
+    return {'edges': tf.constant([0.0, 1.0, 2.0, 5.0, 3.0])}
+
+
+class TemporalStarDataset(datasets.NodeClassificationGraphData):
+  """Node 0 linked to nodes 1, 2, 3, 4, 1 at times 40, 10, 30, 20, 5.
+
+  Node 5 is linked to node 1 at time 25. Nodes 0 and 5 have timestamps 35 and
+  15, the others 50.
+  """
+
+  def num_classes(self) -> int:
+    return 2
+
+  def node_features_dicts_without_labels(self) -> Mapping[
+      tfgnn.NodeSetName, MutableMapping[str, tf.Tensor]]:
+    return {'nodes': {'#id': tf.range(6)}}
+
+  def node_counts(self) -> Mapping[tfgnn.NodeSetName, int]:
+    return {'nodes': 6}
+
+  def edge_lists(self) -> Mapping[Tuple[str, str, str], tf.Tensor]:
+    return {('nodes', 'edges', 'nodes'): tf.constant(
+        [[0, 0, 0, 0, 0, 5], [1, 2, 3, 4, 1, 1]])}
+
+  def edge_timestamps(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
+    return {'edges': tf.constant([40, 10, 30, 20, 5, 25], tf.int64)}
+
+  def node_timestamps(self) -> Mapping[tfgnn.NodeSetName, tf.Tensor]:
+    return {'nodes': tf.constant([35, 50, 50, 50, 50, 15], tf.int64)}
+
+  def node_split(self) -> datasets.NodeSplit:
+    return datasets.NodeSplit(
+        train=tf.constant([0, 5], tf.int64),
+        validation=tf.constant([1], tf.int64),
+        test=tf.constant([2], tf.int64))
+
+  @property
+  def labeled_nodeset(self) -> tfgnn.NodeSetName:
+    return 'nodes'
+
+  def labels(self) -> tf.Tensor:
+    return tf.range(6) % 2
+
+  def test_labels(self) -> tf.Tensor:
+    return self.labels()
+
+
 class IntArithmeticSamplerTest(tf.test.TestCase, parameterized.TestCase):
 
   @parameterized.named_parameters(
@@ -290,6 +392,34 @@ class IntArithmeticSamplerTest(tf.test.TestCase, parameterized.TestCase):
 
     self.assertTrue(are_all_edges_valid(eats_src, eats_tgt))
 
+  @parameterized.named_parameters(('DynamicSizes', False),
+                                  ('StaticSizes', True))
+  def test_as_graph_tensor_with_global_ids_and_hops(self, static_sizes):
+    toy_dataset = ToyDataset()
+    sampler = ia_sampler.GraphSampler(toy_dataset)
+    source_node_ids = tf.constant(
+        [toy_dataset.animal2id['dog'], toy_dataset.animal2id['cat']])
+    spec = sampling_spec_builder.SamplingSpecBuilder(
+        toy_dataset.graph_schema(),
+        default_strategy=sampling_spec_builder.SamplingStrategy.RANDOM_UNIFORM)
+    spec = spec.seed('animals').sample(3, 'eats').sample(4, 'rev_eats').build()
+    walk_tree = sampler.sample_walk_tree(source_node_ids, spec)
+    graph_tensor = walk_tree.as_graph_tensor(
+        sampler.gather_node_features_dict, static_sizes=static_sizes,
+        global_id_feature_name='#global_id', hop_feature_name='#hop')
+
+    for node_set_name in ('animals', 'food'):
+      node_set = graph_tensor.node_sets[node_set_name]
+      self.assertAllEqual(node_set['#global_id'], node_set['#id'])
+
+    animals = graph_tensor.node_sets['animals']
+    expected_animal_hops = [
+        0 if animal_id in source_node_ids.numpy() else 2
+        for animal_id in animals['#global_id'].numpy()]
+    self.assertAllEqual(animals['#hop'], expected_animal_hops)
+    self.assertAllEqual(graph_tensor.node_sets['food']['#hop'],
+                        tf.ones_like(graph_tensor.node_sets['food']['#hop']))
+
   @parameterized.named_parameters(
       ('WithEagerMode', 'Layer'),
       ('TFLoadSavedModel', 'TFLoadModel'),
@@ -358,5 +488,442 @@ class IntArithmeticSamplerTest(tf.test.TestCase, parameterized.TestCase):
                                                     sampling_mode=strategy))
 
 
+class WalkDAGTest(tf.test.TestCase, parameterized.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.graph_data = ToyNodeClassificationDataset()
+    self.sampler = ia_sampler.NodeClassificationGraphSampler(self.graph_data)
+
+  def _build_dag_spec(self):
+    builder = sampling_spec_builder.SamplingSpecBuilder(
+        self.graph_data.graph_schema(),
+        default_strategy=sampling_spec_builder.SamplingStrategy.RANDOM_UNIFORM)
+    seed = builder.seed('nodes')
+    one_hop = seed.sample(2, 'edges')
+    two_hops = one_hop.sample(2, 'edges')
+    return one_hop.join([two_hops]).sample(3, 'edges').build()
+
+  def test_add_merge(self):
+    tree = ia_sampler.TypedWalkTree(tf.constant([1, 2]), owner=self.sampler)
+    child = tree.add_step(
+        'edges', tf.constant([[2, 3], [3, 3]]),
+        valid_mask=tf.constant([[True, True], [True, False]]))
+    grandchild = child.add_step('edges', tf.constant([[[3], [4]], [[4], [5]]]))
+    merged = child.add_merge([grandchild, tree], num_nodes=10)
+
+    self.assertAllEqual(merged.nodes, [[2, 3, 4, 1], [3, 4, 2, 0]])
+    self.assertAllEqual(merged.valid_mask, [[True, True, True, True],
+                                            [True, True, True, False]])
+    self.assertAllEqual(merged.hops, [[1, 1, 2, 0], [1, 2, 0, 0]])
+    self.assertEqual(child.merged_steps, [merged])
+
+  def test_add_merge_fixed_shape(self):
+    tree = ia_sampler.TypedWalkTree(tf.constant([1, 2]), owner=self.sampler)
+    child = tree.add_step(
+        'edges', tf.constant([[2, 3], [3, 3]]),
+        valid_mask=tf.constant([[True, True], [True, False]]))
+    grandchild = child.add_step('edges', tf.constant([[[3], [4]], [[4], [5]]]))
+    merged = child.add_merge([grandchild, tree], num_nodes=10,
+                             fixed_shape=True)
+
+    # Valid nodes are sorted, with the smallest number of hops.
+    self.assertEqual(merged.nodes.shape, [2, 5])
+    self.assertAllEqual(merged.valid_mask, [[True, True, True, False, True],
+                                            [True, True, True, False, False]])
+    self.assertAllEqual(merged.nodes[merged.valid_mask], [1, 2, 3, 4, 2, 3, 4])
+    self.assertAllEqual(merged.hops[merged.valid_mask], [0, 1, 1, 2, 0, 1, 2])
+
+  @parameterized.named_parameters(
+      ('WithReplacement', ia_sampler.EdgeSampling.WITH_REPLACEMENT),
+      ('WithoutReplacement', ia_sampler.EdgeSampling.WITHOUT_REPLACEMENT))
+  def test_sample_walk_dag(self, sampling_mode):
+    seed_nodes = tf.constant([0, 5])
+    walk_tree = self.sampler.sample_walk_tree(
+        seed_nodes, self._build_dag_spec(), sampling_mode=sampling_mode)
+    one_hop = walk_tree.next_steps[0][1]
+    self.assertLen(one_hop.merged_steps, 1)
+    merged = one_hop.merged_steps[0]
+    # Every frontier node is sampled once per seed node.
+    for row, seed in enumerate(seed_nodes.numpy()):
+      frontier = merged.nodes[row][merged.valid_mask[row]].numpy()
+      self.assertLen(set(frontier), len(frontier))
+      self.assertContainsSubset(frontier, (seed + np.arange(1, 5)) % 10)
+    self.assertEqual(merged.next_steps[0][1].nodes.shape[-1], 3)
+
+    graph = walk_tree.as_graph_tensor(
+        self.sampler.gather_node_features_dict,
+        global_id_feature_name='#global_id', hop_feature_name='#hop')
+    global_ids = graph.node_sets['nodes']['#global_id']
+    edges = graph.edge_sets['edges'].adjacency
+    self.assertAllInSet(
+        (tf.gather(global_ids, edges.target) -
+         tf.gather(global_ids, edges.source)) % 10, [1, 2])
+    # Seeds have hop 0, their neighbors have hop 1, others have larger hops.
+    hops = dict(zip(global_ids.numpy(), graph.node_sets['nodes']['#hop']))
+    self.assertEqual(hops[0], 0)
+    self.assertEqual(hops[5], 0)
+    for node_id, hop in hops.items():
+      self.assertGreaterEqual(hop, 1 if node_id not in (0, 5) else 0)
+
+  def test_as_batched_dataset(self):
+    spec = self._build_dag_spec()
+    size_constraints = self.sampler.get_size_constraints(spec, 2)
+    # 1 seed + 2 at 1 hop + 4 at 2 hops + 3 * (2 + 4) sampled from the merge.
+    self.assertEqual(dict(size_constraints.total_num_nodes),
+                     {'nodes': 2 * 25 + 1})
+    dataset = self.sampler.as_batched_dataset(
+        spec, batch_size=2, repeat=False, global_id_feature_name='#global_id')
+    num_batches = 0
+    for graph, _, weights in dataset:
+      num_batches += 1
+      self.assertAllEqual(weights, [[1.0], [1.0], [0.0]])
+      global_ids = graph.node_sets['nodes']['#global_id']
+      edges = graph.edge_sets['edges'].adjacency
+      self.assertAllInSet(
+          (tf.gather(global_ids, edges.target) -
+           tf.gather(global_ids, edges.source)) % 10, [0, 1, 2])
+    self.assertEqual(num_batches, 4)
+
+  def test_as_batched_dataset_jit_compile(self):
+    dataset = self.sampler.as_batched_dataset(
+        self._build_dag_spec(), batch_size=2, repeat=False, shuffle=False,
+        deterministic=True, global_id_feature_name='#global_id',
+        hop_feature_name='#hop', jit_compile=True)
+    for graph, _, weights in dataset:
+      self.assertAllEqual(weights, [[1.0], [1.0], [0.0]])
+      node_set = graph.node_sets['nodes']
+      self.assertEqual(node_set.total_size, 2 * 25 + 1)
+      components = tf.repeat(tf.range(3), node_set.sizes)
+      global_ids = node_set['#global_id']
+      for component in range(2):
+        ids = global_ids[components == component].numpy()
+        self.assertLen(set(ids), len(ids))
+      edges = graph.edge_sets['edges'].adjacency
+      self.assertAllInSet(
+          (tf.gather(global_ids, edges.target) -
+           tf.gather(global_ids, edges.source)) % 10, [0, 1, 2])
+      seed_positions = graph.context['seed_nodes.nodes'][:2, 0]
+      self.assertAllEqual(tf.gather(node_set['#hop'], seed_positions), [0, 0])
+
+
+class AsBatchedDatasetTest(tf.test.TestCase, parameterized.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.graph_data = ToyNodeClassificationDataset()
+    self.sampler = ia_sampler.NodeClassificationGraphSampler(self.graph_data)
+    self.spec = sampling_spec_builder.SamplingSpecBuilder(
+        self.graph_data.graph_schema(),
+        default_strategy=sampling_spec_builder.SamplingStrategy.RANDOM_UNIFORM,
+    ).seed('nodes').sample(2, 'edges').sample(3, 'edges').build()
+
+  def test_size_constraints(self):
+    size_constraints = self.sampler.get_size_constraints(self.spec, 4)
+    self.assertEqual(size_constraints.total_num_components, 5)
+    self.assertEqual(dict(size_constraints.total_num_nodes),
+                     {'nodes': 4 * (1 + 2 + 6) + 1})
+    self.assertEqual(dict(size_constraints.total_num_edges),
+                     {'edges': 4 * (2 + 6)})
+
+  def test_fixed_batch_size(self):
+    dataset = self.sampler.as_batched_dataset(
+        self.spec, batch_size=3, repeat=False, shuffle=False,
+        deterministic=True, global_id_feature_name='#global_id')
+    batches = list(dataset)
+    self.assertLen(batches, 2)  # The last incomplete batch is dropped.
+    for graph, labels, weights in batches:
+      self.assertEqual(graph.node_sets['nodes'].total_size, 3 * 9 + 1)
+      self.assertEqual(graph.edge_sets['edges'].total_size, 3 * 8)
+      self.assertAllEqual(weights, [[1.0], [1.0], [1.0], [0.0]])
+      self.assertEqual(labels.shape, [4, 1, 3])
+
+    graph, labels, _ = batches[1]
+    seed_positions = graph.context['seed_nodes.nodes'][:3]
+    global_ids = graph.node_sets['nodes']['#global_id']
+    self.assertAllEqual(tf.gather(global_ids, seed_positions), [[3], [4], [5]])
+    self.assertAllEqual(labels[:3], tf.one_hot([[0], [1], [2]], 3))
+
+    # Edges connect nodes of the same subgraph, which are neighbors in the ring.
+    node_components = tf.repeat(tf.range(4), graph.node_sets['nodes'].sizes)
+    edge_set = graph.edge_sets['edges']
+    source = edge_set.adjacency.source
+    target = edge_set.adjacency.target
+    self.assertAllEqual(tf.gather(node_components, source),
+                        tf.repeat(tf.range(4), edge_set.sizes))
+    self.assertAllEqual(tf.gather(node_components, source),
+                        tf.gather(node_components, target))
+    self.assertAllInSet(
+        (tf.gather(global_ids, target) - tf.gather(global_ids, source)) % 10,
+        [1, 2])
+
+  def test_dynamic_batch(self):
+    size_constraints = tfgnn.SizeConstraints(
+        total_num_components=4,
+        total_num_nodes={'nodes': 16},
+        total_num_edges={'edges': 24})
+    dataset = self.sampler.as_batched_dataset(
+        self.spec, size_constraints=size_constraints, repeat=False)
+    num_seeds = 0
+    for graph, labels, weights in dataset:
+      self.assertEqual(graph.node_sets['nodes'].total_size, 16)
+      self.assertEqual(graph.edge_sets['edges'].total_size, 24)
+      self.assertNotIn('label', graph.node_sets['nodes'].features)
+      self.assertEqual(labels.shape, [4, 1, 3])
+      num_seeds += int(tf.reduce_sum(weights))
+    self.assertEqual(num_seeds, 8)
+
+  @parameterized.named_parameters(('Shuffled', True), ('NotShuffled', False))
+  def test_epochs(self, shuffle):
+    dataset = self.sampler.as_batched_dataset(
+        self.spec, batch_size=1, repeat=2, shuffle=shuffle,
+        pop_labels_from_graph=False, global_id_feature_name='#global_id')
+    seed_nodes = []
+    for graph in dataset:
+      position = graph.context['seed_nodes.nodes'][0, 0]
+      seed_nodes.append(int(graph.node_sets['nodes']['#global_id'][position]))
+    self.assertLen(seed_nodes, 16)
+    self.assertCountEqual(seed_nodes[:8], range(8))
+    self.assertCountEqual(seed_nodes[8:], range(8))
+
+  def test_batch_size_or_size_constraints(self):
+    with self.assertRaisesRegex(ValueError, 'Exactly one of'):
+      self.sampler.as_batched_dataset(self.spec)
+
+  @parameterized.named_parameters(
+      ('WithReplacement', ia_sampler.EdgeSampling.WITH_REPLACEMENT),
+      ('WithoutReplacement', ia_sampler.EdgeSampling.WITHOUT_REPLACEMENT))
+  def test_jit_compile(self, sampling_mode):
+    dataset = self.sampler.as_batched_dataset(
+        self.spec, batch_size=3, repeat=False, shuffle=False,
+        deterministic=True, sampling_mode=sampling_mode,
+        global_id_feature_name='#global_id', hop_feature_name='#hop',
+        jit_compile=True)
+    batches = list(dataset)
+    self.assertLen(batches, 2)
+    graph, labels, weights = batches[1]
+    # Same static sizes as padded by `tfgnn.pad_to_total_sizes()`.
+    node_set = graph.node_sets['nodes']
+    edge_set = graph.edge_sets['edges']
+    self.assertEqual(node_set.total_size, 3 * 9 + 1)
+    self.assertEqual(edge_set.total_size, 3 * 8)
+    self.assertAllEqual(weights, [[1.0], [1.0], [1.0], [0.0]])
+    self.assertAllEqual(labels[:3], tf.one_hot([[0], [1], [2]], 3))
+    self.assertNotIn('label', node_set.features)
+
+    global_ids = node_set['#global_id']
+    seed_positions = graph.context['seed_nodes.nodes'][:3]
+    self.assertAllEqual(tf.gather(global_ids, seed_positions), [[3], [4], [5]])
+    node_components = tf.repeat(tf.range(4), node_set.sizes)
+    num_nodes = int(tf.reduce_sum(node_set.sizes[:-1]))
+    for component, seed in enumerate([3, 4, 5]):
+      ids = global_ids[node_components == component].numpy()
+      self.assertLen(set(ids), len(ids))
+      hops = node_set['#hop'][node_components == component].numpy()
+      for offset, hop in zip((ids - seed) % 10, hops):
+        self.assertIn(hop, {0: [0], 1: [1, 2], 2: [1, 2]}.get(offset, [2]))
+    # Padding nodes have zero features.
+    self.assertAllEqual(node_set['#id'][num_nodes:],
+                        tf.zeros([3 * 9 + 1 - num_nodes], tf.int32))
+
+    # Edges connect nodes of the same subgraph, which are neighbors in the ring,
+    # or padding nodes.
+    source = edge_set.adjacency.source
+    target = edge_set.adjacency.target
+    self.assertAllEqual(tf.gather(node_components, source),
+                        tf.repeat(tf.range(4), edge_set.sizes))
+    self.assertAllEqual(tf.gather(node_components, source),
+                        tf.gather(node_components, target))
+    num_edges = int(tf.reduce_sum(edge_set.sizes[:-1]))
+    self.assertAllInSet(
+        (tf.gather(global_ids, target[:num_edges]) -
+         tf.gather(global_ids, source[:num_edges])) % 10, [1, 2])
+
+  def test_jit_compile_requirements(self):
+    with self.assertRaisesRegex(ValueError, 'requires `batch_size`'):
+      self.sampler.as_batched_dataset(
+          self.spec, size_constraints=self.sampler.get_size_constraints(
+              self.spec, 2), jit_compile=True)
+    spec = sampling_spec_builder.SamplingSpecBuilder(
+        self.graph_data.graph_schema(),
+        default_strategy=sampling_spec_builder.SamplingStrategy.TOP_K,
+    ).seed('nodes').sample(2, 'edges').build()
+    with self.assertRaisesRegex(ValueError, 'only "RANDOM_UNIFORM"'):
+      self.sampler.as_batched_dataset(spec, batch_size=2, jit_compile=True)
+
+
+class WeightedSamplingTest(tf.test.TestCase, parameterized.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.graph_data = WeightedStarDataset()
+    self.sampler = ia_sampler.GraphSampler(self.graph_data)
+
+  def test_edge_weights_in_edge_sets_and_schema(self):
+    edge_sets = self.graph_data.edge_sets()
+    for edge_set_name in ('edges', 'rev_edges'):
+      self.assertAllEqual(edge_sets[edge_set_name]['weight'],
+                          [0.0, 1.0, 2.0, 5.0, 3.0])
+      self.assertEqual(
+          self.graph_data.graph_schema().edge_sets[edge_set_name]
+          .features['weight'].dtype, tf.float32.as_datatype_enum)
+    # Self loops have unit weights.
+    edge_sets = self.graph_data.with_self_loops(True).edge_sets()
+    self.assertAllEqual(edge_sets['edges']['weight'],
+                        [0.0, 1.0, 2.0, 5.0, 3.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0])
+
+  def test_top_k(self):
+    next_nodes, valid_mask = self.sampler.sample_one_hop_with_valid_mask(
+        tf.constant([0, 5, 1]), 'edges', sample_size=2,
+        strategy=sampling_spec_builder.SamplingStrategy.TOP_K)
+    self.assertAllEqual(valid_mask,
+                        [[True, True], [True, False], [False, False]])
+    self.assertAllEqual(next_nodes[0], [4, 3])
+    self.assertEqual(next_nodes[1, 0], 1)
+
+  def test_weighted_with_replacement(self):
+    next_nodes, valid_mask = self.sampler.sample_one_hop_with_valid_mask(
+        tf.zeros([2000], tf.int64), 'edges', sample_size=4,
+        sampling_mode=ia_sampler.EdgeSampling.WITH_REPLACEMENT,
+        strategy=sampling_spec_builder.SamplingStrategy.RANDOM_WEIGHTED)
+    self.assertAllEqual(valid_mask, tf.ones([2000, 4], tf.bool))
+    counts = np.bincount(next_nodes.numpy().reshape([-1]), minlength=5)
+    # Node 1 is linked with zero weight.
+    self.assertAllClose(counts[1:] / 8000, [0.0, 1 / 8, 2 / 8, 5 / 8],
+                        atol=0.02)
+
+  def test_weighted_without_replacement(self):
+    next_nodes, valid_mask = self.sampler.sample_one_hop_with_valid_mask(
+        tf.zeros([2000], tf.int64), 'edges', sample_size=2,
+        sampling_mode=ia_sampler.EdgeSampling.WITHOUT_REPLACEMENT,
+        strategy=sampling_spec_builder.SamplingStrategy.RANDOM_WEIGHTED)
+    self.assertAllEqual(valid_mask, tf.ones([2000, 2], tf.bool))
+    next_nodes = next_nodes.numpy()
+    self.assertTrue(np.all(next_nodes[:, 0] != next_nodes[:, 1]))
+    self.assertNotIn(1, next_nodes)
+    # The first sample is proportional to weights.
+    counts = np.bincount(next_nodes[:, 0], minlength=5)
+    self.assertAllClose(counts[2:] / 2000, [1 / 8, 2 / 8, 5 / 8], atol=0.04)
+
+    # Edges with zero weight are not sampled, even if there are fewer edges
+    # than the sample size.
+    next_nodes, valid_mask = self.sampler.sample_one_hop_with_valid_mask(
+        tf.constant([0]), 'edges', sample_size=4,
+        sampling_mode=ia_sampler.EdgeSampling.WITHOUT_REPLACEMENT,
+        strategy=sampling_spec_builder.SamplingStrategy.RANDOM_WEIGHTED)
+    self.assertAllEqual(valid_mask, [[True, True, True, False]])
+    self.assertSameElements(next_nodes[0, :3], [2, 3, 4])
+
+  def test_sample_walk_tree_top_k(self):
+    builder = sampling_spec_builder.SamplingSpecBuilder(
+        self.graph_data.graph_schema(),
+        default_strategy=sampling_spec_builder.SamplingStrategy.TOP_K)
+    spec = builder.seed('nodes').sample(1, 'edges').sample(
+        2, 'rev_edges').build()
+    tree = self.sampler.sample_walk_tree(tf.constant([0]), spec)
+    (hop1,) = tree.next_steps
+    self.assertAllEqual(hop1[1].nodes, [[4]])
+    (hop2,) = hop1[1].next_steps
+    self.assertAllEqual(hop2[1].valid_mask, [[[True, False]]])
+    self.assertEqual(hop2[1].nodes[0, 0, 0], 0)
+
+
+class TemporalSamplingTest(tf.test.TestCase, parameterized.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.graph_data = TemporalStarDataset()
+    self.sampler = ia_sampler.NodeClassificationGraphSampler(self.graph_data)
+
+  def test_temporal_edge_lists(self):
+    # Duplicate edges are kept, and edges of each node are sorted by time.
+    self.assertAllEqual(self.sampler.temporal_edge_lists['edges'],
+                        [1, 2, 4, 3, 1, 1])
+    self.assertAllEqual(self.sampler.edge_timestamps['edges'],
+                        [5, 10, 20, 30, 40, 25])
+    self.assertAllEqual(self.sampler.temporal_degrees_cumsum['rev_edges'],
+                        [0, 0, 3, 4, 5, 6])
+    self.assertEqual(
+        self.graph_data.graph_schema().edge_sets['rev_edges']
+        .features['timestamp'].dtype, tf.int64.as_datatype_enum)
+
+  def test_most_recent(self):
+    next_nodes, valid_mask = self.sampler.sample_one_hop_with_valid_mask(
+        tf.constant([0, 0, 5]), 'edges', sample_size=2,
+        strategy=sampling_spec_builder.SamplingStrategy.TOP_K,
+        cutoff_timestamps=tf.constant([35, 30, 15], tf.int64))
+    self.assertAllEqual(valid_mask,
+                        [[True, True], [True, True], [False, False]])
+    # Timestamps equal to the cutoff are excluded.
+    self.assertAllEqual(next_nodes[:2], [[3, 4], [4, 2]])
+
+  @parameterized.named_parameters(
+      ('WithReplacement', ia_sampler.EdgeSampling.WITH_REPLACEMENT),
+      ('WithoutReplacement', ia_sampler.EdgeSampling.WITHOUT_REPLACEMENT))
+  def test_uniform(self, sampling_mode):
+    next_nodes, valid_mask = self.sampler.sample_one_hop_with_valid_mask(
+        tf.zeros([200], tf.int64), 'edges', sample_size=3,
+        sampling_mode=sampling_mode, cutoff_timestamps=tf.constant(25))
+    self.assertAllEqual(valid_mask, tf.ones([200, 3], tf.bool))
+    next_nodes = next_nodes.numpy()
+    self.assertAllInSet(next_nodes, [1, 2, 4])
+    self.assertSameElements(next_nodes.reshape([-1]), [1, 2, 4])
+    if sampling_mode == ia_sampler.EdgeSampling.WITHOUT_REPLACEMENT:
+      self.assertAllEqual(np.sort(next_nodes, axis=1),
+                          np.tile([1, 2, 4], [200, 1]))
+
+    next_nodes, valid_mask = self.sampler.sample_one_hop_with_valid_mask(
+        tf.constant([0, 0]), 'edges', sample_size=2,
+        sampling_mode=sampling_mode,
+        cutoff_timestamps=tf.constant([8, 5], tf.int64))
+    self.assertAllEqual(valid_mask[:, 0], [True, False])
+    self.assertEqual(next_nodes[0, 0], 1)
+
+  def test_weighted_not_supported(self):
+    with self.assertRaisesRegex(ValueError, 'do not support'):
+      self.sampler.sample_one_hop_with_valid_mask(
+          tf.constant([0]), 'edges', sample_size=2,
+          strategy=sampling_spec_builder.SamplingStrategy.RANDOM_WEIGHTED,
+          cutoff_timestamps=tf.constant([35], tf.int64))
+
+  def test_sample_walk_tree(self):
+    spec = sampling_spec_builder.SamplingSpecBuilder(
+        self.graph_data.graph_schema(),
+        default_strategy=sampling_spec_builder.SamplingStrategy.TOP_K,
+    ).seed('nodes').sample(2, 'edges').sample(3, 'rev_edges').build()
+    # Seeds get their timestamps from `node_timestamps()`: 35 and 15.
+    tree = self.sampler.sample_walk_tree(tf.constant([0, 5]), spec)
+    (hop1,) = tree.next_steps
+    self.assertAllEqual(hop1[1].valid_mask, [[True, True], [False, False]])
+    self.assertAllEqual(hop1[1].nodes[0], [3, 4])
+    # Every hop is older than the seed: edge 0->3 at time 30 but not 0->1 at
+    # time 40.
+    (hop2,) = hop1[1].next_steps
+    self.assertAllEqual(hop2[1].valid_mask[0],
+                        [[True, False, False], [True, False, False]])
+    self.assertAllEqual(hop2[1].nodes[0, :, 0], [0, 0])
+
+    tree = self.sampler.sample_walk_tree(
+        tf.constant([0, 5]), spec,
+        seed_timestamps=tf.constant([100, 100], tf.int64))
+    self.assertAllEqual(tree.next_steps[0][1].nodes, [[1, 3], [1, 1]])
+
+  @parameterized.named_parameters(('Graph', False), ('Jit', True))
+  def test_as_batched_dataset(self, jit_compile):
+    spec = sampling_spec_builder.SamplingSpecBuilder(
+        self.graph_data.graph_schema(),
+        default_strategy=sampling_spec_builder.SamplingStrategy.RANDOM_UNIFORM,
+    ).seed('nodes').sample(4, 'edges').build()
+    dataset = self.sampler.as_batched_dataset(
+        spec, batch_size=2, repeat=2, shuffle=False, deterministic=True,
+        global_id_feature_name='#global_id', jit_compile=jit_compile)
+    for graph, _, _ in dataset:
+      # Seed 5 has no edge older than itself, so its component has only itself.
+      self.assertAllEqual(graph.edge_sets['edges'].sizes[:2], [4, 0])
+      node_set = graph.node_sets['nodes']
+      self.assertEqual(node_set.sizes[1], 1)
+      self.assertEqual(node_set['#global_id'][node_set.sizes[0]], 5)
+
+
 if __name__ == '__main__':
   tf.test.main()
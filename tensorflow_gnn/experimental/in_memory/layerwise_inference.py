@@ -0,0 +1,275 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Layer-wise inference of trained GNNs over all nodes of in-memory graphs.
+
+Sampling one subgraph per seed node and running the full model on it costs
+`O(fanout^L)` per node for an `L`-layer model, and neighborhoods of nearby seeds
+get recomputed over and over. Feeding `InMemoryGraphData.as_graph_tensor()` to
+the model at once avoids that, but needs the states of all nodes *and* all
+messages of all edges in memory at the same time.
+
+`LayerwiseInference` runs the model one layer at a time instead: states of all
+nodes after layer `k` are computed, in chunks of receiver nodes, from the
+states after layer `k - 1`, which are stored in numpy arrays (optionally, as
+`np.memmap` files on disk). Every chunk is a one-hop subgraph containing the
+chunk's nodes and all their neighbors, built from the CSR structures of
+`int_arithmetic_sampler.GraphSampler`. The total cost is `O(L * E)`.
+
+
+# Usage Example
+
+```
+graph_data = datasets.get_in_memory_graph_data('ogbn-arxiv')
+sampler = int_arithmetic_sampler.GraphSampler(graph_data)
+
+# Layers of the trained model, e.g., `tfgnn.keras.layers.MapFeatures` to embed
+# the input features, followed by `tfgnn.keras.layers.GraphUpdate`s.
+model_layers = [init_states_layer, graph_update_1, graph_update_2]
+
+inference = layerwise_inference.LayerwiseInference(
+    sampler, model_layers, chunk_size=100_000, work_dir='/tmp/embeddings')
+states = inference.run()  # Node set name -> np.memmap of final states.
+```
+
+The layers must be node-local apart from convolutions that send messages along
+edge sets towards nodes at `receiver_tag`: every layer output for a node may
+only depend on that node and on its neighbors. Specifically, layers must not
+read or update the graph context, and edge sets carry no features.
+"""
+
+import os
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+from tensorflow_gnn.experimental.in_memory import int_arithmetic_sampler
+
+
+class LayerwiseInference:
+  """Computes the final states of all nodes, one model layer at a time.
+
+  The first layer receives all node features of `sampler.graph_data`. Each
+  layer must output the new node states as feature `feature_name` on every
+  node set, which is the only feature passed to the subsequent layer.
+  """
+
+  def __init__(
+      self,
+      sampler: int_arithmetic_sampler.GraphSampler,
+      layers: Sequence[Callable[[tfgnn.GraphTensor], tfgnn.GraphTensor]],
+      *,
+      chunk_size: int = 10_000,
+      work_dir: Optional[str] = None,
+      receiver_tag: tfgnn.IncidentNodeTag = tfgnn.TARGET,
+      feature_name: tfgnn.FieldName = tfgnn.HIDDEN_STATE):
+    """Initializes the inference driver.
+
+    Args:
+      sampler: `GraphSampler` wrapping the in-memory graph. Its CSR structures
+        are used to look up the neighbors of each chunk of nodes.
+      layers: Layers of the trained model (or any callables on `GraphTensor`),
+        in the order they are applied.
+      chunk_size: Maximum number of receiver nodes per subgraph.
+      work_dir: If set, states after each layer are written to `.npy` files
+        in this directory and memory-mapped. If unset, they are kept in memory.
+      receiver_tag: The incident node of every edge set that receives messages
+        in the convolutions of `layers`. Either `tfgnn.SOURCE` or
+        `tfgnn.TARGET`.
+      feature_name: Name of the node feature holding the node states.
+    """
+    if chunk_size <= 0:
+      raise ValueError(f'chunk_size must be positive, got {chunk_size}.')
+    if receiver_tag not in (tfgnn.SOURCE, tfgnn.TARGET):
+      raise ValueError(f'Invalid receiver_tag: {receiver_tag}')
+    self._sampler = sampler
+    self._layers = list(layers)
+    self._chunk_size = chunk_size
+    self._work_dir = work_dir
+    self._receiver_tag = receiver_tag
+    self._feature_name = feature_name
+    self._node_counts = dict(sampler.graph_data.node_counts())
+
+    # Edge set name -> (row_splits, senders), indexed by receiver node.
+    self._receiver_csr: Dict[tfgnn.EdgeSetName,
+                             Tuple[np.ndarray, np.ndarray]] = {}
+    for edge_set_name in sampler.edge_types:
+      self._receiver_csr[edge_set_name] = self._make_receiver_csr(
+          edge_set_name)
+
+  def _make_receiver_csr(
+      self, edge_set_name: tfgnn.EdgeSetName) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns CSR `(row_splits, senders)` of `edge_set_name` by receiver."""
+    degrees = self._sampler.degrees[edge_set_name].numpy()
+    row_splits = np.concatenate([[0], np.cumsum(degrees)]).astype(np.int64)
+    targets = self._sampler.edge_lists[edge_set_name][1].numpy()
+    if self._receiver_tag == tfgnn.SOURCE:
+      # The sampler already indexes edges by their source node.
+      return row_splits, targets
+
+    sources = np.repeat(np.arange(degrees.shape[0]), degrees)
+    _, target_set_name = self._sampler.edge_types[edge_set_name]
+    order = np.argsort(targets, kind='stable')
+    target_degrees = np.bincount(
+        targets, minlength=self._node_counts[target_set_name])
+    target_row_splits = np.concatenate(
+        [[0], np.cumsum(target_degrees)]).astype(np.int64)
+    return target_row_splits, sources[order]
+
+  def _receiver_and_sender_sets(
+      self, edge_set_name: tfgnn.EdgeSetName
+      ) -> Tuple[tfgnn.NodeSetName, tfgnn.NodeSetName]:
+    source_set_name, target_set_name = self._sampler.edge_types[edge_set_name]
+    if self._receiver_tag == tfgnn.SOURCE:
+      return source_set_name, target_set_name
+    return target_set_name, source_set_name
+
+  def run(self) -> Mapping[tfgnn.NodeSetName, np.ndarray]:
+    """Applies all layers and returns the final states of all nodes.
+
+    Returns:
+      Dict from node set name to array with the states of all its nodes after
+      the last layer. If `work_dir` is set, arrays are `np.memmap`s.
+    """
+    features = {
+        node_set_name: {name: np.asarray(value)
+                        for name, value in node_features.items()}
+        for node_set_name, node_features
+        in self._sampler.graph_data.node_features_dicts().items()}
+    for node_set_name in self._node_counts:
+      features.setdefault(node_set_name, {})
+
+    states = None
+    for layer_index, layer in enumerate(self._layers):
+      states = self.run_layer(layer, features, layer_index=layer_index)
+      features = {node_set_name: {self._feature_name: value}
+                  for node_set_name, value in states.items()}
+    return states
+
+  def run_layer(
+      self,
+      layer: Callable[[tfgnn.GraphTensor], tfgnn.GraphTensor],
+      features: Mapping[tfgnn.NodeSetName, Mapping[tfgnn.FieldName,
+                                                   np.ndarray]],
+      layer_index: int = 0) -> Mapping[tfgnn.NodeSetName, np.ndarray]:
+    """Applies `layer` to all nodes, chunk by chunk.
+
+    Args:
+      layer: Model layer to apply.
+      features: Node set name -> feature name -> array with the values of the
+        feature for all nodes of the node set.
+      layer_index: Position of `layer` in the model, used to name output files.
+
+    Returns:
+      Dict from node set name to array holding feature `feature_name` of all
+      nodes in the node set, as output by `layer`.
+    """
+    outputs = {}
+    for node_set_name, num_nodes in self._node_counts.items():
+      for start in range(0, num_nodes, self._chunk_size):
+        chunk = np.arange(start, min(start + self._chunk_size, num_nodes))
+        graph, positions = self._make_subgraph(node_set_name, chunk, features)
+        result = layer(graph).node_sets[node_set_name][self._feature_name]
+        result = tf.gather(result, positions).numpy()
+        if node_set_name not in outputs:
+          outputs[node_set_name] = self._allocate(
+              layer_index, node_set_name, (num_nodes,) + result.shape[1:],
+              result.dtype)
+        outputs[node_set_name][chunk] = result
+    for output in outputs.values():
+      if isinstance(output, np.memmap):
+        output.flush()
+    return outputs
+
+  def _allocate(self, layer_index: int, node_set_name: tfgnn.NodeSetName,
+                shape: Tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+    if self._work_dir is None:
+      return np.zeros(shape, dtype=dtype)
+    os.makedirs(self._work_dir, exist_ok=True)
+    filename = os.path.join(
+        self._work_dir, f'layer_{layer_index}.{node_set_name}.npy')
+    return np.lib.format.open_memmap(
+        filename, mode='w+', dtype=dtype, shape=shape)
+
+  def _make_subgraph(
+      self, node_set_name: tfgnn.NodeSetName, chunk: np.ndarray,
+      features: Mapping[tfgnn.NodeSetName, Mapping[tfgnn.FieldName,
+                                                   np.ndarray]]
+      ) -> Tuple[tfgnn.GraphTensor, np.ndarray]:
+    """Returns subgraph with all edges into `chunk`, and positions of `chunk`.
+
+    Args:
+      node_set_name: Node set of the receiver nodes in `chunk`.
+      chunk: Sorted int array of receiver node ids.
+      features: As for `run_layer()`.
+
+    Returns:
+      Tuple `(graph, positions)` where `graph` contains the nodes of `chunk`,
+      all their neighbors and all edges into `chunk` (by `receiver_tag`), and
+      `positions` is the index of each node of `chunk` in its node set in
+      `graph`.
+    """
+    node_ids: Dict[tfgnn.NodeSetName, List[np.ndarray]] = {
+        name: [] for name in self._node_counts}
+    node_ids[node_set_name].append(chunk)
+    edges = {}  # Edge set name -> (receiver ids, sender ids).
+    for edge_set_name, (row_splits, senders) in self._receiver_csr.items():
+      receiver_set_name, sender_set_name = self._receiver_and_sender_sets(
+          edge_set_name)
+      if receiver_set_name != node_set_name:
+        edges[edge_set_name] = (np.zeros([0], np.int64),
+                                np.zeros([0], np.int64))
+        continue
+      starts = row_splits[chunk]
+      degrees = row_splits[chunk + 1] - starts
+      receivers = np.repeat(chunk, degrees)
+      edge_positions = (np.arange(receivers.shape[0])
+                        - np.repeat(np.cumsum(degrees) - degrees, degrees)
+                        + np.repeat(starts, degrees))
+      edges[edge_set_name] = (receivers, senders[edge_positions])
+      node_ids[sender_set_name].append(edges[edge_set_name][1])
+
+    unique_ids = {
+        name: np.unique(np.concatenate(ids)) if ids else np.zeros([0], np.int64)
+        for name, ids in node_ids.items()}
+
+    node_sets = {}
+    for name, ids in unique_ids.items():
+      node_sets[name] = tfgnn.NodeSet.from_fields(
+          sizes=tf.constant([ids.shape[0]]),
+          features={feature_name: tf.constant(np.take(value, ids, axis=0))
+                    for feature_name, value in features.get(name, {}).items()})
+
+    edge_sets = {}
+    for edge_set_name, (receivers, senders) in edges.items():
+      receiver_set_name, sender_set_name = self._receiver_and_sender_sets(
+          edge_set_name)
+      receivers = np.searchsorted(unique_ids[receiver_set_name], receivers)
+      senders = np.searchsorted(unique_ids[sender_set_name], senders)
+      if self._receiver_tag == tfgnn.SOURCE:
+        source, target = receivers, senders
+      else:
+        source, target = senders, receivers
+      source_set_name, target_set_name = self._sampler.edge_types[edge_set_name]
+      edge_sets[edge_set_name] = tfgnn.EdgeSet.from_fields(
+          sizes=tf.constant([source.shape[0]]),
+          adjacency=tfgnn.Adjacency.from_indices(
+              source=(source_set_name, tf.constant(source, tf.int64)),
+              target=(target_set_name, tf.constant(target, tf.int64))))
+
+    graph = tfgnn.GraphTensor.from_pieces(
+        node_sets=node_sets, edge_sets=edge_sets)
+    positions = np.searchsorted(unique_ids[node_set_name], chunk)
+    return graph, positions
@@ -0,0 +1,141 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for layerwise_inference."""
+
+import os
+from typing import Mapping, MutableMapping, Tuple
+
+from absl.testing import parameterized
+import numpy as np
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+
+from tensorflow_gnn.experimental.in_memory import datasets
+from tensorflow_gnn.experimental.in_memory import int_arithmetic_sampler as ia_sampler
+from tensorflow_gnn.experimental.in_memory import layerwise_inference
+
+
+class RandomBipartiteGraph(datasets.InMemoryGraphData):
+  """Random graph with edge sets "writes" (authors->papers) and "cites"."""
+
+  def __init__(self, num_authors=23, num_papers=31, num_edges=80, seed=0):
+    super().__init__()
+    rng = np.random.default_rng(seed)
+    self._num_authors = num_authors
+    self._num_papers = num_papers
+    self._author_feat = rng.normal(size=[num_authors, 4]).astype(np.float32)
+    self._paper_feat = rng.normal(size=[num_papers, 3]).astype(np.float32)
+
+    def random_edges(num_sources, num_targets):
+      # Unique edges: `GraphSampler` de-duplicates repeated edges.
+      edges = rng.integers(
+          0, [[num_sources], [num_targets]], size=[2, num_edges])
+      return np.unique(edges, axis=1)
+
+    self._writes = random_edges(num_authors, num_papers)
+    self._cites = random_edges(num_papers, num_papers)
+
+  def node_features_dicts(self) -> Mapping[
+      tfgnn.NodeSetName, MutableMapping[str, tf.Tensor]]:
+    return {
+        'authors': {'feat': tf.constant(self._author_feat)},
+        'papers': {'feat': tf.constant(self._paper_feat)},
+    }
+
+  def node_counts(self) -> Mapping[tfgnn.NodeSetName, int]:
+    return {'authors': self._num_authors, 'papers': self._num_papers}
+
+  def edge_lists(self) -> Mapping[Tuple[str, str, str], tf.Tensor]:
+    return {
+        ('authors', 'writes', 'papers'): tf.constant(self._writes),
+        ('papers', 'cites', 'papers'): tf.constant(self._cites),
+    }
+
+
+def _make_model_layers(receiver_tag, reduce_type='sum'):
+  def init_states(node_set, *, node_set_name):
+    del node_set_name
+    return tf.keras.layers.Dense(5)(node_set['feat'])
+
+  def graph_update():
+    def conv():
+      return tfgnn.keras.layers.SimpleConv(
+          tf.keras.layers.Dense(5, 'relu'), reduce_type=reduce_type,
+          receiver_tag=receiver_tag)
+    if receiver_tag == tfgnn.TARGET:
+      receivers = {'writes': 'papers', 'cites': 'papers',
+                   'rev_writes': 'authors'}
+    else:
+      receivers = {'writes': 'authors', 'cites': 'papers',
+                   'rev_writes': 'papers'}
+    node_sets = {}
+    for edge_set_name, receiver in receivers.items():
+      node_sets.setdefault(receiver, {})[edge_set_name] = conv()
+    return tfgnn.keras.layers.GraphUpdate(node_sets={
+        node_set_name: tfgnn.keras.layers.NodeSetUpdate(
+            convs, tfgnn.keras.layers.NextStateFromConcat(
+                tf.keras.layers.Dense(5)))
+        for node_set_name, convs in node_sets.items()})
+
+  return [tfgnn.keras.layers.MapFeatures(node_sets_fn=init_states),
+          graph_update(), graph_update()]
+
+
+class LayerwiseInferenceTest(tf.test.TestCase, parameterized.TestCase):
+
+  @parameterized.named_parameters(
+      ('Target', tfgnn.TARGET, 'sum', 7, False),
+      ('TargetMeanOneChunk', tfgnn.TARGET, 'mean', 100, False),
+      ('TargetMaxOnDisk', tfgnn.TARGET, 'max_no_inf', 4, True),
+      ('Source', tfgnn.SOURCE, 'sum', 5, False))
+  def test_matches_full_graph(self, receiver_tag, reduce_type, chunk_size,
+                              use_work_dir):
+    graph_data = RandomBipartiteGraph()
+    layers = _make_model_layers(receiver_tag, reduce_type)
+    full_graph = graph_data.as_graph_tensor()
+    for layer in layers:
+      full_graph = layer(full_graph)
+
+    work_dir = (os.path.join(self.get_temp_dir(), 'embeddings')
+                if use_work_dir else None)
+    inference = layerwise_inference.LayerwiseInference(
+        ia_sampler.GraphSampler(graph_data), layers, chunk_size=chunk_size,
+        work_dir=work_dir, receiver_tag=receiver_tag)
+    states = inference.run()
+
+    self.assertCountEqual(states.keys(), ['authors', 'papers'])
+    for node_set_name, actual in states.items():
+      self.assertAllClose(
+          full_graph.node_sets[node_set_name][tfgnn.HIDDEN_STATE], actual,
+          rtol=1e-5, atol=1e-5)
+      if use_work_dir:
+        self.assertIsInstance(actual, np.memmap)
+    if use_work_dir:
+      self.assertCountEqual(
+          os.listdir(work_dir),
+          [f'layer_{i}.{node_set_name}.npy' for i in range(3)
+           for node_set_name in ('authors', 'papers')])
+
+  def test_invalid_arguments(self):
+    sampler = ia_sampler.GraphSampler(RandomBipartiteGraph())
+    with self.assertRaisesRegex(ValueError, 'chunk_size'):
+      layerwise_inference.LayerwiseInference(sampler, [], chunk_size=0)
+    with self.assertRaisesRegex(ValueError, 'receiver_tag'):
+      layerwise_inference.LayerwiseInference(
+          sampler, [], receiver_tag=tfgnn.CONTEXT)
+
+
+if __name__ == '__main__':
+  tf.test.main()
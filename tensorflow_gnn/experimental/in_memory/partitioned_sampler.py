@@ -0,0 +1,516 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Samples subgraphs from in-memory graphs partitioned across processes.
+
+`GraphSampler` keeps the adjacency of all edge sets and all node features in
+one process. For graphs that do not fit in one process, the nodes of every node
+set can be split into `num_partitions` contiguous ranges of node IDs, each owned
+by a worker process (on the same host or on different hosts):
+
+1. Class `GraphPartition` holds the edges whose source node is owned by the
+   partition, and the features of the owned nodes. Node IDs remain global.
+
+2. Function `serve_partition()` runs a worker, which answers sampling and
+   feature requests for the nodes of one partition over
+   `multiprocessing.connection` (TCP sockets, always authenticated).
+   Function `start_local_partitions()` starts all workers as local processes.
+
+3. Class `PartitionedGraphSampler` extends `GraphSampler`, such that
+   `sample_one_hop()`, `sample_walk_tree()` and `sample_sub_graph()` send the
+   frontier nodes of every hop, batched per owning partition, to all partitions
+   at once and reassemble their answers.
+
+
+# Usage Example
+
+```
+def make_graph_data():
+  return datasets.get_in_memory_graph_data('ogbn-arxiv')
+
+addresses, processes, authkey = partitioned_sampler.start_local_partitions(
+    make_graph_data, num_partitions=4)
+sampler = partitioned_sampler.PartitionedGraphSampler(addresses, authkey)
+graph_tensor = sampler.sample_sub_graph(seed_nodes, sampling_spec)
+
+sampler.shutdown()  # Stops all workers.
+```
+
+Workers on other hosts are started with `serve_partition()`, given the address
+to listen on, and the sampler is constructed with the addresses of all
+partitions, in the order of partition indices.
+
+# Security
+
+Workers and the sampler exchange pickled Python objects, and unpickling data
+from an untrusted peer can execute arbitrary code. The `authkey` is the only
+protection: only peers that know it can connect, even on loopback, where any
+local user could otherwise connect. It is therefore always required.
+`start_local_partitions()` generates a random key unless one is given. For
+workers on other hosts, use a random key (e.g. `os.urandom(32)`), keep it
+secret, and only run workers on trusted networks.
+"""
+
+import multiprocessing
+from multiprocessing import connection
+import os
+import threading
+from typing import Any, Callable, Dict, List, Mapping, MutableMapping, Optional, Sequence, Tuple
+
+import numpy as np
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+from tensorflow_gnn.experimental.in_memory import datasets
+from tensorflow_gnn.experimental.in_memory import int_arithmetic_sampler as ia_sampler
+from tensorflow_gnn.sampler import sampling_spec_pb2
+
+Address = Tuple[str, int]
+
+
+def _check_authkey(authkey: Optional[bytes]):
+  if not authkey:
+    raise ValueError(
+        'A non-empty `authkey` is required, as workers exchange pickled'
+        ' objects.')
+
+
+def partition_node_ranges(
+    node_counts: Mapping[tfgnn.NodeSetName, int],
+    num_partitions: int) -> Dict[tfgnn.NodeSetName, np.ndarray]:
+  """Returns boundaries of contiguous node ID ranges owned by partitions.
+
+  Args:
+    node_counts: Number of nodes in each node set.
+    num_partitions: Number of partitions.
+
+  Returns:
+    Dict from node set name to int64 vector `b` of size `num_partitions + 1`,
+    such that partition `i` owns node IDs `b[i] <= id < b[i + 1]`.
+  """
+  return {
+      node_set_name: np.linspace(
+          0, num_nodes, num_partitions + 1).astype(np.int64)
+      for node_set_name, num_nodes in node_counts.items()}
+
+
+class GraphPartition(datasets.InMemoryGraphData):
+  """Edges and node features owned by one partition of `InMemoryGraphData`.
+
+  The partition owns the nodes in one range of node IDs of every node set (see
+  `partition_node_ranges()`), all edges (of `graph_data.edge_sets()`, including
+  reversed edge sets) whose source node is owned, and features of owned nodes.
+  `edge_sets()` keep global node IDs and `node_counts()` are global, so a
+  `GraphSampler` over the partition samples the neighbors of owned nodes.
+  """
+
+  def __init__(self, graph_data: datasets.InMemoryGraphData,
+               num_partitions: int, partition_index: int):
+    super().__init__()
+    if not 0 <= partition_index < num_partitions:
+      raise ValueError(
+          f'partition_index must be in [0, {num_partitions}), got '
+          f'{partition_index}.')
+    self.num_partitions = num_partitions
+    self.partition_index = partition_index
+    self._node_counts = dict(graph_data.node_counts())
+    self.node_ranges = partition_node_ranges(self._node_counts, num_partitions)
+
+    self._edge_sets = {}
+    for edge_set_name, edge_set in graph_data.edge_sets().items():
+      source = edge_set.adjacency.source
+      start, end = self.node_range(edge_set.adjacency.source_name)
+      owned = tf.logical_and(source >= start, source < end)
+      self._edge_sets[edge_set_name] = tfgnn.EdgeSet.from_fields(
+          sizes=tf.reshape(
+              tf.math.count_nonzero(owned, dtype=edge_set.sizes.dtype), [1]),
+          features={name: tf.boolean_mask(value, owned)
+                    for name, value in edge_set.features.items()},
+          adjacency=tfgnn.Adjacency.from_indices(
+              source=(edge_set.adjacency.source_name,
+                      tf.boolean_mask(source, owned)),
+              target=(edge_set.adjacency.target_name,
+                      tf.boolean_mask(edge_set.adjacency.target, owned))))
+
+    self._node_features_dicts = {}
+    for node_set_name, features in graph_data.node_features_dicts().items():
+      start, end = self.node_range(node_set_name)
+      self._node_features_dicts[node_set_name] = {
+          name: value[start:end] for name, value in features.items()}
+
+  def node_range(self, node_set_name: tfgnn.NodeSetName) -> Tuple[int, int]:
+    """Returns [start, end) range of node IDs owned by this partition."""
+    bounds = self.node_ranges[node_set_name]
+    return (int(bounds[self.partition_index]),
+            int(bounds[self.partition_index + 1]))
+
+  def node_counts(self) -> Mapping[tfgnn.NodeSetName, int]:
+    return self._node_counts
+
+  def node_features_dicts(self) -> Mapping[
+      tfgnn.NodeSetName, MutableMapping[tfgnn.FieldName, tf.Tensor]]:
+    """Returns features of owned nodes, indexed by `node_id - start`."""
+    return self._node_features_dicts
+
+  def edge_sets(self) -> MutableMapping[tfgnn.EdgeSetName, tfgnn.EdgeSet]:
+    return dict(self._edge_sets)
+
+  def gather_node_features_dict(
+      self, node_set_name: tfgnn.NodeSetName,
+      node_idx: tf.Tensor) -> Mapping[tfgnn.FieldName, tf.Tensor]:
+    """Returns features of owned nodes with (global) IDs `node_idx`."""
+    start, _ = self.node_range(node_set_name)
+    features = self._node_features_dicts.get(node_set_name, {})
+    return {name: tf.gather(value, node_idx - start)
+            for name, value in features.items()}
+
+
+class _PartitionServer:
+  """Answers requests of `PartitionedGraphSampler` for one partition."""
+
+  def __init__(self, partition: GraphPartition,
+               sampling_mode: ia_sampler.EdgeSampling):
+    self._partition = partition
+    self._sampler = ia_sampler.GraphSampler(
+        partition, sampling_mode=sampling_mode)
+    self._shutdown = threading.Event()
+
+  def serve(self, listener: connection.Listener, authkey: Optional[bytes]):
+    """Handles connections of `listener` until shutdown is requested."""
+    while not self._shutdown.is_set():
+      conn = listener.accept()
+      if self._shutdown.is_set():
+        conn.close()
+        break
+      threading.Thread(target=self._handle_connection,
+                       args=(conn, listener.address, authkey),
+                       daemon=True).start()
+
+  def _handle_connection(self, conn: connection.Connection, address: Address,
+                         authkey: Optional[bytes]):
+    with conn:
+      while True:
+        try:
+          command, kwargs = conn.recv()
+        except EOFError:
+          return
+        if command == 'shutdown':
+          self._shutdown.set()
+          conn.send(('ok', None))
+          # Wakes up `listener.accept()` in `serve()`.
+          connection.Client(address, authkey=authkey).close()
+          return
+        try:
+          response = ('ok', self._handle_request(command, **kwargs))
+        except Exception as e:  # pylint: disable=broad-except
+          response = ('error', f'{type(e).__name__}: {e}')
+        conn.send(response)
+
+  def _handle_request(self, command: str, **kwargs) -> Any:
+    """Returns the response to `command`, called with `kwargs`."""
+    if command == 'metadata':
+      return self.metadata()
+    if command == 'sample':
+      next_nodes, valid_mask = self._sampler.sample_one_hop_with_valid_mask(
+          tf.constant(kwargs['nodes']), kwargs['edge_set_name'],
+          kwargs['sample_size'],
+          sampling_mode=ia_sampler.EdgeSampling(kwargs['sampling_mode']),
+          validate=kwargs['validate'], strategy=kwargs['strategy'])
+      return next_nodes.numpy(), valid_mask.numpy()
+    if command == 'features':
+      features = self._partition.gather_node_features_dict(
+          kwargs['node_set_name'], tf.constant(kwargs['nodes']))
+      return {name: value.numpy() for name, value in features.items()}
+    raise ValueError(f'Unknown command "{command}".')
+
+  def metadata(self) -> Mapping[str, Any]:
+    """Returns the graph description used by `PartitionedGraphSampler`."""
+    return dict(
+        num_partitions=self._partition.num_partitions,
+        partition_index=self._partition.partition_index,
+        node_counts=dict(self._partition.node_counts()),
+        node_ranges=self._partition.node_ranges,
+        edge_types=dict(self._sampler.edge_types),
+        # Node set name -> feature name -> (dtype name, shape of one node).
+        feature_specs={
+            node_set_name: {
+                name: (value.dtype.name, value.shape[1:].as_list())
+                for name, value in features.items()}
+            for node_set_name, features
+            in self._partition.node_features_dicts().items()},
+    )
+
+
+def serve_partition(
+    graph_data_fn: Callable[[], datasets.InMemoryGraphData],
+    num_partitions: int,
+    partition_index: int,
+    authkey: bytes,
+    address: Address = ('localhost', 0),
+    sampling_mode: ia_sampler.EdgeSampling = (
+        ia_sampler.EdgeSampling.WITHOUT_REPLACEMENT),
+    ready_fn: Optional[Callable[[Address], Any]] = None):
+  """Serves partition `partition_index` of `graph_data_fn()` until shutdown.
+
+  The full graph data is only referenced while the partition is built.
+
+  Args:
+    graph_data_fn: Returns the graph data to partition.
+    num_partitions: Total number of partitions.
+    partition_index: Index of the partition served by this worker.
+    authkey: Non-empty key that clients must authenticate with (see the
+      module docstring).
+    address: (host, port) to listen on. Port 0 picks a free port.
+    sampling_mode: Default sampling mode of the partition `GraphSampler`.
+    ready_fn: If set, called with the address of the worker once it accepts
+      connections.
+
+  Raises:
+    ValueError: if `authkey` is empty.
+  """
+  _check_authkey(authkey)
+  partition = GraphPartition(graph_data_fn(), num_partitions, partition_index)
+  server = _PartitionServer(partition, sampling_mode)
+  with connection.Listener(address, authkey=authkey) as listener:
+    if ready_fn is not None:
+      ready_fn(listener.address)
+    server.serve(listener, authkey)
+
+
+def _serve_local_partition(ready_conn: connection.Connection, **kwargs):
+  serve_partition(ready_fn=ready_conn.send, **kwargs)
+
+
+def start_local_partitions(
+    graph_data_fn: Callable[[], datasets.InMemoryGraphData],
+    num_partitions: int,
+    authkey: Optional[bytes] = None,
+    **kwargs) -> Tuple[List[Address], List[multiprocessing.Process], bytes]:
+  """Starts all partitions of `graph_data_fn()` as local worker processes.
+
+  Args:
+    graph_data_fn: Picklable function returning the graph data to partition.
+      It is called in every worker process.
+    num_partitions: Number of partitions (and worker processes).
+    authkey: The key that clients must authenticate with. If unset, a random
+      key is generated.
+    **kwargs: forwarded to `serve_partition()`.
+
+  Returns:
+    Tuple of worker addresses and processes, in the order of partitions, and
+    the `authkey` to pass to `PartitionedGraphSampler`.
+
+  Raises:
+    ValueError: if `authkey` is set but empty.
+  """
+  if authkey is None:
+    authkey = os.urandom(32)
+  # Checked here, as workers failing the check would never report ready.
+  _check_authkey(authkey)
+  # TensorFlow is not fork-safe, so workers are started as fresh interpreters.
+  context = multiprocessing.get_context('spawn')
+  processes = []
+  ready_conns = []
+  for partition_index in range(num_partitions):
+    ready_recv, ready_send = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_serve_local_partition,
+        args=(ready_send,),
+        kwargs=dict(graph_data_fn=graph_data_fn, num_partitions=num_partitions,
+                    partition_index=partition_index, authkey=authkey,
+                    **kwargs),
+        daemon=True)
+    process.start()
+    processes.append(process)
+    ready_conns.append(ready_recv)
+  addresses = [ready_conn.recv() for ready_conn in ready_conns]
+  return addresses, processes, authkey
+
+
+class PartitionedGraphSampler(ia_sampler.GraphSampler):
+  """`GraphSampler` over partitions served by `serve_partition()` workers.
+
+  Sampling requests for the nodes of every hop are grouped by the partition
+  owning them, sent to all partitions before any response is read (so
+  partitions work in parallel), and scattered back into place. Tensor methods
+  are wrapped in `tf.numpy_function`, so they can run inside `tf.data`
+  pipelines; concurrent calls are serialized per partition.
+  """
+
+  def __init__(  # pylint: disable=super-init-not-called
+      self, addresses: Sequence[Address],
+      authkey: bytes,
+      sampling_mode: ia_sampler.EdgeSampling = (
+          ia_sampler.EdgeSampling.WITHOUT_REPLACEMENT)):
+    """Connects to partitions.
+
+    The in-memory adjacency of `GraphSampler` is not built: all sampling is
+    delegated to the partitions.
+
+    Args:
+      addresses: Addresses of workers, in the order of partition indices.
+      authkey: Non-empty authentication key of workers.
+      sampling_mode: Default sampling mode.
+
+    Raises:
+      ValueError: if `authkey` is empty.
+    """
+    _check_authkey(authkey)
+    self.graph_data = None
+    self.sampling_mode = sampling_mode
+    # Temporal sampling is not supported across partitions.
+    self.node_timestamps = {}
+    self._connections = [connection.Client(address, authkey=authkey)
+                         for address in addresses]
+    self._locks = [threading.Lock() for _ in addresses]
+
+    metadata = self._call({i: ('metadata', {}) for i in range(len(addresses))})
+    for partition_index, partition_metadata in metadata.items():
+      if (partition_metadata['num_partitions'] != len(addresses) or
+          partition_metadata['partition_index'] != partition_index):
+        raise ValueError(
+            f'Worker at {addresses[partition_index]} serves partition '
+            f'{partition_metadata["partition_index"]} of '
+            f'{partition_metadata["num_partitions"]}, expected partition '
+            f'{partition_index} of {len(addresses)}.')
+    metadata = metadata[0]
+    self.node_counts = metadata['node_counts']
+    self.node_ranges = metadata['node_ranges']
+    self.edge_types = metadata['edge_types']
+    self._feature_specs = metadata['feature_specs']
+
+  @property
+  def num_partitions(self) -> int:
+    return len(self._connections)
+
+  def shutdown(self):
+    """Stops all workers and closes connections."""
+    self._call({i: ('shutdown', {}) for i in range(self.num_partitions)})
+    self.close()
+
+  def close(self):
+    """Closes connections to workers (workers keep running)."""
+    for conn in self._connections:
+      conn.close()
+
+  def _call(self, requests: Mapping[int, Tuple[str, Mapping[str, Any]]]
+            ) -> Dict[int, Any]:
+    """Sends requests to partitions and returns their responses."""
+    partition_indices = sorted(requests)
+    for i in partition_indices:
+      self._locks[i].acquire()
+    try:
+      for i in partition_indices:
+        self._connections[i].send(requests[i])
+      responses = {i: self._connections[i].recv() for i in partition_indices}
+    finally:
+      for i in partition_indices:
+        self._locks[i].release()
+    results = {}
+    for i, (status, result) in responses.items():
+      if status != 'ok':
+        raise RuntimeError(f'Partition {i} failed: {result}')
+      results[i] = result
+    return results
+
+  def _group_by_partition(
+      self, node_set_name: tfgnn.NodeSetName,
+      nodes: np.ndarray) -> Dict[int, np.ndarray]:
+    """Returns positions in `nodes` of nodes owned by each partition."""
+    owners = np.searchsorted(
+        self.node_ranges[node_set_name], nodes, side='right') - 1
+    return {i: np.flatnonzero(owners == i) for i in np.unique(owners)}
+
+  def _sample_numpy(
+      self, nodes: np.ndarray, edge_set_name: tfgnn.EdgeSetName,
+      sample_size: int, sampling_mode: ia_sampler.EdgeSampling,
+      validate: bool,
+      strategy: sampling_spec_pb2.SamplingStrategy
+  ) -> Tuple[np.ndarray, np.ndarray]:
+    positions = self._group_by_partition(
+        self.edge_types[edge_set_name][0], nodes)
+    responses = self._call({
+        i: ('sample', dict(nodes=nodes[pos], edge_set_name=edge_set_name,
+                           sample_size=sample_size,
+                           sampling_mode=sampling_mode.value,
+                           validate=validate, strategy=strategy))
+        for i, pos in positions.items()})
+    next_nodes = np.zeros([nodes.shape[0], sample_size], nodes.dtype)
+    valid_mask = np.zeros([nodes.shape[0], sample_size], bool)
+    for i, (partition_next_nodes, partition_valid_mask) in responses.items():
+      next_nodes[positions[i]] = partition_next_nodes
+      valid_mask[positions[i]] = partition_valid_mask
+    return next_nodes, valid_mask
+
+  def sample_one_hop_with_valid_mask(
+      self, source_nodes: tf.Tensor, edge_set_name: tfgnn.EdgeSetName,
+      sample_size: int,
+      sampling_mode: Optional[ia_sampler.EdgeSampling] = None,
+      validate=True,
+      strategy: sampling_spec_pb2.SamplingStrategy = (
+          sampling_spec_pb2.SamplingStrategy.RANDOM_UNIFORM),
+      cutoff_timestamps: Optional[tf.Tensor] = None,
+  ) -> Tuple[tf.Tensor, tf.Tensor]:
+    """Like `GraphSampler.sample_one_hop_with_valid_mask()`, on partitions."""
+    if cutoff_timestamps is not None:
+      raise ValueError(
+          'PartitionedGraphSampler does not support `cutoff_timestamps`.')
+    if sampling_mode is None:
+      sampling_mode = self.sampling_mode
+    nodes = tf.reshape(source_nodes, [-1])
+    next_nodes, valid_mask = tf.numpy_function(
+        lambda nodes: self._sample_numpy(nodes, edge_set_name, sample_size,
+                                         sampling_mode, validate, strategy),
+        [nodes], [nodes.dtype, tf.bool], stateful=True)
+    newshape = tf.concat([tf.shape(source_nodes), [sample_size]], axis=0)
+    next_nodes = tf.reshape(next_nodes, newshape)
+    valid_mask = tf.reshape(valid_mask, newshape)
+    static_shape = source_nodes.shape.concatenate([sample_size])
+    next_nodes.set_shape(static_shape)
+    valid_mask.set_shape(static_shape)
+    return next_nodes, valid_mask
+
+  def _gather_features_numpy(
+      self, node_set_name: tfgnn.NodeSetName,
+      nodes: np.ndarray) -> List[np.ndarray]:
+    positions = self._group_by_partition(node_set_name, nodes)
+    responses = self._call({
+        i: ('features', dict(node_set_name=node_set_name, nodes=nodes[pos]))
+        for i, pos in positions.items()})
+    outputs = []
+    for name, (dtype, shape) in self._feature_specs[node_set_name].items():
+      # Every position is owned by some partition, so all are assigned.
+      value = np.empty([nodes.shape[0]] + shape,
+                       tf.as_dtype(dtype).as_numpy_dtype)
+      for i, features in responses.items():
+        value[positions[i]] = features[name]
+      outputs.append(value)
+    return outputs
+
+  def gather_node_features_dict(self, node_set_name, node_idx):
+    feature_specs = self._feature_specs.get(node_set_name, {})
+    if not feature_specs:
+      return {}
+    nodes = tf.reshape(node_idx, [-1])
+    values = tf.numpy_function(
+        lambda nodes: self._gather_features_numpy(node_set_name, nodes),
+        [nodes], [tf.as_dtype(dtype) for dtype, _ in feature_specs.values()],
+        stateful=True)
+    features = {}
+    for value, (name, (_, shape)) in zip(values, feature_specs.items()):
+      value = tf.reshape(
+          value, tf.concat([tf.shape(node_idx), tf.constant(shape, tf.int32)],
+                           0))
+      value.set_shape(node_idx.shape.concatenate(shape))
+      features[name] = value
+    return features
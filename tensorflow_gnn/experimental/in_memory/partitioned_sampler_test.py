@@ -0,0 +1,189 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for partitioned_sampler."""
+
+from typing import Mapping, MutableMapping, Tuple
+
+from absl.testing import parameterized
+import numpy as np
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+
+from tensorflow_gnn.experimental.in_memory import datasets
+from tensorflow_gnn.experimental.in_memory import int_arithmetic_sampler as ia_sampler
+from tensorflow_gnn.experimental.in_memory import partitioned_sampler
+from tensorflow_gnn.sampler import sampling_spec_builder
+
+_NUM_NODES = 10
+
+
+class ToyRingData(datasets.InMemoryGraphData):
+  """Directed ring of 10 nodes, each linked to the next two nodes.
+
+  Edges to the next node have weight 2, edges to the node after it weight 1.
+  """
+
+  def node_counts(self) -> Mapping[tfgnn.NodeSetName, int]:
+    return {'nodes': _NUM_NODES}
+
+  def node_features_dicts(self) -> Mapping[
+      tfgnn.NodeSetName, MutableMapping[tfgnn.FieldName, tf.Tensor]]:
+    return {'nodes': {
+        'id': tf.range(_NUM_NODES, dtype=tf.int64),
+        'pair': tf.reshape(tf.range(2 * _NUM_NODES, dtype=tf.float32),
+                           [_NUM_NODES, 2]),
+    }}
+
+  def edge_lists(self) -> Mapping[Tuple[str, str, str], tf.Tensor]:
+    source = np.repeat(np.arange(_NUM_NODES), 2)
+    target = (source + np.tile([1, 2], _NUM_NODES)) % _NUM_NODES
+    return {
+        ('nodes', 'edges', 'nodes'): tf.constant(np.stack([source, target]))}
+
+  def edge_weights(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
+    return {'edges': tf.constant([2.0, 1.0] * _NUM_NODES)}
+
+
+def make_toy_ring_data() -> datasets.InMemoryGraphData:
+  return ToyRingData()
+
+
+class GraphPartitionTest(tf.test.TestCase):
+
+  def test_partition(self):
+    partition = partitioned_sampler.GraphPartition(
+        ToyRingData(), num_partitions=3, partition_index=1)
+    self.assertEqual(partition.node_range('nodes'), (3, 6))
+    self.assertEqual(partition.node_counts(), {'nodes': _NUM_NODES})
+    edge_sets = partition.edge_sets()
+    self.assertAllEqual(edge_sets['edges'].adjacency.source, [3, 3, 4, 4, 5, 5])
+    self.assertAllEqual(edge_sets['edges'].adjacency.target, [4, 5, 5, 6, 6, 7])
+    self.assertAllEqual(edge_sets['edges']['weight'], [2, 1, 2, 1, 2, 1])
+    self.assertAllEqual(edge_sets['edges'].sizes, [6])
+    self.assertAllEqual(edge_sets['rev_edges'].adjacency.source,
+                        [3, 3, 4, 4, 5, 5])
+    self.assertAllEqual(edge_sets['rev_edges'].adjacency.target,
+                        [1, 2, 2, 3, 3, 4])
+    self.assertAllEqual(
+        partition.gather_node_features_dict('nodes', tf.constant([5, 3]))['id'],
+        [5, 3])
+
+  def test_invalid_partition_index(self):
+    with self.assertRaisesRegex(ValueError, 'partition_index must be in'):
+      partitioned_sampler.GraphPartition(ToyRingData(), 2, 2)
+
+
+class AuthkeyTest(tf.test.TestCase, parameterized.TestCase):
+
+  @parameterized.parameters(('localhost', None), ('localhost', b''),
+                            ('0.0.0.0', b''))
+  def test_required(self, host, authkey):
+    with self.assertRaisesRegex(ValueError, 'non-empty `authkey`'):
+      partitioned_sampler.serve_partition(
+          make_toy_ring_data, 1, 0, authkey=authkey, address=(host, 0))
+    with self.assertRaisesRegex(ValueError, 'non-empty `authkey`'):
+      partitioned_sampler.PartitionedGraphSampler(
+          [(host, 1)], authkey=authkey)
+
+  def test_empty_for_local_partitions(self):
+    with self.assertRaisesRegex(ValueError, 'non-empty `authkey`'):
+      partitioned_sampler.start_local_partitions(
+          make_toy_ring_data, 1, authkey=b'')
+
+
+class PartitionedGraphSamplerTest(tf.test.TestCase, parameterized.TestCase):
+
+  @classmethod
+  def setUpClass(cls):
+    super().setUpClass()
+    addresses, cls.processes, authkey = (
+        partitioned_sampler.start_local_partitions(
+            make_toy_ring_data, num_partitions=3))
+    cls.sampler = partitioned_sampler.PartitionedGraphSampler(
+        addresses, authkey)
+
+  @classmethod
+  def tearDownClass(cls):
+    cls.sampler.shutdown()
+    for process in cls.processes:
+      process.join()
+    super().tearDownClass()
+
+  def test_metadata(self):
+    self.assertEqual(self.sampler.num_partitions, 3)
+    self.assertEqual(self.sampler.node_counts, {'nodes': _NUM_NODES})
+    self.assertEqual(self.sampler.edge_types,
+                     {'edges': ('nodes', 'nodes'),
+                      'rev_edges': ('nodes', 'nodes')})
+
+  @parameterized.named_parameters(
+      ('WithReplacement', ia_sampler.EdgeSampling.WITH_REPLACEMENT),
+      ('WithoutReplacement', ia_sampler.EdgeSampling.WITHOUT_REPLACEMENT))
+  def test_sample_one_hop(self, sampling_mode):
+    source_nodes = tf.constant([[0, 9], [4, 5], [7, 2]], tf.int64)
+    next_nodes, valid_mask = self.sampler.sample_one_hop_with_valid_mask(
+        source_nodes, 'edges', sample_size=2, sampling_mode=sampling_mode)
+    self.assertEqual(next_nodes.dtype, tf.int64)
+    self.assertAllEqual(valid_mask, tf.ones([3, 2, 2], tf.bool))
+    offsets = (next_nodes - source_nodes[..., None]) % _NUM_NODES
+    self.assertAllInSet(offsets, [1, 2])
+    if sampling_mode == ia_sampler.EdgeSampling.WITHOUT_REPLACEMENT:
+      self.assertAllEqual(tf.sort(offsets, axis=-1),
+                          tf.broadcast_to([1, 2], [3, 2, 2]))
+
+  def test_top_k_matches_graph_sampler(self):
+    source_nodes = tf.range(_NUM_NODES)
+    expected = ia_sampler.GraphSampler(
+        ToyRingData()).sample_one_hop_with_valid_mask(
+            source_nodes, 'rev_edges', sample_size=3,
+            strategy=sampling_spec_builder.SamplingStrategy.TOP_K)
+    actual = self.sampler.sample_one_hop_with_valid_mask(
+        source_nodes, 'rev_edges', sample_size=3,
+        strategy=sampling_spec_builder.SamplingStrategy.TOP_K)
+    self.assertAllEqual(actual[1], expected[1])
+    self.assertAllEqual(tf.where(actual[1], actual[0], -1),
+                        tf.where(expected[1], expected[0], -1))
+
+  def test_gather_node_features_dict(self):
+    features = self.sampler.gather_node_features_dict(
+        'nodes', tf.constant([[9, 0, 4]]))
+    self.assertAllEqual(features['id'], [[9, 0, 4]])
+    self.assertAllEqual(features['pair'], [[[18, 19], [0, 1], [8, 9]]])
+
+  def test_sample_sub_graph_in_dataset(self):
+    builder = sampling_spec_builder.SamplingSpecBuilder(
+        ToyRingData().graph_schema(),
+        default_strategy=sampling_spec_builder.SamplingStrategy.RANDOM_UNIFORM)
+    spec = builder.seed('nodes').sample(2, 'edges').sample(2, 'edges').build()
+    dataset = tf.data.Dataset.from_tensor_slices(
+        tf.constant([[1, 8], [5, 3]], tf.int64)).map(
+            lambda seeds: self.sampler.sample_sub_graph(seeds, spec))
+    for graph, seeds in zip(dataset, [[1, 8], [5, 3]]):
+      node_ids = graph.node_sets['nodes']['id']
+      self.assertAllInSet(seeds, node_ids)
+      self.assertAllEqual(graph.node_sets['nodes']['pair'][:, 0], node_ids * 2)
+      edges = graph.edge_sets['edges'].adjacency
+      offsets = (tf.gather(node_ids, edges.target) -
+                 tf.gather(node_ids, edges.source)) % _NUM_NODES
+      self.assertAllInSet(offsets, [1, 2])
+
+  def test_remote_errors(self):
+    with self.assertRaisesRegex(RuntimeError,
+                                'Partition 0 failed.*Unsupported sampling'):
+      self.sampler.sample_one_hop(tf.constant([0]), 'edges', 2, strategy=-1)
+
+
+if __name__ == '__main__':
+  tf.test.main()
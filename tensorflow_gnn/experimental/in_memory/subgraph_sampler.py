@@ -0,0 +1,596 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Samples induced subgraphs of in-memory graphs, for deep GNNs.
+
+`GraphSampler` samples trees of neighbors around seed nodes, whose size grows
+exponentially with the number of hops. The samplers in this module instead
+sample sets of nodes and return the subgraphs induced by them (i.e., with all
+edges among the sampled nodes), whose size does not depend on the depth of the
+model:
+
+* `ClusterGCNSampler` partitions the graph once into clusters of densely linked
+  nodes (see `label_propagation_partition()`) and yields subgraphs induced by
+  unions of random clusters (Cluster-GCN, Chiang et al., KDD 2019).
+
+* `GraphSAINTEdgeSampler` and `GraphSAINTRandomWalkSampler` yield subgraphs
+  induced by the endpoints of random edges or by the nodes of random walks
+  (GraphSAINT, Zeng et al., ICLR 2020). Their subgraphs carry the normalization
+  coefficients of GraphSAINT as features: edge feature "aggregation_norm", to
+  scale messages sent to edge targets, and node feature "loss_norm", to weight
+  the loss of nodes.
+
+All node sets and edge sets are sampled together: nodes of all node sets are
+numbered consecutively and all edge sets (in both directions) link them into a
+single graph. Node features are gathered from `graph_data.node_features_dicts()`
+(use `graph_data.with_labels_as_features(True)` for labels).
+
+
+# Usage Example
+
+```
+graph_data = datasets.get_in_memory_graph_data('ogbn-arxiv')
+sampler = subgraph_sampler.ClusterGCNSampler(graph_data, num_clusters=1000)
+dataset = sampler.as_dataset(clusters_per_batch=20)
+
+sampler = subgraph_sampler.GraphSAINTRandomWalkSampler(
+    graph_data, num_roots=3000, walk_length=2)
+dataset = sampler.as_dataset()
+```
+"""
+
+import functools
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import scipy.sparse as ssp
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+from tensorflow_gnn.experimental.in_memory import datasets
+
+AGGREGATION_NORM_FEATURE_NAME = 'aggregation_norm'
+LOSS_NORM_FEATURE_NAME = 'loss_norm'
+
+# Node set name -> sorted node IDs.
+NodeIds = Dict[tfgnn.NodeSetName, np.ndarray]
+# Edge set name -> positions of edges in `graph_data.edge_sets()`.
+EdgeIds = Dict[tfgnn.EdgeSetName, np.ndarray]
+
+
+def label_propagation_partition(
+    adjacency: ssp.spmatrix, num_clusters: int, num_iterations: int = 10,
+    max_imbalance: float = 0.1, seed: Optional[int] = None) -> np.ndarray:
+  """Partitions nodes into clusters of densely linked nodes.
+
+  Nodes are initially split into contiguous ranges of the reverse Cuthill-McKee
+  ordering (which places linked nodes close to each other). Then, in every
+  iteration, a random half of the nodes moves to the cluster of most of their
+  neighbors, unless the cluster would then exceed
+  `(1 + max_imbalance) * num_nodes / num_clusters` nodes. All steps are
+  vectorized over nodes.
+
+  Args:
+    adjacency: Square sparse matrix. Edge directions and values are ignored.
+    num_clusters: Number of clusters.
+    num_iterations: Number of label propagation iterations.
+    max_imbalance: Maximum relative excess of cluster sizes over the average.
+    seed: Seed of random moves.
+
+  Returns:
+    int64 vector with the cluster of every node, in `[0, num_clusters)`.
+  """
+  num_nodes = adjacency.shape[0]
+  if num_clusters < 1:
+    raise ValueError(f'num_clusters must be positive, got {num_clusters}.')
+  adjacency = ssp.csr_matrix(adjacency, dtype=np.float32)
+  adjacency = ((adjacency + adjacency.T) > 0).astype(np.float32)
+  # Self loops are removed.
+  adjacency = ssp.csr_matrix(ssp.triu(adjacency, 1) + ssp.tril(adjacency, -1))
+  order = ssp.csgraph.reverse_cuthill_mckee(adjacency, symmetric_mode=True)
+  clusters = np.empty([num_nodes], np.int64)
+  clusters[order] = np.arange(num_nodes) * num_clusters // max(num_nodes, 1)
+
+  capacity = int(np.ceil((1 + max_imbalance) * num_nodes / num_clusters))
+  rng = np.random.default_rng(seed)
+  node_range = np.arange(num_nodes)
+  for _ in range(num_iterations):
+    sizes = np.bincount(clusters, minlength=num_clusters)
+    one_hot = ssp.csr_matrix(
+        (np.ones([num_nodes], np.float32), (node_range, clusters)),
+        shape=(num_nodes, num_clusters))
+    # Node -> cluster -> number of neighbors, +0.5 to stay in own cluster.
+    votes = (adjacency @ one_hot + 0.5 * one_hot).tocoo()
+    allowed = (sizes[votes.col] < capacity) | (votes.col == clusters[votes.row])
+    rows, cols, scores = (votes.row[allowed], votes.col[allowed],
+                          votes.data[allowed])
+    # Last entry of every row after sorting by (row, score) has the best score.
+    order = np.lexsort([scores, rows])
+    rows, cols = rows[order], cols[order]
+    is_last = np.append(rows[1:] != rows[:-1], True)
+    best = clusters.copy()
+    best[rows[is_last]] = cols[is_last]
+
+    movers = np.flatnonzero((best != clusters) & (rng.random(num_nodes) < 0.5))
+    if not movers.size:
+      continue
+    # Moves into every cluster are capped by its remaining capacity.
+    movers = movers[rng.permutation(movers.size)]
+    movers = movers[np.argsort(best[movers], kind='stable')]
+    targets = best[movers]
+    group_starts = np.flatnonzero(np.append(True, targets[1:] != targets[:-1]))
+    group_sizes = np.diff(np.append(group_starts, targets.size))
+    ranks = np.arange(targets.size) - np.repeat(group_starts, group_sizes)
+    accepted = ranks < capacity - sizes[targets]
+    clusters[movers[accepted]] = targets[accepted]
+  return clusters
+
+
+def _ragged_ranges(starts: np.ndarray, limits: np.ndarray) -> np.ndarray:
+  """Returns concatenation of `range(start, limit)` for all pairs."""
+  lengths = limits - starts
+  return (np.repeat(starts - np.cumsum(lengths) + lengths, lengths) +
+          np.arange(lengths.sum()))
+
+
+class SubgraphSampler:
+  """Abstract class for samplers of induced subgraphs of `InMemoryGraphData`.
+
+  Subclasses implement `_sample()`, which returns sampled nodes and edges for
+  one input tensor, and optionally `_features()`, which returns extra float32
+  features of the sampled nodes and edges.
+  """
+
+  # Names of extra features returned by `_features()`.
+  _node_feature_names = ()
+  _edge_feature_names = ()
+
+  def __init__(self, graph_data: datasets.InMemoryGraphData):
+    self.graph_data = graph_data
+    self.node_counts = dict(graph_data.node_counts())
+    self._node_features = graph_data.node_features_dicts()
+    self._node_set_names = sorted(self.node_counts)
+    # Node set name -> offset of its nodes in the numbering across node sets.
+    offsets = np.cumsum([0] + [self.node_counts[name]
+                               for name in self._node_set_names])
+    self._node_offsets = dict(zip(self._node_set_names, offsets[:-1]))
+    self.num_nodes = int(offsets[-1])
+
+    edge_sets = graph_data.edge_sets()
+    if not edge_sets:
+      raise ValueError('graph_data has no edge-sets.')
+    self._edge_set_names = sorted(edge_sets)
+    self.edge_types = {}  # Edge set name -> (src node set name, dst *).
+    self._edges = {}  # Edge set name -> (source IDs, target IDs).
+    # Edge set name -> (offsets of sources in `edge_ids`, edge_ids by source).
+    self._edges_by_source = {}
+    global_sources = []
+    global_targets = []
+    for name in self._edge_set_names:
+      adjacency = edge_sets[name].adjacency
+      self.edge_types[name] = (adjacency.source_name, adjacency.target_name)
+      sources = adjacency.source.numpy().astype(np.int64)
+      targets = adjacency.target.numpy().astype(np.int64)
+      self._edges[name] = (sources, targets)
+      source_degrees = np.bincount(
+          sources, minlength=self.node_counts[adjacency.source_name])
+      self._edges_by_source[name] = (
+          np.concatenate([[0], np.cumsum(source_degrees)]),
+          np.argsort(sources, kind='stable'))
+      global_sources.append(sources + self._node_offsets[adjacency.source_name])
+      global_targets.append(targets + self._node_offsets[adjacency.target_name])
+
+    global_sources = np.concatenate(global_sources)
+    global_targets = np.concatenate(global_targets)
+    # Undirected graph over all nodes, with linked nodes of all edge sets.
+    self.adjacency = ssp.csr_matrix(
+        (np.ones([2 * global_sources.size], np.int8),
+         (np.concatenate([global_sources, global_targets]),
+          np.concatenate([global_targets, global_sources]))),
+        shape=(self.num_nodes, self.num_nodes)) > 0
+    self.adjacency.sort_indices()
+
+    self._edge_tensors = {
+        name: (tf.constant(sources), tf.constant(targets))
+        for name, (sources, targets) in self._edges.items()}
+
+  def _sample(self, inputs: np.ndarray) -> Tuple[NodeIds, EdgeIds]:
+    """Returns sampled nodes and edges for input of `sample_sub_graph()`."""
+    raise NotImplementedError()
+
+  def _features(self, node_ids: NodeIds, edge_ids: EdgeIds) -> Tuple[
+      Mapping[tfgnn.NodeSetName, Mapping[tfgnn.FieldName, np.ndarray]],
+      Mapping[tfgnn.EdgeSetName, Mapping[tfgnn.FieldName, np.ndarray]]]:
+    """Returns extra features of sampled nodes and edges."""
+    del node_ids, edge_ids
+    return {}, {}
+
+  def _split_global_ids(self, global_ids: np.ndarray) -> NodeIds:
+    """Returns node IDs per node set, given sorted global node IDs."""
+    node_ids = {}
+    for name in self._node_set_names:
+      offset = self._node_offsets[name]
+      begin, end = np.searchsorted(
+          global_ids, [offset, offset + self.node_counts[name]])
+      node_ids[name] = global_ids[begin:end] - offset
+    return node_ids
+
+  def induced_edges(self, node_ids: NodeIds) -> EdgeIds:
+    """Returns edges among nodes, given sorted node IDs per node set."""
+    edge_ids = {}
+    for name in self._edge_set_names:
+      source_set_name, target_set_name = self.edge_types[name]
+      sources = node_ids[source_set_name]
+      targets = node_ids[target_set_name]
+      offsets, edges_by_source = self._edges_by_source[name]
+      candidates = edges_by_source[
+          _ragged_ranges(offsets[sources], offsets[sources + 1])]
+      candidate_targets = self._edges[name][1][candidates]
+      positions = np.minimum(np.searchsorted(targets, candidate_targets),
+                             max(targets.size - 1, 0))
+      if targets.size:
+        candidates = candidates[targets[positions] == candidate_targets]
+      else:
+        candidates = candidates[:0]
+      edge_ids[name] = np.sort(candidates)
+    return edge_ids
+
+  def _sample_flat(self, inputs: np.ndarray) -> List[np.ndarray]:
+    node_ids, edge_ids = self._sample(inputs)
+    node_features, edge_features = self._features(node_ids, edge_ids)
+    flat = [node_ids[name] for name in self._node_set_names]
+    flat.extend(edge_ids[name] for name in self._edge_set_names)
+    for name in self._node_set_names:
+      flat.extend(node_features[name][feature_name]
+                  for feature_name in self._node_feature_names)
+    for name in self._edge_set_names:
+      flat.extend(edge_features[name][feature_name]
+                  for feature_name in self._edge_feature_names)
+    return [np.asarray(value) for value in flat]
+
+  def sample_sub_graph(
+      self, inputs: tf.Tensor,
+      global_id_feature_name: Optional[tfgnn.FieldName] = None
+      ) -> tfgnn.GraphTensor:
+    """Samples one subgraph, as `GraphTensor` with a single component.
+
+    Args:
+      inputs: Input of sampling, as documented by subclasses.
+      global_id_feature_name: If set, every node set gets a feature with this
+        name, holding the node IDs in the in-memory graph (as opposed to the
+        positions of the nodes in the output `GraphTensor`).
+
+    Returns:
+      Subgraph induced by sampled nodes, with all node sets and edge sets of
+      `graph_data`.
+    """
+    num_node_sets = len(self._node_set_names)
+    num_edge_sets = len(self._edge_set_names)
+    num_features = (num_node_sets * len(self._node_feature_names) +
+                    num_edge_sets * len(self._edge_feature_names))
+    flat = tf.numpy_function(
+        self._sample_flat, [inputs],
+        [tf.int64] * (num_node_sets + num_edge_sets) +
+        [tf.float32] * num_features, stateful=False)
+    for value in flat:
+      value.set_shape([None])
+    flat = iter(flat)
+    node_ids = {name: next(flat) for name in self._node_set_names}
+    edge_ids = {name: next(flat) for name in self._edge_set_names}
+    node_features = {
+        name: {feature_name: next(flat)
+               for feature_name in self._node_feature_names}
+        for name in self._node_set_names}
+    edge_features = {
+        name: {feature_name: next(flat)
+               for feature_name in self._edge_feature_names}
+        for name in self._edge_set_names}
+
+    node_sets = {}
+    for name in self._node_set_names:
+      features = {
+          feature_name: tf.gather(value, node_ids[name])
+          for feature_name, value in self._node_features.get(name, {}).items()}
+      features.update(node_features[name])
+      if global_id_feature_name is not None:
+        features[global_id_feature_name] = node_ids[name]
+      node_sets[name] = tfgnn.NodeSet.from_fields(
+          sizes=tf.shape(node_ids[name]), features=features)
+
+    edge_sets = {}
+    for name in self._edge_set_names:
+      source_set_name, target_set_name = self.edge_types[name]
+      sources, targets = self._edge_tensors[name]
+      sources = tf.searchsorted(node_ids[source_set_name],
+                                tf.gather(sources, edge_ids[name]))
+      targets = tf.searchsorted(node_ids[target_set_name],
+                                tf.gather(targets, edge_ids[name]))
+      edge_sets[name] = tfgnn.EdgeSet.from_fields(
+          sizes=tf.shape(sources), features=edge_features[name],
+          adjacency=tfgnn.Adjacency.from_indices(
+              source=(source_set_name, sources),
+              target=(target_set_name, targets)))
+
+    return tfgnn.GraphTensor.from_pieces(
+        node_sets=node_sets, edge_sets=edge_sets)
+
+
+class ClusterGCNSampler(SubgraphSampler):
+  """Samples subgraphs induced by unions of clusters (Cluster-GCN).
+
+  Clusters are computed once, on construction, by
+  `label_propagation_partition()` over nodes of all node sets.
+  """
+
+  def __init__(self, graph_data: datasets.InMemoryGraphData,
+               num_clusters: int, num_iterations: int = 10,
+               max_imbalance: float = 0.1, seed: Optional[int] = None):
+    """Partitions graph.
+
+    Args:
+      graph_data: Graph to sample from.
+      num_clusters: Number of clusters.
+      num_iterations: Forwarded to `label_propagation_partition()`.
+      max_imbalance: Forwarded to `label_propagation_partition()`.
+      seed: Forwarded to `label_propagation_partition()`.
+    """
+    super().__init__(graph_data)
+    self.num_clusters = num_clusters
+    clusters = label_propagation_partition(
+        self.adjacency, num_clusters, num_iterations=num_iterations,
+        max_imbalance=max_imbalance, seed=seed)
+    # Node set name -> cluster of every node.
+    self.clusters = {
+        name: clusters[self._node_offsets[name]:
+                       self._node_offsets[name] + self.node_counts[name]]
+        for name in self._node_set_names}
+    # Global node IDs sorted by cluster, and offsets of clusters in them.
+    self._cluster_nodes = np.argsort(clusters, kind='stable')
+    self._cluster_offsets = np.concatenate(
+        [[0], np.cumsum(np.bincount(clusters, minlength=num_clusters))])
+
+  def _sample(self, inputs: np.ndarray) -> Tuple[NodeIds, EdgeIds]:
+    clusters = np.unique(inputs.astype(np.int64))
+    global_ids = np.sort(self._cluster_nodes[_ragged_ranges(
+        self._cluster_offsets[clusters], self._cluster_offsets[clusters + 1])])
+    node_ids = self._split_global_ids(global_ids)
+    return node_ids, self.induced_edges(node_ids)
+
+  def sample_sub_graph(
+      self, inputs: tf.Tensor,
+      global_id_feature_name: Optional[tfgnn.FieldName] = None
+      ) -> tfgnn.GraphTensor:
+    """Returns subgraph induced by clusters `inputs` (int vector).
+
+    Args:
+      inputs: int vector of cluster IDs.
+      global_id_feature_name: Forwarded to `SubgraphSampler.sample_sub_graph`.
+    """
+    return super().sample_sub_graph(
+        inputs, global_id_feature_name=global_id_feature_name)
+
+  def as_dataset(
+      self, clusters_per_batch: int = 1, repeat: Union[bool, int] = True,
+      shuffle: bool = True, seed: Optional[int] = None,
+      global_id_feature_name: Optional[tfgnn.FieldName] = None
+      ) -> tf.data.Dataset:
+    """Returns dataset of subgraphs induced by `clusters_per_batch` clusters.
+
+    Every epoch visits every cluster once.
+
+    Args:
+      clusters_per_batch: Number of clusters per subgraph.
+      repeat: If True, then the dataset will be infinitely repeated. If an int,
+        then dataset will be repeated this many times. If False, dataset will
+        not be repeated.
+      shuffle: If set, clusters are shuffled in every epoch.
+      seed: Seed of shuffling.
+      global_id_feature_name: Forwarded to `sample_sub_graph`.
+    """
+    dataset = tf.data.Dataset.range(self.num_clusters)
+    if shuffle:
+      dataset = dataset.shuffle(self.num_clusters, seed=seed)
+    if repeat:
+      if isinstance(repeat, bool) and repeat:
+        dataset = dataset.repeat()
+      else:
+        dataset = dataset.repeat(repeat)
+    dataset = dataset.batch(clusters_per_batch)
+    return dataset.map(functools.partial(
+        self.sample_sub_graph, global_id_feature_name=global_id_feature_name))
+
+
+class _GraphSAINTSampler(SubgraphSampler):
+  """Base class of GraphSAINT samplers, with normalization coefficients.
+
+  Subclasses implement `_sample_global_ids()`. Normalization coefficients are
+  estimated from the numbers of `num_estimation_samples` subgraphs that contain
+  every node (C_v) and every edge (C_uv). Edge (u, v) gets
+  "aggregation_norm" = C_v / C_uv, where v is the edge target, and node v gets
+  "loss_norm" = `num_estimation_samples` / (C_v * total number of nodes).
+  """
+
+  _node_feature_names = (LOSS_NORM_FEATURE_NAME,)
+  _edge_feature_names = (AGGREGATION_NORM_FEATURE_NAME,)
+
+  def _sample_global_ids(self, rng: np.random.Generator) -> np.ndarray:
+    """Returns sampled global node IDs, possibly unsorted and repeated."""
+    raise NotImplementedError()
+
+  def _sample(self, inputs: np.ndarray) -> Tuple[NodeIds, EdgeIds]:
+    rng = np.random.default_rng(int(inputs) % 2**63)
+    node_ids = self._split_global_ids(np.unique(self._sample_global_ids(rng)))
+    return node_ids, self.induced_edges(node_ids)
+
+  def _estimate_normalization(self, num_estimation_samples: int,
+                              seed: Optional[int]):
+    """Counts nodes and edges in sampled subgraphs."""
+    if num_estimation_samples < 1:
+      raise ValueError('num_estimation_samples must be positive, got '
+                       f'{num_estimation_samples}.')
+    rng = np.random.default_rng(seed)
+    node_counts = {name: np.zeros([self.node_counts[name]], np.int64)
+                   for name in self._node_set_names}
+    edge_counts = {name: np.zeros([self._edges[name][0].size], np.int64)
+                   for name in self._edge_set_names}
+    for seed_value in rng.integers(2**63, size=[num_estimation_samples]):
+      node_ids, edge_ids = self._sample(seed_value)
+      for name, ids in node_ids.items():
+        node_counts[name][ids] += 1
+      for name, ids in edge_ids.items():
+        edge_counts[name][ids] += 1
+    self._loss_norms = {
+        name: (num_estimation_samples /
+               (np.maximum(counts, 1) * self.num_nodes)).astype(np.float32)
+        for name, counts in node_counts.items()}
+    self._aggregation_norms = {}
+    for name, counts in edge_counts.items():
+      target_counts = node_counts[self.edge_types[name][1]][
+          self._edges[name][1]]
+      self._aggregation_norms[name] = (
+          target_counts / np.maximum(counts, 1)).astype(np.float32)
+
+  def _features(self, node_ids: NodeIds, edge_ids: EdgeIds) -> Tuple[
+      Mapping[tfgnn.NodeSetName, Mapping[tfgnn.FieldName, np.ndarray]],
+      Mapping[tfgnn.EdgeSetName, Mapping[tfgnn.FieldName, np.ndarray]]]:
+    node_features = {
+        name: {LOSS_NORM_FEATURE_NAME: self._loss_norms[name][ids]}
+        for name, ids in node_ids.items()}
+    edge_features = {
+        name: {AGGREGATION_NORM_FEATURE_NAME:
+                   self._aggregation_norms[name][ids]}
+        for name, ids in edge_ids.items()}
+    return node_features, edge_features
+
+  def sample_sub_graph(
+      self, inputs: tf.Tensor,
+      global_id_feature_name: Optional[tfgnn.FieldName] = None
+      ) -> tfgnn.GraphTensor:
+    """Returns subgraph sampled with random seed `inputs` (int scalar).
+
+    Args:
+      inputs: int scalar, seeding the random number generator.
+      global_id_feature_name: Forwarded to `SubgraphSampler.sample_sub_graph`.
+    """
+    return super().sample_sub_graph(
+        inputs, global_id_feature_name=global_id_feature_name)
+
+  def as_dataset(
+      self, num_subgraphs: Optional[int] = None, seed: Optional[int] = None,
+      global_id_feature_name: Optional[tfgnn.FieldName] = None
+      ) -> tf.data.Dataset:
+    """Returns dataset of random subgraphs.
+
+    Args:
+      num_subgraphs: Number of subgraphs. If not set, the dataset is infinite.
+      seed: Seed of the random seeds of subgraphs.
+      global_id_feature_name: Forwarded to `sample_sub_graph`.
+    """
+    dataset = tf.data.Dataset.random(seed=seed)
+    if num_subgraphs is not None:
+      dataset = dataset.take(num_subgraphs)
+    return dataset.map(functools.partial(
+        self.sample_sub_graph, global_id_feature_name=global_id_feature_name))
+
+
+class GraphSAINTEdgeSampler(_GraphSAINTSampler):
+  """Samples subgraphs induced by endpoints of random edges (GraphSAINT).
+
+  Edges of all edge sets are drawn (with replacement) with probability
+  proportional to 1 / deg(u) + 1 / deg(v), where deg are degrees in the
+  undirected graph.
+  """
+
+  def __init__(self, graph_data: datasets.InMemoryGraphData, num_edges: int,
+               num_estimation_samples: int = 50, seed: Optional[int] = None):
+    """Estimates normalization coefficients.
+
+    Args:
+      graph_data: Graph to sample from.
+      num_edges: Number of edges drawn per subgraph.
+      num_estimation_samples: Number of subgraphs sampled to estimate
+        normalization coefficients.
+      seed: Seed of estimation samples.
+    """
+    super().__init__(graph_data)
+    self.num_edges = num_edges
+    degrees = np.maximum(np.diff(self.adjacency.indptr), 1)
+    self._global_edges = []
+    for name in self._edge_set_names:
+      source_set_name, target_set_name = self.edge_types[name]
+      sources, targets = self._edges[name]
+      self._global_edges.append(
+          (sources + self._node_offsets[source_set_name],
+           targets + self._node_offsets[target_set_name]))
+    self._global_edges = tuple(map(np.concatenate, zip(*self._global_edges)))
+    probabilities = (1.0 / degrees[self._global_edges[0]] +
+                     1.0 / degrees[self._global_edges[1]])
+    self._edge_cumsum = np.cumsum(probabilities)
+    self._estimate_normalization(num_estimation_samples, seed)
+
+  def _sample_global_ids(self, rng: np.random.Generator) -> np.ndarray:
+    edges = np.searchsorted(
+        self._edge_cumsum, rng.random(self.num_edges) * self._edge_cumsum[-1],
+        side='right')
+    edges = np.minimum(edges, self._edge_cumsum.size - 1)
+    return np.concatenate(
+        [self._global_edges[0][edges], self._global_edges[1][edges]])
+
+
+class GraphSAINTRandomWalkSampler(_GraphSAINTSampler):
+  """Samples subgraphs induced by nodes of random walks (GraphSAINT).
+
+  Walks start at `num_roots` nodes drawn uniformly (with replacement) from
+  `root_node_set_name`, or from all nodes, and follow uniformly random edges of
+  the undirected graph. Walks stop at nodes without edges.
+  """
+
+  def __init__(self, graph_data: datasets.InMemoryGraphData, num_roots: int,
+               walk_length: int, root_node_set_name: Optional[
+                   tfgnn.NodeSetName] = None,
+               num_estimation_samples: int = 50, seed: Optional[int] = None):
+    """Estimates normalization coefficients.
+
+    Args:
+      graph_data: Graph to sample from.
+      num_roots: Number of walks per subgraph.
+      walk_length: Number of steps of every walk.
+      root_node_set_name: If set, walks start at nodes of this node set.
+      num_estimation_samples: Number of subgraphs sampled to estimate
+        normalization coefficients.
+      seed: Seed of estimation samples.
+    """
+    super().__init__(graph_data)
+    self.num_roots = num_roots
+    self.walk_length = walk_length
+    if root_node_set_name is None:
+      self._root_range = (0, self.num_nodes)
+    else:
+      offset = self._node_offsets[root_node_set_name]
+      self._root_range = (offset,
+                          offset + self.node_counts[root_node_set_name])
+    self._estimate_normalization(num_estimation_samples, seed)
+
+  def _sample_global_ids(self, rng: np.random.Generator) -> np.ndarray:
+    indptr, indices = self.adjacency.indptr, self.adjacency.indices
+    nodes = rng.integers(*self._root_range, size=[self.num_roots])
+    walks = [nodes]
+    for _ in range(self.walk_length):
+      starts = indptr[nodes]
+      degrees = indptr[nodes + 1] - starts
+      steps = starts + (rng.random(nodes.size) * degrees).astype(np.int64)
+      nodes = np.where(degrees > 0,
+                       indices[np.minimum(steps, max(indices.size - 1, 0))],
+                       nodes)
+      walks.append(nodes)
+    return np.concatenate(walks)
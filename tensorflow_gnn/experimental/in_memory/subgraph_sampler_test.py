@@ -0,0 +1,194 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for subgraph_sampler."""
+
+from typing import Mapping, MutableMapping, Tuple
+
+from absl.testing import parameterized
+import numpy as np
+import scipy.sparse as ssp
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+
+from tensorflow_gnn.experimental.in_memory import datasets
+from tensorflow_gnn.experimental.in_memory import subgraph_sampler
+
+_NUM_NODES = 12
+_NUM_ITEMS = 4
+
+
+class ToyCliquesData(datasets.InMemoryGraphData):
+  """Three cliques of 4 "nodes", linked in a ring, and "items" owned by nodes.
+
+  Node 3 links to 4, 7 to 8 and 11 to 0. Item `i` is owned by node `3 * i`.
+  """
+
+  def node_counts(self) -> Mapping[tfgnn.NodeSetName, int]:
+    return {'nodes': _NUM_NODES, 'items': _NUM_ITEMS}
+
+  def node_features_dicts(self) -> Mapping[
+      tfgnn.NodeSetName, MutableMapping[tfgnn.FieldName, tf.Tensor]]:
+    return {'nodes': {'id': tf.range(_NUM_NODES, dtype=tf.int64)},
+            'items': {'id': tf.range(_NUM_ITEMS, dtype=tf.int64)}}
+
+  def edge_lists(self) -> Mapping[Tuple[str, str, str], tf.Tensor]:
+    links = [(4 * c + i, 4 * c + j)
+             for c in range(3) for i in range(4) for j in range(i + 1, 4)]
+    links += [(3, 4), (7, 8), (11, 0)]
+    owns = [(3 * i, i) for i in range(_NUM_ITEMS)]
+    return {('nodes', 'links', 'nodes'): tf.constant(np.array(links).T),
+            ('nodes', 'owns', 'items'): tf.constant(np.array(owns).T)}
+
+
+class SubgraphSamplerTestBase(tf.test.TestCase, parameterized.TestCase):
+
+  def assertInducedSubgraph(self, graph: tfgnn.GraphTensor,
+                            graph_data: datasets.InMemoryGraphData):
+    """Checks that `graph` has all edges among its nodes."""
+    node_ids = {name: set(node_set['#global_id'].numpy())
+                for name, node_set in graph.node_sets.items()}
+    for name, node_set in graph.node_sets.items():
+      self.assertAllEqual(node_set['id'], node_set['#global_id'])
+    for name, edge_set in graph_data.edge_sets().items():
+      adjacency = edge_set.adjacency
+      expected = sorted(
+          (source, target) for source, target in zip(
+              adjacency.source.numpy(), adjacency.target.numpy())
+          if source in node_ids[adjacency.source_name]
+          and target in node_ids[adjacency.target_name])
+      sampled = graph.edge_sets[name].adjacency
+      actual = zip(
+          tf.gather(graph.node_sets[adjacency.source_name]['#global_id'],
+                    sampled.source).numpy(),
+          tf.gather(graph.node_sets[adjacency.target_name]['#global_id'],
+                    sampled.target).numpy())
+      self.assertEqual(sorted(actual), expected, name)
+
+
+class LabelPropagationPartitionTest(tf.test.TestCase):
+
+  def test_cliques(self):
+    graph_data = ToyCliquesData()
+    edges = graph_data.edge_lists()[('nodes', 'links', 'nodes')].numpy()
+    permutation = np.random.default_rng(0).permutation(_NUM_NODES)
+    adjacency = ssp.csr_matrix(
+        (np.ones([edges.shape[1]]), tuple(permutation[edges])),
+        shape=(_NUM_NODES, _NUM_NODES))
+    clusters = subgraph_sampler.label_propagation_partition(
+        adjacency, num_clusters=3, seed=1)[permutation]
+    self.assertLen(set(clusters), 3)
+    for clique in range(3):
+      self.assertLen(set(clusters[4 * clique:4 * clique + 4]), 1)
+
+  def test_balance(self):
+    # Star graph: all nodes would join the cluster of the center.
+    adjacency = ssp.csr_matrix(
+        (np.ones([99]), (np.zeros([99], np.int64), np.arange(1, 100))),
+        shape=(100, 100))
+    clusters = subgraph_sampler.label_propagation_partition(
+        adjacency, num_clusters=4, max_imbalance=0.2, seed=0)
+    self.assertLessEqual(np.bincount(clusters).max(), 30)
+
+
+class ClusterGCNSamplerTest(SubgraphSamplerTestBase):
+
+  def setUp(self):
+    super().setUp()
+    self.graph_data = ToyCliquesData()
+    self.sampler = subgraph_sampler.ClusterGCNSampler(
+        self.graph_data, num_clusters=4, seed=0)
+
+  def test_clusters(self):
+    clusters = self.sampler.clusters
+    self.assertEqual(clusters['nodes'].shape, (_NUM_NODES,))
+    self.assertEqual(clusters['items'].shape, (_NUM_ITEMS,))
+    self.assertAllInSet(np.concatenate(list(clusters.values())), range(4))
+
+  def test_sample_sub_graph(self):
+    graph = self.sampler.sample_sub_graph(
+        tf.constant([2, 0]), global_id_feature_name='#global_id')
+    for name, node_set in graph.node_sets.items():
+      self.assertAllEqual(
+          node_set['#global_id'],
+          np.flatnonzero(np.isin(self.sampler.clusters[name], [0, 2])))
+    self.assertInducedSubgraph(graph, self.graph_data)
+
+  def test_as_dataset(self):
+    dataset = self.sampler.as_dataset(
+        clusters_per_batch=2, repeat=False, global_id_feature_name='#global_id')
+    node_ids = []
+    for graph in dataset:
+      self.assertInducedSubgraph(graph, self.graph_data)
+      node_ids.extend(graph.node_sets['nodes']['#global_id'].numpy())
+    # Every node is sampled once per epoch.
+    self.assertCountEqual(node_ids, range(_NUM_NODES))
+
+
+class GraphSAINTSamplerTest(SubgraphSamplerTestBase):
+
+  @parameterized.named_parameters(
+      ('Edges', lambda graph_data: subgraph_sampler.GraphSAINTEdgeSampler(
+          graph_data, num_edges=3, num_estimation_samples=20, seed=0)),
+      ('RandomWalks',
+       lambda graph_data: subgraph_sampler.GraphSAINTRandomWalkSampler(
+           graph_data, num_roots=2, walk_length=3, root_node_set_name='nodes',
+           num_estimation_samples=20, seed=0)))
+  def test_as_dataset(self, make_sampler):
+    graph_data = ToyCliquesData()
+    sampler = make_sampler(graph_data)
+    dataset = sampler.as_dataset(
+        num_subgraphs=5, seed=1, global_id_feature_name='#global_id')
+    num_subgraphs = 0
+    for graph in dataset:
+      num_subgraphs += 1
+      self.assertInducedSubgraph(graph, graph_data)
+      self.assertNotEmpty(graph.node_sets['nodes']['#global_id'])
+      for node_set in graph.node_sets.values():
+        self.assertTrue(np.all(
+            node_set[subgraph_sampler.LOSS_NORM_FEATURE_NAME].numpy() > 0))
+      for edge_set in graph.edge_sets.values():
+        self.assertTrue(np.all(
+            edge_set[subgraph_sampler.AGGREGATION_NORM_FEATURE_NAME].numpy()
+            >= 1))
+    self.assertEqual(num_subgraphs, 5)
+
+  def test_deterministic_given_seed(self):
+    sampler = subgraph_sampler.GraphSAINTRandomWalkSampler(
+        ToyCliquesData(), num_roots=2, walk_length=2, num_estimation_samples=5)
+    first = sampler.sample_sub_graph(tf.constant(7, tf.int64),
+                                     global_id_feature_name='#global_id')
+    second = sampler.sample_sub_graph(tf.constant(7, tf.int64),
+                                      global_id_feature_name='#global_id')
+    self.assertAllEqual(first.node_sets['nodes']['#global_id'],
+                        second.node_sets['nodes']['#global_id'])
+
+  def test_normalization(self):
+    # Every subgraph has all nodes of the root clique (0..3) and node 4.
+    sampler = subgraph_sampler.GraphSAINTRandomWalkSampler(
+        ToyCliquesData(), num_roots=1, walk_length=0,
+        num_estimation_samples=10, seed=0)
+    offset = sampler._node_offsets['nodes']
+    sampler._sample_global_ids = lambda rng: offset + np.arange(5)
+    sampler._estimate_normalization(10, seed=0)
+    graph = sampler.sample_sub_graph(tf.constant(0, tf.int64))
+    num_nodes = _NUM_NODES + _NUM_ITEMS
+    self.assertAllClose(graph.node_sets['nodes']['loss_norm'],
+                        [1.0 / num_nodes] * 5)
+    self.assertAllClose(graph.edge_sets['links']['aggregation_norm'],
+                        [1.0] * 7)
+
+
+if __name__ == '__main__':
+  tf.test.main()
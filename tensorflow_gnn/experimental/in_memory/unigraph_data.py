@@ -132,6 +132,9 @@ class UnigraphData(datasets.InMemoryGraphData):
     edge_lists: Dict[
         Tuple[tfgnn.NodeSetName, tfgnn.EdgeSetName, tfgnn.NodeSetName],
         List[np.ndarray]] = collections.defaultdict(list)
+    # Mapping from an edge set name to weights of edges, if the edge set has
+    # feature `datasets.EDGE_WEIGHT_FEATURE_NAME`.
+    edge_weights: Dict[tfgnn.EdgeSetName, List[float]] = {}
     new_nodes = collections.defaultdict(list)
     for edge_set_name, stream in stream_dicts[tfgnn.EDGES].items():
       if use_tqdm:
@@ -143,13 +146,23 @@ class UnigraphData(datasets.InMemoryGraphData):
       source_node_set_name = edge_schema.source
       target_node_set_name = edge_schema.target
       self.flat_edge_list[edge_set_name] = []
+      if datasets.EDGE_WEIGHT_FEATURE_NAME in edge_schema.features:
+        edge_weights[edge_set_name] = []
       for edge_order, (src, target, example) in enumerate(stream):
         if max_size and edge_order >= max_size:
           break
         if keep_intermediate_examples:
           self.flat_edge_list[edge_set_name].append((src, target, example))
         edge_key = (source_node_set_name, edge_set_name, target_node_set_name)
-        # Ignore edge features, for now.
+        # Ignore edge features other than weights, for now.
+        if edge_set_name in edge_weights:
+          weight = []
+          _append_features(
+              [weight], [datasets.EDGE_WEIGHT_FEATURE_NAME], example)
+          # Missing weights default to 1, as in the Beam sampler.
+          weight = np.reshape(weight[0], [-1])
+          edge_weights[edge_set_name].append(
+              float(weight[0]) if weight.size else 1.0)
         edge_endpoints = (
             self._compression_id(source_node_set_name, src,
                                  track_new=new_nodes[source_node_set_name]),
@@ -183,6 +196,9 @@ class UnigraphData(datasets.InMemoryGraphData):
       self._edge_lists[edge_key] = tf.convert_to_tensor(
           np.stack(list_np_edge_list, -1))
     del edge_lists
+    self._edge_weights: Dict[tfgnn.EdgeSetName, tf.Tensor] = {
+        edge_set_name: tf.constant(weights, tf.float32)
+        for edge_set_name, weights in edge_weights.items()}
 
   def _compression_id(self, node_set_name, node_id: bytes,
                       track_new: Optional[List[Tuple[int, bytes]]] = None):
@@ -228,6 +244,10 @@ class UnigraphData(datasets.InMemoryGraphData):
     """
     return self._edge_lists
 
+  def edge_weights(self) -> Mapping[tfgnn.EdgeSetName, tf.Tensor]:
+    """Returns edge weights of edge sets with feature "weight" in the schema."""
+    return self._edge_weights
+
 
 def _append_features(feature_lists, feature_names, example):
   for feature_list, feature_name in zip(feature_lists, feature_names):
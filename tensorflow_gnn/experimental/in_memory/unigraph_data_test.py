@@ -197,6 +197,11 @@ class UnigraphDataHomogeneousTest(tf.test.TestCase):
               }
             """, tf.train.Example()))
 
+    self.assertAllClose(in_mem_unigraph.edge_weights()['tastelike'],
+                        [0.1, 0.2, 0.3, 0.4, 0.5])
+    self.assertAllClose(in_mem_unigraph.edge_sets()['tastelike']['weight'],
+                        [0.1, 0.2, 0.3, 0.4, 0.5])
+
 
 class DatasetsUnigraphHeterogeneousTest(tf.test.TestCase):
 
@@ -17,12 +17,15 @@ from tensorflow_gnn.experimental.sampler import core
 from tensorflow_gnn.experimental.sampler import eval_dag
 from tensorflow_gnn.experimental.sampler import ext_ops
 from tensorflow_gnn.experimental.sampler import interfaces
+from tensorflow_gnn.experimental.sampler import serving
 
 # Helpers.
 set_ext_ops_implementation = ext_ops.set_ops_implementation
 ragged_lookup = ext_ops.ragged_lookup
 ragged_unique = ext_ops.ragged_unique
 ragged_choice = ext_ops.ragged_choice
+ragged_weighted_choice = ext_ops.ragged_weighted_choice
+ragged_top_k = ext_ops.ragged_top_k
 
 build_graph_tensor = core.build_graph_tensor
 
@@ -33,14 +36,23 @@ save_model = eval_dag.save_model
 # Sampling layers.
 InMemIntegerKeyToBytesAccessor = core.InMemIntegerKeyToBytesAccessor
 InMemStringKeyToBytesAccessor = core.InMemStringKeyToBytesAccessor
+InMemKeyToFeaturesAccessor = core.InMemKeyToFeaturesAccessor
+InMemOutgoingEdgesAccessor = core.InMemOutgoingEdgesAccessor
 KeyToTfExampleAccessor = core.KeyToTfExampleAccessor
 TfExamplesParser = core.TfExamplesParser
 UniformEdgesSampler = core.UniformEdgesSampler
+WeightedEdgesSampler = core.WeightedEdgesSampler
+TopKEdgesSampler = core.TopKEdgesSampler
 CompositeLayer = core.CompositeLayer
 
+# Online serving.
+SamplingServer = serving.SamplingServer
+LocalStoreKeyToBytesAccessor = serving.LocalStoreKeyToBytesAccessor
+
 # Interfaces.
 ConnectingEdgesSampler = interfaces.ConnectingEdgesSampler
 OutgoingEdgesSampler = interfaces.OutgoingEdgesSampler
+OutgoingEdgesAccessor = interfaces.OutgoingEdgesAccessor
 KeyToFeaturesAccessor = interfaces.KeyToFeaturesAccessor
 KeyToBytesAccessor = interfaces.KeyToBytesAccessor
 
@@ -48,3 +60,4 @@ del core
 del eval_dag
 del ext_ops
 del interfaces
+del serving
@@ -34,6 +34,7 @@ with results tensor components being converted to the `numpy.ndarray`s.
 """
 
 import collections
+import hashlib
 import os
 
 from typing import Callable, Dict, List, Iterable, Iterator, Mapping, Optional, Set, Tuple, TypeVar, Union
@@ -45,8 +46,11 @@ from apache_beam.utils import windowed_value
 
 import numpy as np
 import tensorflow as tf
+import tensorflow_gnn as tfgnn
 
 from tensorflow_gnn.experimental.sampler import eval_dag_pb2 as pb
+from tensorflow_gnn.experimental.sampler import executor_utils
+from tensorflow_gnn.experimental.sampler import tf_example_encoder
 
 PCollection = beam.pvalue.PCollection
 # Global unique identifier of a particular example.
@@ -132,7 +136,11 @@ def execute(
     *,
     feeds: Optional[Mapping[str, PFeed]] = None,
     artifacts_path: str = '',
-) -> PCollection[Tuple[ExampleId, tf.train.Example]]:
+    serialize_examples: bool = False,
+    cache_path: Optional[str] = None,
+    input_fingerprints: Optional[Mapping[str, str]] = None,
+    feed_fingerprints: Optional[Mapping[str, str]] = None,
+) -> PCollection[Tuple[ExampleId, Union[tf.train.Example, bytes]]]:
   """Executes sampling program for the given inputs and external data feeds.
 
   Args:
@@ -143,24 +151,57 @@ def execute(
       unique node ids.
     artifacts_path: The path to file system directory containing subdirectories
       named after layers with artifacts (e.g. saved TF model).
+    serialize_examples: If True, the results are returned as serialized TF
+      Example messages. They could be written without re-encoding, e.g. as
+      `result | beam.Values() | unigraph.WriteTable(path,
+      coder=beam.coders.BytesCoder())`.
+    cache_path: If set, the directory to materialize stage outputs, so that
+      they could be reused by the next runs. Each stage is identified by the
+      fingerprint of its layer (including saved TF model artifacts), of its
+      upstream stages and of the data it reads, as given by `input_fingerprints`
+      and `feed_fingerprints`. The outputs of stages found in the cache are read
+      from it and their upstream stages are not executed. Stages that depend on
+      inputs or feeds without fingerprints are not cached.
+    input_fingerprints: A mapping from input layer name to the identity of its
+      input values (e.g. path and version of input files), for stage caching.
+    feed_fingerprints: A mapping from feed name to the identity of its values,
+      for stage caching.
 
   Returns:
     A collection of unique example ids to execution results as TF Example
-    messages.
+    messages (or their serializations, if `serialize_examples` is True).
   """
   sink = program.layers.get('sink', None)
   if sink is None:
     raise ValueError('Sampling program must define `sink` layer.')
 
+  cache = None
+  if cache_path is not None:
+    cache = _StageCache(
+        cache_path,
+        feed_fingerprints=dict(feed_fingerprints or {}),
+        artifacts_path=artifacts_path,
+    )
   output = _execute(
       program.eval_dag,
       dict(program.layers),
       dict(inputs),
       dict(feeds or {}),
       artifacts_path,
+      cache=cache,
+      input_fingerprints=dict(input_fingerprints or {}),
   )
 
-  return output | 'CreateTfExample' >> beam.ParDo(TFExampleSink(sink))
+  output = output | 'CreateTfExample' >> TFExampleSink(sink)
+  if serialize_examples:
+    return output
+  return output | 'ParseTfExample' >> beam.MapTuple(_parse_tf_example)
+
+
+def _parse_tf_example(
+    example_id: ExampleId, serialized: bytes
+) -> Tuple[ExampleId, tf.train.Example]:
+  return example_id, tf.train.Example.FromString(serialized)
 
 
 def _execute(
@@ -169,19 +210,33 @@ def _execute(
     inputs: Dict[str, PValues],
     feeds: Dict[str, PFeed],
     artifacts_path: str,
+    cache: Optional['_StageCache'] = None,
+    input_fingerprints: Optional[Dict[str, str]] = None,
 ) -> PValues:
   """Runs Eval DAG stages and recursively executes composite stages."""
+  fingerprints = {}
+  if cache is not None:
+    fingerprints = cache.fingerprint_stages(
+        eval_dag, layers, input_fingerprints or {}
+    )
+  required_stages = _get_required_stages(eval_dag, layers, fingerprints, cache)
+
   results = []
   outputs = {}
   for stage in eval_dag.stages:
+    if stage.id not in required_stages:
+      continue
     layer = layers[stage.layer_id]
     if layer.type == 'Sink':
       results.append(_get_primitive_stage_inputs(stage, layer, outputs))
       continue
 
     stage_name = _create_stage_name(stage.id, layer.id, layer.type)
+    fingerprint = fingerprints.get(stage.id, None)
     if layer.type == 'InputLayer':
       output = inputs[layer.id]
+    elif fingerprint is not None and cache.contains(fingerprint):
+      output = cache.read(_get_pipeline(inputs), stage_name, fingerprint)
     elif _is_primitive_stage(layer):
       stage_inputs = _get_primitive_stage_inputs(stage, layer, outputs)
       executor = _get_primitive_stage_executor(layer)
@@ -191,9 +246,24 @@ def _execute(
       output = (
           substage_inputs,
           feeds,
-      ) | stage_name >> CompositeStage(layer.eval_dag, layers, artifacts_path)
+      ) | stage_name >> CompositeStage(
+          layer.eval_dag,
+          layers,
+          artifacts_path,
+          cache=cache,
+          input_fingerprints=_get_composite_input_fingerprints(
+              stage, layer, fingerprints
+          ),
+      )
     else:
       raise ValueError(f'Unsupported layer type {layer.type}')
+
+    if (
+        fingerprint is not None
+        and layer.type != 'InputLayer'
+        and not cache.contains(fingerprint)
+    ):
+      cache.write(stage_name, output, fingerprint)
     outputs[stage.id] = output
 
   if len(results) != 1:
@@ -202,6 +272,60 @@ def _execute(
   return results[0]
 
 
+def _get_required_stages(
+    eval_dag: pb.EvalDAG,
+    layers: Dict[str, pb.Layer],
+    fingerprints: Dict[str, Optional[str]],
+    cache: Optional['_StageCache'],
+) -> Set[str]:
+  """Returns ids of stages required to compute the `Sink` stage inputs.
+
+  The stages with cached outputs do not require their upstream stages.
+
+  Args:
+    eval_dag: The Eval DAG.
+    layers: All layers by their ids.
+    fingerprints: Stage fingerprints for stage caching.
+    cache: The stage cache, if enabled.
+
+  Returns:
+    Set of stage ids.
+  """
+  if cache is None:
+    return {stage.id for stage in eval_dag.stages}
+  required = set()
+  for stage in reversed(eval_dag.stages):
+    layer = layers[stage.layer_id]
+    if layer.type != 'Sink' and stage.id not in required:
+      continue
+    required.add(stage.id)
+    fingerprint = fingerprints.get(stage.id, None)
+    if fingerprint is not None and cache.contains(fingerprint):
+      continue
+    required.update(matcher.stage_id for matcher in stage.input_matchers)
+  return required
+
+
+def _get_composite_input_fingerprints(
+    stage: pb.Stage, layer: pb.Layer, fingerprints: Dict[str, Optional[str]]
+) -> Dict[str, str]:
+  """Returns fingerprints of composite stage inputs by their names."""
+  result = {}
+  for matcher, name in zip(
+      stage.input_matchers, layer.input_names.feature_names
+  ):
+    fingerprint = fingerprints.get(matcher.stage_id, None)
+    if fingerprint is not None:
+      result[name] = _hash_strings(fingerprint, str(matcher.output_index))
+  return result
+
+
+def _get_pipeline(inputs: Dict[str, PValues]) -> beam.Pipeline:
+  if not inputs:
+    raise ValueError('Expected at least one input to read cached stages.')
+  return next(iter(inputs.values())).pipeline
+
+
 def _is_composite_stage(layer: pb.Layer) -> bool:
   return layer.HasField('eval_dag')
 
@@ -354,10 +478,14 @@ class CompositeStage(beam.PTransform):
       eval_dag: pb.EvalDAG,
       layers: Dict[str, pb.Layer],
       artifacts_path: str,
+      cache: Optional['_StageCache'] = None,
+      input_fingerprints: Optional[Dict[str, str]] = None,
   ):
     self._eval_dag = eval_dag
     self._layers = layers
     self._artifacts_path = artifacts_path
+    self._cache = cache
+    self._input_fingerprints = input_fingerprints
 
   def expand(
       self, inputs: Tuple[Dict[str, PValues], Dict[str, PFeed]]
@@ -369,13 +497,180 @@ class CompositeStage(beam.PTransform):
         inputs,
         feeds=feeds,
         artifacts_path=self._artifacts_path,
+        cache=self._cache,
+        input_fingerprints=self._input_fingerprints,
+    )
+
+
+class _StageCache:
+  """Materializes stage outputs as TFRecord files keyed by stage fingerprints.
+
+  The fingerprint of a stage is computed from the serialized layer (together
+  with layers of its composite stages and the files of their saved artifacts),
+  the fingerprints of the data it reads from feeds, and the fingerprints of its
+  upstream stages outputs. The results of each stage are written to the
+  `{cache_path}/{fingerprint}` directory, which is marked as complete with the
+  `_SUCCESS` file, after all results are written.
+  """
+
+  _VERSION = '1'
+  _SUCCESS = '_SUCCESS'
+
+  def __init__(
+      self,
+      cache_path: str,
+      *,
+      feed_fingerprints: Dict[str, str],
+      artifacts_path: str,
+  ):
+    self._cache_path = cache_path
+    self._feed_fingerprints = feed_fingerprints
+    self._artifacts_path = artifacts_path
+    self._coder = typecoders.registry.get_coder(
+        typehints.Tuple[ExampleId, typehints.List[typehints.List[np.ndarray]]]
     )
+    self._contains = {}
+
+  def fingerprint_stages(
+      self,
+      eval_dag: pb.EvalDAG,
+      layers: Dict[str, pb.Layer],
+      input_fingerprints: Dict[str, str],
+  ) -> Dict[str, Optional[str]]:
+    """Returns fingerprints of all stages, or `None` for not cached stages.
+
+    Args:
+      eval_dag: The Eval DAG.
+      layers: All layers by their ids.
+      input_fingerprints: The fingerprints of input values by input names.
+
+    Returns:
+      Mapping from stage id to its fingerprint, or `None` if stage depends on
+      inputs or feeds without fingerprints.
+    """
+    result = {}
+    for stage in eval_dag.stages:
+      layer = layers[stage.layer_id]
+      if layer.type == 'InputLayer':
+        upstream = [input_fingerprints.get(layer.id, None)]
+      else:
+        upstream = [
+            result.get(matcher.stage_id, None)
+            for matcher in stage.input_matchers
+        ]
+        upstream.extend(
+            str(matcher.output_index) for matcher in stage.input_matchers
+        )
+      layer_fingerprint = self._fingerprint_layer(layer, layers)
+      if layer_fingerprint is None or None in upstream:
+        result[stage.id] = None
+      else:
+        result[stage.id] = _hash_strings(
+            self._VERSION, layer_fingerprint, *upstream
+        )
+    return result
+
+  def contains(self, fingerprint: str) -> bool:
+    """Returns `True` if stage results are in the cache."""
+    result = self._contains.get(fingerprint, None)
+    if result is None:
+      result = tf.io.gfile.exists(
+          os.path.join(self._cache_path, fingerprint, self._SUCCESS)
+      )
+      self._contains[fingerprint] = result
+    return result
+
+  def read(
+      self, pipeline: beam.Pipeline, label: str, fingerprint: str
+  ) -> PValues:
+    """Reads cached stage results."""
+    return pipeline | f'{label}/ReadCache' >> beam.io.ReadFromTFRecord(
+        os.path.join(self._cache_path, fingerprint, 'values-*'),
+        coder=self._coder,
+    )
+
+  def write(self, label: str, values: PValues, fingerprint: str) -> None:
+    """Writes stage results to the cache, overriding incomplete results."""
+    path = os.path.join(self._cache_path, fingerprint)
+    if tf.io.gfile.exists(path):
+      tf.io.gfile.rmtree(path)
+    _ = (
+        values
+        | f'{label}/WriteCache'
+        >> beam.io.WriteToTFRecord(
+            os.path.join(path, 'values'), coder=self._coder
+        )
+        | f'{label}/CollectCacheFiles' >> beam.combiners.ToList()
+        | f'{label}/MarkCacheComplete'
+        >> beam.Map(_mark_complete, os.path.join(path, self._SUCCESS))
+    )
+
+  def _fingerprint_layer(
+      self, layer: pb.Layer, layers: Dict[str, pb.Layer]
+  ) -> Optional[str]:
+    """Fingerprints layer with its sublayers, artifacts and used feeds."""
+    hasher = hashlib.sha256()
+    hasher.update(layer.SerializeToString(deterministic=True))
+    for name in _get_feed_names(layer):
+      feed_fingerprint = self._feed_fingerprints.get(name, None)
+      if feed_fingerprint is None:
+        return None
+      hasher.update(feed_fingerprint.encode())
+    if self._artifacts_path:
+      _hash_files(hasher, os.path.join(self._artifacts_path, layer.id))
+    if _is_composite_stage(layer):
+      for stage in layer.eval_dag.stages:
+        sublayer_fingerprint = self._fingerprint_layer(
+            layers[stage.layer_id], layers
+        )
+        if sublayer_fingerprint is None:
+          return None
+        hasher.update(sublayer_fingerprint.encode())
+    return hasher.hexdigest()
+
+
+def _get_feed_names(layer: pb.Layer) -> List[str]:
+  """Returns names of feeds used by the layer."""
+  if layer.config.Is(pb.KeyToBytesAccessorConfig.DESCRIPTOR):
+    config = pb.KeyToBytesAccessorConfig()
+    layer.config.Unpack(config)
+    return [config.resource_name]
+  if layer.config.Is(pb.EdgeSamplingConfig.DESCRIPTOR):
+    config = pb.EdgeSamplingConfig()
+    layer.config.Unpack(config)
+    return [config.edge_set_name]
+  return []
+
+
+def _hash_files(hasher, path: str) -> None:
+  """Updates hasher with relative paths and contents of all files in path."""
+  if not tf.io.gfile.isdir(path):
+    return
+  for dirname, _, filenames in sorted(tf.io.gfile.walk(path)):
+    for filename in sorted(filenames):
+      filepath = os.path.join(dirname, filename)
+      hasher.update(os.path.relpath(filepath, path).encode())
+      with tf.io.gfile.GFile(filepath, 'rb') as f:
+        hasher.update(f.read())
+
+
+def _hash_strings(*values: str) -> str:
+  hasher = hashlib.sha256()
+  for value in values:
+    hasher.update(value.encode())
+    hasher.update(b'\0')
+  return hasher.hexdigest()
+
+
+def _mark_complete(unused_filenames: List[str], path: str) -> None:
+  with tf.io.gfile.GFile(path, 'w') as f:
+    f.write('')
 
 
 @beam_typehints.with_input_types(Tuple[ExampleId, Values])
-@beam_typehints.with_output_types(Tuple[ExampleId, tf.train.Example])
-class TFExampleSink(beam.DoFn):
-  """Converts dense or ragged values to TFExample.
+@beam_typehints.with_output_types(Tuple[ExampleId, bytes])
+class TFExampleSink(beam.PTransform):
+  """Converts dense or ragged values to serialized TFExample.
 
   Feature names for each value must be specified in the `config` field of the
   `Sink` layer as `IOFeatures` message. Currently only ragged tensors or dense
@@ -385,11 +680,18 @@ class TFExampleSink(beam.DoFn):
   values have feature name "{feature_name}". The row lengths have feature names
   "{feature_name}.d{index}", where `index` enumerate ragged dimensions from
   outermost to innermost starting from 1 .
+
+  The examples are serialized directly to bytes by the `TFExampleEncoder`,
+  in batches of up to `max_examples_per_batch` examples, so that numeric
+  features of all examples in a batch are encoded together. Batches are formed
+  by `beam.BatchElements()` within the windows of inputs, so the outputs stay in
+  their input windows.
   """
 
   _SUPPORTED_VALUES = ['tensor', 'ragged_tensor']
 
-  def __init__(self, sink: pb.Layer):
+  def __init__(self, sink: pb.Layer, *, max_examples_per_batch: int = 100):
+    super().__init__()
     for input_spec in sink.inputs:
       if not any(input_spec.HasField(t) for t in self._SUPPORTED_VALUES):
         raise ValueError(
@@ -398,53 +700,47 @@ class TFExampleSink(beam.DoFn):
         )
     if not sink.HasField('config'):
       raise ValueError('Sink layer must define config as `IOFeatures` message.')
+    if max_examples_per_batch <= 0:
+      raise ValueError(
+          'max_examples_per_batch must be positive,'
+          f' got {max_examples_per_batch}'
+      )
 
     io_config = pb.IOFeatures()
     sink.config.Unpack(io_config)
-    self._io_config = io_config
-    self._examples_count = beam.metrics.Metrics.counter(
-        'TFExampleSink', 'ExamplesCount'
+    self._encoder = tf_example_encoder.TFExampleEncoder(
+        io_config.feature_names
     )
+    self._max_examples_per_batch = max_examples_per_batch
 
-  def process(
-      self, inputs: Tuple[ExampleId, Values]
-  ) -> Iterator[Tuple[ExampleId, tf.train.Example]]:
-    example_id, values = inputs
-    batch_size = _get_outer_dim_size(values)
+  def expand(self, inputs: PValues) -> PCollection[Tuple[ExampleId, bytes]]:
+    return (
+        inputs
+        | 'Batch'
+        >> beam.BatchElements(
+            min_batch_size=1, max_batch_size=self._max_examples_per_batch
+        )
+        | 'Encode' >> beam.FlatMap(_encode_tf_examples, self._encoder)
+    )
+
+
+def _encode_tf_examples(
+    batch: List[Tuple[ExampleId, Values]],
+    encoder: tf_example_encoder.TFExampleEncoder,
+) -> Iterator[Tuple[ExampleId, bytes]]:
+  """Serializes a batch of examples with the `encoder`."""
+  for example_id, values in batch:
+    batch_size = executor_utils.get_outer_dim_size(values)
     if batch_size != 1:
       raise ValueError(
           f'Expected values of {example_id} to have batch size 1,'
           f' got {batch_size}'
       )
-    features = tf.train.Features()
-    for feature_name, value in zip(self._io_config.feature_names, values):
-      value_dtype = value[0].dtype
-      flat_values = np.reshape(value[0], [-1]).tolist()
-      if np.issubdtype(value_dtype, np.floating):
-        feature = tf.train.Feature(
-            float_list=tf.train.FloatList(value=flat_values)
-        )
-      elif np.issubdtype(value_dtype, np.integer):
-        feature = tf.train.Feature(
-            int64_list=tf.train.Int64List(value=flat_values)
-        )
-      else:
-        assert value_dtype == np.object_, value_dtype
-        feature = tf.train.Feature(
-            bytes_list=tf.train.BytesList(value=flat_values)
-        )
-      features.feature[feature_name].CopyFrom(feature)
-
-      for index, row_lengths in enumerate(value[2:], 1):
-        assert row_lengths.dtype in (np.int32, np.int64), row_lengths.dtype
-        features.feature[f'{feature_name}.d{index}'].CopyFrom(
-            tf.train.Feature(
-                int64_list=tf.train.Int64List(value=row_lengths.tolist())
-            )
-        )
-
-    yield example_id, tf.train.Example(features=features)
-    self._examples_count.inc()
+  serialized = encoder.encode_batch([values for _, values in batch])
+  beam.metrics.Metrics.counter('TFExampleSink', 'ExamplesCount').inc(
+      len(serialized)
+  )
+  yield from zip([example_id for example_id, _ in batch], serialized)
 
 
 def _extract_input(
@@ -600,7 +896,7 @@ class TFModelWithAutoBatch(TFModelBase):
           pieces.append(v)
 
     try:
-      outer_dim_size = _get_outer_dim_size(values)
+      outer_dim_size = executor_utils.get_outer_dim_size(values)
     except ValueError as e:
       raise ValueError(
           f'Values for {example_id} has inconsistent outer dimension sizes.'
@@ -635,7 +931,10 @@ class TFModelWithAutoBatch(TFModelBase):
     start = 0
     for example_id, outer_dim_size in self._batch_splits:
       limit = start + outer_dim_size
-      slices = [ragged_slice(value, start, limit) for value in result_batch]
+      slices = [
+          executor_utils.ragged_slice(value, start, limit)
+          for value in result_batch
+      ]
       yield windowed_value.WindowedValue(
           (example_id, slices),
           beam.utils.timestamp.MAX_TIMESTAMP,
@@ -651,19 +950,6 @@ class TFModelWithAutoBatch(TFModelBase):
     self._estimated_memsize = 0
 
 
-def ragged_slice(value: Value, start: int, limit: int) -> Value:
-  """Extracts `value[index:(index+1), :]` for potentially ragged values."""
-  assert value
-  b, e = start, limit
-  partition_slices = []
-  for dim in range(1, len(value)):
-    partition = value[dim]
-    partition_slices.append(partition[b:e])
-    b, e = np.sum(partition[:b]), np.sum(partition[:e])
-  flat_value = value[0][b:e]
-  return [flat_value, *partition_slices]
-
-
 def _estimate_memsize(value: np.ndarray) -> int:
   result = 8 + value.size * value.itemsize
   if value.dtype == np.object_:
@@ -680,7 +966,7 @@ def _tf_model_executor(
 ) -> PValues:
   """Returns TFModel stage executor."""
   model_path = os.path.join(artifacts_path, layer.id)
-  if _supports_batching(layer):
+  if executor_utils.supports_batching(layer):
     model_fn = TFModelWithAutoBatch(
         model_path,
         layer,
@@ -694,37 +980,292 @@ def _tf_model_executor(
   return inputs | label >> beam.ParDo(model_fn)
 
 
-def _get_outer_dim_size(values: Values) -> int:
-  assert values
-  dims = [value[-1].shape[0] for value in values]
-  if any(dims[0] != d for d in dims):
-    raise ValueError(f'Values have different outer dimensions: {dims}')
-  return dims[0]
+# Lookup key (node id) and positions of this key in the lookup keys of examples.
+LookupKey = Union[int, bytes]
+LookupRequests = List[Tuple[ExampleId, List[int]]]
+
+
+@beam_typehints.with_input_types(Tuple[ExampleId, Values])
+@beam_typehints.with_output_types(Tuple[LookupKey, LookupRequests])
+class CreateLookupRequests(beam.DoFn):
+  """Groups lookup keys of examples by their unique values.
+
+  The keys of all examples within a bundle (up to `max_keys_per_batch` keys) are
+  aggregated, so that each unique key is emitted once for all of its positions
+  in all examples of the batch. This reduces the amount of data shuffled when
+  joining popular keys (e.g. high-degree nodes) with the feed.
+
+  The input values must contain exactly one ragged rank 1 value with a single
+  row, as the keys of accessor or sampler layers.
+  """
+
+  def __init__(self, *, max_keys_per_batch: int = 1_000_000):
+    self._max_keys_per_batch = max_keys_per_batch
+
+  def start_bundle(self):
+    self._reset()
+
+  def finish_bundle(self):
+    if self._requests:
+      yield from self._flush()
+
+  def process(
+      self, inputs: Tuple[ExampleId, Values]
+  ) -> Iterator[Tuple[LookupKey, LookupRequests]]:
+    example_id, values = inputs
+    keys = executor_utils.get_lookup_keys(values, example_id)
+    positions_by_key = collections.defaultdict(list)
+    for position, key in enumerate(keys.tolist()):
+      positions_by_key[key].append(position)
+    for key, positions in positions_by_key.items():
+      self._requests[key].append((example_id, positions))
+    self._num_keys += keys.size
+    if self._num_keys >= self._max_keys_per_batch:
+      yield from self._flush()
+
+  def _flush(self):
+    window = beam.transforms.window.GlobalWindow()
+    for key, requests in self._requests.items():
+      yield windowed_value.WindowedValue(
+          (key, requests),
+          beam.utils.timestamp.MAX_TIMESTAMP,
+          [window],
+      )
+    self._reset()
+
+  def _reset(self):
+    self._requests = collections.defaultdict(list)
+    self._num_keys = 0
+
+
+class LookupWithFeed(beam.PTransform):
+  """Joins lookup keys of each example with the feed values for those keys.
+
+  Lookup requests for unique keys are joined with the feed by key and resolved
+  by the `resolve_fn`, which emits `(example_id, (positions, result))` for all
+  requests of the key. The resolved results are then joined with the input
+  values by example id and combined into the output values by the
+  `assemble_fn`. Examples without any keys are joined with no results.
+  """
+
+  def __init__(
+      self, feed: PFeed, resolve_fn: beam.DoFn, assemble_fn: beam.DoFn
+  ):
+    super().__init__()
+    self._feed = feed
+    self._resolve_fn = resolve_fn
+    self._assemble_fn = assemble_fn
+
+  def expand(self, inputs: PValues) -> PValues:
+    requests = inputs | 'CreateRequests' >> beam.ParDo(CreateLookupRequests())
+    results = (
+        {'requests': requests, 'values': self._feed}
+        | 'JoinWithFeed' >> beam.CoGroupByKey()
+        | 'Resolve' >> beam.ParDo(self._resolve_fn)
+    )
+    return (
+        {'inputs': inputs, 'results': results}
+        | 'JoinWithInputs' >> beam.CoGroupByKey()
+        | 'Assemble' >> beam.ParDo(self._assemble_fn)
+    )
+
+
+class ResolveKeyToBytesRequests(beam.DoFn):
+  """Resolves lookup requests for a single key with its serialized value."""
 
+  def __init__(self, default_value: Optional[bytes]):
+    self._default_value = default_value
 
-def _supports_batching(layer: pb.Layer) -> bool:
-  """Checks if layer supports batching by concatenating inputs and splitting outputs.
+  def process(self, inputs):
+    key, grouped = inputs
+    requests = list(grouped['requests'])
+    if not requests:
+      return
+    value = next(iter(grouped['values']), None)
+    if value is None:
+      if self._default_value is None:
+        raise ValueError(f'Missing value for key {key!r}')
+      value = self._default_value
+    for batch in requests:
+      for example_id, positions in batch:
+        yield example_id, (positions, value)
 
-  The check guarantees that
-  `concat(layer(input1), layer(input2)) == layer(concat(input1, input2))` for
-  any inputs 1 and 2.
 
-  TODO(aferludin): this must be controlled by the `Layer` property and set
-  during sampling model export, only if Keras layers has this guarantee.
+class AssembleKeyToBytesResults(beam.DoFn):
+  """Places looked up values into the positions of their keys."""
+
+  def __init__(self, layer: pb.Layer):
+    self._row_lengths_dtype = executor_utils.get_row_lengths_dtype(
+        layer.outputs[0]
+    )
+
+  def process(self, inputs):
+    example_id, grouped = inputs
+    (values,) = grouped['inputs']
+    keys = values[0][0]
+    result = np.empty([keys.size], dtype=np.object_)
+    for positions, value in grouped['results']:
+      for position in positions:
+        result[position] = value
+    row_lengths = np.array([keys.size], dtype=self._row_lengths_dtype)
+    yield example_id, [[result, row_lengths]]
+
+
+class ResolveEdgeSamplingRequests(beam.DoFn):
+  """Samples outgoing edges of a single source node for each request."""
+
+  def __init__(self, sample_size: int, seed: Optional[int]):
+    self._sample_size = sample_size
+    self._seed = seed
+
+  def setup(self):
+    self._rng = np.random.default_rng(self._seed)
+
+  def process(self, inputs):
+    source, grouped = inputs
+    requests = list(grouped['requests'])
+    if not requests:
+      return
+    targets = np.array(list(grouped['values']))
+    for batch in requests:
+      for example_id, positions in batch:
+        samples = []
+        for _ in positions:
+          if targets.size <= self._sample_size:
+            samples.append(targets)
+          else:
+            indices = self._rng.choice(
+                targets.size, self._sample_size, replace=False
+            )
+            samples.append(targets[np.sort(indices)])
+        yield example_id, (positions, samples)
+
+
+class AssembleEdgeSamplingResults(beam.DoFn):
+  """Concatenates sampled edges in the order of their source nodes."""
+
+  def __init__(self, layer: pb.Layer, edge_feature_names: List[str]):
+    self._edge_feature_names = edge_feature_names
+    self._dtypes = [
+        executor_utils.get_flat_values_dtype(spec) for spec in layer.outputs
+    ]
+    self._row_lengths_dtypes = [
+        executor_utils.get_row_lengths_dtype(spec) for spec in layer.outputs
+    ]
+
+  def process(self, inputs):
+    example_id, grouped = inputs
+    (values,) = grouped['inputs']
+    sources = values[0][0]
+    targets = [None] * sources.size
+    for positions, samples in grouped['results']:
+      for position, sample in zip(positions, samples):
+        targets[position] = sample
+    sizes = [0 if t is None else t.size for t in targets]
+    features = {
+        tfgnn.SOURCE_NAME: np.repeat(sources, sizes),
+        tfgnn.TARGET_NAME: (
+            np.concatenate([t for t in targets if t is not None])
+            if any(sizes)
+            else np.array([])
+        ),
+    }
+    num_edges = sum(sizes)
+    result = []
+    for name, dtype, row_lengths_dtype in zip(
+        self._edge_feature_names, self._dtypes, self._row_lengths_dtypes
+    ):
+      result.append([
+          features[name].astype(dtype),
+          np.array([num_edges], dtype=row_lengths_dtype),
+      ])
+    yield example_id, result
+
+
+def _key_to_bytes_accessor_executor(
+    label: str,
+    layer: pb.Layer,
+    inputs: PValues,
+    feeds: Dict[str, PFeed],
+    unused_artifacts_path: str,
+) -> PValues:
+  """Returns executor for in-memory key to bytes accessors.
+
+  The keys of each example are looked up in the `PKeyToBytes` feed named after
+  the accessor's resource name.
 
   Args:
-    layer: The layer to check.
+    label: The stage label.
+    layer: The accessor layer with `KeyToBytesAccessorConfig`.
+    inputs: The lookup keys of examples.
+    feeds: All feeds.
+    unused_artifacts_path: Not used.
 
   Returns:
-    `True` if layer supports batching.
+    Looked up values as a ragged rank 1 value for each example.
   """
+  config = pb.KeyToBytesAccessorConfig()
+  if not layer.config.Unpack(config):
+    raise ValueError(f'Expected KeyToBytesAccessorConfig for {layer.id}')
+  feed = executor_utils.get_feed(feeds, config.resource_name, layer)
+  default_value = (
+      config.default_value if config.HasField('default_value') else None
+  )
+  return inputs | label >> LookupWithFeed(
+      feed,
+      ResolveKeyToBytesRequests(default_value),
+      AssembleKeyToBytesResults(layer),
+  )
+
+
+def _uniform_edges_sampler_executor(
+    label: str,
+    layer: pb.Layer,
+    inputs: PValues,
+    feeds: Dict[str, PFeed],
+    unused_artifacts_path: str,
+) -> PValues:
+  """Returns executor for uniform sampling of outgoing edges.
+
+  The edges are sampled from the `PEdges` feed named after the edge set. Because
+  `PEdges` contains only source and target node ids, other edge features are
+  not supported.
 
-  def _is_stackable(spec) -> bool:
-    return spec.HasField('ragged_tensor') or spec.HasField('tensor')
+  Args:
+    label: The stage label.
+    layer: The sampler layer with `EdgeSamplingConfig`.
+    inputs: The source node ids of examples.
+    feeds: All feeds.
+    unused_artifacts_path: Not used.
 
-  return all(_is_stackable(t) for t in [*layer.inputs, *layer.outputs])
+  Returns:
+    Sampled edge features, as a ragged rank 1 value for each example.
+  """
+  config = pb.EdgeSamplingConfig()
+  if not layer.config.Unpack(config):
+    raise ValueError(f'Expected EdgeSamplingConfig for {layer.id}')
+  edge_feature_names = list(config.edge_feature_names.feature_names)
+  unsupported = set(edge_feature_names) - {
+      tfgnn.SOURCE_NAME,
+      tfgnn.TARGET_NAME,
+  }
+  if unsupported:
+    raise ValueError(
+        f'Edge features {sorted(unsupported)} of the layer {layer.id} are not'
+        ' supported for sampling from edges feed'
+    )
+  feed = executor_utils.get_feed(feeds, config.edge_set_name, layer)
+  seed = config.seed if config.HasField('seed') else None
+  return inputs | label >> LookupWithFeed(
+      feed,
+      ResolveEdgeSamplingRequests(config.sample_size, seed),
+      AssembleEdgeSamplingResults(layer, edge_feature_names),
+  )
 
 
 _REGISTERED_EXECUTORS: Dict[str, Executor] = {
     'TFModel': _tf_model_executor,
+    'InMemStringKeyToBytesAccessor': _key_to_bytes_accessor_executor,
+    'InMemIntegerKeyToBytesAccessor': _key_to_bytes_accessor_executor,
+    'UniformEdgesSampler': _uniform_edges_sampler_executor,
 }
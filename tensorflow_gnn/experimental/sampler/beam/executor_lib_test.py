@@ -20,12 +20,14 @@ from absl.testing import parameterized
 import apache_beam as beam
 from apache_beam.coders import typecoders
 from apache_beam.testing import util
+from apache_beam.transforms import window
 from apache_beam.typehints import trivial_inference
 
 import numpy as np
 import tensorflow as tf
 
 from tensorflow_gnn.experimental import sampler
+from tensorflow_gnn.experimental.sampler import executor_utils
 from tensorflow_gnn.experimental.sampler.beam import executor_lib
 
 from google.protobuf import text_format
@@ -115,7 +117,7 @@ class HelpersTest(tf.test.TestCase, parameterized.TestCase):
   ):
     value = [value]
     expected = [expected]
-    actual = executor_lib.ragged_slice(value, start, limit)
+    actual = executor_utils.ragged_slice(value, start, limit)
     tf.nest.map_structure(self.assertAllEqual, actual, expected)
 
   @parameterized.named_parameters([
@@ -175,10 +177,49 @@ class HelpersTest(tf.test.TestCase, parameterized.TestCase):
 
     value = as_value(value)
     expected = as_value(expected)
-    actual = executor_lib.ragged_slice(value, start, limit)
+    actual = executor_utils.ragged_slice(value, start, limit)
     tf.nest.map_structure(self.assertAllEqual, actual, expected)
 
 
+class TFExampleSinkTest(tf.test.TestCase):
+
+  def test_keeps_windows(self):
+    sink = executor_lib.pb.Layer(id='sink', type='Sink')
+    sink.inputs.add().ragged_tensor.dtype = tf.int64.as_datatype_enum
+    sink.config.Pack(executor_lib.pb.IOFeatures(feature_names=['x']))
+
+    def timestamped(i):
+      value = [[np.array([i], np.int64), np.array([1])]]
+      return window.TimestampedValue((f's{i}'.encode(), value), 10 * i)
+
+    def parse(example_id, example):
+      example = tf.train.Example.FromString(example)
+      return example_id, list(example.features.feature['x'].int64_list.value)
+
+    with beam.Pipeline() as root:
+      result = (
+          root
+          | beam.Create(range(5))
+          | beam.Map(timestamped)
+          | beam.WindowInto(window.FixedWindows(20))
+          | executor_lib.TFExampleSink(sink, max_examples_per_batch=2)
+          | beam.MapTuple(parse)
+      )
+
+      def expected(i):
+        w = window.IntervalWindow(20 * (i // 2), 20 * (i // 2 + 1))
+        # Batches are timestamped at the end of their window.
+        return util.TestWindowedValue(
+            (f's{i}'.encode(), [i]), w.max_timestamp(), [w]
+        )
+
+      util.assert_that(
+          result,
+          util.equal_to([expected(i) for i in range(5)]),
+          reify_windows=True,
+      )
+
+
 class ExecutorTestBase(tf.test.TestCase, parameterized.TestCase):
 
   def sampling_results_equal(self, expected, actual) -> bool:
@@ -255,6 +296,89 @@ class TFModelStageTest(ExecutorTestBase):
           ),
       )
 
+  def test_serialized_examples(self):
+    i = tf.keras.Input(
+        type_spec=tf.RaggedTensorSpec(
+            [None, None], dtype=tf.int64, ragged_rank=1
+        ),
+        name='input',
+    )
+    model = tf.keras.Model(inputs=i, outputs=i * 2)
+    program, artifacts = sampler.create_program(model)
+    temp_dir = self.create_tempdir().full_path
+    for name, model in artifacts.models.items():
+      sampler.save_model(model, os.path.join(temp_dir, name))
+
+    values = {
+        f's{i}'.encode(): [[np.arange(i, dtype=np.int64), np.array([i])]]
+        for i in range(5)
+    }
+    with beam.Pipeline() as root:
+      result = executor_lib.execute(
+          program,
+          {'input': root | beam.Create(values)},
+          artifacts_path=temp_dir,
+          serialize_examples=True,
+      )
+      result = result | beam.MapTuple(
+          lambda k, v: (k, tf.train.Example.FromString(v))
+      )
+      util.assert_that(
+          result,
+          util.equal_to(
+              [
+                  (
+                      f's{i}'.encode(),
+                      """features {
+                        feature {
+                          key: "__output__"
+                          value { int64_list { value: %s } }
+                        }
+                      }""" % [2 * v for v in range(i)],
+                  )
+                  for i in range(5)
+              ],
+              self.sampling_results_equal,
+          ),
+      )
+
+  def test_in_mem_key_to_features_accessor(self):
+    accessor = sampler.InMemKeyToFeaturesAccessor(
+        keys=['a', 'b'],
+        features={'f': [1, 2]},
+        features_spec={'f': tf.TensorSpec([], tf.int64)},
+        name='features',
+    )
+    i = tf.keras.Input(
+        type_spec=tf.RaggedTensorSpec(
+            [None, None], dtype=tf.string, ragged_rank=1
+        ),
+        name='keys',
+    )
+    program, artifacts = sampler.create_program(tf.keras.Model(i, accessor(i)))
+    temp_dir = self.create_tempdir().full_path
+    for name, model in artifacts.models.items():
+      sampler.save_model(model, os.path.join(temp_dir, name))
+
+    with beam.Pipeline() as root:
+      inputs = root | beam.Create({
+          b's1': [[np.array([b'b', b'a'], np.object_), np.array([2])]],
+          b's2': [[np.array([b'x'], np.object_), np.array([1])]],
+      })
+      result = executor_lib.execute(
+          program, {'keys': inputs}, artifacts_path=temp_dir
+      )
+      template = """features {
+                      feature { key: "f" value { int64_list { value: %s } } }
+                    }"""
+      util.assert_that(
+          result,
+          util.equal_to(
+              [(b's1', template % '[2, 1]'), (b's2', template % '[0]')],
+              self.sampling_results_equal,
+          ),
+      )
+
   def test_multiple_inputs(self):
     i1 = tf.keras.Input(
         type_spec=tf.RaggedTensorSpec(
@@ -372,5 +496,379 @@ class TFModelStageTest(ExecutorTestBase):
       )
 
 
+class FeedStagesTest(ExecutorTestBase):
+
+  def _keys_input(self, dtype=tf.string):
+    return tf.keras.Input(
+        type_spec=tf.RaggedTensorSpec([None, None], dtype, ragged_rank=1),
+        name='keys',
+    )
+
+  @parameterized.named_parameters(
+      ('string', tf.string, [b'a', b'b', b'x'], np.object_),
+      ('integer', tf.int64, [1, 2, 9], np.int64),
+  )
+  def test_key_to_bytes_accessor(self, dtype, keys, np_dtype):
+    a, b, x = keys
+    if dtype == tf.string:
+      accessor = sampler.InMemStringKeyToBytesAccessor(
+          keys_to_values={'?': b''}, name='nodes'
+      )
+    else:
+      accessor = sampler.InMemIntegerKeyToBytesAccessor(
+          keys_to_values={1000: b''}, name='nodes'
+      )
+    i = self._keys_input(dtype)
+    model = tf.keras.Model(inputs=i, outputs=accessor(i))
+
+    with beam.Pipeline() as root:
+      inputs = root | 'Inputs' >> beam.Create({
+          b's1': [[np.array([a, b, a], np_dtype), np.array([3], np.int64)]],
+          b's2': [[np.array([x, b], np_dtype), np.array([2], np.int64)]],
+          b's3': [[np.array([], np_dtype), np.array([0], np.int64)]],
+      })
+      feed = root | 'Feed' >> beam.Create([(a, b'A'), (b, b'B')])
+      program, _ = sampler.create_program(model)
+      result = executor_lib.execute(
+          program, {'keys': inputs}, feeds={'nodes': feed}
+      )
+      template = """features {
+                      feature {
+                        key: "__output__"
+                        value { bytes_list { %s } }
+                      }
+                    }"""
+      util.assert_that(
+          result,
+          util.equal_to(
+              [
+                  (b's1', template % 'value: ["A", "B", "A"]'),
+                  (b's2', template % 'value: ["", "B"]'),
+                  (b's3', template % ''),
+              ],
+              self.sampling_results_equal,
+          ),
+      )
+
+  def test_missing_feed(self):
+    accessor = sampler.InMemStringKeyToBytesAccessor(
+        keys_to_values={'?': b''}, name='nodes'
+    )
+    i = self._keys_input()
+    program, _ = sampler.create_program(
+        tf.keras.Model(inputs=i, outputs=accessor(i))
+    )
+    with self.assertRaisesRegex(ValueError, 'Missing feed nodes'):
+      with beam.Pipeline() as root:
+        inputs = root | beam.Create(
+            [(b's1', [[np.array([b'a'], np.object_), np.array([1])]])]
+        )
+        executor_lib.execute(program, {'keys': inputs})
+
+  @parameterized.parameters([2, 3])
+  def test_uniform_edges_sampler(self, sample_size):
+    edges = sampler.KeyToTfExampleAccessor(
+        sampler.InMemStringKeyToBytesAccessor(
+            keys_to_values={'?': b''}, name='cites'
+        ),
+        features_spec={'neighbors': tf.TensorSpec([None], tf.string)},
+    )
+    i = self._keys_input()
+    layer = sampler.UniformEdgesSampler(
+        edges,
+        sample_size=sample_size,
+        edge_target_feature_name='neighbors',
+        seed=42,
+    )
+    model = tf.keras.Model(inputs=i, outputs=layer(i))
+
+    with beam.Pipeline() as root:
+      inputs = root | 'Inputs' >> beam.Create({
+          b's1': [[np.array([b'a', b'c'], np.object_), np.array([2])]],
+          b's2': [[np.array([b'b', b'x'], np.object_), np.array([2])]],
+      })
+      feed = root | 'Feed' >> beam.Create(
+          [(b'a', b'b'), (b'a', b'c'), (b'b', b'c'), (b'c', b'a')]
+      )
+      program, _ = sampler.create_program(model)
+      result = executor_lib.execute(
+          program, {'keys': inputs}, feeds={'cites': feed}
+      )
+      template = """features {
+                      feature {
+                        key: "#source"
+                        value { bytes_list { value: %s } }
+                      }
+                      feature {
+                        key: "#target"
+                        value { bytes_list { value: %s } }
+                      }
+                    }"""
+      util.assert_that(
+          result,
+          util.equal_to(
+              [
+                  (b's1', template % ('["a", "a", "c"]', '["b", "c", "a"]')),
+                  (b's2', template % ('["b"]', '["c"]')),
+              ],
+              self.sampling_results_equal,
+          ),
+      )
+
+  def test_uniform_edges_sampler_subsamples(self):
+    edges = sampler.KeyToTfExampleAccessor(
+        sampler.InMemIntegerKeyToBytesAccessor(
+            keys_to_values={1000: b''}, name='cites'
+        ),
+        features_spec={'neighbors': tf.TensorSpec([None], tf.int64)},
+    )
+    i = self._keys_input(tf.int64)
+    layer = sampler.UniformEdgesSampler(
+        edges, sample_size=2, edge_target_feature_name='neighbors'
+    )
+    model = tf.keras.Model(inputs=i, outputs=layer(i))
+
+    def check(results):
+      self.assertLen(results, 1)
+      (example_id, example), = results
+      self.assertEqual(example_id, b's1')
+      features = example.features.feature
+      self.assertAllEqual(
+          features['#source'].int64_list.value, [0, 0, 1, 1, 0, 0]
+      )
+      targets = features['#target'].int64_list.value
+      for start, source in [(0, 0), (2, 1), (4, 0)]:
+        sample = targets[start : start + 2]
+        self.assertLen(set(sample), 2)
+        for target in sample:
+          self.assertBetween(target, 10 * source + 1, 10 * source + 5)
+
+    with beam.Pipeline() as root:
+      inputs = root | 'Inputs' >> beam.Create(
+          [(b's1', [[np.array([0, 1, 0]), np.array([3])]])]
+      )
+      feed = root | 'Feed' >> beam.Create(
+          [(s, 10 * s + t) for s in range(2) for t in range(1, 6)]
+      )
+      program, _ = sampler.create_program(model)
+      result = executor_lib.execute(
+          program, {'keys': inputs}, feeds={'cites': feed}
+      )
+      util.assert_that(result, check)
+
+
+  def test_top_k_edges_sampler(self):
+    edges = sampler.KeyToTfExampleAccessor(
+        sampler.InMemStringKeyToBytesAccessor(
+            keys_to_values={'?': b''}, name='cites'
+        ),
+        features_spec={
+            '#target': tf.TensorSpec([None], tf.string),
+            'weight': tf.TensorSpec([None], tf.float32),
+        },
+    )
+    i = self._keys_input()
+    layer = sampler.TopKEdgesSampler(
+        edges, sample_size=2, weight_feature_name='weight'
+    )
+    model = tf.keras.Model(inputs=i, outputs=layer(i))
+    program, artifacts = sampler.create_program(model)
+    temp_dir = self.create_tempdir().full_path
+    for name, model in artifacts.models.items():
+      sampler.save_model(model, os.path.join(temp_dir, name))
+
+    def serialize(targets, weights):
+      return text_format.Parse(
+          f"""features {{
+                feature {{
+                  key: "#target" value {{ bytes_list {{ value: {targets} }} }}
+                }}
+                feature {{
+                  key: "weight" value {{ float_list {{ value: {weights} }} }}
+                }}
+              }}""",
+          tf.train.Example(),
+      ).SerializeToString()
+
+    with beam.Pipeline() as root:
+      inputs = root | 'Inputs' >> beam.Create({
+          b's1': [[np.array([b'a', b'c'], np.object_), np.array([2])]],
+          b's2': [[np.array([b'b', b'x'], np.object_), np.array([2])]],
+      })
+      feed = root | 'Feed' >> beam.Create([
+          (b'a', serialize('["b", "c", "d"]', '[1.0, 3.0, 2.0]')),
+          (b'b', serialize('["c"]', '[1.0]')),
+          (b'c', serialize('["a", "d"]', '[2.0, 5.0]')),
+      ])
+      result = executor_lib.execute(
+          program,
+          {'keys': inputs},
+          feeds={'cites': feed},
+          artifacts_path=temp_dir,
+      )
+      template = """features {
+                      feature {
+                        key: "#source"
+                        value { bytes_list { value: %s } }
+                      }
+                      feature {
+                        key: "#target"
+                        value { bytes_list { value: %s } }
+                      }
+                      feature {
+                        key: "weight"
+                        value { float_list { value: %s } }
+                      }
+                    }"""
+      util.assert_that(
+          result,
+          util.equal_to(
+              [
+                  (
+                      b's1',
+                      template
+                      % (
+                          '["a", "a", "c", "c"]',
+                          '["c", "d", "d", "a"]',
+                          '[3.0, 2.0, 5.0, 2.0]',
+                      ),
+                  ),
+                  (b's2', template % ('["b"]', '["c"]', '[1.0]')),
+              ],
+              self.sampling_results_equal,
+          ),
+      )
+
+
+class StageCacheTest(ExecutorTestBase):
+
+  def _run(
+      self,
+      prefix: str,
+      feed_values,
+      feed_fingerprint: str,
+      cache_path: str,
+      expected: str,
+  ):
+    # Resets Keras layer names, so that the sink layer is named "sink".
+    tf.keras.backend.clear_session()
+    accessor = sampler.InMemStringKeyToBytesAccessor(
+        keys_to_values={'?': b''}, name='nodes'
+    )
+    i = tf.keras.Input(
+        type_spec=tf.RaggedTensorSpec([None, None], tf.string, ragged_rank=1),
+        name='keys',
+    )
+    o = tf.strings.join([prefix, accessor(i)], separator='-')
+    program, artifacts = sampler.create_program(
+        tf.keras.Model(inputs=i, outputs=o)
+    )
+    temp_dir = self.create_tempdir().full_path
+    for name, model in artifacts.models.items():
+      sampler.save_model(model, os.path.join(temp_dir, name))
+
+    with beam.Pipeline() as root:
+      inputs = root | 'Inputs' >> beam.Create(
+          [(b's1', [[np.array([b'a', b'b'], np.object_), np.array([2])]])]
+      )
+      feed = root | 'Feed' >> beam.Create(feed_values)
+      result = executor_lib.execute(
+          program,
+          {'keys': inputs},
+          feeds={'nodes': feed},
+          artifacts_path=temp_dir,
+          cache_path=cache_path,
+          input_fingerprints={'keys': 'keys-v1'},
+          feed_fingerprints={'nodes': feed_fingerprint},
+      )
+      util.assert_that(
+          result,
+          util.equal_to(
+              [(
+                  b's1',
+                  """features {
+                    feature {
+                      key: "__output__"
+                      value { bytes_list { value: %s } }
+                    }
+                  }""" % expected,
+              )],
+              self.sampling_results_equal,
+          ),
+      )
+
+  def _num_cached_stages(self, cache_path: str) -> int:
+    return len(tf.io.gfile.glob(os.path.join(cache_path, '*', '_SUCCESS')))
+
+  def test_reuses_cached_stages(self):
+    cache_path = self.create_tempdir().full_path
+    self._run(
+        'x', [(b'a', b'A'), (b'b', b'B')], 'v1', cache_path, '["x-A", "x-B"]'
+    )
+    self.assertEqual(self._num_cached_stages(cache_path), 2)
+    # The accessor results are read from the cache, so the feed is not used.
+    self._run('x', [], 'v1', cache_path, '["x-A", "x-B"]')
+    # Only the TF model stage is re-executed.
+    self._run('y', [], 'v1', cache_path, '["y-A", "y-B"]')
+    self.assertBetween(self._num_cached_stages(cache_path), 3, 4)
+    # The feed has changed, so all stages are re-executed.
+    self._run('y', [(b'a', b'C')], 'v2', cache_path, '["y-C", "y-"]')
+
+  def test_no_fingerprints(self):
+    cache_path = self.create_tempdir().full_path
+    self._run('x', [(b'a', b'A')], None, cache_path, '["x-A", "x-"]')
+    self.assertEqual(self._num_cached_stages(cache_path), 0)
+    self._run('x', [(b'b', b'B')], None, cache_path, '["x-", "x-B"]')
+
+  def test_fingerprints(self):
+    layers = {
+        'input': text_format.Parse(
+            'id: "input" type: "InputLayer"', executor_lib.pb.Layer()
+        ),
+        'model': text_format.Parse(
+            'id: "model" type: "TFModel"', executor_lib.pb.Layer()
+        ),
+    }
+    eval_dag = text_format.Parse(
+        """
+        stages { id: "1" layer_id: "input" }
+        stages {
+          id: "2"
+          layer_id: "model"
+          input_matchers { stage_id: "1" output_index: 0 }
+        }
+        """,
+        executor_lib.pb.EvalDAG(),
+    )
+    artifacts_path = self.create_tempdir().full_path
+
+    def fingerprints(input_fingerprint):
+      cache = executor_lib._StageCache(
+          self.create_tempdir().full_path,
+          feed_fingerprints={},
+          artifacts_path=artifacts_path,
+      )
+      input_fingerprints = {}
+      if input_fingerprint is not None:
+        input_fingerprints['input'] = input_fingerprint
+      return cache.fingerprint_stages(eval_dag, layers, input_fingerprints)
+
+    v1 = fingerprints('v1')
+    self.assertEqual(v1, fingerprints('v1'))
+    self.assertEqual(fingerprints(None), {'1': None, '2': None})
+    v2 = fingerprints('v2')
+    self.assertNotEqual(v1['1'], v2['1'])
+    self.assertNotEqual(v1['2'], v2['2'])
+
+    tf.io.gfile.makedirs(os.path.join(artifacts_path, 'model'))
+    with tf.io.gfile.GFile(
+        os.path.join(artifacts_path, 'model', 'saved_model.pb'), 'w'
+    ) as f:
+      f.write('model')
+    v1_model = fingerprints('v1')
+    self.assertEqual(v1['1'], v1_model['1'])
+    self.assertNotEqual(v1['2'], v1_model['2'])
+
+
 if __name__ == '__main__':
   tf.test.main()
@@ -16,9 +16,9 @@
 import abc
 import base64
 import collections
-import functools
-from typing import Any, cast, Collection, List, Mapping, Optional, Tuple, Union
+from typing import Any, cast, Collection, Dict, List, Mapping, Optional, Tuple, Union
 
+import numpy as np
 import tensorflow as tf
 import tensorflow_gnn as tfgnn
 
@@ -235,6 +235,10 @@ class _InMemKeyToBytesAccessor(
   def resource_name(self) -> str:
     return self.name
 
+  @property
+  def default_value(self) -> Optional[bytes]:
+    return self._default_value
+
   def get_config(self):
     return {
         'default_value': base64.b64encode(self._default_value).decode('utf-8'),
@@ -334,6 +338,221 @@ class InMemIntegerKeyToBytesAccessor(_InMemKeyToBytesAccessor):
     )
 
 
+@tf.keras.utils.register_keras_serializable(package='GNN')
+class InMemOutgoingEdgesAccessor(
+    tf.keras.layers.Layer, interfaces.OutgoingEdgesAccessor
+):
+  """Looks up (and optionally samples) outgoing edges of nodes from memory.
+
+  Edges are stored in the compressed sparse row (CSR) format: edges are sorted
+  by their source node ids, so outgoing edges of each source node are stored
+  contiguously and are indexed by the row splits. If `sample_size` is set,
+  edges are sampled directly from the CSR storage using Floyd's algorithm, so
+  the sampling cost for each source node is O(sample_size^2) and does not depend
+  on its out-degree. Source nodes without outgoing edges (including missing
+  ones) have no edges.
+
+  Example:
+
+  ```python
+    layer = InMemOutgoingEdgesAccessor(
+        source_ids=[1, 1, 1, 2],
+        target_ids=[2, 3, 4, 3],
+        edge_features={'weight': [0.1, 0.2, 0.3, 0.4]},
+        name='cites',
+    )
+    layer(tf.ragged.constant([[1, 2], [5]]), sample_size=2)
+    # Samples up to 2 edges for each source node, e.g.:
+    # {
+    #   '#target': [[[4, 2], [3]], [[]]],
+    #   'weight': [[[0.3, 0.1], [0.4]], [[]]],
+    # }
+  ```
+  """
+
+  def __init__(
+      self,
+      *,
+      source_ids: Optional[Any] = None,
+      target_ids: Optional[Any] = None,
+      edge_features: Optional[Mapping[str, Any]] = None,
+      edge_target_feature_name: str = tfgnn.TARGET_NAME,
+      **kwargs,
+  ):
+    """Constructor.
+
+    Args:
+      source_ids: source node ids of all edges, as integers or strings.
+      target_ids: target node ids of all edges, matching `source_ids`.
+      edge_features: Optional extra edge features. Each feature must have its
+        outermost dimension matching `source_ids`.
+      edge_target_feature_name: The name of the returned feature containing
+        target node ids.
+      **kwargs: Other arguments for the base class.
+    """
+    keys_to_index = kwargs.pop('keys_to_index', None)
+    edges = kwargs.pop('edges', None)
+
+    super().__init__(**kwargs)
+    self._edge_target_feature_name = edge_target_feature_name
+
+    if edges is not None:
+      # Object is restored from Keras saved model (`from_config`).
+      assert keys_to_index is not None
+      self._keys_to_index = keys_to_index
+      self._edges = edges
+      return
+
+    if source_ids is None or target_ids is None:
+      raise ValueError('Both `source_ids` and `target_ids` must be provided.')
+    source_ids = tf.convert_to_tensor(source_ids)
+    if source_ids.shape.rank != 1:
+      raise ValueError('Expected `source_ids` of rank 1.')
+    if source_ids.dtype in (tf.int32, tf.int64):
+      source_ids = tf.cast(source_ids, tf.int64)
+      index_cls = tf.keras.layers.IntegerLookup
+    elif source_ids.dtype == tf.string:
+      index_cls = tf.keras.layers.StringLookup
+    else:
+      raise ValueError(
+          'Expected source ids of tf.int32, tf.int64 or tf.string type,'
+          f' got {source_ids.dtype}'
+      )
+
+    features = dict(edge_features or {})
+    if edge_target_feature_name in features:
+      raise ValueError(
+          f'Edge feature {edge_target_feature_name} conflicts with target ids.'
+      )
+    target_ids = tf.convert_to_tensor(target_ids)
+    if target_ids.dtype == tf.int32:
+      target_ids = tf.cast(target_ids, tf.int64)
+    features[edge_target_feature_name] = target_ids
+    features = {k: tf.convert_to_tensor(v) for k, v in features.items()}
+    for name, value in features.items():
+      if value.shape.rank == 0 or value.shape[0] != source_ids.shape[0]:
+        raise ValueError(
+            f'Edge feature {name} must have the outermost dimension matching'
+            f' the number of edges {source_ids.shape[0]}.'
+        )
+
+    # Sort edges by their source ids. Stable sort keeps the relative order of
+    # edges with the same source.
+    unique_ids, source_index = tf.unique(source_ids)
+    order = tf.argsort(source_index, stable=True)
+    row_splits = tf.concat(
+        [
+            tf.zeros([2], tf.int64),
+            tf.math.cumsum(
+                tf.math.bincount(
+                    source_index,
+                    minlength=tf.size(unique_ids),
+                    dtype=tf.int64,
+                )
+            ),
+        ],
+        axis=0,
+    )
+    self._keys_to_index = index_cls(
+        vocabulary=unique_ids.numpy().tolist()
+        if index_cls is tf.keras.layers.IntegerLookup
+        else [v.decode('utf-8') for v in unique_ids.numpy()],
+        num_oov_indices=1,
+    )
+    values = {'#row_splits': row_splits}
+    values.update({k: tf.gather(v, order) for k, v in features.items()})
+    self._edges = _Columns({k: v.numpy() for k, v in values.items()})
+
+  @property
+  def resource_name(self) -> str:
+    return self.name
+
+  def get_config(self):
+    return {
+        'edge_target_feature_name': self._edge_target_feature_name,
+        'edges': self._edges,
+        'keys_to_index': self._keys_to_index,
+        **super().get_config(),
+    }
+
+  def call(
+      self,
+      keys: tf.RaggedTensor,
+      *,
+      sample_size: Optional[int] = None,
+      seed: Optional[int] = None,
+  ) -> Features:
+    _check_ragged_rank1(keys, type(self).__name__)
+    columns = dict(self._edges.columns)
+    row_splits = columns.pop('#row_splits')
+    indices = tf.cast(self._keys_to_index(keys.flat_values), tf.int64)
+    starts = tf.gather(row_splits, indices)
+    degrees = tf.gather(row_splits, indices + 1) - starts
+    if sample_size is None:
+      positions = tf.ragged.range(starts, starts + degrees)
+    else:
+      positions = _sample_positions(starts, degrees, sample_size, seed)
+
+    result = {}
+    for name, values in columns.items():
+      edges = positions.with_flat_values(tf.gather(values, positions.values))
+      result[name] = tf.RaggedTensor.from_row_splits(
+          edges,
+          tf.cast(keys.row_splits, edges.row_splits.dtype),
+          validate=False,
+      )
+    return result
+
+
+def _sample_positions(
+    starts: tf.Tensor,
+    degrees: tf.Tensor,
+    sample_size: int,
+    seed: Optional[int] = None,
+) -> tf.RaggedTensor:
+  """Samples without replacement up to `sample_size` positions in each row.
+
+  Implements Floyd's algorithm vectorized over all rows: the cost is
+  O(num_rows * sample_size^2) regardless of the row lengths.
+
+  Args:
+    starts: int64 start positions of the rows, shape `[num_rows]`.
+    degrees: int64 row lengths, shape `[num_rows]`.
+    sample_size: The maximum number of positions to sample in each row.
+    seed: A Python integer. Used to create a random seed for sampling.
+
+  Returns:
+    Sampled positions as ragged tensor with shape `[num_rows, (num_samples)]`,
+    where `num_samples = min(degree, sample_size)`.
+  """
+  if sample_size <= 0:
+    return tf.RaggedTensor.from_row_lengths(
+        tf.zeros([0], tf.int64), tf.zeros_like(degrees)
+    )
+  k = tf.constant(sample_size, tf.int64)
+  uniform = tf.random.uniform(
+      [tf.size(degrees), sample_size], dtype=tf.float64, seed=seed
+  )
+  sampled = []
+  for i in range(sample_size):
+    # For rows with degree <= sample_size all positions are selected.
+    j = tf.maximum(degrees - k, 0) + i
+    t = tf.minimum(
+        tf.cast(tf.floor(uniform[:, i] * tf.cast(j + 1, tf.float64)), tf.int64),
+        j,
+    )
+    if sampled:
+      t = tf.where(
+          tf.reduce_any(tf.stack(sampled, axis=-1) == t[:, None], axis=-1),
+          j,
+          t,
+      )
+    t = tf.where(degrees > k, t, i)
+    sampled.append(t)
+  sampled = tf.stack(sampled, axis=-1) + starts[:, None]
+  return tf.RaggedTensor.from_tensor(sampled, lengths=tf.minimum(degrees, k))
+
+
 @tf.keras.utils.register_keras_serializable(package='GNN')
 class KeyToTfExampleAccessor(CompositeLayer, interfaces.KeyToFeaturesAccessor):
   r"""Accessor for features stored as `Example` proto.
@@ -424,6 +643,187 @@ class KeyToTfExampleAccessor(CompositeLayer, interfaces.KeyToFeaturesAccessor):
     return super().call(keys)
 
 
+@tf.keras.utils.register_keras_serializable(package='GNN')
+class InMemKeyToFeaturesAccessor(
+    tf.keras.layers.Layer, interfaces.KeyToFeaturesAccessor
+):
+  """Looks up pre-parsed features by their keys from memory.
+
+  Unlike `KeyToTfExampleAccessor`, features are not stored as serialized
+  `Example` protos to be parsed on each lookup. Instead, each feature is stored
+  as a single column tensor, with row splits for features with variable size,
+  so each lookup is a gather.
+
+  Keys are indexed by `tf.keras.layers.IntegerLookup` or
+  `tf.keras.layers.StringLookup` layers, as for `InMemIntegerKeyToBytesAccessor`
+  and `InMemStringKeyToBytesAccessor`.
+
+  Sampling programs do not read the features from feeds: the accessor is saved
+  with its keys and features as part of a `TFModel` stage.
+
+  Example:
+
+  ```python
+    layer = InMemKeyToFeaturesAccessor(
+        keys=['a', 'b'],
+        features={'class': [1, 2], 'words': [['to', 'be'], ['or']]},
+        features_spec={
+            'class': tf.TensorSpec([], tf.int64),
+            'words': tf.TensorSpec([None], tf.string),
+        },
+    )
+    layer(tf.ragged.constant([['a', 'x'], ['b']]))
+    # {
+    #     'class': tf.ragged.constant([[1, 0], [2]]),
+    #     'words': tf.ragged.constant([[['to', 'be'], []], [['or']]]),
+    # }
+  ```
+  """
+
+  def __init__(
+      self,
+      *,
+      keys: Optional[Collection[Union[int, str]]] = None,
+      features: Optional[Mapping[str, Any]] = None,
+      features_spec: Optional[FeaturesSpec] = None,
+      default_values: Optional[Mapping[str, Any]] = None,
+      allow_missing_keys: bool = True,
+      **kwargs,
+  ):
+    """Constructor.
+
+    Args:
+      keys: The integer or string keys. Keys with an integer NumPy dtype kind
+        are indexed by `IntegerLookup`, all other keys by `StringLookup`.
+      features: A mapping from a feature name to its values for all `keys`, in
+        the same order. Each value must be compatible with the feature spec.
+      features_spec: A mapping from a feature name to its type spec, as for
+        `KeyToTfExampleAccessor`. Feature shapes must be either fully defined
+        or have only the outermost dimension of variable size.
+      default_values: An optional mapping between a feature name and a value to
+        be used for missing keys. By default (or if set to `None`), 0 values
+        are used for numeric types and empty strings for `tf.string` type.
+        Features of variable size are empty for missing keys.
+      allow_missing_keys: If `False`, missing keys result in
+        `tf.errors.InvalidArgumentError` and `default_values` are not used.
+      **kwargs: Other arguments for the base class.
+    """
+    keys_to_index = kwargs.pop('keys_to_index', None)
+    columns = kwargs.pop('columns', None)
+
+    super().__init__(**kwargs)
+
+    if columns is not None:
+      # Object is restored from Keras saved model (`from_config`).
+      assert keys_to_index is not None
+      self._keys_to_index = keys_to_index
+      self._columns = columns
+      return
+
+    if keys is None or features is None or features_spec is None:
+      raise ValueError(
+          '`keys`, `features` and `features_spec` must be provided.'
+      )
+    if set(features.keys()) != set(features_spec.keys()):
+      raise ValueError(
+          'Features do not match features spec:'
+          f' {sorted(features.keys())} vs {sorted(features_spec.keys())}.'
+      )
+    reserved = sorted(
+        name for name in features if name.endswith(_ROW_SPLITS_SUFFIX)
+    )
+    if reserved:
+      raise ValueError(
+          f'Feature names must not end with {_ROW_SPLITS_SUFFIX!r},'
+          f' got {reserved}.'
+      )
+    keys = list(keys)
+    default_values = dict(default_values or {})
+    num_oov = 1 if allow_missing_keys else 0
+    if np.asarray(keys).dtype.kind in 'iu':
+      index_cls = tf.keras.layers.IntegerLookup
+      keys = [int(k) for k in keys]
+    else:
+      index_cls = tf.keras.layers.StringLookup
+      keys = [k.decode('utf-8') if isinstance(k, bytes) else k for k in keys]
+    self._keys_to_index = index_cls(vocabulary=keys, num_oov_indices=num_oov)
+
+    columns = {}
+    for name, spec in features_spec.items():
+      values = features[name]
+      if len(values) != len(keys):
+        raise ValueError(
+            f'Expected {len(keys)} values for feature {name},'
+            f' got {len(values)}.'
+        )
+      dtype = spec.dtype.as_numpy_dtype
+      if spec.shape.is_fully_defined():
+        default_value = default_values.get(name, None)
+        if default_value is None:
+          default_value = _type_default(spec).numpy()
+        values = [default_value] * num_oov + list(values)
+        columns[name] = np.reshape(
+            np.asarray(values, dtype), [len(values), *spec.shape.as_list()]
+        )
+        continue
+
+      if spec.shape.rank is None or not spec.shape[1:].is_fully_defined():
+        raise ValueError(
+            f'Feature {name} must have fully defined shape or only the'
+            f' outermost dimension of variable size, got {spec.shape}.'
+        )
+      inner_shape = spec.shape[1:].as_list()
+      values = [np.zeros([0, *inner_shape], dtype)] * num_oov + [
+          np.reshape(np.asarray(v, dtype), [-1, *inner_shape]) for v in values
+      ]
+      columns[name] = np.concatenate(values, axis=0)
+      columns[name + _ROW_SPLITS_SUFFIX] = np.cumsum(
+          [0] + [len(v) for v in values], dtype=np.int64
+      )
+
+    self._columns = _Columns(columns)
+
+  @property
+  def resource_name(self) -> str:
+    return self.name
+
+  @property
+  def feature_names(self) -> List[str]:
+    return sorted(
+        name
+        for name in self._columns.columns
+        if not name.endswith(_ROW_SPLITS_SUFFIX)
+    )
+
+  def get_config(self):
+    return {
+        'columns': self._columns,
+        'keys_to_index': self._keys_to_index,
+        **super().get_config(),
+    }
+
+  def call(self, keys: tf.RaggedTensor) -> Features:
+    _check_ragged_rank1(keys, type(self).__name__)
+    indices = tf.cast(self._keys_to_index(keys.flat_values), tf.int64)
+    columns = self._columns.columns
+    result = {}
+    for name in self.feature_names:
+      column = columns[name]
+      row_splits = columns.get(name + _ROW_SPLITS_SUFFIX, None)
+      if row_splits is None:
+        result[name] = keys.with_flat_values(tf.gather(column, indices))
+        continue
+      starts = tf.gather(row_splits, indices)
+      positions = tf.ragged.range(starts, tf.gather(row_splits, indices + 1))
+      values = positions.with_flat_values(tf.gather(column, positions.values))
+      result[name] = tf.RaggedTensor.from_row_splits(
+          values,
+          tf.cast(keys.row_splits, values.row_splits.dtype),
+          validate=False,
+      )
+    return result
+
+
 @tf.keras.utils.register_keras_serializable(package='GNN')
 class UniformEdgesSampler(
     CompositeLayer, interfaces.OutgoingEdgesSampler
@@ -476,6 +876,8 @@ class UniformEdgesSampler(
         `edge_target_feature_name` feature with target node ids of the edges
         allong with other edge features. All returned features must have a shape
         `[batch_size, (num_source_nodes), (num_outgoing_edges), *feature_dims]`.
+        If it implements `OutgoingEdgesAccessor`, sampling is delegated to the
+        accessor, so only sampled edges are returned.
       sample_size: The maximum number of edges to sample for each source node.
       edge_target_feature_name: The name of the feature returned by the
         `outgoing_edges_accessor` containing target node ids of the edges.
@@ -494,11 +896,20 @@ class UniformEdgesSampler(
         edge_target_feature_name=edge_target_feature_name,
         seed=seed,
     )
+    self._presampled_selector = _UniformEdgesSelector(
+        sample_size=sample_size,
+        edge_target_feature_name=edge_target_feature_name,
+        presampled=True,
+    )
 
   @property
   def sample_size(self) -> int:
     return self._sample_size
 
+  @property
+  def seed(self) -> Optional[int]:
+    return self._seed
+
   @property
   def resource_name(self) -> tfgnn.EdgeSetName:
     return self._outgoing_edges_accessor.resource_name
@@ -513,19 +924,226 @@ class UniformEdgesSampler(
     )
 
   def symbolic_call(self, source_node_ids):
-    outgoing_edges = self._outgoing_edges_accessor(source_node_ids)
+    if isinstance(
+        self._outgoing_edges_accessor, interfaces.OutgoingEdgesAccessor
+    ):
+      # Sampling is pushed down into the accessor.
+      outgoing_edges = self._outgoing_edges_accessor(
+          source_node_ids, sample_size=self._sample_size, seed=self._seed
+      )
+      sampler = self._presampled_selector
+    else:
+      outgoing_edges = self._outgoing_edges_accessor(source_node_ids)
+      sampler = self._sampler
     if self._edge_target_feature_name not in outgoing_edges:
       raise ValueError(
           f'Expected {self._edge_target_feature_name} feature '
           'with target node ids of an outgoing edges.'
       )
 
+    return sampler([source_node_ids, outgoing_edges])
+
+  def call(self, source_node_ids: tf.RaggedTensor) -> Features:
+    return super().call(source_node_ids)
+
+
+class _WeightedEdgesSamplerBase(
+    CompositeLayer, interfaces.OutgoingEdgesSampler
+):
+  """Base class for samplers selecting edges using their weights."""
+
+  _STRATEGY = None
+
+  def __init__(
+      self,
+      outgoing_edges_accessor: interfaces.KeyToFeaturesAccessor,
+      *,
+      sample_size: int,
+      weight_feature_name: str,
+      edge_target_feature_name: str = tfgnn.TARGET_NAME,
+      seed: Optional[int] = None,
+      **kwargs,
+  ):
+    super().__init__(**kwargs)
+    self._outgoing_edges_accessor = cast(
+        tf.keras.layers.Layer, outgoing_edges_accessor
+    )
+    self._sample_size = sample_size
+    self._weight_feature_name = weight_feature_name
+    self._edge_target_feature_name = edge_target_feature_name
+    self._seed = seed
+    self._sampler = _WeightedEdgesSelector(
+        sample_size=sample_size,
+        weight_feature_name=weight_feature_name,
+        strategy=self._STRATEGY,
+        edge_target_feature_name=edge_target_feature_name,
+        seed=seed,
+    )
+
+  @property
+  def sample_size(self) -> int:
+    return self._sample_size
+
+  @property
+  def weight_feature_name(self) -> str:
+    return self._weight_feature_name
+
+  @property
+  def seed(self) -> Optional[int]:
+    return self._seed
+
+  @property
+  def resource_name(self) -> tfgnn.EdgeSetName:
+    return self._outgoing_edges_accessor.resource_name
+
+  def get_config(self):
+    return dict(
+        outgoing_edges_accessor=self._outgoing_edges_accessor,
+        sample_size=self._sample_size,
+        weight_feature_name=self._weight_feature_name,
+        edge_target_feature_name=self._edge_target_feature_name,
+        **super().get_config(),
+    )
+
+  def symbolic_call(self, source_node_ids):
+    outgoing_edges = self._outgoing_edges_accessor(source_node_ids)
+    for name in (self._edge_target_feature_name, self._weight_feature_name):
+      if name not in outgoing_edges:
+        raise ValueError(
+            f'Expected {name} feature of an outgoing edges, got'
+            f' {sorted(outgoing_edges.keys())}.'
+        )
+
     return self._sampler([source_node_ids, outgoing_edges])
 
   def call(self, source_node_ids: tf.RaggedTensor) -> Features:
     return super().call(source_node_ids)
 
 
+@tf.keras.utils.register_keras_serializable(package='GNN')
+class WeightedEdgesSampler(_WeightedEdgesSamplerBase):
+  """Samples edges from adjacency lists without replacement using weights.
+
+  Edges are sampled one by one with probabilities proportional to their weights
+  among not yet sampled edges. Edges with non-positive weights are never
+  sampled. This is the `RANDOM_WEIGHTED` strategy of the Beam sampler.
+
+  Example: For each input paper samples up to 2 cited papers, so that papers
+  with larger weights are more likely to be sampled.
+
+  ```python
+    cited_papers = tfgnn.KeyToTfExampleAccessor(
+      serialized_cited_papers,
+      features_spec={
+          '#target': tf.TensorSpec([None], tf.string),
+          'weight': tf.TensorSpec([None], tf.float32),
+      },
+    )
+    edge_sampler = tfgnn.WeightedEdgesSampler(
+        cited_papers, sample_size=2, weight_feature_name='weight'
+    )
+    cites = edge_sampler(tf.ragged.constant([['paper1', 'paper2'], ['paper1']]))
+  ```
+
+  Call returns:
+      `Features` containing the sampled edges whose source nodes are in
+      `source_node_ids`, as for `UniformEdgesSampler`.
+  """
+
+  _STRATEGY = 'weighted'
+
+  def __init__(
+      self,
+      outgoing_edges_accessor: interfaces.KeyToFeaturesAccessor,
+      *,
+      sample_size: int,
+      weight_feature_name: str,
+      edge_target_feature_name: str = tfgnn.TARGET_NAME,
+      seed: Optional[int] = None,
+      **kwargs,
+  ):
+    """Constructor.
+
+    Args:
+      outgoing_edges_accessor: The Keras layer that for each source node returns
+        all its outgoing edges as a `Features` dictionary, as for
+        `UniformEdgesSampler`.
+      sample_size: The maximum number of edges to sample for each source node.
+      weight_feature_name: The name of the scalar edge feature with
+        non-negative sampling weights.
+      edge_target_feature_name: The name of the feature returned by the
+        `outgoing_edges_accessor` containing target node ids of the edges.
+      seed: A Python integer. Used to create a random seed for sampling.
+      **kwargs: Other arguments for the base class.
+    """
+    super().__init__(
+        outgoing_edges_accessor,
+        sample_size=sample_size,
+        weight_feature_name=weight_feature_name,
+        edge_target_feature_name=edge_target_feature_name,
+        seed=seed,
+        **kwargs,
+    )
+
+  def get_config(self):
+    return dict(seed=self._seed, **super().get_config())
+
+
+@tf.keras.utils.register_keras_serializable(package='GNN')
+class TopKEdgesSampler(_WeightedEdgesSamplerBase):
+  """Selects edges with the largest weights from adjacency lists.
+
+  Edges with equal weights are selected in the order of the adjacency list.
+  This is the `TOP_K` strategy of the Beam sampler.
+
+  Example: For each input paper selects up to 2 cited papers with the largest
+  weights.
+
+  ```python
+    edge_sampler = tfgnn.TopKEdgesSampler(
+        cited_papers, sample_size=2, weight_feature_name='weight'
+    )
+    cites = edge_sampler(tf.ragged.constant([['paper1', 'paper2'], ['paper1']]))
+  ```
+
+  Call returns:
+      `Features` containing the selected edges whose source nodes are in
+      `source_node_ids`, as for `UniformEdgesSampler`.
+  """
+
+  _STRATEGY = 'top_k'
+
+  def __init__(
+      self,
+      outgoing_edges_accessor: interfaces.KeyToFeaturesAccessor,
+      *,
+      sample_size: int,
+      weight_feature_name: str,
+      edge_target_feature_name: str = tfgnn.TARGET_NAME,
+      **kwargs,
+  ):
+    """Constructor.
+
+    Args:
+      outgoing_edges_accessor: The Keras layer that for each source node returns
+        all its outgoing edges as a `Features` dictionary, as for
+        `UniformEdgesSampler`.
+      sample_size: The maximum number of edges to select for each source node.
+      weight_feature_name: The name of the scalar numeric edge feature to select
+        edges with the largest values.
+      edge_target_feature_name: The name of the feature returned by the
+        `outgoing_edges_accessor` containing target node ids of the edges.
+      **kwargs: Other arguments for the base class.
+    """
+    super().__init__(
+        outgoing_edges_accessor,
+        sample_size=sample_size,
+        weight_feature_name=weight_feature_name,
+        edge_target_feature_name=edge_target_feature_name,
+        **kwargs,
+    )
+
+
 @tf.keras.utils.register_keras_serializable(package='GNN')
 class TfExamplesParser(tf.keras.layers.Layer):
   """Parses serialized Example protos according to features type spec."""
@@ -619,6 +1237,7 @@ def build_graph_tensor(
         Mapping[str, Union[Features, List[Features]]]
     ] = None,
     validate: bool = True,
+    fused: bool = False,
 ) -> tfgnn.GraphTensor:
   """Builds GraphTensor from its pieces using node ids.
 
@@ -647,6 +1266,8 @@ def build_graph_tensor(
       features must have shapes `[batch_size, (num_edges), ...]`.
     validate: If True, runs potentially expensive runtime consitency checks,
       like that node sets have unique ids.
+    fused: If True, indexes all ids of each node set in a single pass (see
+      `GraphTensorBuilder`).
 
   Returns:
     GraphTensor with `rank=1`.
@@ -704,7 +1325,7 @@ def build_graph_tensor(
             }
         })
   """
-  layer = GraphTensorBuilder(validate=validate)
+  layer = GraphTensorBuilder(validate=validate, fused=fused)
   return layer(
       context or {}, node_sets=node_sets or {}, edge_sets=edge_sets or {}
   )
@@ -738,19 +1359,32 @@ class GraphTensorBuilder(tf.keras.layers.Layer):
 
   Call returns:
       GraphTensor of rank 1.
+
+  Init arguments:
+      validate: If True, runs potentially expensive runtime consitency checks,
+        like that node sets have unique ids.
+      fused: If True, ids of each node set are deduplicated together with all
+        edge endpoints in this node set in a single pass, and edge indices are
+        computed from the deduplication results instead of vocabulary lookups.
+        The results are the same as for `fused=False`. With validation, checks
+        that node ids are unique and contain all edge endpoints.
   """
 
   def __init__(
       self,
       *,
       validate: bool = True,
+      fused: bool = False,
       **kwargs
   ):
     super().__init__(**kwargs)
     self._validate = validate
+    self._fused = fused
 
   def get_config(self):
-    return dict(validate=self._validate, **super().get_config())
+    return dict(
+        validate=self._validate, fused=self._fused, **super().get_config()
+    )
 
   def call(
       self,
@@ -764,93 +1398,53 @@ class GraphTensorBuilder(tf.keras.layers.Layer):
         return concat_features(pieces)
       return pieces
 
-    context_ = tfgnn.Context.from_fields(features=context, shape=[None])
-    node_sets_ = {}
-    edge_sets_ = {}
-
-    latent_node_sets = collections.defaultdict(list)
+    node_sets = {k: join(v) for k, v in node_sets.items()}
+    edge_sets = {k: join(v) for k, v in edge_sets.items()}
+    for node_set_name, features in node_sets.items():
+      if NODE_ID_NAME not in features:
+        raise ValueError(f'Missing `{NODE_ID_NAME}` in {node_set_name}.')
     for key, features in edge_sets.items():
-      source_node_set, edge_set_name, target_node_set = (
-          _parse_edge_set_definition(key)
+      _, edge_set_name, _ = _parse_edge_set_definition(key)
+      missing = [
+          fname
+          for fname in (tfgnn.SOURCE_NAME, tfgnn.TARGET_NAME)
+          if fname not in features
+      ]
+      if missing:
+        raise ValueError(f'Missing `{missing} in {edge_set_name}.')
+
+    if self._fused:
+      nodes_ids, edges_indices, checks = _index_nodes_fused(
+          node_sets, edge_sets, validate=self._validate
+      )
+    else:
+      nodes_ids, edges_indices, checks = _index_nodes(
+          node_sets, edge_sets, validate=self._validate
       )
 
-      features = features if isinstance(features, list) else [features]
-      if source_node_set not in node_sets:
-        latent_node_sets[source_node_set].extend(
-            [f[tfgnn.SOURCE_NAME] for f in features]
-        )
-      if target_node_set not in node_sets:
-        latent_node_sets[target_node_set].extend(
-            [f[tfgnn.TARGET_NAME] for f in features]
-        )
-
-    node_sets_with_id = {
-        **{k: v for k, v in node_sets.items()},
-        **{
-            k: [{NODE_ID_NAME: ext_ops.ragged_unique(tf.concat(v, -1))}]
-            for k, v in latent_node_sets.items()
-        },
-    }
-
-    nodes_ids = dict()
-    for node_set_name, features in node_sets_with_id.items():
-      features_ = {}
-      sizes_ = None
-      for fname, fvalue in join(features).items():
-        if fname == NODE_ID_NAME:
-          check_ops = []
-          if self._validate and node_set_name not in latent_node_sets:
-            check_ops.append(
-                tf.debugging.assert_equal(
-                    ext_ops.ragged_unique(fvalue).row_splits,
-                    fvalue.row_splits,
-                    f'Node set {node_set_name} ids are not unique.',
-                )
-            )
-          with tf.control_dependencies(check_ops):
-            sizes_ = tf.expand_dims(fvalue.row_lengths(), -1)
-          nodes_ids[node_set_name] = fvalue
-        features_[fname] = fvalue
-      if sizes_ is None:
-        raise ValueError(f'Missing `{NODE_ID_NAME}` in {node_set_name}.')
-
+    context_ = tfgnn.Context.from_fields(features=context, shape=[None])
+    node_sets_ = {}
+    for node_set_name, ids in nodes_ids.items():
+      with tf.control_dependencies(checks.get(node_set_name, [])):
+        sizes_ = tf.expand_dims(ids.row_lengths(), -1)
       node_sets_[node_set_name] = tfgnn.NodeSet.from_fields(
-          features=features_, sizes=sizes_
+          features=node_sets.get(node_set_name, {NODE_ID_NAME: ids}),
+          sizes=sizes_,
       )
 
+    edge_sets_ = {}
     for key, features in edge_sets.items():
       source_node_set, edge_set_name, target_node_set = (
           _parse_edge_set_definition(key)
       )
-      key_to_index_fn = {
-          tfgnn.SOURCE_NAME: functools.partial(
-              ext_ops.ragged_lookup,
-              vocabulary=nodes_ids[source_node_set],
-              validate=self._validate,
-          ),
-          tfgnn.TARGET_NAME: functools.partial(
-              ext_ops.ragged_lookup,
-              vocabulary=nodes_ids[target_node_set],
-              validate=self._validate,
-          ),
-      }
-      features_ = {}
-      indices_ = {}
-      sizes_ = None
-      for fname, fvalue in join(features).items():
-        if fname in (tfgnn.SOURCE_NAME, tfgnn.TARGET_NAME):
-          sizes_ = tf.expand_dims(fvalue.row_lengths(), -1)
-          indices_[fname] = key_to_index_fn.pop(fname)(fvalue)
-        else:
-          features_[fname] = fvalue
-
-      if key_to_index_fn:
-        raise ValueError(
-            f'Missing `{list(key_to_index_fn)} in {edge_set_name}.'
-        )
+      indices_ = edges_indices[key]
       edge_sets_[edge_set_name] = tfgnn.EdgeSet.from_fields(
-          features=features_,
-          sizes=sizes_,
+          features={
+              fname: fvalue
+              for fname, fvalue in features.items()
+              if fname not in (tfgnn.SOURCE_NAME, tfgnn.TARGET_NAME)
+          },
+          sizes=tf.expand_dims(features[tfgnn.SOURCE_NAME].row_lengths(), -1),
           adjacency=tfgnn.Adjacency.from_indices(
               source=(source_node_set, indices_[tfgnn.SOURCE_NAME]),
               target=(target_node_set, indices_[tfgnn.TARGET_NAME]),
@@ -861,6 +1455,200 @@ class GraphTensorBuilder(tf.keras.layers.Layer):
     )
 
 
+# Node ids of each node set, edge indices of each edge set by endpoint name
+# (`tfgnn.SOURCE_NAME` or `tfgnn.TARGET_NAME`) and validation ops of each node
+# set.
+_NodesIndex = Tuple[
+    Dict[tfgnn.NodeSetName, tf.RaggedTensor],
+    Dict[str, Dict[str, tf.RaggedTensor]],
+    Dict[tfgnn.NodeSetName, List[tf.Operation]],
+]
+
+
+def _index_nodes(
+    node_sets: Mapping[tfgnn.NodeSetName, Features],
+    edge_sets: Mapping[str, Features],
+    *,
+    validate: bool,
+) -> _NodesIndex:
+  """Indexes edge endpoints by looking up their ids in node sets."""
+  latent_node_sets = collections.defaultdict(list)
+  for key, features in edge_sets.items():
+    source_node_set, _, target_node_set = _parse_edge_set_definition(key)
+    if source_node_set not in node_sets:
+      latent_node_sets[source_node_set].append(features[tfgnn.SOURCE_NAME])
+    if target_node_set not in node_sets:
+      latent_node_sets[target_node_set].append(features[tfgnn.TARGET_NAME])
+
+  nodes_ids = {k: v[NODE_ID_NAME] for k, v in node_sets.items()}
+  for node_set_name, ids in latent_node_sets.items():
+    nodes_ids[node_set_name] = ext_ops.ragged_unique(tf.concat(ids, -1))
+
+  checks = {}
+  if validate:
+    for node_set_name in node_sets:
+      ids = nodes_ids[node_set_name]
+      checks[node_set_name] = [
+          tf.debugging.assert_equal(
+              ext_ops.ragged_unique(ids).row_splits,
+              ids.row_splits,
+              f'Node set {node_set_name} ids are not unique.',
+          )
+      ]
+
+  edges_indices = {}
+  for key, features in edge_sets.items():
+    source_node_set, _, target_node_set = _parse_edge_set_definition(key)
+    edges_indices[key] = {
+        tfgnn.SOURCE_NAME: ext_ops.ragged_lookup(
+            features[tfgnn.SOURCE_NAME],
+            vocabulary=nodes_ids[source_node_set],
+            validate=validate,
+        ),
+        tfgnn.TARGET_NAME: ext_ops.ragged_lookup(
+            features[tfgnn.TARGET_NAME],
+            vocabulary=nodes_ids[target_node_set],
+            validate=validate,
+        ),
+    }
+  return nodes_ids, edges_indices, checks
+
+
+def _index_nodes_fused(
+    node_sets: Mapping[tfgnn.NodeSetName, Features],
+    edge_sets: Mapping[str, Features],
+    *,
+    validate: bool,
+) -> _NodesIndex:
+  """Indexes edge endpoints with a single pass over ids of each node set.
+
+  All ids of a node set (node ids, if the node set is not latent, followed by
+  ids of edge endpoints in this node set) are deduplicated together and the
+  positions of deduplicated ids are used as edge indices, so no lookups are
+  needed. For not latent node sets the number of unique ids must be equal to
+  the number of nodes, which is checked if `validate` is True.
+
+  Args:
+    node_sets: Features of not latent node sets.
+    edge_sets: Features of edge sets by edge set definition keys.
+    validate: Whether to check node ids of not latent node sets.
+
+  Returns:
+    Node ids, edge indices and validation ops.
+  """
+  node_set_ids = collections.defaultdict(list)
+  # Edge set definition key and endpoint name for each of `node_set_ids`, or
+  # `None` for node ids.
+  node_set_refs = collections.defaultdict(list)
+  for node_set_name, features in node_sets.items():
+    node_set_ids[node_set_name].append(features[NODE_ID_NAME])
+    node_set_refs[node_set_name].append(None)
+  for key, features in edge_sets.items():
+    source_node_set, _, target_node_set = _parse_edge_set_definition(key)
+    for node_set_name, fname in (
+        (source_node_set, tfgnn.SOURCE_NAME),
+        (target_node_set, tfgnn.TARGET_NAME),
+    ):
+      node_set_ids[node_set_name].append(features[fname])
+      node_set_refs[node_set_name].append((key, fname))
+
+  nodes_ids = {}
+  edges_indices = collections.defaultdict(dict)
+  checks = {}
+  for node_set_name, ids in node_set_ids.items():
+    refs = node_set_refs[node_set_name]
+    if len(ids) == 1 and refs[0] is None and not validate:
+      nodes_ids[node_set_name] = ids[0]
+      continue
+    unique_ids, indices = _ragged_unique_with_indices(ids)
+    if node_set_name in node_sets:
+      nodes_ids[node_set_name] = ids[0]
+      if validate:
+        checks[node_set_name] = [
+            tf.debugging.assert_equal(
+                unique_ids.row_splits,
+                ids[0].row_splits,
+                f'Node set {node_set_name} ids are not unique or do not'
+                ' contain all edge endpoints.',
+            )
+        ]
+    else:
+      nodes_ids[node_set_name] = unique_ids
+    for ref, ref_indices in zip(refs, indices):
+      if ref is not None:
+        key, fname = ref
+        edges_indices[key][fname] = ref_indices
+  return nodes_ids, dict(edges_indices), checks
+
+
+def _ragged_unique_with_indices(
+    pieces: List[tf.RaggedTensor],
+) -> Tuple[tf.RaggedTensor, List[tf.RaggedTensor]]:
+  """Returns unique values in each row of pieces and indices of all values.
+
+  The result is the same as `ragged_unique(tf.concat(pieces, -1))` together
+  with `ragged_lookup(piece, unique)` for each piece, but it is computed with
+  two hash-based `tf.unique` calls over flat values.
+
+  Args:
+    pieces: The ragged tensors of rank 2 with the same number of rows.
+
+  Returns:
+    Tuple of unique values for each row, ordered by their first appearance in
+    the row of concatenated pieces, and indices of values of each piece in the
+    unique values of their row.
+  """
+  flat_values = tf.concat([p.flat_values for p in pieces], 0)
+  row_ids = tf.concat([tf.cast(p.value_rowids(), tf.int64) for p in pieces], 0)
+  nrows = pieces[0].nrows(out_type=tf.int64)
+  # Global indices of values combined with their row ids are unique keys of
+  # values in rows. The keys are ordered by their first appearance in flat
+  # values of pieces, so they are grouped by rows using stable sort.
+  global_values, global_indices = tf.unique(flat_values, out_idx=tf.int64)
+  num_global_values = tf.maximum(tf.size(global_values, out_type=tf.int64), 1)
+  keys, key_indices = tf.unique(
+      row_ids * num_global_values + global_indices, out_idx=tf.int64
+  )
+  key_rows = keys // num_global_values
+  order = tf.argsort(key_rows, stable=True)
+  row_splits = tf.concat(
+      [
+          tf.zeros([1], tf.int64),
+          tf.math.cumsum(
+              tf.math.unsorted_segment_sum(
+                  tf.ones_like(key_rows), key_rows, nrows
+              )
+          ),
+      ],
+      0,
+  )
+  local_indices = tf.cast(
+      tf.math.invert_permutation(order), tf.int64
+  ) - tf.gather(row_splits, key_rows)
+  first_positions = tf.math.unsorted_segment_min(
+      tf.range(tf.size(flat_values, out_type=tf.int64)),
+      key_indices,
+      tf.size(keys, out_type=tf.int64),
+  )
+  unique_values = tf.RaggedTensor.from_row_splits(
+      tf.gather(flat_values, tf.gather(first_positions, order)),
+      tf.cast(row_splits, pieces[0].row_splits.dtype),
+      validate=False,
+  )
+  flat_indices = tf.split(
+      tf.gather(local_indices, key_indices),
+      tf.stack([tf.size(p.flat_values, out_type=tf.int64) for p in pieces]),
+      num=len(pieces),
+  )
+  indices = [
+      tf.RaggedTensor.from_row_splits(
+          tf.cast(i, p.row_splits.dtype), p.row_splits, validate=False
+      )
+      for i, p in zip(flat_indices, pieces)
+  ]
+  return unique_values, indices
+
+
 def concat_features(pieces: List[Features]) -> Features:
   """Concatenates features from multiple items along the 1st (item) dimension.
 
@@ -988,6 +1776,73 @@ class _BytesArray(tf.keras.layers.Layer, interfaces.KeyToBytesAccessor):
     return tf.gather(self._values, indices)
 
 
+_ROW_SPLITS_SUFFIX = '.#row_splits'
+
+
+@tf.keras.utils.register_keras_serializable(package='GNN')
+class _Columns(tf.keras.layers.Layer):
+  """Stores named dense tensors (columns) in memory.
+
+  Columns are stored internally as `tf.Variable` so they could be saved to and
+  restored from checkpoints, same as for `_BytesArray`. Columns are kept as a
+  list to not use their names as checkpoint keys.
+  """
+
+  def __init__(self, columns: Optional[Mapping[str, Any]] = None, **kwargs):
+    columns_spec = kwargs.pop('columns_spec', None)
+    super().__init__(**kwargs)
+
+    if columns is None:
+      assert columns_spec is not None
+      initializers = {
+          name: tf.constant_initializer('' if dtype == 'string' else 0)
+          for name, _, dtype in columns_spec
+      }
+    else:
+      assert columns_spec is None
+      columns = {k: np.asarray(v) for k, v in columns.items()}
+      columns_spec = [
+          [
+              name,
+              list(columns[name].shape),
+              'string'
+              if columns[name].dtype.kind in ('O', 'S', 'U')
+              else tf.dtypes.as_dtype(columns[name].dtype).name,
+          ]
+          for name in sorted(columns)
+      ]
+      initializers = {
+          k: tf.constant_initializer(v) for k, v in columns.items()
+      }
+
+    self._columns_spec = columns_spec
+    self._columns = [
+        self.add_weight(
+            name=f'column_{index}',
+            shape=shape,
+            dtype=tf.dtypes.as_dtype(dtype),
+            initializer=initializers[name],
+            use_resource=False,
+            trainable=False,
+        )
+        for index, (name, shape, dtype) in enumerate(columns_spec)
+    ]
+    self.built = True
+
+  @property
+  def columns(self) -> Mapping[str, tf.Variable]:
+    return {
+        name: column
+        for (name, _, _), column in zip(self._columns_spec, self._columns)
+    }
+
+  def get_config(self):
+    return {
+        'columns_spec': self._columns_spec,
+        **super().get_config(),
+    }
+
+
 @tf.keras.utils.register_keras_serializable(package='GNN')
 class _UniformEdgesSelector(tf.keras.layers.Layer):
   """Selects edges uniformly at random from outgoing edges tensor.
@@ -1012,6 +1867,9 @@ class _UniformEdgesSelector(tf.keras.layers.Layer):
     has row lengths less or equal to `sample_size`. Notice that the original
     edge name `edge_target_feature_name` in  `outgoing_edges` is renamed to
     "#target" in the result.
+
+    If `presampled` is set, `outgoing_edges` are expected to be already sampled
+    (e.g. by `OutgoingEdgesAccessor`) and are only reformatted.
   """
 
   def __init__(
@@ -1020,23 +1878,30 @@ class _UniformEdgesSelector(tf.keras.layers.Layer):
       sample_size: int,
       edge_target_feature_name: str = tfgnn.TARGET_NAME,
       seed: Optional[int] = None,
+      presampled: bool = False,
       **kwargs,
   ):
     super().__init__(**kwargs)
     self._sample_size = sample_size
     self._edge_target_feature_name = edge_target_feature_name
     self._seed = seed
+    self._presampled = presampled
 
   def get_config(self):
     return dict(
         sample_size=self._sample_size,
         edge_target_feature_name=self._edge_target_feature_name,
         seed=self._seed,
+        presampled=self._presampled,
         **super().get_config(),
     )
 
   def call(self, inputs):
     source_node_ids, outgoing_edges = inputs
+    if self._presampled:
+      return _to_sampled_edges(
+          source_node_ids, dict(outgoing_edges), self._edge_target_feature_name
+      )
     return _sample_edges_without_replacement(
         source_node_ids,
         outgoing_edges,
@@ -1046,6 +1911,56 @@ class _UniformEdgesSelector(tf.keras.layers.Layer):
     )
 
 
+@tf.keras.utils.register_keras_serializable(package='GNN')
+class _WeightedEdgesSelector(tf.keras.layers.Layer):
+  """Selects edges from outgoing edges tensor according to their weights.
+
+  Same as `_UniformEdgesSelector`, but edges are selected using the
+  `weight_feature_name` edge feature, either randomly with probabilities
+  proportional to weights (`strategy='weighted'`) or as edges with the largest
+  weights (`strategy='top_k'`).
+  """
+
+  def __init__(
+      self,
+      *,
+      sample_size: int,
+      weight_feature_name: str,
+      strategy: str,
+      edge_target_feature_name: str = tfgnn.TARGET_NAME,
+      seed: Optional[int] = None,
+      **kwargs,
+  ):
+    super().__init__(**kwargs)
+    self._sample_size = sample_size
+    self._weight_feature_name = weight_feature_name
+    self._strategy = strategy
+    self._edge_target_feature_name = edge_target_feature_name
+    self._seed = seed
+
+  def get_config(self):
+    return dict(
+        sample_size=self._sample_size,
+        weight_feature_name=self._weight_feature_name,
+        strategy=self._strategy,
+        edge_target_feature_name=self._edge_target_feature_name,
+        seed=self._seed,
+        **super().get_config(),
+    )
+
+  def call(self, inputs):
+    source_node_ids, outgoing_edges = inputs
+    return _sample_edges_by_weight(
+        source_node_ids,
+        outgoing_edges,
+        self._edge_target_feature_name,
+        self._weight_feature_name,
+        self._sample_size,
+        self._strategy,
+        self._seed,
+    )
+
+
 def _pack_args(args, kwargs):
   return ((*args,), kwargs)
 
@@ -1067,6 +1982,53 @@ def _sample_edges_without_replacement(
   sampling_indices = ext_ops.ragged_choice(
       num_samples, row_splits, global_indices=True, seed=seed
   )
+  return _gather_sampled_edges(
+      source_node_ids, outgoing_edges, edge_target_feature_name,
+      sampling_indices
+  )
+
+
+def _sample_edges_by_weight(
+    source_node_ids: tf.RaggedTensor,
+    outgoing_edges: Features,
+    edge_target_feature_name: str,
+    weight_feature_name: str,
+    sample_size: int,
+    strategy: str,
+    seed: Optional[int] = None,
+) -> Features:
+  """Samples up to `sample_size` edges for each source using edge weights."""
+  weights = outgoing_edges[weight_feature_name]
+  if weights.shape.rank != 3:
+    raise ValueError(
+        f'Expected scalar edge weights {weight_feature_name}, got'
+        f' {tf.type_spec_from_value(weights)}'
+    )
+  weights = weights.values
+  num_samples = tf.constant(sample_size, dtype=weights.row_splits.dtype)
+  if strategy == 'weighted':
+    sampling_indices = ext_ops.ragged_weighted_choice(
+        num_samples, weights, global_indices=True, seed=seed
+    )
+  elif strategy == 'top_k':
+    sampling_indices = ext_ops.ragged_top_k(
+        weights, num_samples, global_indices=True
+    )
+  else:
+    raise ValueError(f'Unsupported sampling strategy {strategy}')
+  return _gather_sampled_edges(
+      source_node_ids, outgoing_edges, edge_target_feature_name,
+      sampling_indices
+  )
+
+
+def _gather_sampled_edges(
+    source_node_ids: tf.RaggedTensor,
+    outgoing_edges: Features,
+    edge_target_feature_name: str,
+    sampling_indices: tf.RaggedTensor,
+) -> Features:
+  """Selects sampled edges by their global indices in outgoing edges."""
 
   def sample(feature: tf.RaggedTensor) -> tf.RaggedTensor:
     edge_feature = feature.values
@@ -1074,6 +2036,18 @@ def _sample_edges_without_replacement(
     return feature.with_values(sampled_edge_feature)
 
   sampled_edges = tf.nest.map_structure(sample, outgoing_edges)
+  return _to_sampled_edges(
+      source_node_ids, sampled_edges, edge_target_feature_name
+  )
+
+
+def _to_sampled_edges(
+    source_node_ids: tf.RaggedTensor,
+    sampled_edges: Features,
+    edge_target_feature_name: str,
+) -> Features:
+  """Converts sampled outgoing edges of source nodes to the edges features."""
+  sampled_edges = dict(sampled_edges)
   target_node_ids = sampled_edges.pop(edge_target_feature_name)
   # Repeat source node ids for each sample target node.
   source_node_ids = target_node_ids.with_flat_values(
@@ -12,15 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import collections
 import tempfile
 from typing import Optional
 
 from absl.testing import parameterized
 
 import google.protobuf.text_format as pbtext
+import numpy as np
 import tensorflow as tf
 
 from tensorflow_gnn.experimental.sampler import core
+from tensorflow_gnn.experimental.sampler import ext_ops
 
 rt = tf.ragged.constant
 
@@ -534,6 +537,103 @@ class KeyToTfExampleTest(tf.test.TestCase):
     self.assertEqual(layer.resource_name, 'node_features')
 
 
+class InMemKeyToFeaturesAccessorTest(tf.test.TestCase, parameterized.TestCase):
+
+  def _get_layer(self, keys, **kwargs):
+    return core.InMemKeyToFeaturesAccessor(
+        keys=keys,
+        features={
+            'class': [1, 2],
+            'words': [['to', 'be'], ['or']],
+            'vector': [[1.0, 2.0], [3.0, 4.0]],
+            'pairs': [[[1, 2], [3, 4]], []],
+        },
+        features_spec={
+            'class': tf.TensorSpec([], tf.int64),
+            'words': tf.TensorSpec([None], tf.string),
+            'vector': tf.TensorSpec([2], tf.float32),
+            'pairs': tf.TensorSpec([None, 2], tf.int32),
+        },
+        name='features',
+        **kwargs,
+    )
+
+  @parameterized.parameters(
+      (['a', 'b'], rt([['a', 'x'], ['b']])),
+      ([10, 20], rt([[10, 30], [20]], dtype=tf.int64)),
+      (np.arange(10, 30, 10), rt([[10, 30], [20]], dtype=tf.int64)),
+      (np.array([b'a', b'b']), rt([['a', 'x'], ['b']])),
+  )
+  def testLookup(self, keys, queries):
+    layer = self._get_layer(keys, default_values={'class': -1})
+
+    def check_results(result):
+      self.assertAllEqual(result['class'], rt([[1, -1], [2]]))
+      self.assertAllEqual(
+          result['words'], rt([[[b'to', b'be'], []], [[b'or']]])
+      )
+      self.assertAllEqual(
+          result['vector'],
+          rt([[[1.0, 2.0], [0.0, 0.0]], [[3.0, 4.0]]], ragged_rank=1),
+      )
+      self.assertAllEqual(
+          result['pairs'],
+          rt([[[[1, 2], [3, 4]], []], [[]]], ragged_rank=2, inner_shape=(2,)),
+      )
+
+    check_results(layer(queries))
+    i = tf.keras.Input(
+        type_spec=tf.RaggedTensorSpec([None, None], queries.dtype)
+    )
+    model = tf.keras.Model(inputs=i, outputs=layer(i))
+    restored_model = save_and_load(model)
+    check_results(restored_model(queries))
+    self.assertIsInstance(
+        restored_model.layers[1], core.InMemKeyToFeaturesAccessor
+    )
+
+  def testMissingKeys(self):
+    layer = self._get_layer(['a', 'b'], allow_missing_keys=False)
+    self.assertAllEqual(layer(rt([['b'], []]))['class'], rt([[2], []]))
+    with self.assertRaises(tf.errors.InvalidArgumentError):
+      layer(rt([['a', 'x']]))
+
+  def testNoneDefaultValue(self):
+    layer = self._get_layer(['a', 'b'], default_values={'class': None})
+    self.assertAllEqual(layer(rt([['a', 'x']]))['class'], rt([[1, 0]]))
+
+  def testErrors(self):
+    with self.assertRaisesRegex(ValueError, 'must be provided'):
+      core.InMemKeyToFeaturesAccessor(keys=['a'])
+    with self.assertRaisesRegex(ValueError, 'do not match'):
+      core.InMemKeyToFeaturesAccessor(
+          keys=['a'],
+          features={'f': [1]},
+          features_spec={'g': tf.TensorSpec([], tf.int64)},
+      )
+    with self.assertRaisesRegex(ValueError, 'Expected 2 values'):
+      core.InMemKeyToFeaturesAccessor(
+          keys=['a', 'b'],
+          features={'f': [1]},
+          features_spec={'f': tf.TensorSpec([], tf.int64)},
+      )
+    with self.assertRaisesRegex(ValueError, 'must not end with'):
+      core.InMemKeyToFeaturesAccessor(
+          keys=['a'],
+          features={'f': [[1]], 'f.#row_splits': [2]},
+          features_spec={
+              'f': tf.TensorSpec([None], tf.int64),
+              'f.#row_splits': tf.TensorSpec([], tf.int64),
+          },
+      )
+    with self.assertRaisesRegex(ValueError, 'outermost dimension'):
+      core.InMemKeyToFeaturesAccessor(
+          keys=['a'],
+          features={'f': [[[1]]]},
+          features_spec={'f': tf.TensorSpec([None, None], tf.int64)},
+      )
+
+
 class UniformEdgesSamplerTest(tf.test.TestCase, parameterized.TestCase):
 
   def _get_test_data(
@@ -709,6 +809,197 @@ class UniformEdgesSamplerTest(tf.test.TestCase, parameterized.TestCase):
     check_results(restored_model)
 
 
+class WeightedEdgesSamplersTest(tf.test.TestCase, parameterized.TestCase):
+
+  def _get_edges(self):
+    return core.InMemKeyToFeaturesAccessor(
+        keys=['a', 'b', 'c'],
+        features={
+            'neighbors': [['b', 'c', 'd'], ['a'], ['a', 'b', 'c', 'd']],
+            'weight': [[1.0, 0.0, 3.0], [2.0], [1.0, 4.0, 4.0, 2.0]],
+        },
+        features_spec={
+            'neighbors': tf.TensorSpec([None], tf.string),
+            'weight': tf.TensorSpec([None], tf.float32),
+        },
+        name='edges',
+    )
+
+  def testTopK(self):
+    layer = core.TopKEdgesSampler(
+        self._get_edges(),
+        sample_size=2,
+        weight_feature_name='weight',
+        edge_target_feature_name='neighbors',
+    )
+    self.assertEqual(layer.resource_name, 'edges')
+    keys = tf.keras.Input(
+        type_spec=tf.RaggedTensorSpec([None, None], tf.string)
+    )
+    model = tf.keras.Model(keys, layer(keys))
+
+    def check_results(model):
+      result = model(rt([['a', 'b'], ['c', 'x'], []]))
+      self.assertAllEqual(
+          result['#source'], rt([['a', 'a', 'b'], ['c', 'c'], []])
+      )
+      self.assertAllEqual(
+          result['#target'], rt([['d', 'b', 'a'], ['b', 'c'], []])
+      )
+      self.assertAllEqual(
+          result['weight'], rt([[3.0, 1.0, 2.0], [4.0, 4.0], []])
+      )
+
+    check_results(model)
+    restored_model = save_and_load(model)
+    check_results(restored_model)
+    self.assertIsInstance(restored_model.layers[1], core.TopKEdgesSampler)
+
+  @parameterized.parameters([1, 2, 5])
+  def testWeighted(self, sample_size):
+    layer = core.WeightedEdgesSampler(
+        self._get_edges(),
+        sample_size=sample_size,
+        weight_feature_name='weight',
+        edge_target_feature_name='neighbors',
+        seed=42,
+    )
+    counts = collections.Counter()
+    num_runs = 200 if sample_size == 1 else 10
+    for _ in range(num_runs):
+      result = layer(rt([['a', 'c']]))
+      targets = result['#target'].to_list()[0]
+      sources = result['#source'].to_list()[0]
+      self.assertLen(targets, min(sample_size, 2) + min(sample_size, 4))
+      edges = list(zip(sources, targets))
+      self.assertLen(set(edges), len(edges))
+      # Edge `a->c` has zero weight and is never sampled.
+      self.assertNotIn((b'a', b'c'), edges)
+      counts.update(edges)
+    if sample_size == 1:
+      self.assertAllClose(
+          [counts[(b'a', b'b')] / num_runs, counts[(b'c', b'a')] / num_runs],
+          [0.25, 1.0 / 11],
+          atol=0.08,
+      )
+
+  def testErrors(self):
+    layer = core.TopKEdgesSampler(
+        self._get_edges(),
+        sample_size=2,
+        weight_feature_name='score',
+        edge_target_feature_name='neighbors',
+    )
+    with self.assertRaisesRegex(ValueError, 'Expected score feature'):
+      layer(rt([['a']]))
+
+
+class InMemOutgoingEdgesAccessorTest(tf.test.TestCase, parameterized.TestCase):
+
+  def _get_accessor(self, **kwargs):
+    # Node i has outgoing edges to nodes 0..i-1 with weights 10 * i + target.
+    sources, targets = [], []
+    for source in range(10):
+      for target in range(source):
+        sources.append(source)
+        targets.append(target)
+    order = np.random.default_rng(1).permutation(len(sources))
+    sources = np.array(sources)[order]
+    targets = np.array(targets)[order]
+    return core.InMemOutgoingEdgesAccessor(
+        source_ids=sources,
+        target_ids=targets,
+        edge_features={
+            'weight': (10 * sources + targets).astype(np.float32),
+            'pair': np.stack([sources, targets], axis=-1),
+        },
+        name='edges',
+        **kwargs,
+    )
+
+  def testAllEdges(self):
+    layer = self._get_accessor()
+    result = layer(rt([[1, 3], [], [0, 20]], dtype=tf.int64))
+    self.assertAllEqual(
+        result['#target'], rt([[[0], [0, 1, 2]], [], [[], []]])
+    )
+    self.assertAllEqual(
+        result['weight'], rt([[[10.0], [30.0, 31.0, 32.0]], [], [[], []]])
+    )
+    self.assertEqual(result['pair'].shape.as_list(), [3, None, None, 2])
+
+  @parameterized.parameters(0, 1, 3, 9, 20)
+  def testSampling(self, sample_size):
+    layer = self._get_accessor()
+    keys = rt([list(range(10)), [9, 9, 30]], dtype=tf.int64)
+    result = layer(keys, sample_size=sample_size, seed=42)
+    targets = result['#target']
+    self.assertAllEqual(
+        targets.row_lengths(axis=2),
+        [[min(i, sample_size) for i in range(10)],
+         [min(9, sample_size)] * 2 + [0]],
+    )
+    for row_keys, row_targets, row_pairs in zip(
+        keys.to_list(), targets.to_list(), result['pair'].to_list()
+    ):
+      for key, key_targets, key_pairs in zip(row_keys, row_targets, row_pairs):
+        self.assertLen(set(key_targets), len(key_targets))
+        self.assertTrue(all(t < key for t in key_targets))
+        self.assertAllEqual(key_pairs, [[key, t] for t in key_targets])
+
+  def testSamplingIsUniform(self):
+    layer = self._get_accessor()
+    result = layer(rt([[9] * 9000], dtype=tf.int64), sample_size=3)
+    counts = np.bincount(result['#target'].flat_values.numpy(), minlength=9)
+    self.assertAllClose(counts / np.sum(counts), [1.0 / 9] * 9, atol=0.02)
+
+  def testStringKeys(self):
+    layer = core.InMemOutgoingEdgesAccessor(
+        source_ids=['a', 'b', 'a'], target_ids=['x', 'y', 'z']
+    )
+    result = layer(rt([['a', 'c', 'b']]), sample_size=1)
+    self.assertAllEqual(result['#target'].row_lengths(axis=2), [[1, 0, 1]])
+    self.assertIn(result['#target'][0][0][0].numpy(), (b'x', b'z'))
+
+  def testUniformEdgesSampler(self):
+    layer = self._get_accessor(edge_target_feature_name='target')
+    sampler = core.UniformEdgesSampler(
+        layer, sample_size=2, edge_target_feature_name='target'
+    )
+    keys = tf.keras.Input(
+        type_spec=tf.RaggedTensorSpec([None, None], tf.int64)
+    )
+    model = tf.keras.Model(keys, sampler(keys))
+
+    def check_results(model):
+      result = model(rt([[1, 5], [20]], dtype=tf.int64))
+      self.assertAllEqual(
+          result['#source'], rt([[1, 5, 5], []], dtype=tf.int64)
+      )
+      self.assertAllEqual(
+          result['weight'],
+          tf.cast(10 * result['#source'] + result['#target'], tf.float32),
+      )
+
+    check_results(model)
+    restored_model = save_and_load(model)
+    check_results(restored_model)
+    self.assertIsInstance(
+        restored_model.layers[1].wrapped_model.layers[1],
+        core.InMemOutgoingEdgesAccessor,
+    )
+
+  def testErrors(self):
+    with self.assertRaisesRegex(ValueError, 'must be provided'):
+      core.InMemOutgoingEdgesAccessor(source_ids=[1])
+    with self.assertRaisesRegex(ValueError, 'outermost dimension'):
+      core.InMemOutgoingEdgesAccessor(source_ids=[1, 2], target_ids=[1])
+    with self.assertRaisesRegex(ValueError, 'conflicts'):
+      core.InMemOutgoingEdgesAccessor(
+          source_ids=[1], target_ids=[1], edge_features={'#target': [1]}
+      )
+
+
 class GraphTensorBuilderTest(tf.test.TestCase):
 
   def testContext(self):
@@ -902,5 +1193,107 @@ class GraphTensorBuilderTest(tf.test.TestCase):
     )
 
 
+
+class FusedGraphTensorBuilderTest(tf.test.TestCase, parameterized.TestCase):
+
+  def assertGraphsEqual(self, expected, actual):
+    self.assertAllEqual(
+        list(expected.node_sets.keys()), list(actual.node_sets.keys())
+    )
+    for name, node_set in expected.node_sets.items():
+      self.assertAllEqual(node_set.sizes, actual.node_sets[name].sizes)
+      for fname, fvalue in node_set.features.items():
+        self.assertAllEqual(fvalue, actual.node_sets[name][fname])
+    for name, edge_set in expected.edge_sets.items():
+      actual_edge_set = actual.edge_sets[name]
+      self.assertAllEqual(edge_set.sizes, actual_edge_set.sizes)
+      self.assertAllEqual(
+          edge_set.adjacency.source, actual_edge_set.adjacency.source
+      )
+      self.assertAllEqual(
+          edge_set.adjacency.target, actual_edge_set.adjacency.target
+      )
+
+  @parameterized.parameters(True, False)
+  def testSameAsNotFused(self, validate: bool):
+    pieces = dict(
+        node_sets={
+            'A': [
+                {'#id': rt([[1, 2], [5], []])},
+                {'#id': rt([[3], [4], [7]])},
+            ],
+        },
+        edge_sets={
+            'A,A->B,B': {
+                '#source': rt([[1, 2, 2, 1], [4, 4, 5], [7]]),
+                '#target': rt([['x', 'y', 'z', 'x'], ['u', 'v', 'u'], ['x']]),
+            },
+            'B,B->C,C': {
+                '#source': rt([['z', 'y'], ['w'], []]),
+                '#target': rt([[10, 20], [30], []]),
+                'f.s': rt([[1.0, 2.0], [3.0], []]),
+            },
+            'C,C->A,A': {
+                '#source': rt([[20, 10, 20], [30], []]),
+                '#target': rt([[3, 1, 3], [5], []]),
+            },
+        },
+    )
+    expected = core.build_graph_tensor(**pieces, validate=validate)
+    actual = core.build_graph_tensor(**pieces, validate=validate, fused=True)
+    self.assertGraphsEqual(expected, actual)
+    self.assertAllEqual(
+        actual.node_sets['B']['#id'],
+        rt([['x', 'y', 'z'], ['u', 'v', 'w'], ['x']]),
+    )
+    self.assertAllEqual(
+        actual.edge_sets['C->A'].adjacency.target, rt([[2, 0, 2], [0], []])
+    )
+
+  def testRandomMultiHop(self):
+    rng = np.random.default_rng(42)
+    seeds = rng.integers(0, 100, [8, 1])
+    hop1 = rng.integers(0, 100, [8, 5])
+    hop2 = rng.integers(0, 100, [8, 25])
+    ragged = lambda v: tf.RaggedTensor.from_tensor(tf.constant(v))
+    sources = np.concatenate([np.repeat(seeds, 5, 1), np.repeat(hop1, 5, 1)], 1)
+    ids = ext_ops.ragged_unique(ragged(np.concatenate([seeds, hop1, hop2], 1)))
+    pieces = dict(
+        node_sets={'A': {'#id': ids}},
+        edge_sets={
+            'A,A->A,A': {
+                '#source': ragged(sources),
+                '#target': ragged(np.concatenate([hop1, hop2], 1)),
+            },
+        },
+    )
+    self.assertGraphsEqual(
+        core.build_graph_tensor(**pieces),
+        core.build_graph_tensor(**pieces, fused=True),
+    )
+
+  def testNotUniqueIds(self):
+    with self.assertRaisesRegex(
+        tf.errors.InvalidArgumentError, 'ids are not unique'
+    ):
+      core.build_graph_tensor(
+          node_sets={'A': {'#id': rt([[1, 2, 1]])}}, fused=True
+      )
+
+  def testMissingEndpoints(self):
+    with self.assertRaisesRegex(
+        tf.errors.InvalidArgumentError, 'do not contain all edge endpoints'
+    ):
+      core.build_graph_tensor(
+          node_sets={'A': {'#id': rt([[1, 2]])}},
+          edge_sets={
+              'A,A->A,A': {
+                  '#source': rt([[1, 2]]),
+                  '#target': rt([[2, 3]]),
+              }
+          },
+          fused=True,
+      )
+
 if __name__ == '__main__':
   tf.test.main()
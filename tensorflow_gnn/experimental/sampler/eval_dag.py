@@ -334,6 +334,9 @@ def _convert_stages_dag_to_eval_dag(
 
 def _has_specialized_stage(node: Node) -> bool:
   """`True` if `node` has a specialized stage."""
+  if isinstance(node.layer, core.InMemKeyToFeaturesAccessor):
+    # Holds its features, so it is saved as part of a `TFModel` stage.
+    return False
   return isinstance(
       node.layer,
       (
@@ -755,8 +758,46 @@ def _(layer: core.CompositeLayer):
   return None
 
 
+@get_layer_config_pb.register(core.UniformEdgesSampler)
+def _(layer: core.UniformEdgesSampler):
+  return _get_edge_sampling_config(layer)
+
+
+@get_layer_config_pb.register(core.WeightedEdgesSampler)
+@get_layer_config_pb.register(core.TopKEdgesSampler)
+def _(layer: core.CompositeLayer):
+  result = _get_edge_sampling_config(layer)
+  result.weight_feature_name = layer.weight_feature_name
+  return result
+
+
+def _get_edge_sampling_config(layer) -> eval_dag_pb2.EdgeSamplingConfig:
+  result = eval_dag_pb2.EdgeSamplingConfig(
+      edge_set_name=layer.resource_name, sample_size=layer.sample_size
+  )
+  result.edge_feature_names.feature_names.extend(
+      sorted(layer.wrapped_model.output.keys())
+  )
+  if layer.seed is not None:
+    result.seed = layer.seed
+  return result
+
+
 @get_layer_config_pb.register(interfaces.KeyToBytesAccessor)
 def _(layer: interfaces.KeyToBytesAccessor):
+  result = eval_dag_pb2.KeyToBytesAccessorConfig(
+      resource_name=layer.resource_name
+  )
+  default_value = getattr(layer, 'default_value', None)
+  if default_value is not None:
+    result.default_value = default_value
+  return result
+
+
+@get_layer_config_pb.register(interfaces.OutgoingEdgesAccessor)
+def _(layer: interfaces.OutgoingEdgesAccessor):
+  del layer
+  # Edge sampling is configured by the `EdgeSamplingConfig` of the sampler.
   return None
 
 
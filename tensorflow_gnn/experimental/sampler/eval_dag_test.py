@@ -173,6 +173,69 @@ class EvalDagSimpleTest(tf.test.TestCase):
     self.assertAllEqual(expected.row_lengths(), actual.row_lengths())
 
 
+class LayerConfigsTest(tf.test.TestCase):
+
+  def testInMemKeyToFeaturesAccessor(self):
+    accessor = core.InMemKeyToFeaturesAccessor(
+        keys=['a', 'b'],
+        features={'f': [1.0, 2.0], 'w': [['x'], []]},
+        features_spec={
+            'f': tf.TensorSpec([], tf.float32),
+            'w': tf.TensorSpec([None], tf.string),
+        },
+        name='features',
+    )
+    i = tf.keras.Input(
+        type_spec=tf.RaggedTensorSpec([None, None], tf.string), name='input'
+    )
+    program, artifacts = lib.create_program(tf.keras.Model(i, accessor(i)))
+    self.assertNotIn('features', program.layers)
+    self.assertEqual(
+        sorted(layer.type for layer in program.layers.values()),
+        ['InputLayer', 'Sink', 'TFModel'],
+    )
+    self.assertLen(artifacts.models, 1)
+
+  def testWeightedEdgesSamplers(self):
+    edges = core.KeyToTfExampleAccessor(
+        core.InMemStringKeyToBytesAccessor(
+            keys_to_values={'?': b''}, name='cites'
+        ),
+        features_spec={
+            '#target': tf.TensorSpec([None], tf.string),
+            'weight': tf.TensorSpec([None], tf.float32),
+        },
+    )
+    i = tf.keras.Input(
+        type_spec=tf.RaggedTensorSpec([None, None], tf.string), name='input'
+    )
+    weighted = core.WeightedEdgesSampler(
+        edges, sample_size=2, weight_feature_name='weight', seed=1, name='w'
+    )
+    top_k = core.TopKEdgesSampler(
+        edges, sample_size=3, weight_feature_name='weight', name='k'
+    )
+    program, _ = lib.create_program(
+        tf.keras.Model(i, [weighted(i), top_k(i)])
+    )
+    for layer_id, sample_size, seed in [('w', 2, 'seed: 1'), ('k', 3, '')]:
+      layer = program.layers[layer_id]
+      config = pb.EdgeSamplingConfig()
+      self.assertTrue(layer.config.Unpack(config))
+      self.assertProtoEquals(
+          f"""
+          edge_set_name: "cites"
+          sample_size: {sample_size}
+          edge_feature_names {{
+            feature_names: ["#source", "#target", "weight"]
+          }}
+          weight_feature_name: "weight"
+          {seed}
+          """,
+          config,
+      )
+
+
 class SpecializableLambda(tf.keras.layers.Lambda, interfaces.SamplingPrimitive):
   pass
 
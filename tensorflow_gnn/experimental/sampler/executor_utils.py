@@ -0,0 +1,113 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Helpers shared by the executors of sampling programs.
+
+Used by `beam.executor_lib` and `local.executor_lib`, which represent values
+the same way: dense values as `[value]` and ragged values as `[flat_values,
+*nested_row_lengths]`, with the outermost row lengths first.
+"""
+
+from typing import List, Mapping, Optional, TypeVar
+
+import numpy as np
+import tensorflow as tf
+
+from tensorflow_gnn.experimental.sampler import eval_dag_pb2 as pb
+
+# Global unique identifier of a particular example.
+ExampleId = bytes
+# Tensor or flattened composite tensor.
+Value = List[np.ndarray]
+# Collection of values belonging to particular example.
+Values = List[Value]
+
+# External data source, as represented by an executor.
+Feed = TypeVar('Feed')
+
+
+def ragged_slice(value: Value, start: int, limit: int) -> Value:
+  """Extracts `value[start:limit, ...]` for potentially ragged values."""
+  assert value
+  b, e = start, limit
+  partition_slices = []
+  for dim in range(1, len(value)):
+    partition = value[dim]
+    partition_slices.append(partition[b:e])
+    b, e = np.sum(partition[:b]), np.sum(partition[:e])
+  flat_value = value[0][b:e]
+  return [flat_value, *partition_slices]
+
+
+def get_outer_dim_size(values: Values) -> int:
+  """Returns the common outer dimension of `values`."""
+  assert values
+  # Dense values are `[value]` and ragged values are `[flat_values,
+  # *nested_row_lengths]`, with the outermost row lengths first.
+  dims = [value[min(1, len(value) - 1)].shape[0] for value in values]
+  if any(dims[0] != d for d in dims):
+    raise ValueError(f'Values have different outer dimensions: {dims}')
+  return dims[0]
+
+
+def supports_batching(layer: pb.Layer) -> bool:
+  """Checks if layer supports batching of concatenated inputs.
+
+  The check guarantees that
+  `concat(layer(input1), layer(input2)) == layer(concat(input1, input2))` for
+  any inputs 1 and 2.
+
+  TODO(aferludin): this must be controlled by the `Layer` property and set
+  during sampling model export, only if Keras layers has this guarantee.
+
+  Args:
+    layer: The layer to check.
+
+  Returns:
+    `True` if layer supports batching.
+  """
+
+  def _is_stackable(spec) -> bool:
+    return spec.HasField('ragged_tensor') or spec.HasField('tensor')
+
+  return all(_is_stackable(t) for t in [*layer.inputs, *layer.outputs])
+
+
+def get_lookup_keys(
+    values: Values, example_id: Optional[ExampleId] = None
+) -> np.ndarray:
+  """Returns lookup keys from a single ragged value with a single row."""
+  if len(values) != 1 or len(values[0]) != 2 or values[0][1].size != 1:
+    raise ValueError(
+        'Expected single ragged rank 1 value with a single row as lookup keys'
+        + ('' if example_id is None else f' for {example_id}')
+    )
+  return values[0][0]
+
+
+def get_flat_values_dtype(spec: pb.ValueSpec) -> np.dtype:
+  dtype = tf.dtypes.as_dtype(spec.ragged_tensor.dtype)
+  return np.object_ if dtype == tf.string else dtype.as_numpy_dtype
+
+
+def get_row_lengths_dtype(spec: pb.ValueSpec) -> np.dtype:
+  return tf.dtypes.as_dtype(spec.ragged_tensor.row_splits_dtype).as_numpy_dtype
+
+
+def get_feed(feeds: Mapping[str, Feed], name: str, layer: pb.Layer) -> Feed:
+  """Returns feed `name` for `layer`, which must exist."""
+  feed = feeds.get(name, None)
+  if feed is None:
+    raise ValueError(f'Missing feed {name} for the layer {layer.id}')
+  return feed
@@ -19,11 +19,13 @@ import tensorflow as tf
 # copybara:uncomment_begin (internal implementation of ext_ops)
 # from tensorflow_gnn.experimental.sampler import ext_ops_custom
 # copybara:uncomment_end
+from tensorflow_gnn.experimental.sampler import ext_ops_auto
 from tensorflow_gnn.experimental.sampler import ext_ops_parallel
 from tensorflow_gnn.experimental.sampler import ext_ops_vectorized
 
 
 _IMPLEMENTATIONS = {
+    'auto': ext_ops_auto,
     'parallel': ext_ops_parallel,
     'vectorized': ext_ops_vectorized,
     # copybara:uncomment_begin (internal implementation of ext_ops)
@@ -87,6 +89,100 @@ def ragged_choice(
   )
 
 
+def ragged_weighted_choice(
+    num_samples: tf.Tensor,
+    weights: tf.RaggedTensor,
+    *,
+    global_indices: bool = False,
+    seed: Optional[int] = None,
+) -> tf.RaggedTensor:
+  """Draws elements without replacement with probabilities given by weights.
+
+  Each row is sampled independently. Elements are drawn one by one with
+  probabilities proportional to their weights among the elements not drawn
+  yet. This is implemented by assigning random keys `log(u) / weight` to all
+  elements, where `u ~ Uniform(0, 1]`, and selecting elements with top keys in
+  each row (A-ES algorithm by Efraimidis and Spirakis). Elements with
+  non-positive weights are never drawn.
+
+  Example:
+
+    ```python
+    ragged_weighted_choice(2, [[1.0, 0.0, 3.0], [1.0, 1.0]])
+    # [[2, 0], [1, 0]]
+    ```
+
+  Args:
+    num_samples: The maximum number of samples to draw from each row without
+      replacement. An integer tensor broadcastable to `[nrows]` (so a scalar or
+      a 1D `[nrows]` tensor).
+    weights: The ragged tensor of rank 2 (ragged matrix) with non-negative
+      weights of elements.
+    global_indices: If True, the returned indices are defined for flat values
+      ignoring the ragged row splits. If False, the returned indices are defined
+      independently for each ragged row.
+    seed: A Python integer. Used to create a random seed for sampling.
+
+  Returns:
+    A ragged tensor of the same type as `weights` row splits containing indices
+    of sampled elements in each row (row-based or global, depending on the
+    `global_indices` argument).
+  """
+  weights = _convert_to_ragged_tensor(weights)
+  if weights.shape.rank != 2:
+    raise ValueError(
+        f'Expected rank 2 ragged tensor, got {tf.type_spec_from_value(weights)}'
+    )
+  if not weights.dtype.is_floating:
+    weights = tf.cast(weights, tf.float32)
+  num_samples = tf.convert_to_tensor(num_samples)
+  return _OPS_LIB.ragged_weighted_choice(
+      num_samples, weights, global_indices=global_indices, seed=seed
+  )
+
+
+def ragged_top_k(
+    values: tf.RaggedTensor,
+    k: tf.Tensor,
+    *,
+    global_indices: bool = False,
+) -> tf.RaggedTensor:
+  """Returns indices of up to `k` largest values for each ragged row.
+
+  Indices are sorted by their values in descending order. Equal values are
+  ordered by their indices.
+
+  Example:
+
+    ```python
+    ragged_top_k([[1.0, 3.0, 2.0], [5.0]], 2)
+    # [[1, 2], [0]]
+    ragged_top_k([[1.0, 3.0, 2.0], [5.0]], 2, global_indices=True)
+    # [[1, 2], [3]]
+    ```
+
+  Args:
+    values: The ragged tensor of rank 2 (ragged matrix) with numeric values.
+    k: The maximum number of elements to return for each row. An integer tensor
+      broadcastable to `[nrows]` (so a scalar or a 1D `[nrows]` tensor).
+    global_indices: If True, the returned indices are defined for flat values
+      ignoring the ragged row splits. If False, the returned indices are defined
+      independently for each ragged row.
+
+  Returns:
+    A ragged tensor of the same type as `values` row splits containing indices
+    of top elements in each row (row-based or global, depending on the
+    `global_indices` argument).
+  """
+  values = _convert_to_ragged_tensor(values)
+  if values.shape.rank != 2:
+    raise ValueError(
+        f'Expected rank 2 ragged tensor, got {tf.type_spec_from_value(values)}'
+    )
+  k = tf.convert_to_tensor(k)
+  return _OPS_LIB.ragged_top_k(values, k, global_indices=global_indices)
+
+
 def ragged_unique(ragged: tf.RaggedTensor) -> tf.RaggedTensor:
   """Returns unique values for each ragged row preserving order.
 
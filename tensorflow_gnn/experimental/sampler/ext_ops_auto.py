@@ -0,0 +1,175 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Implements `ext_ops.py` by selecting the fastest implementation per call.
+
+For each call, the implementation is selected from `ext_ops_vectorized.py` and
+`ext_ops_parallel.py` using the average length of ragged rows.
+If those are known statically (e.g. in eager mode), the selection is done in
+Python, otherwise both implementations are added to the graph and selected
+using `tf.cond`.
+"""
+from typing import Callable, Optional, Union
+
+import tensorflow as tf
+
+from tensorflow_gnn.experimental.sampler import ext_ops_parallel
+from tensorflow_gnn.experimental.sampler import ext_ops_vectorized
+
+
+# The minimum average row length for which the parallel implementation is used.
+#
+# Derived from `ext_ops_benchmark.py` results on CPU for 1 to 10^4 rows of
+# 1 to 10^3 values: the vectorized implementation is faster for rows with up to
+# 100 values, regardless of the number of rows, while the parallel one is
+# faster (2x-15x) for rows with 1000 values. The thresholds are set in between.
+_MIN_PARALLEL_ROW_LENGTH = {
+    'ragged_choice': 300,
+    'ragged_unique': 300,
+    'ragged_lookup': 300,
+    'ragged_weighted_choice': 300,
+    'ragged_top_k': 300,
+}
+
+
+def ragged_choice(
+    num_samples: tf.Tensor,
+    row_splits: tf.Tensor,
+    *,
+    global_indices: bool,
+    seed: Optional[int],
+) -> tf.RaggedTensor:
+  """Implements `ext_ops.py:ragged_choice()`."""
+  return _dispatch(
+      'ragged_choice',
+      tf.size(row_splits, out_type=row_splits.dtype) - 1,
+      row_splits[-1],
+      lambda lib: lib.ragged_choice(
+          num_samples, row_splits, global_indices=global_indices, seed=seed
+      ),
+  )
+
+
+def ragged_weighted_choice(
+    num_samples: tf.Tensor,
+    weights: tf.RaggedTensor,
+    *,
+    global_indices: bool,
+    seed: Optional[int],
+) -> tf.RaggedTensor:
+  """Implements `ext_ops.py:ragged_weighted_choice()`."""
+  return _dispatch_ragged(
+      'ragged_weighted_choice',
+      weights,
+      lambda lib: lib.ragged_weighted_choice(
+          num_samples, weights, global_indices=global_indices, seed=seed
+      ),
+  )
+
+
+def ragged_top_k(
+    values: tf.RaggedTensor,
+    k: tf.Tensor,
+    *,
+    global_indices: bool,
+) -> tf.RaggedTensor:
+  """Implements `ext_ops.py:ragged_top_k()`."""
+  return _dispatch_ragged(
+      'ragged_top_k',
+      values,
+      lambda lib: lib.ragged_top_k(values, k, global_indices=global_indices),
+  )
+
+
+def ragged_unique(ragged: tf.RaggedTensor) -> tf.RaggedTensor:
+  """Implements `ext_ops.py:ragged_unique()`."""
+  return _dispatch_ragged(
+      'ragged_unique', ragged, lambda lib: lib.ragged_unique(ragged)
+  )
+
+
+def ragged_lookup(
+    values: tf.RaggedTensor,
+    vocabulary: tf.RaggedTensor,
+    *,
+    global_indices: bool,
+    validate: bool = True,
+) -> tf.RaggedTensor:
+  """Implements `ext_ops.py:ragged_lookup()`."""
+  return _dispatch(
+      'ragged_lookup',
+      values.nrows(),
+      # Both vocabulary and values rows are processed together.
+      tf.size(values, out_type=values.row_splits.dtype)
+      + tf.size(vocabulary, out_type=values.row_splits.dtype),
+      lambda lib: lib.ragged_lookup(
+          values, vocabulary, global_indices=global_indices, validate=validate
+      ),
+  )
+
+
+def use_parallel(
+    op: str, num_rows: tf.Tensor, num_values: tf.Tensor
+) -> Union[bool, tf.Tensor]:
+  """Returns `True` if the parallel implementation of `op` is faster.
+
+  Args:
+    op: The name of `ext_ops` operation.
+    num_rows: The number of ragged rows, as a scalar integer tensor.
+    num_values: The total number of values in all rows, as a scalar integer
+      tensor.
+
+  Returns:
+    Python boolean, if `num_rows` and `num_values` are known statically,
+    otherwise a scalar boolean tensor.
+  """
+  min_row_length = _MIN_PARALLEL_ROW_LENGTH[op]
+  static_num_rows = tf.get_static_value(num_rows)
+  static_num_values = tf.get_static_value(num_values)
+  if static_num_rows is not None and static_num_values is not None:
+    return bool(
+        static_num_rows > 0
+        and static_num_values >= min_row_length * static_num_rows
+    )
+  num_rows = tf.cast(num_rows, tf.int64)
+  num_values = tf.cast(num_values, tf.int64)
+  return tf.math.logical_and(
+      num_rows > 0, num_values >= min_row_length * num_rows
+  )
+
+
+def _dispatch_ragged(
+    op: str, ragged: tf.RaggedTensor, fn: Callable[..., tf.RaggedTensor]
+) -> tf.RaggedTensor:
+  return _dispatch(
+      op,
+      ragged.nrows(),
+      tf.size(ragged, out_type=ragged.row_splits.dtype),
+      fn,
+  )
+
+
+def _dispatch(
+    op: str,
+    num_rows: tf.Tensor,
+    num_values: tf.Tensor,
+    fn: Callable[..., tf.RaggedTensor],
+) -> tf.RaggedTensor:
+  """Calls `fn` with the fastest implementation library for the input sizes."""
+  parallel = use_parallel(op, num_rows, num_values)
+  if isinstance(parallel, bool):
+    return fn(ext_ops_parallel if parallel else ext_ops_vectorized)
+  return tf.cond(
+      parallel, lambda: fn(ext_ops_parallel), lambda: fn(ext_ops_vectorized)
+  )
@@ -0,0 +1,205 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Benchmarks `ext_ops` implementations over a grid of input shapes.
+
+For each operation, implementation, number of rows and row length, runs the
+operation on random ragged inputs (generated with a fixed seed) as a
+`tf.function` and prints the median run time in microseconds, together with
+the fastest implementation for each input shape. The results are used to set
+thresholds of the "auto" implementation (see `ext_ops_auto.py`).
+
+To get reproducible results on CPU, all benchmarks run on CPU with a single
+inter-op thread.
+
+```
+python -m tensorflow_gnn.experimental.sampler.ext_ops_benchmark \
+  --ops=ragged_unique --num_rows=1,100,10000 --row_lengths=1,10,100
+```
+"""
+
+import csv
+import dataclasses
+import sys
+import timeit
+from typing import Callable, Iterable, List
+
+from absl import app
+from absl import flags
+import numpy as np
+import tensorflow as tf
+
+from tensorflow_gnn.experimental.sampler import ext_ops
+
+_OPS = flags.DEFINE_list(
+    'ops',
+    ['ragged_choice', 'ragged_unique', 'ragged_lookup'],
+    'Operations to benchmark.',
+)
+_IMPLEMENTATIONS = flags.DEFINE_list(
+    'implementations',
+    ['vectorized', 'parallel', 'auto'],
+    'Implementations to benchmark.',
+)
+_NUM_ROWS = flags.DEFINE_list(
+    'num_rows', ['1', '10', '100', '1000', '10000'], 'Numbers of rows.'
+)
+_ROW_LENGTHS = flags.DEFINE_list(
+    'row_lengths', ['1', '10', '100', '1000'], 'Lengths of rows.'
+)
+_MAX_SIZE = flags.DEFINE_integer(
+    'max_size', 1_000_000, 'Skips inputs with larger total number of values.'
+)
+_NUM_RUNS = flags.DEFINE_integer(
+    'num_runs', 10, 'Number of timed runs for each input.'
+)
+_OUTPUT = flags.DEFINE_string(
+    'output', None, 'Optional path to write results as CSV.'
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class BenchmarkResult:
+  """Median run time of an operation for the given input shape."""
+
+  op: str
+  implementation: str
+  num_rows: int
+  row_length: int
+  time_us: float
+
+
+def _create_op_fn(
+    op: str, num_rows: int, row_length: int
+) -> Callable[[], tf.RaggedTensor]:
+  """Returns function which runs `op` on random inputs of the given shape."""
+  rng = np.random.default_rng(42)
+  row_splits = tf.constant(
+      np.arange(num_rows + 1) * row_length, dtype=tf.int64
+  )
+  num_values = num_rows * row_length
+
+  def ragged(values) -> tf.RaggedTensor:
+    return tf.RaggedTensor.from_row_splits(values, row_splits, validate=False)
+
+  num_samples = tf.constant(10, tf.int64)
+  if op == 'ragged_choice':
+    fn = lambda: ext_ops.ragged_choice(  # pylint: disable=g-long-lambda
+        num_samples, row_splits, global_indices=True, seed=42
+    )
+  elif op == 'ragged_unique':
+    # About a half of values in each row are repeated.
+    values = ragged(rng.integers(0, max(1, row_length // 2), num_values))
+    fn = lambda: ext_ops.ragged_unique(values)
+  elif op == 'ragged_lookup':
+    vocabulary = ragged(
+        np.tile(rng.permutation(row_length), num_rows).astype(np.int64)
+    )
+    values = ragged(rng.integers(0, row_length, num_values))
+    fn = lambda: ext_ops.ragged_lookup(values, vocabulary)
+  elif op == 'ragged_weighted_choice':
+    weights = ragged(rng.uniform(size=num_values).astype(np.float32))
+    fn = lambda: ext_ops.ragged_weighted_choice(num_samples, weights, seed=42)
+  elif op == 'ragged_top_k':
+    values = ragged(rng.uniform(size=num_values).astype(np.float32))
+    fn = lambda: ext_ops.ragged_top_k(values, num_samples)
+  else:
+    raise ValueError(f'Unsupported operation {op}')
+  return tf.function(fn)
+
+
+def run_benchmarks(
+    ops: Iterable[str],
+    implementations: Iterable[str],
+    num_rows: Iterable[int],
+    row_lengths: Iterable[int],
+    *,
+    max_size: int = 1_000_000,
+    num_runs: int = 10,
+) -> List[BenchmarkResult]:
+  """Runs benchmarks for all combinations of arguments.
+
+  Args:
+    ops: The names of `ext_ops` operations.
+    implementations: The names of `ext_ops` implementations.
+    num_rows: The numbers of ragged rows.
+    row_lengths: The lengths of ragged rows.
+    max_size: Skips inputs with total number of values larger than this.
+    num_runs: The number of timed runs for each input.
+
+  Returns:
+    Median run times for all combinations of arguments.
+  """
+  results = []
+  for op in ops:
+    for rows in num_rows:
+      for length in row_lengths:
+        if rows * length > max_size:
+          continue
+        for implementation in implementations:
+          ext_ops.set_ops_implementation(implementation)
+          with tf.device('/CPU:0'):
+            fn = _create_op_fn(op, rows, length)
+            # Traces and warms up the function.
+            fn()
+            times = timeit.repeat(fn, number=1, repeat=num_runs)
+          results.append(
+              BenchmarkResult(
+                  op=op,
+                  implementation=implementation,
+                  num_rows=rows,
+                  row_length=length,
+                  time_us=float(np.median(times) * 1e6),
+              )
+          )
+  ext_ops.set_ops_implementation('vectorized')
+  return results
+
+
+def _print_results(results: List[BenchmarkResult]) -> None:
+  by_shape = {}
+  for r in results:
+    by_shape.setdefault((r.op, r.num_rows, r.row_length), []).append(r)
+  print(f'{"op":<24}{"rows":>8}{"length":>8}  times, us')
+  for (op, rows, length), shape_results in by_shape.items():
+    fastest = min(shape_results, key=lambda r: r.time_us)
+    times = ', '.join(
+        f'{r.implementation}={r.time_us:.0f}' for r in shape_results
+    )
+    print(f'{op:<24}{rows:>8}{length:>8}  {times} -> {fastest.implementation}')
+
+
+def main(argv):
+  del argv
+  tf.config.threading.set_inter_op_parallelism_threads(1)
+  results = run_benchmarks(
+      _OPS.value,
+      _IMPLEMENTATIONS.value,
+      [int(v) for v in _NUM_ROWS.value],
+      [int(v) for v in _ROW_LENGTHS.value],
+      max_size=_MAX_SIZE.value,
+      num_runs=_NUM_RUNS.value,
+  )
+  _print_results(results)
+  if _OUTPUT.value:
+    with tf.io.gfile.GFile(_OUTPUT.value, 'w') as f:
+      writer = csv.writer(f)
+      writer.writerow([f.name for f in dataclasses.fields(BenchmarkResult)])
+      for r in results:
+        writer.writerow(dataclasses.astuple(r))
+  sys.stdout.flush()
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -51,6 +51,73 @@ def ragged_choice(
   return result
 
 
+def ragged_weighted_choice(
+    num_samples: tf.Tensor,
+    weights: tf.RaggedTensor,
+    *,
+    global_indices: bool,
+    seed: Optional[int],
+) -> tf.RaggedTensor:
+  """Implements `ext_ops.py:ragged_weighted_choice()`."""
+
+  def fn(inputs: Tuple[tf.Tensor, tf.Tensor]) -> tf.Tensor:
+    row_weights, num_samples = inputs
+    noise = 1.0 - tf.random.uniform(
+        tf.shape(row_weights), dtype=row_weights.dtype, seed=seed
+    )
+    is_valid = row_weights > 0
+    keys = tf.where(
+        is_valid,
+        tf.math.log(noise) / tf.where(is_valid, row_weights, 1.0),
+        float('-inf'),
+    )
+    num_valid = tf.math.count_nonzero(is_valid, dtype=num_samples.dtype)
+    return _top_k(keys, tf.math.minimum(num_samples, num_valid))
+
+  return _map_rows(fn, num_samples, weights, global_indices=global_indices)
+
+
+def ragged_top_k(
+    values: tf.RaggedTensor,
+    k: tf.Tensor,
+    *,
+    global_indices: bool,
+) -> tf.RaggedTensor:
+  """Implements `ext_ops.py:ragged_top_k()`."""
+
+  def fn(inputs: Tuple[tf.Tensor, tf.Tensor]) -> tf.Tensor:
+    row_values, k = inputs
+    return _top_k(row_values, k)
+
+  return _map_rows(fn, k, values, global_indices=global_indices)
+
+
+def _top_k(values: tf.Tensor, k: tf.Tensor) -> tf.Tensor:
+  k = tf.math.minimum(tf.cast(k, tf.int32), tf.size(values))
+  return tf.math.top_k(values, k=k).indices
+
+
+def _map_rows(
+    fn, k: tf.Tensor, values: tf.RaggedTensor, *, global_indices: bool
+) -> tf.RaggedTensor:
+  """Maps `fn` over rows of `values` with per-row `k` to ragged indices."""
+  dtype = values.row_splits.dtype
+  k = tf.broadcast_to(tf.cast(k, dtype), [values.nrows()])
+  result = tf.map_fn(
+      lambda inputs: tf.cast(fn(inputs), dtype),
+      (values, k),
+      fn_output_signature=tf.RaggedTensorSpec(
+          [None],
+          dtype=dtype,
+          ragged_rank=0,
+          row_splits_dtype=dtype,
+      ),
+  )
+  if global_indices:
+    result += tf.expand_dims(values.row_starts(), axis=-1)
+  return result
+
+
 def ragged_unique(ragged: tf.RaggedTensor) -> tf.RaggedTensor:
   """Implements `ext_ops.py:ragged_unique()`."""
 
@@ -16,6 +16,7 @@ from absl.testing import parameterized
 import tensorflow as tf
 
 from tensorflow_gnn.experimental.sampler import ext_ops as ops
+from tensorflow_gnn.experimental.sampler import ext_ops_auto
 
 
 rt = tf.ragged.constant
@@ -91,12 +92,86 @@ class ParallelRaggedChoiceTest(RaggedChoiceTest):
   IMPLEMENTATION = 'parallel'
 
 
+class AutoRaggedChoiceTest(RaggedChoiceTest):
+  IMPLEMENTATION = 'auto'
+
+
 # copybara:uncomment_begin (test for internal implementation of ext_ops)
 # class CustomRaggedChoiceTest(RaggedChoiceTest):
 #   IMPLEMENTATION = 'custom'
 # copybara:uncomment_end
 
 
+class RaggedWeightedChoiceTest(ExtOpsTestBase, parameterized.TestCase):
+
+  @parameterized.parameters([True, False])
+  def testIndices(self, global_indices: bool):
+    weights = rt([[1.0, 0.0, 2.0], [], [0.0], [3.0, 1.0, 1.0, 1.0]])
+    offsets = [0, 3, 3, 4] if global_indices else [0, 0, 0, 0]
+    for _ in range(20):
+      choice = ops.ragged_weighted_choice(
+          [2, 2, 2, 3], weights, global_indices=global_indices, seed=42
+      )
+      self.assertAllEqual(choice.row_lengths(), [2, 0, 0, 3])
+      self.assertSetEqual(set(choice[0, :].numpy()), {offsets[0] + 0, 2})
+      row = choice[3, :].numpy() - offsets[3]
+      self.assertLen(set(row), 3)
+      self.assertContainsSubset(row, range(4))
+
+  def testProbabilities(self):
+    weights = rt([[1.0, 2.0, 7.0]])
+    counts = [0] * 3
+    for _ in range(1000):
+      counts[ops.ragged_weighted_choice([1], weights)[0, 0].numpy()] += 1
+    self.assertAllClose(
+        [c / 1000.0 for c in counts], [0.1, 0.2, 0.7], atol=0.06
+    )
+
+  def testIntegerWeights(self):
+    choice = ops.ragged_weighted_choice(5, rt([[0, 3, 0, 1]]))
+    self.assertSetEqual(set(choice[0, :].numpy()), {1, 3})
+
+
+class ParallelRaggedWeightedChoiceTest(RaggedWeightedChoiceTest):
+  IMPLEMENTATION = 'parallel'
+
+
+class AutoRaggedWeightedChoiceTest(RaggedWeightedChoiceTest):
+  IMPLEMENTATION = 'auto'
+
+
+class RaggedTopKTest(ExtOpsTestBase, parameterized.TestCase):
+
+  @parameterized.named_parameters([
+      ('empty', rt([], tf.float32, 1), 2, rt([], tf.int64, 1)),
+      ('empty_rows', rt([[], []], tf.float32), 1, rt([[], []], tf.int64)),
+      (
+          'floats',
+          rt([[1.0, 3.0, 2.0], [5.0], [4.0, 4.0, 6.0]]),
+          2,
+          rt([[1, 2], [0], [2, 0]]),
+      ),
+      ('integers', rt([[1, 3, 2], [3, 3, 3]]), [3, 2], rt([[1, 2, 0], [0, 1]])),
+      ('zero', rt([[1.0, 2.0]]), 0, rt([[]], tf.int64)),
+  ])
+  def testImplementation(self, values, k, expected):
+    result = ops.ragged_top_k(values, k)
+    self.assertAllEqual(result, expected)
+    result = ops.ragged_top_k(values, k, global_indices=True)
+    self.assertAllEqual(
+        result,
+        tf.cast(expected, tf.int64) + tf.expand_dims(values.row_starts(), -1),
+    )
+
+
+class ParallelRaggedTopKTest(RaggedTopKTest):
+  IMPLEMENTATION = 'parallel'
+
+
+class AutoRaggedTopKTest(RaggedTopKTest):
+  IMPLEMENTATION = 'auto'
+
+
 class RaggedUniqueTest(ExtOpsTestBase, parameterized.TestCase):
 
   @parameterized.parameters(
@@ -167,6 +242,10 @@ class ParallelRaggedUniqueTest(RaggedUniqueTest):
   IMPLEMENTATION = 'parallel'
 
 
+class AutoRaggedUniqueTest(RaggedUniqueTest):
+  IMPLEMENTATION = 'auto'
+
+
 # copybara:uncomment_begin (test for internal implementation of ext_ops)
 # class CustomRaggedUniqueTest(RaggedUniqueTest):
 #   IMPLEMENTATION = 'custom'
@@ -321,10 +400,53 @@ class ParallelRaggedLookupTest(RaggedLookupTest):
   IMPLEMENTATION = 'parallel'
 
 
+class AutoRaggedLookupTest(RaggedLookupTest):
+  IMPLEMENTATION = 'auto'
+
+
 # copybara:uncomment_begin (test for internal implementation of ext_ops)
 # class CustomRaggedLookupTest(RaggedLookupTest):
 #   IMPLEMENTATION = 'custom'
 # copybara:uncomment_end
 
+
+class AutoImplementationTest(tf.test.TestCase, parameterized.TestCase):
+
+  @parameterized.parameters(
+      (0, 0, False),
+      (1, 1, False),
+      (10_000, 1_000_000, False),
+      (1, 1_000, True),
+      (100, 100_000, True),
+  )
+  def testUseParallel(self, num_rows, num_values, expected):
+    result = ext_ops_auto.use_parallel('ragged_unique', num_rows, num_values)
+    self.assertIsInstance(result, bool)
+    self.assertEqual(result, expected)
+
+  @parameterized.parameters(1, 10, 1_000)
+  def testDynamicShapes(self, row_length):
+    ops.set_ops_implementation('auto')
+    self.addCleanup(ops.set_ops_implementation, 'vectorized')
+
+    @tf.function(
+        input_signature=[
+            tf.RaggedTensorSpec([None, None], tf.int64, ragged_rank=1)
+        ]
+    )
+    def unique(values):
+      return ops.ragged_unique(values)
+
+    row = tf.range(row_length, dtype=tf.int64) // 2
+    values = tf.RaggedTensor.from_uniform_row_length(
+        tf.tile(row, [2]), row_length
+    )
+    expected = tf.RaggedTensor.from_uniform_row_length(
+        tf.tile(tf.range((row_length + 1) // 2, dtype=tf.int64), [2]),
+        (row_length + 1) // 2,
+    )
+    self.assertAllEqual(unique(values), expected)
+
+
 if __name__ == '__main__':
   tf.test.main()
@@ -45,6 +45,78 @@ def ragged_choice(
   return result
 
 
+def ragged_weighted_choice(
+    num_samples: tf.Tensor,
+    weights: tf.RaggedTensor,
+    *,
+    global_indices: bool,
+    seed: Optional[int],
+) -> tf.RaggedTensor:
+  """Implements `ext_ops.py:ragged_weighted_choice()`."""
+  flat_weights = weights.values
+  # `1 - u` is in (0, 1], so all keys of elements with positive weights are
+  # finite.
+  noise = 1.0 - tf.random.uniform(
+      tf.shape(flat_weights), dtype=flat_weights.dtype, seed=seed
+  )
+  is_valid = flat_weights > 0
+  keys = tf.where(
+      is_valid,
+      tf.math.log(noise) / tf.where(is_valid, flat_weights, 1.0),
+      float('-inf'),
+  )
+  num_valid = tf.math.unsorted_segment_sum(
+      tf.cast(is_valid, weights.row_splits.dtype),
+      weights.value_rowids(),
+      weights.nrows(),
+  )
+  num_samples = tf.math.minimum(
+      tf.cast(num_samples, weights.row_splits.dtype), num_valid
+  )
+  return _ragged_top_k(
+      keys, weights.row_splits, num_samples, global_indices=global_indices
+  )
+
+
+def ragged_top_k(
+    values: tf.RaggedTensor,
+    k: tf.Tensor,
+    *,
+    global_indices: bool,
+) -> tf.RaggedTensor:
+  """Implements `ext_ops.py:ragged_top_k()`."""
+  return _ragged_top_k(
+      values.values, values.row_splits, k, global_indices=global_indices
+  )
+
+
+def _ragged_top_k(
+    flat_values: tf.Tensor,
+    row_splits: tf.Tensor,
+    k: tf.Tensor,
+    *,
+    global_indices: bool,
+) -> tf.RaggedTensor:
+  """Selects up to `k` largest values in each row using two stable sorts."""
+  row_starts, row_limits = row_splits[:-1], row_splits[1:]
+  row_lengths = row_limits - row_starts
+  k = tf.math.minimum(tf.cast(k, row_splits.dtype), row_lengths)
+
+  # Sort all values in descending order and then stable sort them by their row
+  # ids, so values are grouped by rows and are in descending order within rows.
+  row_ids = tf.ragged.row_splits_to_segment_ids(row_splits)
+  order = tf.argsort(flat_values, direction='DESCENDING', stable=True)
+  order = tf.gather(
+      order, tf.argsort(tf.gather(row_ids, order), stable=True)
+  )
+  order = tf.cast(order, row_splits.dtype)
+  subranges = tf.ragged.range(row_starts, row_starts + k)
+  result = tf.gather(order, subranges)
+  if not global_indices:
+    result -= tf.expand_dims(row_starts, axis=-1)
+  return result
+
+
 def ragged_unique(ragged: tf.RaggedTensor) -> tf.RaggedTensor:
   """Implements `ext_ops.py:ragged_unique()`."""
   global_vocabulary, row_ids, row_ids_base = _index_rows(ragged)
@@ -0,0 +1,114 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Benchmarks `GraphTensorBuilder` modes on synthetic multi-hop subgraphs.
+
+Generates a batch of subgraphs as sampled by a multi-hop neighborhood sampler
+with the given fanouts: for each hop, the edge set "nodes,hop{i},nodes" has
+`fanout` edges for each target of the previous hop. Node ids are drawn from
+`--num_nodes` nodes, so sampled subgraphs contain duplicate ids. The seed
+nodes set is explicit, all other nodes are latent and are collected from edge
+endpoints, as in the sampling programs. Runs `GraphTensorBuilder` for each
+combination of `fused` and `validate` as a `tf.function` and prints median run
+times in milliseconds.
+
+```
+python -m tensorflow_gnn.experimental.sampler.graph_tensor_builder_benchmark \
+  --batch_size=128 --fanouts=10,10,10
+```
+"""
+
+import sys
+import timeit
+from typing import Dict, List
+
+from absl import app
+from absl import flags
+import numpy as np
+import tensorflow as tf
+
+from tensorflow_gnn.experimental.sampler import core
+
+_BATCH_SIZE = flags.DEFINE_integer(
+    'batch_size', 128, 'Number of subgraphs in a batch.'
+)
+_NUM_SEEDS = flags.DEFINE_integer(
+    'num_seeds', 1, 'Number of seed nodes in each subgraph.'
+)
+_FANOUTS = flags.DEFINE_list(
+    'fanouts', ['10', '10', '10'], 'Number of sampled edges for each hop.'
+)
+_NUM_NODES = flags.DEFINE_integer(
+    'num_nodes', 100_000, 'Number of nodes in the sampled graph.'
+)
+_NUM_RUNS = flags.DEFINE_integer(
+    'num_runs', 10, 'Number of timed runs for each mode.'
+)
+
+
+def create_pieces(
+    batch_size: int,
+    num_seeds: int,
+    fanouts: List[int],
+    num_nodes: int,
+    seed: int = 42,
+) -> Dict[str, Dict[str, Dict[str, tf.RaggedTensor]]]:
+  """Returns `GraphTensorBuilder` inputs for random multi-hop subgraphs."""
+  rng = np.random.default_rng(seed)
+
+  def ragged(values: np.ndarray) -> tf.RaggedTensor:
+    return tf.RaggedTensor.from_tensor(tf.constant(values, tf.int64))
+
+  targets = np.stack(
+      [
+          rng.choice(num_nodes, num_seeds, replace=False)
+          for _ in range(batch_size)
+      ]
+  )
+  node_sets = {'seeds': {core.NODE_ID_NAME: ragged(targets)}}
+  edge_sets = {}
+  source_node_set = 'seeds'
+  for hop, fanout in enumerate(fanouts):
+    sources = np.repeat(targets, fanout, axis=1)
+    targets = rng.integers(0, num_nodes, sources.shape)
+    edge_sets[f'{source_node_set},hop{hop},nodes'] = {
+        '#source': ragged(sources),
+        '#target': ragged(targets),
+    }
+    source_node_set = 'nodes'
+  return dict(node_sets=node_sets, edge_sets=edge_sets)
+
+
+def main(argv):
+  del argv
+  pieces = create_pieces(
+      _BATCH_SIZE.value,
+      _NUM_SEEDS.value,
+      [int(v) for v in _FANOUTS.value],
+      _NUM_NODES.value,
+  )
+  print(f'{"fused":<8}{"validate":<10}time, ms')
+  for fused in (False, True):
+    for validate in (True, False):
+      builder = core.GraphTensorBuilder(validate=validate, fused=fused)
+      fn = tf.function(lambda b=builder: b({}, **pieces))
+      # Traces and warms up the function.
+      fn()
+      times = timeit.repeat(fn, number=1, repeat=_NUM_RUNS.value)
+      print(f'{fused!s:<8}{validate!s:<10}{np.median(times) * 1e3:.1f}')
+  sys.stdout.flush()
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -42,7 +42,7 @@ for dense inputs in the future.
 """
 
 import abc
-from typing import Mapping
+from typing import Mapping, Optional
 
 import tensorflow as tf
 
@@ -134,6 +134,40 @@ class KeyToFeaturesAccessor(AccessorBase):
     raise NotImplementedError
 
 
+class OutgoingEdgesAccessor(KeyToFeaturesAccessor):
+  """Accessor for outgoing edges of source nodes that supports sampling.
+
+  Allows to push down uniform sampling of edges into the storage backend, so
+  that only the sampled edges are returned instead of all outgoing edges. This
+  reduces the cost of visiting a source node from O(out-degree) to
+  O(sample_size), e.g. for `UniformEdgesSampler`.
+  """
+
+  @abc.abstractmethod
+  def call(
+      self,
+      keys: tf.RaggedTensor,
+      *,
+      sample_size: Optional[int] = None,
+      seed: Optional[int] = None,
+  ) -> Features:
+    """Looks up outgoing edges for the given source node ids.
+
+    Args:
+      keys: source node ids. Ragged tensor with shape `[batch_size,
+        (num_keys)]`, and tf.int32, tf.int64 or tf.string type.
+      sample_size: If set, returns up to `sample_size` outgoing edges of each
+        source node, sampled uniformly at random without replacement. If not
+        set, returns all outgoing edges.
+      seed: A Python integer. Used to create a random seed for sampling.
+
+    Returns:
+      dictionary of edge features with shape [batch_size, (num_keys),
+      (num_edges), *inner_dims], and fixed set of dictionary keys.
+    """
+    raise NotImplementedError
+
+
 class OutgoingEdgesSampler(SamplingPrimitive):
   """Samples outgoing edges for given source nodes.
 
@@ -0,0 +1,641 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""In-process executor for sampling programs.
+
+Allows to run sampling `Program` (as created by `sampler.create_program()`) on
+a single machine without Apache Beam, e.g. for medium-sized graphs or as a local
+stand-in for the Beam executor in tests. Examples are split into batches of
+fixed size. The EvalDAG stages for each batch are scheduled on a thread pool as
+soon as all their inputs are ready, so that independent stages run concurrently
+and multiple batches are processed in a pipelined fashion. Results are returned
+in the order of input examples.
+
+The values use the same representation as for the Beam executor (see
+`sampler/beam/executor_lib.py`): each example value is a list of
+`numpy.ndarray`s with flattened tensor or composite tensor components. The
+`TFModel` stages are called once per batch, on the values of all its examples
+concatenated along their outermost dimension.
+
+The external data sources (feeds) are in-memory mappings: from unique keys to
+serialized values for key-to-bytes accessors and from source node ids to
+sequences of target node ids for edge samplers.
+"""
+
+import collections
+from concurrent import futures
+import functools
+import itertools
+import os
+import threading
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+
+from tensorflow_gnn.experimental.sampler import eval_dag_pb2 as pb
+from tensorflow_gnn.experimental.sampler import executor_utils
+from tensorflow_gnn.experimental.sampler import tf_example_encoder
+
+# Global unique identifier of a particular example.
+ExampleId = bytes
+# Tensor or flattened composite tensor.
+Value = List[np.ndarray]
+# Collection of values belonging to particular example.
+Values = List[Value]
+# Values of all examples in a batch, in the order of examples.
+BatchValues = List[Values]
+
+Key = Union[int, bytes]
+# Unique keys to serialized values.
+KeyToBytesFeed = Mapping[Key, bytes]
+# Source node ids to target node ids of their outgoing edges.
+EdgesFeed = Mapping[Key, Sequence[Key]]
+# Supported external data sources types.
+Feed = Union[KeyToBytesFeed, EdgesFeed]
+
+# Computes stage results for a batch of examples.
+StageFn = Callable[[BatchValues], BatchValues]
+# Creates stage function for a primitive stage. Input arguments are layer, all
+# feeds and path to serialized artifacts (e.g. saved TF Model for `TFModel`
+# stages).
+StageFnFactory = Callable[[pb.Layer, Mapping[str, Feed], str], StageFn]
+
+
+class Executor:
+  """Runs sampling program in-process using a thread pool.
+
+  Example:
+
+  ```python
+  program, artifacts = sampler.create_program(sampling_model)
+  for name, model in artifacts.models.items():
+    sampler.save_model(model, os.path.join(artifacts_path, name))
+
+  executor = Executor(
+      program, feeds={'cites': edges}, artifacts_path=artifacts_path
+  )
+  inputs = [
+      (b'seed1', {'seeds': [[np.array([b'a']), np.array([1])]]}),
+      (b'seed2', {'seeds': [[np.array([b'b']), np.array([1])]]}),
+  ]
+  for example_id, example in executor.execute(inputs):
+    ...
+  ```
+  """
+
+  def __init__(
+      self,
+      program: pb.Program,
+      *,
+      feeds: Optional[Mapping[str, Feed]] = None,
+      artifacts_path: str = '',
+      batch_size: int = 100,
+      num_threads: Optional[int] = None,
+      max_batches_in_flight: Optional[int] = None,
+  ):
+    """Constructor.
+
+    Args:
+      program: The sampling program, e.g. sampling Keras model converted by the
+        `sampler.create_program()` function.
+      feeds: A mapping from feed name to feed values, e.g. serialized features
+        keyed by unique node ids.
+      artifacts_path: The path to file system directory containing
+        subdirectories named after layers with artifacts (e.g. saved TF model).
+      batch_size: The maximum number of examples in each batch.
+      num_threads: The number of worker threads. Defaults to the number of CPUs.
+      max_batches_in_flight: The maximum number of batches processed
+        concurrently. Defaults to twice the number of threads.
+    """
+    if batch_size <= 0:
+      raise ValueError(f'batch_size must be positive, got {batch_size}')
+    sink = program.layers.get('sink', None)
+    if sink is None:
+      raise ValueError('Sampling program must define `sink` layer.')
+
+    self._program = program
+    self._layers = dict(program.layers)
+    self._encoder = tf_example_encoder.TFExampleEncoder(
+        _get_sink_feature_names(sink)
+    )
+    self._batch_size = batch_size
+    self._num_threads = num_threads or os.cpu_count() or 1
+    self._max_batches_in_flight = max_batches_in_flight or (
+        2 * self._num_threads
+    )
+    self._input_names = [
+        self._layers[stage.layer_id].id
+        for stage in program.eval_dag.stages
+        if self._layers[stage.layer_id].type == 'InputLayer'
+    ]
+    self._stage_fns = {}
+    self._create_stage_fns(program.eval_dag, dict(feeds or {}), artifacts_path)
+
+  def execute(
+      self, inputs: Iterable[Tuple[ExampleId, Mapping[str, Values]]]
+  ) -> Iterator[Tuple[ExampleId, tf.train.Example]]:
+    """Executes sampling program for the given inputs.
+
+    Args:
+      inputs: Examples as pairs of unique example id and a mapping from input
+        layer name to input values.
+
+    Yields:
+      Pairs of example id and its execution results as TF Example message, in
+      the order of input examples.
+    """
+    for example_ids, serialized in self.execute_serialized(inputs):
+      for example_id, example in zip(example_ids, serialized):
+        yield example_id, tf.train.Example.FromString(example)
+
+  def execute_serialized(
+      self, inputs: Iterable[Tuple[ExampleId, Mapping[str, Values]]]
+  ) -> Iterator[Tuple[List[ExampleId], List[bytes]]]:
+    """Executes sampling program and returns serialized results.
+
+    Args:
+      inputs: Examples as pairs of unique example id and a mapping from input
+        layer name to input values.
+
+    Yields:
+      Pairs of example ids and their execution results as serialized TF Example
+      messages, one for each batch of input examples.
+    """
+    for example_ids, batch in self._execute_batches(inputs):
+      for example_id, values in zip(example_ids, batch):
+        _check_batch_size(example_id, values)
+      yield example_ids, self._encoder.encode_batch(batch)
+
+  def execute_to_graph_tensors(
+      self,
+      inputs: Iterable[Tuple[ExampleId, Mapping[str, Values]]],
+      graph_tensor_spec: tfgnn.GraphTensorSpec,
+  ) -> Iterator[Tuple[List[ExampleId], tfgnn.GraphTensor]]:
+    """Executes sampling program and parses results as graph tensors.
+
+    Args:
+      inputs: Examples as pairs of unique example id and a mapping from input
+        layer name to input values.
+      graph_tensor_spec: The spec of the sampled graph tensors (of rank 0) to
+        parse execution results with.
+
+    Yields:
+      Pairs of example ids and graph tensors of rank 1 with their results, one
+      for each batch of input examples.
+    """
+    for example_ids, serialized in self.execute_serialized(inputs):
+      yield example_ids, tfgnn.parse_example(
+          graph_tensor_spec, tf.constant(serialized)
+      )
+
+  def _execute_batches(
+      self, inputs: Iterable[Tuple[ExampleId, Mapping[str, Values]]]
+  ) -> Iterator[Tuple[List[ExampleId], BatchValues]]:
+    """Runs program on batches of inputs, yielding results in their order."""
+    pool = futures.ThreadPoolExecutor(self._num_threads)
+    scheduler = _Scheduler(pool, self._layers, self._stage_fns)
+    in_flight = collections.deque()
+    try:
+      for batch in _batched(iter(inputs), self._batch_size):
+        example_ids = [example_id for example_id, _ in batch]
+        batch_inputs = {
+            name: _done_future(_get_inputs(batch, name))
+            for name in self._input_names
+        }
+        in_flight.append(
+            (example_ids, scheduler.run(self._program.eval_dag, batch_inputs))
+        )
+        if len(in_flight) >= self._max_batches_in_flight:
+          example_ids, result = in_flight.popleft()
+          yield example_ids, result.result()
+      while in_flight:
+        example_ids, result = in_flight.popleft()
+        yield example_ids, result.result()
+    finally:
+      # Drops pending work if results are not consumed to the end. New
+      # submissions are rejected first, so the pending set can only shrink.
+      # NOTE: `shutdown(cancel_futures=True)` requires Python 3.9+.
+      pool.shutdown(wait=False)
+      scheduler.cancel_pending()
+      pool.shutdown(wait=True)
+
+  def _create_stage_fns(
+      self,
+      eval_dag: pb.EvalDAG,
+      feeds: Dict[str, Feed],
+      artifacts_path: str,
+  ) -> None:
+    """Creates stage functions for all primitive stages of `eval_dag`."""
+    for stage in eval_dag.stages:
+      layer = self._layers[stage.layer_id]
+      if layer.type in ('InputLayer', 'Sink') or layer.id in self._stage_fns:
+        continue
+      if _is_primitive_stage(layer):
+        factory = _REGISTERED_STAGE_FNS[layer.type]
+        self._stage_fns[layer.id] = factory(layer, feeds, artifacts_path)
+      elif _is_composite_stage(layer):
+        if not layer.HasField('input_names'):
+          raise ValueError('Composite layer must define `input_names`')
+        self._create_stage_fns(layer.eval_dag, feeds, artifacts_path)
+      else:
+        raise ValueError(f'Unsupported layer type {layer.type}')
+
+
+class _Scheduler:
+  """Schedules EvalDAG stages on a thread pool as their inputs become ready."""
+
+  def __init__(
+      self,
+      pool: futures.Executor,
+      layers: Dict[str, pb.Layer],
+      stage_fns: Dict[str, StageFn],
+  ):
+    self._pool = pool
+    self._layers = layers
+    self._stage_fns = stage_fns
+    self._pending = set()
+    self._pending_lock = threading.Lock()
+
+  def cancel_pending(self) -> None:
+    """Cancels all submitted stage functions that have not started yet."""
+    with self._pending_lock:
+      pending = list(self._pending)
+    for f in pending:
+      f.cancel()
+
+  def run(
+      self, eval_dag: pb.EvalDAG, inputs: Dict[str, futures.Future]
+  ) -> futures.Future:
+    """Schedules all stages of `eval_dag` and returns future of its results."""
+    results = []
+    outputs = {}
+    for stage in eval_dag.stages:
+      layer = self._layers[stage.layer_id]
+      if layer.type == 'InputLayer':
+        outputs[stage.id] = inputs[layer.id]
+      elif layer.type == 'Sink':
+        results.append(self._combine_inputs(stage, outputs))
+      elif _is_primitive_stage(layer):
+        outputs[stage.id] = self._then(
+            [self._combine_inputs(stage, outputs)], self._stage_fns[layer.id]
+        )
+      elif _is_composite_stage(layer):
+        substage_inputs = {}
+        for matcher, name in zip(
+            stage.input_matchers, layer.input_names.feature_names
+        ):
+          upstream = _get_upstream(stage, matcher.stage_id, outputs)
+          substage_inputs[name] = self._then(
+              [upstream],
+              functools.partial(_extract_input, index=matcher.output_index),
+          )
+        outputs[stage.id] = self.run(layer.eval_dag, substage_inputs)
+      else:
+        raise ValueError(f'Unsupported layer type {layer.type}')
+
+    if len(results) != 1:
+      raise ValueError('Eval DAG must contain exactly one `Sink` stage')
+    return results[0]
+
+  def _combine_inputs(
+      self, stage: pb.Stage, outputs: Dict[str, futures.Future]
+  ) -> futures.Future:
+    """Collects matching inputs for `stage` from upstream stages outputs."""
+    stage_ids = list(
+        dict.fromkeys(matcher.stage_id for matcher in stage.input_matchers)
+    )
+    upstream = [_get_upstream(stage, s, outputs) for s in stage_ids]
+
+    def combine(*upstream_results: BatchValues) -> BatchValues:
+      results = dict(zip(stage_ids, upstream_results))
+      batch_size = len(upstream_results[0])
+      return [
+          [
+              results[matcher.stage_id][index][matcher.output_index]
+              for matcher in stage.input_matchers
+          ]
+          for index in range(batch_size)
+      ]
+
+    return self._then(upstream, combine)
+
+  def _then(
+      self, inputs: Sequence[futures.Future], fn: Callable[..., Any]
+  ) -> futures.Future:
+    """Schedules `fn` on results of `inputs` once they are all done."""
+    result = futures.Future()
+    remaining = len(inputs)
+    lock = threading.Lock()
+
+    def run():
+      try:
+        result.set_result(fn(*[i.result() for i in inputs]))
+      except BaseException as e:  # pylint: disable=broad-exception-caught
+        result.set_exception(e)
+
+    def on_input_done(unused_future):
+      nonlocal remaining
+      with lock:
+        remaining -= 1
+        if remaining > 0:
+          return
+      if not result.set_running_or_notify_cancel():
+        return
+      for i in inputs:
+        if i.cancelled():
+          result.set_exception(futures.CancelledError())
+          return
+        if i.exception() is not None:
+          result.set_exception(i.exception())
+          return
+      try:
+        self._submit(run, result)
+      except RuntimeError as e:
+        # The pool is shut down.
+        result.set_exception(e)
+
+    for i in inputs:
+      i.add_done_callback(on_input_done)
+    return result
+
+  def _submit(self, fn: Callable[[], None], result: futures.Future) -> None:
+    """Submits `fn` that sets `result` to the pool, tracking it until done."""
+
+    def on_done(future: futures.Future):
+      with self._pending_lock:
+        self._pending.discard(future)
+      if future.cancelled():
+        result.set_exception(futures.CancelledError())
+
+    with self._pending_lock:
+      future = self._pool.submit(fn)
+      self._pending.add(future)
+    future.add_done_callback(on_done)
+
+
+class _TFModelStage:
+  """Executes saved TF Model on batches of examples."""
+
+  def __init__(self, model_path: str, layer: pb.Layer):
+    if not tf.io.gfile.exists(model_path):
+      raise ValueError(
+          f'Layer "{layer.id}" refers to a non-existent TF model path:'
+          f' {model_path}'
+      )
+    self._output_struct = []
+    for output in layer.outputs:
+      if output.HasField('tensor'):
+        self._output_struct.append([None])
+      elif output.HasField('ragged_tensor'):
+        self._output_struct.append(
+            [None] * (output.ragged_tensor.ragged_rank + 1)
+        )
+      elif output.HasField('flattened'):
+        self._output_struct.append([None] * len(output.flattened.components))
+      else:
+        raise NotImplementedError(f'Tensor type {output} is not supported')
+
+    self._supports_batching = executor_utils.supports_batching(layer)
+    self._model = tf.saved_model.load(model_path)
+    self._serving_fn = self._model.signatures[
+        tf.saved_model.DEFAULT_SERVING_SIGNATURE_DEF_KEY
+    ]
+
+  def __call__(self, batch: BatchValues) -> BatchValues:
+    if not self._supports_batching:
+      return [self._call_model(values) for values in batch]
+
+    inputs = []
+    for value_index, value in enumerate(batch[0]):
+      inputs.append([
+          np.concatenate(
+              [values[value_index][i] for values in batch], axis=0
+          )
+          for i in range(len(value))
+      ])
+    result_batch = self._call_model(inputs)
+
+    results = []
+    start = 0
+    for values in batch:
+      limit = start + executor_utils.get_outer_dim_size(values)
+      results.append(
+          [
+              executor_utils.ragged_slice(value, start, limit)
+              for value in result_batch
+          ]
+      )
+      start = limit
+    return results
+
+  def _call_model(self, values: Values) -> Values:
+    kwargs = {
+        ('argw' + (f'_{i}' if i > 0 else '')): tf.convert_to_tensor(v)
+        for i, v in enumerate(tf.nest.flatten(values))
+    }
+    outputs = self._serving_fn(**kwargs)
+    flat_outputs = [None] * len(outputs)
+    for k, v in outputs.items():
+      flat_outputs[int(k[len('output_') :])] = v.numpy()
+    return tf.nest.pack_sequence_as(self._output_struct, flat_outputs)
+
+
+def _tf_model_stage(
+    layer: pb.Layer, unused_feeds: Mapping[str, Feed], artifacts_path: str
+) -> StageFn:
+  return _TFModelStage(os.path.join(artifacts_path, layer.id), layer)
+
+
+def _key_to_bytes_accessor_stage(
+    layer: pb.Layer, feeds: Mapping[str, Feed], unused_artifacts_path: str
+) -> StageFn:
+  """Returns stage function for in-memory key to bytes accessors."""
+  config = pb.KeyToBytesAccessorConfig()
+  if not layer.config.Unpack(config):
+    raise ValueError(f'Expected KeyToBytesAccessorConfig for {layer.id}')
+  feed = executor_utils.get_feed(feeds, config.resource_name, layer)
+  default_value = (
+      config.default_value if config.HasField('default_value') else None
+  )
+  row_lengths_dtype = executor_utils.get_row_lengths_dtype(layer.outputs[0])
+
+  def lookup(key: Key) -> bytes:
+    value = feed.get(key, default_value)
+    if value is None:
+      raise ValueError(f'Missing value for key {key!r}')
+    return value
+
+  def fn(batch: BatchValues) -> BatchValues:
+    results = []
+    for values in batch:
+      keys = executor_utils.get_lookup_keys(values)
+      result = np.empty([keys.size], dtype=np.object_)
+      result[:] = [lookup(key) for key in keys.tolist()]
+      row_lengths = np.array([keys.size], dtype=row_lengths_dtype)
+      results.append([[result, row_lengths]])
+    return results
+
+  return fn
+
+
+def _uniform_edges_sampler_stage(
+    layer: pb.Layer, feeds: Mapping[str, Feed], unused_artifacts_path: str
+) -> StageFn:
+  """Returns stage function for uniform sampling of outgoing edges."""
+  config = pb.EdgeSamplingConfig()
+  if not layer.config.Unpack(config):
+    raise ValueError(f'Expected EdgeSamplingConfig for {layer.id}')
+  edge_feature_names = list(config.edge_feature_names.feature_names)
+  unsupported = set(edge_feature_names) - {
+      tfgnn.SOURCE_NAME,
+      tfgnn.TARGET_NAME,
+  }
+  if unsupported:
+    raise ValueError(
+        f'Edge features {sorted(unsupported)} of the layer {layer.id} are not'
+        ' supported for sampling from edges feed'
+    )
+  feed = executor_utils.get_feed(feeds, config.edge_set_name, layer)
+  sample_size = config.sample_size
+  rng = np.random.default_rng(
+      config.seed if config.HasField('seed') else None
+  )
+  # NumPy random generators are not thread-safe.
+  rng_lock = threading.Lock()
+  dtypes = [
+      executor_utils.get_flat_values_dtype(spec) for spec in layer.outputs
+  ]
+  row_lengths_dtypes = [
+      executor_utils.get_row_lengths_dtype(spec) for spec in layer.outputs
+  ]
+
+  def sample(source: Key) -> np.ndarray:
+    targets = np.asarray(feed.get(source, ()))
+    if targets.size <= sample_size:
+      return targets
+    with rng_lock:
+      indices = rng.choice(targets.size, sample_size, replace=False)
+    return targets[np.sort(indices)]
+
+  def fn(batch: BatchValues) -> BatchValues:
+    results = []
+    for values in batch:
+      sources = executor_utils.get_lookup_keys(values)
+      targets = [sample(source) for source in sources.tolist()]
+      sizes = [t.size for t in targets]
+      features = {
+          tfgnn.SOURCE_NAME: np.repeat(sources, sizes),
+          tfgnn.TARGET_NAME: (
+              np.concatenate(targets) if any(sizes) else np.array([])
+          ),
+      }
+      num_edges = sum(sizes)
+      results.append([
+          [
+              features[name].astype(dtype),
+              np.array([num_edges], dtype=row_lengths_dtype),
+          ]
+          for name, dtype, row_lengths_dtype in zip(
+              edge_feature_names, dtypes, row_lengths_dtypes
+          )
+      ])
+    return results
+
+  return fn
+
+
+def _check_batch_size(example_id: ExampleId, values: Values) -> None:
+  batch_size = executor_utils.get_outer_dim_size(values)
+  if batch_size != 1:
+    raise ValueError(
+        f'Expected values of {example_id} to have batch size 1,'
+        f' got {batch_size}'
+    )
+
+
+def _get_sink_feature_names(sink: pb.Layer) -> List[str]:
+  for input_spec in sink.inputs:
+    if not (
+        input_spec.HasField('tensor') or input_spec.HasField('ragged_tensor')
+    ):
+      raise ValueError(
+          'Conversion to TF Example is only supported for dense or ragged'
+          f' tensors, got {sink}'
+      )
+  if not sink.HasField('config'):
+    raise ValueError('Sink layer must define config as `IOFeatures` message.')
+  io_config = pb.IOFeatures()
+  sink.config.Unpack(io_config)
+  return list(io_config.feature_names)
+
+
+def _batched(iterator: Iterator[Any], batch_size: int) -> Iterator[List[Any]]:
+  while True:
+    batch = list(itertools.islice(iterator, batch_size))
+    if not batch:
+      return
+    yield batch
+
+
+def _done_future(result: Any) -> futures.Future:
+  future = futures.Future()
+  future.set_result(result)
+  return future
+
+
+def _get_inputs(
+    batch: List[Tuple[ExampleId, Mapping[str, Values]]], name: str
+) -> BatchValues:
+  results = []
+  for example_id, inputs in batch:
+    values = inputs.get(name, None)
+    if values is None:
+      raise ValueError(f'Missing input {name} for {example_id}')
+    results.append(values)
+  return results
+
+
+def _get_upstream(
+    stage: pb.Stage, stage_id: str, outputs: Dict[str, futures.Future]
+) -> futures.Future:
+  result = outputs.get(stage_id, None)
+  if result is None:
+    raise ValueError(
+        f'Stage {stage.id} is disconnected: could not find matching input'
+        f' upstream stage {stage_id}.'
+    )
+  return result
+
+
+def _extract_input(batch: BatchValues, index: int) -> BatchValues:
+  return [[values[index]] for values in batch]
+
+
+def _is_composite_stage(layer: pb.Layer) -> bool:
+  return layer.HasField('eval_dag')
+
+
+def _is_primitive_stage(layer: pb.Layer) -> bool:
+  return layer.type in _REGISTERED_STAGE_FNS
+
+
+_REGISTERED_STAGE_FNS: Dict[str, StageFnFactory] = {
+    'TFModel': _tf_model_stage,
+    'InMemStringKeyToBytesAccessor': _key_to_bytes_accessor_stage,
+    'InMemIntegerKeyToBytesAccessor': _key_to_bytes_accessor_stage,
+    'UniformEdgesSampler': _uniform_edges_sampler_stage,
+}
@@ -0,0 +1,278 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for local executor_lib."""
+import os
+
+from absl.testing import parameterized
+import numpy as np
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+
+from tensorflow_gnn.experimental import sampler
+from tensorflow_gnn.experimental.sampler.local import executor_lib
+
+
+def _ragged_value(values, dtype=np.object_):
+  return [np.array(values, dtype), np.array([len(values)], np.int64)]
+
+
+def _ragged_input(name, dtype=tf.string):
+  return tf.keras.Input(
+      type_spec=tf.RaggedTensorSpec([None, None], dtype, ragged_rank=1),
+      name=name,
+  )
+
+
+class Identity(sampler.CompositeLayer):
+
+  def symbolic_call(self, inputs):
+    return inputs
+
+
+class ExecutorTest(tf.test.TestCase, parameterized.TestCase):
+
+  def _save_artifacts(self, artifacts) -> str:
+    temp_dir = self.get_temp_dir()
+    for name, model in artifacts.models.items():
+      sampler.save_model(model, os.path.join(temp_dir, name))
+    return temp_dir
+
+  @parameterized.product(batch_size=[1, 2, 100], num_threads=[1, 4])
+  def test_tf_model(self, batch_size, num_threads):
+    i = _ragged_input('input')
+    o1 = tf.strings.join(['x', i], separator='-')
+    o2 = tf.strings.join(['y', i], separator='-')
+    model = tf.keras.Model(inputs=i, outputs=tf.concat([o1, o2], axis=-1))
+    program, artifacts = sampler.create_program(model)
+    executor = executor_lib.Executor(
+        program,
+        artifacts_path=self._save_artifacts(artifacts),
+        batch_size=batch_size,
+        num_threads=num_threads,
+    )
+    inputs = [
+        (f's{i}'.encode(), {'input': [_ragged_value([b'a', b'b'][: i % 3])]})
+        for i in range(7)
+    ]
+    results = list(executor.execute(inputs))
+    self.assertEqual([example_id for example_id, _ in results],
+                     [example_id for example_id, _ in inputs])
+    for index, (_, example) in enumerate(results):
+      keys = [b'a', b'b'][: index % 3]
+      self.assertEqual(
+          example.features.feature['__output__'].bytes_list.value,
+          [b'x-' + k for k in keys] + [b'y-' + k for k in keys],
+      )
+
+    serialized = [
+        (example_id, example)
+        for example_ids, batch in executor.execute_serialized(inputs)
+        for example_id, example in zip(example_ids, batch)
+    ]
+    self.assertEqual(
+        [(k, tf.train.Example.FromString(v)) for k, v in serialized], results
+    )
+
+  def test_partially_consumed(self):
+    i = _ragged_input('input')
+    model = tf.keras.Model(inputs=i, outputs=tf.strings.join(['x', i]))
+    program, artifacts = sampler.create_program(model)
+    executor = executor_lib.Executor(
+        program,
+        artifacts_path=self._save_artifacts(artifacts),
+        batch_size=1,
+        num_threads=2,
+    )
+    inputs = [
+        (f's{i}'.encode(), {'input': [_ragged_value([b'a'])]})
+        for i in range(20)
+    ]
+    results = executor.execute(inputs)
+    example_id, _ = next(results)
+    self.assertEqual(example_id, b's0')
+    # Cancels pending work without waiting for it.
+    results.close()
+
+  def test_composite(self):
+    i1 = _ragged_input('i1', tf.int64)
+    i2 = _ragged_input('i2', tf.int64)
+    o1, o2 = Identity()([i1 * 2, i2])
+    model = tf.keras.Model(inputs=[i1, i2], outputs={'a': o1 + 1, 'b': o2})
+    program, artifacts = sampler.create_program(model)
+    executor = executor_lib.Executor(
+        program, artifacts_path=self._save_artifacts(artifacts), batch_size=2
+    )
+    inputs = [
+        (b's1', {'i1': [_ragged_value([1, 2], np.int64)],
+                 'i2': [_ragged_value([3], np.int64)]}),
+        (b's2', {'i1': [_ragged_value([], np.int64)],
+                 'i2': [_ragged_value([4, 5], np.int64)]}),
+        (b's3', {'i1': [_ragged_value([6], np.int64)],
+                 'i2': [_ragged_value([], np.int64)]}),
+    ]
+    results = dict(executor.execute(inputs))
+    expected = {b's1': ([3, 5], [3]), b's2': ([], [4, 5]), b's3': ([13], [])}
+    for example_id, (a, b) in expected.items():
+      features = results[example_id].features.feature
+      self.assertEqual(features['a'].int64_list.value, a)
+      self.assertEqual(features['b'].int64_list.value, b)
+
+  def test_in_mem_key_to_features_accessor(self):
+    accessor = sampler.InMemKeyToFeaturesAccessor(
+        keys=np.arange(10, 40, 10),
+        features={'f': [1.0, 2.0, 3.0], 'w': [['x'], [], ['y', 'z']]},
+        features_spec={
+            'f': tf.TensorSpec([], tf.float32),
+            'w': tf.TensorSpec([None], tf.string),
+        },
+        name='features',
+    )
+    keys = _ragged_input('keys', tf.int64)
+    program, artifacts = sampler.create_program(
+        tf.keras.Model(inputs=keys, outputs=accessor(keys))
+    )
+    executor = executor_lib.Executor(
+        program, artifacts_path=self._save_artifacts(artifacts), batch_size=2
+    )
+    results = dict(
+        executor.execute([
+            (b's1', {'keys': [_ragged_value([30, 10], np.int64)]}),
+            (b's2', {'keys': [_ragged_value([20, 99], np.int64)]}),
+        ])
+    )
+    features = results[b's1'].features.feature
+    self.assertAllClose(features['f'].float_list.value, [3.0, 1.0])
+    self.assertEqual(features['w'].bytes_list.value, [b'y', b'z', b'x'])
+    self.assertEqual(features['w.d1'].int64_list.value, [2, 1])
+    features = results[b's2'].features.feature
+    self.assertAllClose(features['f'].float_list.value, [2.0, 0.0])
+    self.assertEmpty(features['w'].bytes_list.value)
+    self.assertEqual(features['w.d1'].int64_list.value, [0, 0])
+
+  def test_feeds(self):
+    edges = sampler.KeyToTfExampleAccessor(
+        sampler.InMemStringKeyToBytesAccessor(
+            keys_to_values={'?': b''}, name='cites'
+        ),
+        features_spec={'neighbors': tf.TensorSpec([None], tf.string)},
+    )
+    names = sampler.InMemStringKeyToBytesAccessor(
+        keys_to_values={'?': b''}, name='names'
+    )
+    seeds = _ragged_input('seeds')
+    sampled = sampler.UniformEdgesSampler(
+        edges, sample_size=2, edge_target_feature_name='neighbors'
+    )(seeds)
+    model = tf.keras.Model(
+        inputs=seeds,
+        outputs={'edges': sampled, 'names': names(sampled['#target'])},
+    )
+    program, _ = sampler.create_program(model)
+    executor = executor_lib.Executor(
+        program,
+        feeds={
+            'cites': {b'a': [b'b', b'c', b'd'], b'b': [b'c']},
+            'names': {b'b': b'B', b'c': b'C', b'd': b'D'},
+        },
+        num_threads=2,
+    )
+    results = dict(
+        executor.execute([
+            (b's1', {'seeds': [_ragged_value([b'a', b'b'])]}),
+            (b's2', {'seeds': [_ragged_value([b'x'])]}),
+        ])
+    )
+
+    features = results[b's1'].features.feature
+    sources = features['edges/#source'].bytes_list.value
+    targets = features['edges/#target'].bytes_list.value
+    self.assertEqual(sources, [b'a', b'a', b'b'])
+    self.assertLen(set(targets[:2]), 2)
+    self.assertContainsSubset(targets[:2], [b'b', b'c', b'd'])
+    self.assertEqual(targets[2], b'c')
+    self.assertEqual(
+        features['names'].bytes_list.value, [t.upper() for t in targets]
+    )
+    features = results[b's2'].features.feature
+    self.assertEmpty(features['edges/#source'].bytes_list.value)
+    self.assertEmpty(features['names'].bytes_list.value)
+
+  def test_graph_tensors(self):
+    seeds = _ragged_input('seeds', tf.int64)
+    graph = tf.keras.layers.Lambda(
+        lambda ids: tfgnn.GraphTensor.from_pieces(
+            node_sets={
+                'nodes': tfgnn.NodeSet.from_fields(
+                    sizes=tf.expand_dims(ids.row_lengths(), -1),
+                    features={'id': ids},
+                )
+            }
+        )
+    )(seeds)
+    program, artifacts = sampler.create_program(
+        tf.keras.Model(inputs=seeds, outputs=graph)
+    )
+    executor = executor_lib.Executor(
+        program, artifacts_path=self._save_artifacts(artifacts), batch_size=2
+    )
+    spec = tfgnn.GraphTensorSpec.from_piece_specs(
+        node_sets_spec={
+            'nodes': tfgnn.NodeSetSpec.from_field_specs(
+                sizes_spec=tf.TensorSpec([1], tf.int64),
+                features_spec={'id': tf.TensorSpec([None], tf.int64)},
+            )
+        }
+    )
+    results = list(
+        executor.execute_to_graph_tensors(
+            [
+                (b's1', {'seeds': [_ragged_value([1, 2], np.int64)]}),
+                (b's2', {'seeds': [_ragged_value([3], np.int64)]}),
+                (b's3', {'seeds': [_ragged_value([4], np.int64)]}),
+            ],
+            spec,
+        )
+    )
+    self.assertEqual([ids for ids, _ in results], [[b's1', b's2'], [b's3']])
+    self.assertAllEqual(
+        results[0][1].node_sets['nodes']['id'],
+        tf.ragged.constant([[1, 2], [3]]),
+    )
+    self.assertAllEqual(
+        results[1][1].node_sets['nodes']['id'], tf.ragged.constant([[4]])
+    )
+
+  def test_errors(self):
+    names = sampler.InMemStringKeyToBytesAccessor(
+        keys_to_values={'?': b''}, name='names', default_value=None
+    )
+    keys = _ragged_input('keys')
+    program, _ = sampler.create_program(
+        tf.keras.Model(inputs=keys, outputs=names(keys))
+    )
+    with self.assertRaisesRegex(ValueError, 'Missing feed names'):
+      executor_lib.Executor(program)
+    with self.assertRaisesRegex(ValueError, 'batch_size'):
+      executor_lib.Executor(program, batch_size=0)
+
+    executor = executor_lib.Executor(program, feeds={'names': {b'a': b'A'}})
+    with self.assertRaisesRegex(ValueError, "Missing value for key b'x'"):
+      list(executor.execute([(b's1', {'keys': [_ragged_value([b'a', b'x'])]})]))
+    with self.assertRaisesRegex(ValueError, 'Missing input keys'):
+      list(executor.execute([(b's1', {})]))
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -0,0 +1,387 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Low-latency online sampling of subgraphs.
+
+The sampling models (e.g. built from `UniformEdgesSampler` and
+`KeyToTfExampleAccessor` layers) are designed to process large batches of
+examples. The `SamplingServer` adapts them to online inference, where each
+request samples a subgraph for a handful of seed nodes and must be served
+within milliseconds:
+
+  * the model is traced once per batch size bucket into a concrete function with
+    a fixed input shape, and warmed up before serving any requests;
+  * concurrent requests are grouped into micro-batches, padded with empty
+    examples to the closest bucket size;
+  * the sampled graph tensors are split into per-request graph tensors in the
+    same concrete function.
+
+Accessors stay resident in the process: either in-memory accessors, like
+`InMemStringKeyToBytesAccessor`, or `LocalStoreKeyToBytesAccessor` that reads
+from any local key-value store with a Python mapping interface.
+"""
+
+import dataclasses
+import queue
+import threading
+import time
+
+from concurrent import futures
+from typing import Any, Callable, List, Mapping, Optional, Sequence
+
+import numpy as np
+import tensorflow as tf
+import tensorflow_gnn as tfgnn
+
+from tensorflow_gnn.experimental.sampler import core
+from tensorflow_gnn.experimental.sampler import interfaces
+
+
+class LocalStoreKeyToBytesAccessor(
+    tf.keras.layers.Layer, interfaces.KeyToBytesAccessor
+):
+  """Looks up serialized values by their keys in a local key-value store.
+
+  The store is any Python mapping from keys (integers or bytes) to serialized
+  values, e.g. a `dict` or a wrapper of an embedded on-disk database, so that
+  the values do not have to be copied into the model. Lookups happen through
+  `tf.numpy_function`, so models using this accessor can not be exported as
+  sampling programs or saved models. They are intended for in-process serving
+  (see `SamplingServer`).
+  """
+
+  def __init__(
+      self,
+      store: Mapping[Any, bytes],
+      *,
+      resource_name: str,
+      default_value: Optional[bytes] = b'',
+      **kwargs,
+  ):
+    """Constructor.
+
+    Args:
+      store: A mapping from keys to serialized values.
+      resource_name: The name of the data source.
+      default_value: The value to use in place of missing values. If `None`, any
+        missing value results in an error.
+      **kwargs: Other arguments for the base class.
+    """
+    super().__init__(**kwargs)
+    self._store = store
+    self._resource_name = resource_name
+    self._default_value = default_value
+
+  @property
+  def resource_name(self) -> str:
+    return self._resource_name
+
+  @property
+  def default_value(self) -> Optional[bytes]:
+    return self._default_value
+
+  def call(self, keys: tf.RaggedTensor) -> tf.RaggedTensor:
+    core._check_ragged_rank1(keys, type(self).__name__)  # pylint: disable=protected-access
+    # The store is mutable, so lookups must not be constant-folded or merged.
+    values = tf.numpy_function(
+        self._lookup, [keys.flat_values], tf.string, stateful=True
+    )
+    values.set_shape(keys.flat_values.shape)
+    return keys.with_flat_values(values)
+
+  def _lookup(self, keys: np.ndarray) -> np.ndarray:
+    result = np.empty([keys.size], dtype=np.object_)
+    for index, key in enumerate(keys.tolist()):
+      value = self._store.get(key, self._default_value)
+      if value is None:
+        raise ValueError(f'Missing value for key {key!r}')
+      result[index] = value
+    return result
+
+
+class SamplingServer:
+  """Serves subgraph sampling requests with low latency.
+
+  The server runs a sampling model that takes seed node ids as a ragged tensor
+  of shape `[batch_size, (num_seeds)]` and returns sampled subgraphs as a
+  `GraphTensor` of rank 1. Each request provides the seed node ids of a single
+  example and receives its subgraph as a `GraphTensor` of rank 0. Requests are
+  thread-safe: concurrent requests are grouped into batches of up to
+  `max_batch_size` examples, waiting for at most `batch_timeout_ms` after the
+  first request of the batch.
+
+  Example:
+
+  ```python
+  server = SamplingServer(sampling_model, max_batch_size=16)
+  graph = server.sample([b'paper1', b'paper2'])
+  ...
+  server.close()
+  ```
+  """
+
+  def __init__(
+      self,
+      model: tf.keras.Model,
+      *,
+      max_batch_size: int = 16,
+      batch_timeout_ms: float = 1.0,
+      batch_sizes: Optional[Sequence[int]] = None,
+  ):
+    """Constructor.
+
+    Args:
+      model: The sampling model with a single ragged input of seed node ids and
+        a `GraphTensor` output.
+      max_batch_size: The maximum number of requests in a micro-batch.
+      batch_timeout_ms: The maximum time to wait for more requests after the
+        first request of a micro-batch.
+      batch_sizes: Sorted batch size buckets to trace the model for. Defaults to
+        powers of two up to `max_batch_size`. The largest bucket must be equal
+        to `max_batch_size`.
+    """
+    if max_batch_size <= 0:
+      raise ValueError(
+          f'max_batch_size must be positive, got {max_batch_size}'
+      )
+    if batch_sizes is None:
+      batch_sizes = [1]
+      while batch_sizes[-1] < max_batch_size:
+        batch_sizes.append(min(2 * batch_sizes[-1], max_batch_size))
+    batch_sizes = list(batch_sizes)
+    if batch_sizes != sorted(set(batch_sizes)) or batch_sizes[-1] != (
+        max_batch_size
+    ):
+      raise ValueError(
+          'batch_sizes must be sorted unique sizes up to max_batch_size,'
+          f' got {batch_sizes}'
+      )
+
+    input_spec = _get_input_spec(model)
+    output_spec = _get_output_spec(model)
+    self._seeds_dtype = input_spec.dtype
+    self._row_splits_dtype = input_spec.row_splits_dtype
+    self._graph_spec = output_spec._unbatch()  # pylint: disable=protected-access
+    self._max_batch_size = max_batch_size
+    self._batch_timeout = batch_timeout_ms / 1000.0
+    self._batch_sizes = batch_sizes
+
+    self._sample_fns = {}
+    for batch_size in batch_sizes:
+      self._sample_fns[batch_size] = _make_sample_fn(
+          model, input_spec, output_spec, batch_size
+      )
+    # Runs each concrete function once, so that the first requests do not pay
+    # for the lazy initialization of the model resources.
+    for batch_size in batch_sizes:
+      self._run_batch(batch_size, [])
+
+    self._requests = queue.SimpleQueue()
+    self._closed = False
+    self._lock = threading.Lock()
+    self._thread = threading.Thread(target=self._serve, daemon=True)
+    self._thread.start()
+
+  def sample(self, seeds: Sequence[Any]) -> tfgnn.GraphTensor:
+    """Samples subgraph for `seeds`, as `GraphTensor` of rank 0."""
+    return self.sample_async(seeds).result()
+
+  def sample_async(self, seeds: Sequence[Any]) -> futures.Future:
+    """Schedules sampling for `seeds` and returns future `GraphTensor`."""
+    seeds = np.asarray(seeds, dtype=self._seeds_dtype.as_numpy_dtype)
+    if seeds.ndim != 1:
+      raise ValueError(f'Expected seeds of rank 1, got shape {seeds.shape}')
+    result = futures.Future()
+    with self._lock:
+      if self._closed:
+        raise RuntimeError('SamplingServer is closed.')
+      self._requests.put((seeds, result))
+    return result
+
+  def close(self) -> None:
+    """Stops the server after serving all scheduled requests."""
+    with self._lock:
+      if self._closed:
+        return
+      self._closed = True
+      self._requests.put(None)
+    self._thread.join()
+
+  def __enter__(self) -> 'SamplingServer':
+    return self
+
+  def __exit__(self, *unused_exc_info) -> None:
+    self.close()
+
+  def _serve(self) -> None:
+    """Collects requests into micro-batches and runs them."""
+    stopped = False
+    while not stopped:
+      request = self._requests.get()
+      if request is None:
+        return
+      batch = [request]
+      deadline = time.monotonic() + self._batch_timeout
+      while len(batch) < self._max_batch_size:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+          break
+        try:
+          request = self._requests.get(timeout=timeout)
+        except queue.Empty:
+          break
+        if request is None:
+          stopped = True
+          break
+        batch.append(request)
+
+      batch = [(s, r) for s, r in batch if r.set_running_or_notify_cancel()]
+      if not batch:
+        continue
+      try:
+        bucket = next(b for b in self._batch_sizes if b >= len(batch))
+        graphs = self._run_batch(bucket, [seeds for seeds, _ in batch])
+      except Exception as e:  # pylint: disable=broad-exception-caught
+        for _, result in batch:
+          result.set_exception(e)
+        continue
+      for (_, result), graph in zip(batch, graphs):
+        result.set_result(graph)
+
+  def _run_batch(
+      self, batch_size: int, seeds: List[np.ndarray]
+  ) -> List[tfgnn.GraphTensor]:
+    """Runs model on `seeds` padded to `batch_size` with empty examples."""
+    row_lengths = np.zeros([batch_size], self._row_splits_dtype.as_numpy_dtype)
+    row_lengths[: len(seeds)] = [s.size for s in seeds]
+    flat_seeds = (
+        np.concatenate(seeds)
+        if seeds
+        else np.zeros([0], self._seeds_dtype.as_numpy_dtype)
+    )
+    outputs = self._sample_fns[batch_size](
+        tf.RaggedTensor.from_row_lengths(
+            flat_seeds, row_lengths, validate=False
+        )
+    )
+    # pylint: disable=protected-access
+    return [
+        self._graph_spec._from_compatible_tensor_list(tensors)
+        for tensors in outputs[: len(seeds)]
+    ]
+
+
+@dataclasses.dataclass
+class LatencyStats:
+  """Latency statistics of sampling requests, in milliseconds."""
+
+  p50: float
+  p99: float
+  mean: float
+  requests_per_second: float
+
+
+def measure_latency(
+    sample_fn: Callable[[Sequence[Any]], Any],
+    requests: Sequence[Sequence[Any]],
+    *,
+    num_clients: int = 1,
+) -> LatencyStats:
+  """Measures latency of `sample_fn` for `requests` from concurrent clients.
+
+  Args:
+    sample_fn: The function that samples subgraph for seed node ids, e.g.
+      `SamplingServer.sample`.
+    requests: Seed node ids of all requests.
+    num_clients: The number of client threads sending requests concurrently.
+      Each client sends its next request after receiving the previous result.
+
+  Returns:
+    Latency statistics over all requests.
+  """
+  latencies = np.zeros([len(requests)], np.float64)
+
+  def run_client(client_index):
+    for index in range(client_index, len(requests), num_clients):
+      start = time.perf_counter()
+      sample_fn(requests[index])
+      latencies[index] = time.perf_counter() - start
+
+  start = time.perf_counter()
+  with futures.ThreadPoolExecutor(num_clients) as pool:
+    for client in [pool.submit(run_client, i) for i in range(num_clients)]:
+      client.result()
+  total_time = time.perf_counter() - start
+
+  latencies *= 1000.0
+  return LatencyStats(
+      p50=float(np.percentile(latencies, 50)),
+      p99=float(np.percentile(latencies, 99)),
+      mean=float(np.mean(latencies)),
+      requests_per_second=len(requests) / total_time,
+  )
+
+
+def _get_input_spec(model: tf.keras.Model) -> tf.RaggedTensorSpec:
+  if len(model.inputs) != 1:
+    raise ValueError(
+        f'Expected sampling model with a single input, got {model.inputs}'
+    )
+  spec = model.inputs[0].type_spec
+  if not (
+      isinstance(spec, tf.RaggedTensorSpec)
+      and spec.shape.rank == 2
+      and spec.ragged_rank == 1
+  ):
+    raise ValueError(
+        'Expected sampling model input of seed node ids as a ragged tensor'
+        f' with shape `[batch_size, (num_seeds)]`, got {spec}'
+    )
+  return spec
+
+
+def _get_output_spec(model: tf.keras.Model) -> tfgnn.GraphTensorSpec:
+  spec = getattr(model.output, 'type_spec', None)
+  if not (isinstance(spec, tfgnn.GraphTensorSpec) and spec.rank == 1):
+    raise ValueError(
+        f'Expected sampling model output as GraphTensor of rank 1, got {spec}'
+    )
+  return spec
+
+
+def _make_sample_fn(
+    model: tf.keras.Model,
+    input_spec: tf.RaggedTensorSpec,
+    output_spec: tfgnn.GraphTensorSpec,
+    batch_size: int,
+) -> Callable[[tf.RaggedTensor], List[List[tf.Tensor]]]:
+  """Traces `model` for fixed `batch_size` and splits results by examples."""
+
+  @tf.function
+  def sample(seeds: tf.RaggedTensor) -> List[List[tf.Tensor]]:
+    graph = model(seeds)
+    # The batched tensor list encodes each graph tensor component as a stack
+    # of per-example components, as for `tf.data.Dataset.unbatch()`.
+    tensors = output_spec._to_batched_tensor_list(graph)  # pylint: disable=protected-access
+    per_example = [tf.unstack(t, num=batch_size) for t in tensors]
+    return [list(example) for example in zip(*per_example)]
+
+  return sample.get_concrete_function(
+      tf.RaggedTensorSpec(
+          [batch_size, None],
+          input_spec.dtype,
+          ragged_rank=1,
+          row_splits_dtype=input_spec.row_splits_dtype,
+      )
+  )
@@ -0,0 +1,125 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Benchmarks latency of online 2-hop sampling with `SamplingServer`.
+
+Samples subgraphs from a random graph with power-law node degrees, with
+concurrent clients each sending a request for a few random seed nodes, and
+prints p50/p99 latencies in milliseconds.
+
+```
+python -m tensorflow_gnn.experimental.sampler.serving_benchmark \
+  --num_nodes=100000 --num_clients=8 --max_batch_size=8
+```
+"""
+
+from absl import app
+from absl import flags
+import numpy as np
+import tensorflow as tf
+
+from tensorflow_gnn.experimental.sampler import core
+from tensorflow_gnn.experimental.sampler import serving
+
+_NUM_NODES = flags.DEFINE_integer('num_nodes', 10_000, 'Number of nodes.')
+_AVG_DEGREE = flags.DEFINE_integer('avg_degree', 10, 'Average out-degree.')
+_SAMPLE_SIZES = flags.DEFINE_list(
+    'sample_sizes', ['10', '5'], 'Number of sampled edges for each hop.'
+)
+_NUM_SEEDS = flags.DEFINE_integer('num_seeds', 4, 'Seed nodes per request.')
+_NUM_REQUESTS = flags.DEFINE_integer('num_requests', 2_000, 'Total requests.')
+_NUM_CLIENTS = flags.DEFINE_integer(
+    'num_clients', 8, 'Number of concurrent clients.'
+)
+_MAX_BATCH_SIZE = flags.DEFINE_integer(
+    'max_batch_size', 8, 'Maximum micro-batch size.'
+)
+_BATCH_TIMEOUT_MS = flags.DEFINE_float(
+    'batch_timeout_ms', 1.0, 'Micro-batching timeout.'
+)
+_USE_LOCAL_STORE = flags.DEFINE_bool(
+    'use_local_store',
+    False,
+    'Whether to read edges from `LocalStoreKeyToBytesAccessor`.',
+)
+
+
+def _make_model(rng: np.random.Generator) -> tf.keras.Model:
+  """Creates sampling model for a random graph."""
+  num_nodes = _NUM_NODES.value
+  degrees = rng.zipf(2.0, size=num_nodes)
+  degrees = np.minimum(
+      degrees * _AVG_DEGREE.value // max(1, int(np.mean(degrees))), num_nodes
+  )
+  values = {}
+  for node, degree in enumerate(degrees):
+    targets = rng.integers(0, num_nodes, size=degree)
+    values[node] = tf.train.Example(
+        features=tf.train.Features(
+            feature={
+                'targets': tf.train.Feature(
+                    int64_list=tf.train.Int64List(value=targets)
+                )
+            }
+        )
+    ).SerializeToString()
+
+  if _USE_LOCAL_STORE.value:
+    table = serving.LocalStoreKeyToBytesAccessor(values, resource_name='edges')
+  else:
+    table = core.InMemIntegerKeyToBytesAccessor(
+        keys_to_values=values, name='edges'
+    )
+  edges = core.KeyToTfExampleAccessor(
+      table, features_spec={'targets': tf.TensorSpec([None], tf.int64)}
+  )
+  seeds = tf.keras.Input(
+      type_spec=tf.RaggedTensorSpec([None, None], tf.int64, ragged_rank=1)
+  )
+  frontier = seeds
+  hops = []
+  for sample_size in _SAMPLE_SIZES.value:
+    sampler = core.UniformEdgesSampler(
+        edges, sample_size=int(sample_size), edge_target_feature_name='targets'
+    )
+    hops.append(sampler(frontier))
+    frontier = hops[-1]['#target']
+  graph = core.build_graph_tensor(edge_sets={'node,edge,node': hops})
+  return tf.keras.Model(seeds, graph)
+
+
+def main(argv):
+  del argv
+  rng = np.random.default_rng(42)
+  model = _make_model(rng)
+  requests = rng.integers(
+      0, _NUM_NODES.value, size=[_NUM_REQUESTS.value, _NUM_SEEDS.value]
+  )
+  requests = [np.unique(r) for r in requests]
+  with serving.SamplingServer(
+      model,
+      max_batch_size=_MAX_BATCH_SIZE.value,
+      batch_timeout_ms=_BATCH_TIMEOUT_MS.value,
+  ) as server:
+    stats = serving.measure_latency(
+        server.sample, requests, num_clients=_NUM_CLIENTS.value
+    )
+  print(
+      f'p50: {stats.p50:.2f}ms, p99: {stats.p99:.2f}ms, mean:'
+      f' {stats.mean:.2f}ms, {stats.requests_per_second:.1f} requests/s'
+  )
+
+
+if __name__ == '__main__':
+  app.run(main)
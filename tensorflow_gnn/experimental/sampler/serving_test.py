@@ -0,0 +1,151 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for serving."""
+
+from concurrent import futures
+
+from absl.testing import parameterized
+import tensorflow as tf
+
+from tensorflow_gnn.experimental.sampler import core
+from tensorflow_gnn.experimental.sampler import serving
+
+# Papers citing other papers: a -> {b, c}, b -> {c}, c -> {a, d}.
+_CITES = {b'a': [b'b', b'c'], b'b': [b'c'], b'c': [b'a', b'd']}
+
+
+def _serialize_neighbors(targets):
+  return tf.train.Example(
+      features=tf.train.Features(
+          feature={
+              'neighbors': tf.train.Feature(
+                  bytes_list=tf.train.BytesList(value=targets)
+              )
+          }
+      )
+  ).SerializeToString()
+
+
+def _make_sampling_model(use_local_store: bool) -> tf.keras.Model:
+  """Returns model sampling 2 hops of citations, at most 2 per paper."""
+  values = {k: _serialize_neighbors(v) for k, v in _CITES.items()}
+  if use_local_store:
+    table = serving.LocalStoreKeyToBytesAccessor(values, resource_name='cites')
+  else:
+    table = core.InMemStringKeyToBytesAccessor(
+        keys_to_values={k.decode(): v for k, v in values.items()}, name='cites'
+    )
+  edges = core.KeyToTfExampleAccessor(
+      table, features_spec={'neighbors': tf.TensorSpec([None], tf.string)}
+  )
+  sampler = core.UniformEdgesSampler(
+      edges, sample_size=2, edge_target_feature_name='neighbors'
+  )
+  seeds = tf.keras.Input(
+      type_spec=tf.RaggedTensorSpec([None, None], tf.string, ragged_rank=1)
+  )
+  hop1 = sampler(seeds)
+  hop2 = sampler(hop1['#target'])
+  graph = core.build_graph_tensor(
+      edge_sets={'paper,cites,paper': [hop1, hop2]}
+  )
+  return tf.keras.Model(seeds, graph)
+
+
+class SamplingServerTest(tf.test.TestCase, parameterized.TestCase):
+
+  def _check_graph(self, graph, seeds):
+    self.assertEqual(graph.rank, 0)
+    ids = graph.node_sets['paper']['#id'].numpy().tolist()
+    adjacency = graph.edge_sets['cites'].adjacency
+    for source, target in zip(adjacency.source.numpy(),
+                              adjacency.target.numpy()):
+      self.assertIn(ids[target], _CITES[ids[source]])
+    hop1_sources = [ids[s] for s in adjacency.source.numpy()]
+    self.assertContainsSubset([s for s in seeds if s in _CITES], hop1_sources)
+
+  @parameterized.named_parameters(
+      ('InMem', False), ('LocalStore', True)
+  )
+  def test_sample(self, use_local_store):
+    model = _make_sampling_model(use_local_store)
+    with serving.SamplingServer(model, max_batch_size=4) as server:
+      graph = server.sample([b'a'])
+      self._check_graph(graph, [b'a'])
+      # All 2-hop citations of `a`: a->b, a->c, b->c, c->a, c->d.
+      self.assertEqual(graph.edge_sets['cites'].sizes.numpy().tolist(), [5])
+      self._check_graph(server.sample([b'b', b'c']), [b'b', b'c'])
+      graph = server.sample([])
+      self.assertEqual(graph.node_sets['paper'].sizes.numpy().tolist(), [0])
+
+  def test_concurrent_requests(self):
+    model = _make_sampling_model(use_local_store=False)
+    requests = [[b'a'], [b'b'], [b'c', b'a'], [b'd'], [b'b', b'd']] * 4
+    with serving.SamplingServer(
+        model, max_batch_size=3, batch_timeout_ms=5.0
+    ) as server:
+      with futures.ThreadPoolExecutor(8) as pool:
+        graphs = list(pool.map(server.sample, requests))
+    for graph, seeds in zip(graphs, requests):
+      self._check_graph(graph, seeds)
+      expected = model(tf.ragged.constant([seeds], dtype=tf.string))
+      self.assertEqual(
+          graph.edge_sets['cites'].sizes.numpy().tolist(),
+          expected.edge_sets['cites'].sizes[0].numpy().tolist(),
+      )
+
+  def test_missing_key(self):
+    values = {b'a': _serialize_neighbors([b'b'])}
+    table = serving.LocalStoreKeyToBytesAccessor(
+        values, resource_name='cites', default_value=None
+    )
+    self.assertAllEqual(
+        table(tf.ragged.constant([[b'a'], []])),
+        tf.ragged.constant([[values[b'a']], []]),
+    )
+    with self.assertRaisesRegex(
+        (ValueError, tf.errors.InvalidArgumentError), 'Missing value'
+    ):
+      table(tf.ragged.constant([[b'a', b'x']]))
+
+  def test_measure_latency(self):
+    model = _make_sampling_model(use_local_store=False)
+    with serving.SamplingServer(model, max_batch_size=2) as server:
+      stats = serving.measure_latency(
+          server.sample, [[b'a'], [b'b']] * 5, num_clients=2
+      )
+    self.assertGreater(stats.p50, 0.0)
+    self.assertGreaterEqual(stats.p99, stats.p50)
+    self.assertGreater(stats.requests_per_second, 0.0)
+
+  def test_errors(self):
+    model = _make_sampling_model(use_local_store=False)
+    with self.assertRaisesRegex(ValueError, 'max_batch_size'):
+      serving.SamplingServer(model, max_batch_size=0)
+    with self.assertRaisesRegex(ValueError, 'batch_sizes'):
+      serving.SamplingServer(model, max_batch_size=4, batch_sizes=[1, 2])
+    with self.assertRaisesRegex(ValueError, 'GraphTensor'):
+      serving.SamplingServer(tf.keras.Model(model.input, model.input))
+
+    server = serving.SamplingServer(model, max_batch_size=1)
+    with self.assertRaisesRegex(ValueError, 'rank 1'):
+      server.sample([[b'a']])
+    server.close()
+    with self.assertRaisesRegex(RuntimeError, 'closed'):
+      server.sample([b'a'])
+
+
+if __name__ == '__main__':
+  tf.test.main()
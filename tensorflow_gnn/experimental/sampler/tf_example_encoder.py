@@ -0,0 +1,254 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Serializes sampling results as TF Examples without building protos.
+
+The executors represent each example result as a list of values, where each
+value is a list of `numpy.ndarray`s with flattened tensor components:
+`[t]` for dense tensors and `[t.flat_values, *t.nested_row_lengths()]` for
+ragged tensors (see `sampler/beam/executor_lib.py`). `TFExampleEncoder` writes
+the wire format of `tf.train.Example` messages for such values directly: the
+feature names are encoded once, numeric features of all examples in a batch
+are packed with vectorized numpy operations and the results are joined into
+bytes with a single copy per example.
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# Tensor or flattened composite tensor.
+Value = List[np.ndarray]
+# Collection of values belonging to particular example.
+Values = List[Value]
+
+# Field 1 with wire type 2 (length-delimited): `Example.features`,
+# `Features.feature` map entries, map entry keys and `*List.value`.
+_FIELD_1 = b'\x0a'
+# Field 2 with wire type 2: map entry values.
+_FIELD_2 = b'\x12'
+# `Feature` oneof fields with wire type 2.
+_BYTES_LIST = b'\x0a'
+_FLOAT_LIST = b'\x12'
+_INT64_LIST = b'\x1a'
+
+_SMALL_VARINTS = [bytes([i]) for i in range(0x80)]
+# Tags with sizes of `BytesList` values shorter than 128 bytes.
+_VALUE_HEADERS = [_FIELD_1 + v for v in _SMALL_VARINTS]
+# The smallest values which need more bytes when encoded as varints.
+_VARINT_BOUNDARIES = np.array([1 << (7 * i) for i in range(1, 10)], np.uint64)
+
+
+class TFExampleEncoder:
+  """Serializes dense or ragged values as TF Examples.
+
+  Dense values are flattened and written as a TF example `Feature` of the
+  matching type: `float_list` for floating point values, `int64_list` for
+  integers and `bytes_list` for objects (bytes). Ragged values are written as
+  collection of their flat values and ragged row lengths from each ragged
+  dimension. The flat values have feature name "{feature_name}". The row
+  lengths have feature names "{feature_name}.d{index}", where `index` enumerate
+  ragged dimensions from outermost to innermost starting from 1. The outermost
+  (batch) dimension is not written.
+  """
+
+  def __init__(self, feature_names: Sequence[str]):
+    """Constructor.
+
+    Args:
+      feature_names: The names of features for each value.
+    """
+    self._feature_names = list(feature_names)
+    self._keys = {}
+
+  def encode(self, values: Values) -> bytes:
+    """Returns serialized TF Example with the given values."""
+    return self.encode_batch([values])[0]
+
+  def encode_batch(self, batch: Sequence[Values]) -> List[bytes]:
+    """Returns serialized TF Examples for a batch of example values.
+
+    Args:
+      batch: The values of each example, with the same number of values as
+        feature names. Values with the same index must have the same number of
+        components and compatible types for all examples.
+
+    Returns:
+      Serialized `tf.train.Example` messages, one for each example.
+    """
+    if not batch:
+      return []
+    parts = [[] for _ in batch]
+    sizes = [0] * len(batch)
+
+    def add_feature(name: str, components: List[np.ndarray]):
+      key = self._get_key(name)
+      for index, (feature, feature_size) in enumerate(
+          _encode_features(name, components)
+      ):
+        feature_size_bytes = _encode_varint(feature_size)
+        entry_size = len(key) + 1 + len(feature_size_bytes) + feature_size
+        entry_size_bytes = _encode_varint(entry_size)
+        example_parts = parts[index]
+        example_parts += (
+            _FIELD_1,
+            entry_size_bytes,
+            key,
+            _FIELD_2,
+            feature_size_bytes,
+        )
+        example_parts += feature
+        sizes[index] += 1 + len(entry_size_bytes) + entry_size
+
+    for value_index, feature_name in enumerate(self._feature_names):
+      values = [example[value_index] for example in batch]
+      add_feature(feature_name, [value[0] for value in values])
+      for dim in range(2, len(values[0])):
+        add_feature(
+            f'{feature_name}.d{dim - 1}', [value[dim] for value in values]
+        )
+
+    return [
+        b''.join([_FIELD_1, _encode_varint(size), *example_parts])
+        for size, example_parts in zip(sizes, parts)
+    ]
+
+  def _get_key(self, name: str) -> bytes:
+    """Returns encoded map entry key for the feature name."""
+    key = self._keys.get(name)
+    if key is None:
+      name_bytes = name.encode('utf-8')
+      key = _FIELD_1 + _encode_varint(len(name_bytes)) + name_bytes
+      self._keys[name] = key
+    return key
+
+
+def _encode_features(
+    name: str, components: List[np.ndarray]
+) -> List[Tuple[List[bytes], int]]:
+  """Encodes components of all examples as `tf.train.Feature` messages.
+
+  Args:
+    name: The feature name, for error messages.
+    components: The feature values for each example.
+
+  Returns:
+    For each example, the parts of serialized `Feature` message and its total
+    size in bytes.
+  """
+  flat_components = [c.reshape(-1) for c in components]
+  dtype = flat_components[0].dtype
+  if dtype == np.object_:
+    return [_encode_bytes_feature(c) for c in flat_components]
+
+  single = len(flat_components) == 1
+  flat_values = (
+      flat_components[0] if single else np.concatenate(flat_components)
+  )
+  if np.issubdtype(dtype, np.floating):
+    tag = _FLOAT_LIST
+    data = flat_values.astype('<f4', copy=False).tobytes()
+    if not single:
+      counts = np.array([c.size for c in flat_components], np.int64)
+      value_splits = np.concatenate([[0], np.cumsum(counts * 4)]).tolist()
+  elif np.issubdtype(dtype, np.integer):
+    tag = _INT64_LIST
+    data, num_bytes = _encode_varints(flat_values)
+    data = data.tobytes()
+    if not single:
+      counts = np.array([c.size for c in flat_components], np.int64)
+      byte_splits = np.concatenate([[0], np.cumsum(num_bytes)])
+      value_splits = byte_splits[
+          np.concatenate([[0], np.cumsum(counts)])
+      ].tolist()
+  else:
+    raise ValueError(
+        f'Conversion to TF Example is not supported for {name} with values'
+        f' of type {dtype}'
+    )
+  if single:
+    value_splits = [0, len(data)]
+  data = memoryview(data)
+  results = []
+  for start, limit in zip(value_splits[:-1], value_splits[1:]):
+    size = limit - start
+    if not size:
+      # Packed repeated field with no values is not written.
+      results.append(([tag, _SMALL_VARINTS[0]], 2))
+      continue
+    size_bytes = _encode_varint(size)
+    list_size = 1 + len(size_bytes) + size
+    list_size_bytes = _encode_varint(list_size)
+    results.append((
+        [tag, list_size_bytes, _FIELD_1, size_bytes, data[start:limit]],
+        1 + len(list_size_bytes) + list_size,
+    ))
+  return results
+
+
+def _encode_bytes_feature(values: np.ndarray) -> Tuple[List[bytes], int]:
+  """Encodes `bytes_list` feature."""
+  values = values.tolist()
+  parts = [None] * (2 * len(values))
+  parts[0::2] = [
+      _VALUE_HEADERS[size]
+      if size < 0x80
+      else _FIELD_1 + _encode_varint(size)
+      for size in map(len, values)
+  ]
+  parts[1::2] = values
+  body = b''.join(parts)
+  list_size_bytes = _encode_varint(len(body))
+  return [_BYTES_LIST, list_size_bytes, body], (
+      1 + len(list_size_bytes) + len(body)
+  )
+
+
+def _encode_varint(value: int) -> bytes:
+  """Encodes non-negative integer as base 128 varint."""
+  if value < 0x80:
+    return _SMALL_VARINTS[value]
+  if value < 0x4000:
+    return bytes(((value & 0x7F) | 0x80, value >> 7))
+  result = bytearray()
+  while value >= 0x80:
+    result.append((value & 0x7F) | 0x80)
+    value >>= 7
+  result.append(value)
+  return bytes(result)
+
+
+def _encode_varints(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+  """Encodes int64 values as varints using vectorized operations.
+
+  Negative values are encoded as 10-byte two's complement varints, as for the
+  `int64` protocol buffer fields.
+
+  Args:
+    values: The integer values to encode.
+
+  Returns:
+    Tuple of `uint8` array with concatenated varints and the number of bytes of
+    each varint.
+  """
+  values = values.astype(np.int64, copy=False).view(np.uint64)
+  num_bytes = np.searchsorted(_VARINT_BOUNDARIES, values, side='right') + 1
+  max_bytes = int(num_bytes.max()) if values.size else 1
+  positions = np.arange(max_bytes)
+  shifts = (positions * 7).astype(np.uint64)
+  groups = (
+      (values[:, np.newaxis] >> shifts[np.newaxis, :]) & np.uint64(0x7F)
+  ).astype(np.uint8)
+  groups[positions[np.newaxis, :] < num_bytes[:, np.newaxis] - 1] |= 0x80
+  return groups[positions[np.newaxis, :] < num_bytes[:, np.newaxis]], num_bytes
@@ -0,0 +1,143 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for tf_example_encoder."""
+
+from absl.testing import parameterized
+import numpy as np
+import tensorflow as tf
+
+from tensorflow_gnn.experimental.sampler import tf_example_encoder
+
+from google.protobuf import text_format
+
+
+class TFExampleEncoderTest(tf.test.TestCase, parameterized.TestCase):
+
+  def assertEncoded(self, serialized: bytes, expected: str):
+    self.assertProtoEquals(
+        text_format.Parse(expected, tf.train.Example()),
+        tf.train.Example.FromString(serialized),
+    )
+
+  @parameterized.parameters(np.float32, np.float64, np.float16)
+  def testFloats(self, dtype):
+    encoder = tf_example_encoder.TFExampleEncoder(['x'])
+    self.assertEncoded(
+        encoder.encode([[np.array([[1.0, -2.5], [0.0, 1e10]], dtype)]]),
+        """features {
+          feature {
+            key: "x"
+            value { float_list { value: [1.0, -2.5, 0.0, %s] } }
+          }
+        }""" % float(dtype(1e10)),
+    )
+
+  @parameterized.parameters(np.int32, np.int64, np.uint8)
+  def testIntegers(self, dtype):
+    values = np.array([0, 1, 127, 128, 255], dtype)
+    if np.issubdtype(dtype, np.signedinteger):
+      values = np.concatenate([values, np.array([-1, -128], dtype)])
+    if dtype == np.int64:
+      values = np.concatenate(
+          [values, np.array([2**40, 2**63 - 1, -(2**63)], dtype)]
+      )
+    encoder = tf_example_encoder.TFExampleEncoder(['x'])
+    self.assertEncoded(
+        encoder.encode([[values]]),
+        """features {
+          feature { key: "x" value { int64_list { value: %s } } }
+        }""" % values.tolist(),
+    )
+
+  def testBytes(self):
+    encoder = tf_example_encoder.TFExampleEncoder(['x'])
+    long_value = b'z' * 200
+    self.assertEncoded(
+        encoder.encode([[np.array([b'a', b'', long_value], np.object_)]]),
+        """features {
+          feature {
+            key: "x"
+            value { bytes_list { value: ["a", "", "%s"] } }
+          }
+        }""" % long_value.decode(),
+    )
+
+  def testEmptyValues(self):
+    encoder = tf_example_encoder.TFExampleEncoder(['f', 'i', 's'])
+    self.assertEncoded(
+        encoder.encode([
+            [np.zeros([0], np.float32)],
+            [np.zeros([0, 2], np.int64)],
+            [np.zeros([0], np.object_)],
+        ]),
+        """features {
+          feature { key: "f" value { float_list {} } }
+          feature { key: "i" value { int64_list {} } }
+          feature { key: "s" value { bytes_list {} } }
+        }""",
+    )
+
+  def testRagged(self):
+    encoder = tf_example_encoder.TFExampleEncoder(['x', 'y'])
+    self.assertEncoded(
+        encoder.encode([
+            [
+                np.array([b'a', b'b', b'c'], np.object_),
+                np.array([2]),
+                np.array([1, 0]),
+                np.array([2, 1]),
+            ],
+            [np.array([1.0, 2.0], np.float32), np.array([1], np.int32)],
+        ]),
+        """features {
+          feature { key: "x" value { bytes_list { value: ["a", "b", "c"] } } }
+          feature { key: "x.d1" value { int64_list { value: [1, 0] } } }
+          feature { key: "x.d2" value { int64_list { value: [2, 1] } } }
+          feature { key: "y" value { float_list { value: [1.0, 2.0] } } }
+        }""",
+    )
+
+  def testEncodeBatch(self):
+    encoder = tf_example_encoder.TFExampleEncoder(['ids', 'weights', 'näme'])
+    rng = np.random.default_rng(42)
+    batch = []
+    for size in [0, 1, 5, 200]:
+      batch.append([
+          [rng.integers(-(2**40), 2**40, size), np.array([size])],
+          [rng.uniform(size=[size, 2]).astype(np.float32)],
+          [np.array([b'x'] * size, np.object_)],
+      ])
+    serialized = encoder.encode_batch(batch)
+    self.assertLen(serialized, len(batch))
+    for values, actual in zip(batch, serialized):
+      self.assertEqual(actual, encoder.encode(values))
+      expected = tf.train.Example()
+      feature = expected.features.feature
+      feature['ids'].int64_list.value.extend(values[0][0].tolist())
+      feature['weights'].float_list.value.extend(
+          values[1][0].flatten().tolist()
+      )
+      feature['näme'].bytes_list.value.extend(values[2][0].tolist())
+      self.assertProtoEquals(expected, tf.train.Example.FromString(actual))
+    self.assertEqual(encoder.encode_batch([]), [])
+
+  def testUnsupportedType(self):
+    encoder = tf_example_encoder.TFExampleEncoder(['x'])
+    with self.assertRaisesRegex(ValueError, 'not supported for x'):
+      encoder.encode([[np.array([True, False])]])
+
+
+if __name__ == '__main__':
+  tf.test.main()
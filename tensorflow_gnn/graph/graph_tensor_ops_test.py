@@ -1462,6 +1462,94 @@ class NodeDegreeTest(tf.test.TestCase, parameterized.TestCase):
       self.assertAllEqual(get, expected)
 
 
+class PoolNeighborsToNodeTest(tf.test.TestCase, parameterized.TestCase):
+  """Tests for pooling from neighbor nodes by sparse matmul."""
+
+  def _make_graph(self, node_values):
+    return gt.GraphTensor.from_pieces(
+        node_sets={
+            'a': gt.NodeSet.from_fields(
+                sizes=as_tensor([4]), features={'f': node_values}),
+            'b': gt.NodeSet.from_fields(sizes=as_tensor([3]), features={}),
+        },
+        edge_sets={
+            'a->b': gt.EdgeSet.from_fields(
+                sizes=as_tensor([6]),
+                adjacency=adj.Adjacency.from_indices(
+                    ('a', as_tensor([3, 0, 1, 0, 2, 3])),
+                    ('b', as_tensor([0, 0, 0, 2, 2, 2])),
+                )),
+        })
+
+  def _pool_edges(self, graph, reduce_type, edge_weights=None):
+    values = ops.broadcast_node_to_edges(
+        graph, 'a->b', const.SOURCE, feature_name='f')
+    if edge_weights is not None:
+      values *= tf.reshape(edge_weights, [-1] + [1] * (values.shape.rank - 1))
+    return ops.pool_edges_to_node(
+        graph, 'a->b', const.TARGET, reduce_type, feature_value=values)
+
+  @parameterized.product(reduce_type=['sum', 'mean'],
+                         feature_shape=[[], [2], [2, 3]],
+                         use_edge_weights=[False, True])
+  def testEquivalentToPoolEdges(self, reduce_type, feature_shape,
+                                use_edge_weights):
+    graph = self._make_graph(tf.random.uniform([4] + feature_shape, seed=1))
+    edge_weights = (as_tensor([1., 2., 3., 4., 5., 6.]) if use_edge_weights
+                    else None)
+    expected = self._pool_edges(graph, reduce_type, edge_weights)
+    actual = ops.pool_neighbors_to_node(
+        graph, const.TARGET, edge_set_name='a->b', reduce_type=reduce_type,
+        feature_name='f', edge_weights=edge_weights)
+    self.assertEqual(actual.shape, [3] + feature_shape)
+    self.assertAllClose(expected, actual)
+
+  def testToSource(self):
+    graph = self._make_graph(as_tensor([[1.], [2.], [4.], [8.]]))
+    actual = ops.pool_neighbors_to_node(
+        graph, const.SOURCE, edge_set_name='a->b', reduce_type='sum',
+        feature_value=as_tensor([[1.], [10.], [100.]]))
+    self.assertAllClose([[101.], [1.], [100.], [101.]], actual)
+
+  @parameterized.parameters(['sum', 'mean'])
+  def testGradients(self, reduce_type):
+    node_values = tf.random.uniform([4, 2], seed=1)
+    edge_weights = as_tensor([1., 2., 3., 4., 5., 6.])
+    with tf.GradientTape(persistent=True) as tape:
+      tape.watch([node_values, edge_weights])
+      graph = self._make_graph(node_values)
+      expected = self._pool_edges(graph, reduce_type, edge_weights)
+      actual = ops.pool_neighbors_to_node(
+          graph, const.TARGET, edge_set_name='a->b', reduce_type=reduce_type,
+          feature_name='f', edge_weights=edge_weights)
+      expected_loss = tf.reduce_sum(tf.square(expected))
+      actual_loss = tf.reduce_sum(tf.square(actual))
+    for source in [node_values, edge_weights]:
+      self.assertAllClose(
+          tf.convert_to_tensor(tape.gradient(expected_loss, source)),
+          tf.convert_to_tensor(tape.gradient(actual_loss, source)))
+
+  @parameterized.parameters([tf.float16, tf.bfloat16])
+  def testHalfPrecision(self, dtype):
+    node_values = tf.random.uniform([4, 2], seed=1)
+    graph = self._make_graph(tf.cast(node_values, dtype))
+    actual = ops.pool_neighbors_to_node(
+        graph, const.TARGET, edge_set_name='a->b', reduce_type='mean',
+        feature_name='f')
+    self.assertEqual(actual.dtype, dtype)
+    self.assertAllClose(self._pool_edges(self._make_graph(node_values), 'mean'),
+                        tf.cast(actual, tf.float32), rtol=1e-2, atol=1e-2)
+
+  def testErrors(self):
+    graph = self._make_graph(tf.ones([4, 2]))
+    with self.assertRaisesRegex(ValueError, r'reduce_type'):
+      ops.pool_neighbors_to_node(graph, const.TARGET, edge_set_name='a->b',
+                                 reduce_type='max', feature_name='f')
+    with self.assertRaisesRegex(ValueError, r'to_tag'):
+      ops.pool_neighbors_to_node(graph, const.CONTEXT, edge_set_name='a->b',
+                                 feature_name='f')
+
+
 class _MaskEdges(tf.keras.layers.Layer):
 
   def call(self, graph, edge_set_name, mask, masked_edge_set_name):
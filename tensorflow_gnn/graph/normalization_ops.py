@@ -21,6 +21,7 @@ import tensorflow as tf
 from tensorflow_gnn.graph import graph_constants as const
 from tensorflow_gnn.graph import graph_tensor as gt
 from tensorflow_gnn.graph import pooling
+from tensorflow_gnn.graph import tensor_utils as utils
 
 
 Field = const.Field
@@ -74,7 +75,9 @@ def softmax(
 
   Returns:
     A tensor or a list of tensors with the softmaxed values. The dimensions of
-    the tensors and the length of the list do not change from the input.
+    the tensors, their dtypes and the length of the list do not change from
+    the input. Inputs of dtype `float16` or `bfloat16` are processed in
+    `float32` internally.
   """
   # Set up a list of `values` to be softmaxed with `pool` and `broadcast` calls.
   edge_set_names, node_set_names, values, got_sequence_args = (
@@ -89,6 +92,11 @@ def softmax(
       pooling.broadcast_v2, graph_tensor, per_tag,
       edge_set_name=edge_set_names, node_set_name=node_set_names)
 
+  # Half-precision values are softmaxed in float32 and cast back afterwards,
+  # because exponentiation and summation lose too much accuracy otherwise.
+  dtypes = [v.dtype for v in values]
+  values = [tf.cast(v, utils.accumulation_dtype(v.dtype)) for v in values]
+
   # Compute softmax. Subtract the maxes for numerical stability.
   # Some segment_maxes may be -inf, but that's broadcast nowhere.
   segment_maxes = pool(reduce_type="max", feature_value=values)
@@ -96,7 +104,8 @@ def softmax(
   exp_values = [tf.exp(v - m) for v, m in _zip_strict(values, maxes)]
   sum_exp_values = broadcast(feature_value=pool(reduce_type="sum",
                                                 feature_value=exp_values))
-  result = [ev / sev for ev, sev in _zip_strict(exp_values, sum_exp_values)]
+  result = [tf.cast(ev / sev, dtype) for ev, sev, dtype
+            in _zip_strict(exp_values, sum_exp_values, dtypes)]
 
   # Return result with the same nesting as the inputs.
   if got_sequence_args:
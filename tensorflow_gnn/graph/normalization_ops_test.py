@@ -175,6 +175,28 @@ class NormalizationOpsTest(tf.test.TestCase, parameterized.TestCase):
     self.assertAllClose(actual_aa, expected_aa)
     self.assertAllClose(actual_ga, expected_ga)
 
+  @parameterized.named_parameters(
+      ('Float16', tf.float16),
+      ('BFloat16', tf.bfloat16))
+  def testSoftmaxHalfPrecision(self, dtype):
+    """Tests softmax() on half-precision inputs with many items."""
+    num_edges = 1000
+    graph_tensor = gt.GraphTensor.from_pieces(
+        node_sets={'v': gt.NodeSet.from_fields(sizes=[1])},
+        edge_sets={
+            'e': gt.EdgeSet.from_fields(
+                sizes=[num_edges],
+                adjacency=adj.Adjacency.from_indices(
+                    ('v', tf.zeros([num_edges], tf.int32)),
+                    ('v', tf.zeros([num_edges], tf.int32)))),
+        })
+    actual = normalization_ops.softmax_edges_per_node(
+        graph_tensor, 'e', const.TARGET,
+        feature_value=tf.zeros([num_edges], dtype))
+    self.assertEqual(actual.dtype, dtype)
+    self.assertAllClose(tf.fill([num_edges], 1. / num_edges),
+                        tf.cast(actual, tf.float32), rtol=0.01)
+
   @parameterized.product(
       # The descriptive names are meant to make test output easier to read.
       relation=['EdgeToNode', 'EdgeToContext', 'NodeToContext'],
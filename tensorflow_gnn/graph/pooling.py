@@ -541,14 +541,19 @@ class GraphPieceReducer(abc.ABC):
 
 
 class CountGraphPieceReducer(GraphPieceReducer):
-  """Implements count-pooling from one graph piece."""
+  """Implements count-pooling from one graph piece.
+
+  Counts are returned in the `accumulation_dtype()` of the values, so that
+  they stay exact for half-precision inputs.
+  """
 
   def unsorted_segment_op(self,
                           values: Field,
                           segment_ids: tf.Tensor,
                           num_segments: tf.Tensor)-> Field:
     """Implements subclass API."""
-    ones = tf.ones(tf.shape(values)[0], dtype=values.dtype)
+    ones = tf.ones(tf.shape(values)[0],
+                   dtype=utils.accumulation_dtype(values.dtype))
     return tf.math.unsorted_segment_sum(ones, segment_ids, num_segments)
 
 
@@ -571,7 +576,8 @@ class MeanGraphPieceReducer(GraphPieceReducer):
                           segment_ids: tf.Tensor,
                           num_segments: tf.Tensor) -> Field:
     """Implements subclass API."""
-    return tf.math.unsorted_segment_mean(values, segment_ids, num_segments)
+    return utils.with_accumulation_dtype(tf.math.unsorted_segment_mean)(
+        values, segment_ids, num_segments)
 
 
 class MinGraphPieceReducer(GraphPieceReducer):
@@ -593,7 +599,8 @@ class SumGraphPieceReducer(GraphPieceReducer):
                           segment_ids: tf.Tensor,
                           num_segments: tf.Tensor) -> Field:
     """Implements subclass API."""
-    return tf.math.unsorted_segment_sum(values, segment_ids, num_segments)
+    return utils.with_accumulation_dtype(tf.math.unsorted_segment_sum)(
+        values, segment_ids, num_segments)
 
 
 class ProdGraphPieceReducer(GraphPieceReducer):
@@ -686,10 +693,14 @@ class MeanMultiReducer(MultiReducer):
   def compute_from_pieces(self,
                           pieces: dict[str, list[Field]]) -> Field:
     """Implements subclass API."""
-    sum_ = tf.add_n(pieces["sum"])
+    dtype = pieces["sum"][0].dtype
+    acc_dtype = utils.accumulation_dtype(dtype)
+    sum_ = tf.add_n([tf.cast(s, acc_dtype) for s in pieces["sum"]])
     count = tf.add_n(pieces["_count"])
-    return tf.math.divide_no_nan(
-        sum_, _expand_count_to_rank(count, sum_.shape.rank))
+    return tf.cast(
+        tf.math.divide_no_nan(
+            sum_, _expand_count_to_rank(count, sum_.shape.rank)),
+        dtype)
 
 
 def _expand_count_to_rank(count, rank):
@@ -736,7 +747,10 @@ class SumMultiReducer(MultiReducer):
   def compute_from_pieces(self,
                           pieces: dict[str, list[Field]]) -> Field:
     """Implements subclass API."""
-    return tf.add_n(pieces["sum"])
+    dtype = pieces["sum"][0].dtype
+    acc_dtype = utils.accumulation_dtype(dtype)
+    return tf.cast(tf.add_n([tf.cast(s, acc_dtype) for s in pieces["sum"]]),
+                   dtype)
 
 
 class ProdMultiReducer(MultiReducer):
@@ -172,6 +172,37 @@ class PoolTest(tf.test.TestCase, parameterized.TestCase):
         pooling.pool_v2(input_graph, to_tag, reduce_type="sum",
                         edge_set_name="e", feature_name="feat"))
 
+  @parameterized.product(
+      reduce_type=["sum", "mean", "mean|sum"],
+      dtype=[tf.float16, tf.bfloat16],
+      edge_set_name=["e", ("e", "f")])
+  def testHalfPrecisionAccumulation(self, reduce_type, dtype, edge_set_name):
+    # Summing up 3000 ones in bfloat16 (or float16) gets stuck at 256 (or
+    # 2048), unless the sum is accumulated in float32.
+    num_edges = 1500
+    def edge_set():
+      return gt.EdgeSet.from_fields(
+          sizes=tf.constant([num_edges]),
+          adjacency=adj.Adjacency.from_indices(
+              ("v", tf.zeros([num_edges], tf.int32)),
+              ("v", tf.zeros([num_edges], tf.int32))))
+    input_graph = gt.GraphTensor.from_pieces(
+        node_sets={"v": gt.NodeSet.from_fields(sizes=tf.constant([1]))},
+        edge_sets={"e": edge_set(), "f": edge_set()})
+    if isinstance(edge_set_name, str):
+      feature_value = tf.ones([num_edges, 1], dtype)
+      total = num_edges
+    else:
+      feature_value = [tf.ones([num_edges, 1], dtype)] * len(edge_set_name)
+      total = num_edges * len(edge_set_name)
+    expected = {"sum": [[total]], "mean": [[1.]], "mean|sum": [[1., total]]}
+    actual = pooling.pool_v2(
+        input_graph, const.TARGET, reduce_type=reduce_type,
+        edge_set_name=edge_set_name, feature_value=feature_value)
+    self.assertEqual(actual.dtype, dtype)
+    self.assertAllClose(expected[reduce_type], tf.cast(actual, tf.float32),
+                        rtol=0.01)
+
   def testPoolHyperedges(self):
     input_graph = gt.GraphTensor.from_pieces(
         node_sets={
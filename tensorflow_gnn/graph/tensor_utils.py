@@ -501,6 +501,48 @@ def is_dense_tensor(value: Value) -> bool:
   return False
 
 
+def accumulation_dtype(dtype: tf.DType) -> tf.DType:
+  """Returns the dtype in which to accumulate sums of values of `dtype`.
+
+  Sums over many half-precision floats (`float16` or `bfloat16`) lose accuracy
+  quickly, so they get accumulated in `float32`. All other dtypes are returned
+  unchanged.
+
+  Args:
+    dtype: The dtype of the values to be summed up.
+
+  Returns:
+    `tf.float32` if `dtype` is a half-precision float, else `dtype`.
+  """
+  dtype = tf.as_dtype(dtype)
+  if dtype in (tf.float16, tf.bfloat16):
+    return tf.float32
+  return dtype
+
+
+def with_accumulation_dtype(reduce_op):
+  """Wraps an unsorted segment op to accumulate in `accumulation_dtype()`.
+
+  The returned op casts its `data` to the `accumulation_dtype()` of its dtype,
+  calls `reduce_op`, and casts the result back to the original dtype. This is
+  a no-op for all dtypes other than `float16` and `bfloat16`.
+
+  Args:
+    reduce_op: An unsorted segment op like `tf.math.unsorted_segment_sum`.
+
+  Returns:
+    The wrapped op, with the same signature as `reduce_op`.
+  """
+  def wrapped_reduce_op(data, segment_ids, num_segments):
+    acc_dtype = accumulation_dtype(data.dtype)
+    if acc_dtype == data.dtype:
+      return reduce_op(data, segment_ids, num_segments)
+    result = reduce_op(tf.cast(data, acc_dtype), segment_ids, num_segments)
+    return tf.cast(result, data.dtype)
+
+  return wrapped_reduce_op
+
+
 def short_repr(value: Value) -> str:
   """A string for a dense or ragged tensor without the contained values.
 
@@ -267,6 +267,20 @@ class TensorUtilsTest(tf.test.TestCase):
         value, tf.ones([value.nrows()], value.row_splits.dtype))
     self.assertAllEqual(utils.pad_to_nrows(value, 2, ''), value)
 
+  def testAccumulationDtype(self):
+    self.assertEqual(utils.accumulation_dtype(tf.float16), tf.float32)
+    self.assertEqual(utils.accumulation_dtype(tf.bfloat16), tf.float32)
+    self.assertEqual(utils.accumulation_dtype(tf.float32), tf.float32)
+    self.assertEqual(utils.accumulation_dtype(tf.float64), tf.float64)
+    self.assertEqual(utils.accumulation_dtype(tf.int32), tf.int32)
+
+  def testWithAccumulationDtype(self):
+    segment_sum = utils.with_accumulation_dtype(tf.math.unsorted_segment_sum)
+    data = tf.ones([1000], tf.bfloat16)
+    result = segment_sum(data, tf.zeros([1000], tf.int32), 1)
+    self.assertEqual(result.dtype, tf.bfloat16)
+    self.assertAllEqual(result, tf.constant([1000.], tf.bfloat16))
+
 
 _SEED = 42
 
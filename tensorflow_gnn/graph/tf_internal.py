@@ -31,6 +31,11 @@ try:
   from tensorflow.python.framework import type_spec_registry
 except ImportError:
   type_spec_registry = None  # Not available before TF 2.12.
+try:
+  from tensorflow.python.eager import record
+except ImportError:
+  # Path before TF 2.13.
+  from tensorflow.python.eager import tape as record
 try:
   from keras.engine import keras_tensor
 except ImportError:
@@ -62,11 +67,14 @@ register_keras_tensor_specialization = (
 delegate_property = core_layers._delegate_property  # pylint: disable=protected-access
 delegate_method = core_layers._delegate_method  # pylint: disable=protected-access
 # TFClassMethodDispatcher = core_layers.TFClassMethodDispatcher
+# A context manager to hide ops from all active GradientTapes.
+stop_recording = record.stop_recording
 
 # Delete imports, in their order above.
 del composite_tensor
 del type_spec
 del tf
 del type_spec_registry
+del record
 del keras_tensor
 del core_layers
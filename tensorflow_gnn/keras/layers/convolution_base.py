@@ -22,7 +22,10 @@ import tensorflow as tf
 from tensorflow_gnn.graph import graph_constants as const
 from tensorflow_gnn.graph import graph_tensor as gt
 from tensorflow_gnn.graph import graph_tensor_ops as ops
+from tensorflow_gnn.graph import normalization_ops
 from tensorflow_gnn.graph import tag_utils
+from tensorflow_gnn.graph import tensor_utils as utils
+from tensorflow_gnn.graph import tf_internal
 
 
 class AnyToAnyConvolutionBase(tf.keras.layers.Layer, abc.ABC):
@@ -148,6 +151,7 @@ class AnyToAnyConvolutionBase(tf.keras.layers.Layer, abc.ABC):
                sender_edge_feature: Optional[const.FieldName] = None,
                extra_receiver_ops: Optional[
                    Mapping[str, Callable[..., Any]]] = None,
+               edge_chunk_size: Optional[int] = None,
                **kwargs):
     """Initializes the AnyToAnyConvolutionBase of a convolution layer.
 
@@ -193,6 +197,25 @@ class AnyToAnyConvolutionBase(tf.keras.layers.Layer, abc.ABC):
         are computed inside the convolution. The sole positional argument of
         `wrapped_f()` is passed to `f()`  as `feature_value=`, and any keyword
         arguments are forwarded.
+      edge_chunk_size: If set, convolutions over an edge set to
+        `receiver_tag=tfgnn.SOURCE` or `tfgnn.TARGET` call `convolve()` on
+        consecutive chunks of at most this many edges, and combine the
+        results of `pool_to_receiver()` across chunks, so that the per-edge
+        intermediate values of only one chunk exist at a time. For training,
+        the forward pass over all chunks is not recorded on the gradient tape;
+        instead, a custom gradient runs each chunk again under a tape of its
+        own to get its gradients, one chunk at a time. Random ops would draw
+        new values when repeated, so training raises a ValueError for random
+        sublayers like dropout, and `convolve()` must not call random ops like
+        `tf.nn.dropout()` directly. This requires a `convolve()` method
+        that calls `pool_to_receiver()` in the same order each time and uses
+        its results only for computations per receiver. It supports all
+        reduce types of `tfgnn.pool()` except for concatenations, and
+        `extra_receiver_ops={"softmax": tfgnn.softmax}` (but no others), under
+        the additional condition that each softmax result is multiplied with
+        per-edge values that get pooled by `reduce_type="sum"` in all calls
+        to `pool_to_receiver()` that follow it, as usual for attention.
+        Convolutions to context are not chunked.
       **kwargs: Forwarded to the base class tf.keras.layers.Layer.
     """
     super().__init__(**kwargs)
@@ -202,6 +225,16 @@ class AnyToAnyConvolutionBase(tf.keras.layers.Layer, abc.ABC):
     self._sender_edge_feature = sender_edge_feature
     self._extra_receiver_ops = (None if extra_receiver_ops is None
                                 else dict(extra_receiver_ops))
+    if edge_chunk_size is not None:
+      if edge_chunk_size <= 0:
+        raise ValueError(
+            f"edge_chunk_size must be positive, got {edge_chunk_size}")
+      for name, fn in (self._extra_receiver_ops or {}).items():
+        if fn is not normalization_ops.softmax:
+          raise ValueError(
+              f"{self.__class__.__name__}(edge_chunk_size=...) does not "
+              f"support extra_receiver_ops['{name}'], only tfgnn.softmax")
+    self._edge_chunk_size = edge_chunk_size
 
   def get_config(self):
     """Returns config with features and tag managed by AnyToAnyConvolutionBase.
@@ -229,6 +262,7 @@ class AnyToAnyConvolutionBase(tf.keras.layers.Layer, abc.ABC):
         receiver_feature=self._receiver_feature,
         sender_node_feature=self._sender_node_feature,
         sender_edge_feature=self._sender_edge_feature,
+        edge_chunk_size=self._edge_chunk_size,
         **super().get_config())
 
   @property
@@ -321,6 +355,19 @@ class AnyToAnyConvolutionBase(tf.keras.layers.Layer, abc.ABC):
       sender_node_input = sender_node_set[self._sender_node_feature]
     if None not in [edge_set, self._sender_edge_feature]:
       sender_edge_input = edge_set[self._sender_edge_feature]
+    # Under a mixed precision policy, Keras autocasts the Tensor inputs of a
+    # Layer but not the features inside a GraphTensor, so do that here.
+    receiver_input = _maybe_autocast(self, receiver_input)
+    sender_node_input = _maybe_autocast(self, sender_node_input)
+    sender_edge_input = _maybe_autocast(self, sender_edge_input)
+
+    if self._edge_chunk_size is not None and receiver_tag != const.CONTEXT:
+      return self._convolve_in_edge_chunks(
+          graph, edge_set_name=edge_set_name, receiver_tag=receiver_tag,
+          sender_node_input=sender_node_input,
+          sender_edge_input=sender_edge_input,
+          receiver_input=receiver_input,
+          training=training)
 
     return self.convolve(
         sender_node_input=sender_node_input,
@@ -391,6 +438,433 @@ class AnyToAnyConvolutionBase(tf.keras.layers.Layer, abc.ABC):
     """
     raise NotImplementedError("To be implemented by the concrete subclass.")
 
+  def _convolve_in_edge_chunks(
+      self, graph: gt.GraphTensor, *,
+      edge_set_name: gt.EdgeSetName,
+      receiver_tag: const.IncidentNodeTag,
+      sender_node_input: Optional[tf.Tensor],
+      sender_edge_input: Optional[tf.Tensor],
+      receiver_input: Optional[tf.Tensor],
+      training: Optional[bool]) -> tf.Tensor:
+    """Returns the result of `convolve()`, computed in chunks of edges.
+
+    The `convolve()` method is called repeatedly with the receiver ops of an
+    `_EdgeChunkPass`:
+
+      * once on zero edges, to build sublayers and to record the sequence
+        of `pool_to_receiver()` and softmax calls;
+      * once for each chunk, inside a `tf.while_loop()`, to accumulate the
+        partial results of `pool_to_receiver()` across chunks;
+      * once more on zero edges, with `pool_to_receiver()` returning the
+        accumulated results, to compute the final result per receiver.
+
+    The gradient of the accumulated results repeats the loop over chunks,
+    so that the backward pass does not keep per-edge values of all chunks.
+
+    Args:
+      graph: The input GraphTensor.
+      edge_set_name: The edge set to convolve over.
+      receiver_tag: The incident node tag of receivers.
+      sender_node_input: As for `convolve()`.
+      sender_edge_input: As for `convolve()`.
+      receiver_input: As for `convolve()`.
+      training: As for `convolve()`.
+
+    Returns:
+      The result of `convolve()` for all edges.
+    """
+    adjacency = graph.edge_sets[edge_set_name].adjacency
+    receiver_index = adjacency[receiver_tag]
+    sender_index = adjacency[tag_utils.reverse_tag(receiver_tag)]
+    num_receivers = graph.node_sets[
+        adjacency.node_set_name(receiver_tag)].total_size
+    num_edges = tf.shape(receiver_index, out_type=receiver_index.dtype)[0]
+    chunk_size = tf.constant(self._edge_chunk_size, receiver_index.dtype)
+    # The distinct input tensors (e.g., receiver and sender node states
+    # coincide for an edge set within one node set), and for each input
+    # of convolve() its position among them, if any.
+    input_values = []
+    input_positions = {}
+    for key, value in [("sender_node_input", sender_node_input),
+                       ("sender_edge_input", sender_edge_input),
+                       ("receiver_input", receiver_input)]:
+      if value is None:
+        continue
+      for i, other in enumerate(input_values):
+        if value is other:
+          input_positions[key] = i
+          break
+      else:
+        input_positions[key] = len(input_values)
+        input_values.append(value)
+
+    def run_pass(edge_pass, begin, end, input_values):
+      inputs = {key: input_values[i] for key, i in input_positions.items()}
+      if "sender_edge_input" in inputs:
+        inputs["sender_edge_input"] = inputs["sender_edge_input"][begin:end]
+      edge_pass.set_edges(receiver_index[begin:end], sender_index[begin:end])
+      if self._extra_receiver_ops is None:
+        extra_receiver_ops_kwarg = {}
+      else:
+        extra_receiver_ops_kwarg = dict(extra_receiver_ops={
+            name: edge_pass.softmax for name in self._extra_receiver_ops})
+      try:
+        return self.convolve(
+            sender_node_input=inputs.get("sender_node_input"),
+            sender_edge_input=inputs.get("sender_edge_input"),
+            receiver_input=inputs.get("receiver_input"),
+            broadcast_from_sender_node=edge_pass.broadcast_from_sender_node,
+            broadcast_from_receiver=edge_pass.broadcast_from_receiver,
+            pool_to_receiver=edge_pass.pool_to_receiver,
+            **extra_receiver_ops_kwarg,
+            training=training)
+      except _AllPooled:
+        return None
+
+    def run_chunk(begin, end, input_values):
+      chunk = _EdgeChunkPass(num_receivers, recording.pools)
+      run_pass(chunk, begin, end, input_values)
+      return chunk.partial_results()
+
+    def loop_over_chunks(body, loop_vars):
+      _, loop_vars = tf.while_loop(
+          lambda begin, _: begin < num_edges,
+          lambda begin, loop_vars: (
+              tf.minimum(begin + chunk_size, num_edges),
+              body(begin, tf.minimum(begin + chunk_size, num_edges),
+                   loop_vars)),
+          [tf.zeros_like(num_edges), loop_vars])
+      return loop_vars
+
+    @tf.custom_gradient
+    def accumulate_chunks(*input_values):
+      with tf_internal.stop_recording():
+        accumulators = loop_over_chunks(
+            lambda begin, end, accumulators: recording.accumulate(
+                accumulators, run_chunk(begin, end, input_values)),
+            recording.initial_accumulators())
+
+      def grad_fn(*accumulator_grads, variables=None):
+        variables = list(variables or [])
+        sources = list(input_values) + variables
+        accumulator_grads = [
+            tf.zeros_like(a) if g is None else g
+            for a, g in zip(accumulators, accumulator_grads)]
+
+        def body(begin, end, loop_vars):
+          source_grads, unclaimed = loop_vars
+          with tf.GradientTape() as tape:
+            tape.watch(input_values)
+            partial_results = run_chunk(begin, end, input_values)
+          partial_result_grads, unclaimed = recording.partial_results_grads(
+              accumulators, accumulator_grads, partial_results, unclaimed)
+          chunk_grads = tape.gradient(
+              partial_results, sources, output_gradients=partial_result_grads,
+              unconnected_gradients=tf.UnconnectedGradients.ZERO)
+          return ([g + tf.convert_to_tensor(chunk_g)
+                   for g, chunk_g in zip(source_grads, chunk_grads)],
+                  unclaimed)
+
+        source_grads, _ = loop_over_chunks(
+            body, ([tf.zeros_like(x) for x in sources],
+                   recording.initial_unclaimed(accumulators)))
+        num_inputs = len(input_values)
+        return source_grads[:num_inputs], source_grads[num_inputs:]
+
+      return accumulators, grad_fn
+
+    # Record the pooling ops on zero edges.
+    recording = _EdgeChunkPass(num_receivers)
+    run_pass(recording, 0, 0, input_values)
+    if not recording.pools:
+      raise ValueError(f"{self.__class__.__name__}.convolve() did not call "
+                       "pool_to_receiver(), cannot use edge_chunk_size")
+    # The gradient runs each chunk again, which must see the same random values
+    # as the forward pass. A symbolic `training` is treated as true.
+    static_training = (False if training is None
+                       else tf.get_static_value(training))
+    if static_training is None or static_training:
+      random_layers = [m.name for m in self.submodules
+                       if _is_random_in_training(m)]
+      if random_layers:
+        raise ValueError(
+            f"{self.__class__.__name__}(edge_chunk_size=...) cannot be called "
+            f"with training=True, because its sublayers {random_layers} draw "
+            "new random values when chunks are run again for the gradient")
+    # Accumulate the pooled values over all chunks and compute the result.
+    accumulators = accumulate_chunks(*input_values)
+    final = _EdgeChunkPass(num_receivers, recording.pools,
+                           results=recording.finalize(accumulators))
+    return run_pass(final, 0, 0, input_values)
+
+
+def _is_random_in_training(module: tf.Module) -> bool:
+  """Returns true if `module` is a Keras layer that is random in training."""
+  if isinstance(module, tf.keras.layers.GaussianNoise):
+    return module.stddev > 0
+  if isinstance(module, (tf.keras.layers.Dropout,
+                         tf.keras.layers.AlphaDropout,
+                         tf.keras.layers.GaussianDropout)):
+    return module.rate > 0
+  return False
+
+
+class _AllPooled(Exception):
+  """Stops convolve() on a chunk of edges after the last pooling op."""
+
+
+class _PoolRecord:
+  """Describes one call to pool_to_receiver() from convolve()."""
+
+  def __init__(self, reduce_type, softmax_index, value):
+    self.reduce_type = reduce_type
+    self.softmax_index = softmax_index  # Of the latest softmax call, or None.
+    self.dtype = value.dtype
+    self.inner_shape = tf.shape(value)[1:]
+
+  @property
+  def chunk_reduce_type(self):
+    """Returns the key in _CHUNK_REDUCE_OPS for pooling chunks."""
+    return _chunk_reduce_type(self.reduce_type)
+
+
+def _unsorted_segment_sum_for_accumulation(data, segment_ids, num_segments):
+  return tf.math.unsorted_segment_sum(
+      tf.cast(data, utils.accumulation_dtype(data.dtype)),
+      segment_ids, num_segments)
+
+
+# For each reduce type: the op to pool a chunk, the op to combine results
+# from chunks, and the initial value (or the name of a dtype attribute).
+# Sums (and means) of half-precision floats are accumulated in float32.
+_CHUNK_REDUCE_OPS = {
+    "sum": (_unsorted_segment_sum_for_accumulation, tf.add, 0),
+    "max": (tf.math.unsorted_segment_max, tf.maximum, "min"),
+    "min": (tf.math.unsorted_segment_min, tf.minimum, "max"),
+}
+
+
+def _chunk_reduce_type(reduce_type):
+  if reduce_type == "mean":
+    return "sum"  # Divided by the degree in the end.
+  return reduce_type.replace("_no_inf", "")
+
+
+class _EdgeChunkPass:
+  """Receiver ops for one call to convolve() on a range of edges.
+
+  Without `pools`, this object records the sequence of pooling and softmax
+  calls, and provides the ops to accumulate their partial results from chunks.
+  With previously recorded `pools` and without `results`, it collects the
+  partial results for one chunk. With `results`, `pool_to_receiver()` returns
+  them in order.
+
+  The partial results of a chunk are a flat list of (1) the degree of each
+  receiver, (2) the pooled values in order, and (3) for each softmax, the
+  maximum of its inputs per receiver and the sum of its (unnormalized)
+  outputs per receiver. Accumulators have the same structure.
+  """
+
+  def __init__(self, num_receivers, pools=None, results=None):
+    self._num_receivers = num_receivers
+    self._recording = pools is None
+    self.pools = [] if self._recording else pools
+    self._results = results
+    self._pooled = []
+    self._softmax_stats = []
+    self._receiver_index = self._sender_index = None
+
+  def set_edges(self, receiver_index, sender_index):
+    self._receiver_index = receiver_index
+    self._sender_index = sender_index
+
+  def broadcast_from_sender_node(self, feature_value):
+    return tf.gather(feature_value, self._sender_index)
+
+  def broadcast_from_receiver(self, feature_value):
+    return tf.gather(feature_value, self._receiver_index)
+
+  def pool_to_receiver(self, feature_value, *, reduce_type="sum"):
+    """Pools the values of the current edges to receivers."""
+    index = len(self._pooled)
+    if self._recording:
+      if _chunk_reduce_type(reduce_type) not in _CHUNK_REDUCE_OPS:
+        raise ValueError(
+            f"Pooling with reduce_type='{reduce_type}' is not supported "
+            "with edge_chunk_size")
+      softmax_index = (len(self._softmax_stats) - 1 if self._softmax_stats
+                       else None)
+      if softmax_index is not None and reduce_type != "sum":
+        raise ValueError(
+            "With edge_chunk_size, values after softmax can only be pooled "
+            f"with reduce_type='sum', got '{reduce_type}'")
+      self.pools.append(_PoolRecord(reduce_type, softmax_index, feature_value))
+    if self._results is not None:
+      self._pooled.append(None)
+      return self._results[index]
+
+    unsorted_reduce_op = _CHUNK_REDUCE_OPS[
+        self.pools[index].chunk_reduce_type][0]
+    result = unsorted_reduce_op(feature_value, self._receiver_index,
+                                self._num_receivers)
+    self._pooled.append(result)
+    if not self._recording and len(self._pooled) == len(self.pools):
+      raise _AllPooled()
+    return tf.cast(result, feature_value.dtype)
+
+  def softmax(self, feature_value):
+    """Returns exp(feature_value) scaled by a per-receiver constant."""
+    if self._results is not None:
+      return feature_value  # Zero edges.
+    dtype = feature_value.dtype
+    value = tf.cast(feature_value, utils.accumulation_dtype(dtype))
+    # The result of pooling is invariant under the choice of maxes.
+    maxes = tf.stop_gradient(tf.math.unsorted_segment_max(
+        value, self._receiver_index, self._num_receivers))
+    exp_value = tf.exp(value - tf.gather(maxes, self._receiver_index))
+    sums = tf.math.unsorted_segment_sum(exp_value, self._receiver_index,
+                                        self._num_receivers)
+    self._softmax_stats.append((maxes, sums))
+    return tf.cast(exp_value, dtype)
+
+  def partial_results(self):
+    """Returns the flat list of partial results from one chunk."""
+    degree = tf.math.unsorted_segment_sum(
+        tf.ones_like(self._receiver_index, tf.float32), self._receiver_index,
+        self._num_receivers)
+    return [degree, *self._pooled,
+            *[x for stats in self._softmax_stats for x in stats]]
+
+  def initial_accumulators(self):
+    """Returns accumulators for the recorded ops, before seeing any edges."""
+    accumulators = [tf.zeros([self._num_receivers], tf.float32)]
+    for pool in self.pools:
+      dtype = (utils.accumulation_dtype(pool.dtype)
+               if pool.chunk_reduce_type == "sum" else pool.dtype)
+      initial_value = _CHUNK_REDUCE_OPS[pool.chunk_reduce_type][2]
+      if isinstance(initial_value, str):
+        initial_value = getattr(dtype, initial_value)
+      accumulators.append(tf.fill(
+          tf.concat([[self._num_receivers], pool.inner_shape], 0),
+          tf.constant(initial_value, dtype)))
+    for maxes, sums in self._softmax_stats:
+      accumulators.append(tf.fill(tf.shape(maxes), maxes.dtype.min))
+      accumulators.append(tf.zeros_like(sums))
+    return accumulators
+
+  def _softmax_slice(self, i):
+    begin = 1 + len(self.pools) + 2 * i
+    return slice(begin, begin + 2)
+
+  def accumulate(self, accumulators, partial_results):
+    """Returns `accumulators` updated with the partial results of a chunk."""
+    # Sums of exponentials are rescaled to a common maximum (online softmax).
+    rescalings = []
+    new_softmax_stats = []
+    for i in range(len(self._softmax_stats)):
+      old_max, old_sum = accumulators[self._softmax_slice(i)]
+      chunk_max, chunk_sum = partial_results[self._softmax_slice(i)]
+      new_max = tf.maximum(old_max, chunk_max)
+      old_scale = tf.exp(old_max - new_max)
+      chunk_scale = tf.exp(chunk_max - new_max)
+      rescalings.append((old_scale, chunk_scale))
+      new_softmax_stats.extend(
+          [new_max, old_sum * old_scale + chunk_sum * chunk_scale])
+
+    new_accumulators = [accumulators[0] + partial_results[0]]
+    for i, pool in enumerate(self.pools):
+      old, chunk = accumulators[1 + i], partial_results[1 + i]
+      if pool.softmax_index is not None:
+        old_scale, chunk_scale = rescalings[pool.softmax_index]
+        new_accumulators.append(
+            old * _expand_to_rank(old_scale, old.shape.rank) +
+            chunk * _expand_to_rank(chunk_scale, chunk.shape.rank))
+      else:
+        combine_op = _CHUNK_REDUCE_OPS[pool.chunk_reduce_type][1]
+        new_accumulators.append(combine_op(old, chunk))
+    return new_accumulators + new_softmax_stats
+
+  def initial_unclaimed(self, accumulators):
+    """Returns masks of the maxima (or minima) not yet claimed by a chunk."""
+    return [tf.ones_like(accumulators[1 + i], tf.bool)
+            if pool.chunk_reduce_type in ("max", "min")
+            else tf.zeros([0], tf.bool)
+            for i, pool in enumerate(self.pools)]
+
+  def partial_results_grads(self, accumulators, accumulator_grads,
+                            partial_results, unclaimed):
+    """Returns the gradients for the partial results of a chunk.
+
+    Args:
+      accumulators: The accumulators after all chunks.
+      accumulator_grads: The gradients for `accumulators`.
+      partial_results: The partial results of the chunk.
+      unclaimed: For pooling by max or min, masks of the accumulated values
+        for which no earlier chunk has received the gradient.
+
+    Returns:
+      A tuple of gradients for the partial results, and the updated
+      `unclaimed`. The gradient for each maximum (or minimum) goes to the
+      first chunk that attains it.
+    """
+    # The softmax maxes are treated as constants: the result of pooling
+    # after softmax does not depend on them.
+    scales = []
+    softmax_grads = []
+    for i in range(len(self._softmax_stats)):
+      final_max, _ = accumulators[self._softmax_slice(i)]
+      _, sum_grad = accumulator_grads[self._softmax_slice(i)]
+      chunk_max, _ = partial_results[self._softmax_slice(i)]
+      scale = tf.exp(chunk_max - final_max)
+      scales.append(scale)
+      softmax_grads.extend([tf.zeros_like(chunk_max), sum_grad * scale])
+
+    grads = [tf.zeros_like(partial_results[0])]
+    new_unclaimed = []
+    for i, pool in enumerate(self.pools):
+      grad, chunk = accumulator_grads[1 + i], partial_results[1 + i]
+      if pool.softmax_index is not None:
+        grad *= _expand_to_rank(scales[pool.softmax_index], grad.shape.rank)
+      elif pool.chunk_reduce_type in ("max", "min"):
+        claims = tf.logical_and(unclaimed[i],
+                                tf.equal(chunk, accumulators[1 + i]))
+        grad = tf.where(claims, grad, tf.zeros_like(grad))
+        new_unclaimed.append(tf.logical_and(unclaimed[i],
+                                            tf.logical_not(claims)))
+        grads.append(grad)
+        continue
+      grads.append(grad)
+      new_unclaimed.append(unclaimed[i])
+    return grads + softmax_grads, new_unclaimed
+
+  def finalize(self, accumulators):
+    """Returns the pooled results from all chunks."""
+    degree = accumulators[0]
+    results = []
+    for i, pool in enumerate(self.pools):
+      value = accumulators[1 + i]
+      if pool.softmax_index is not None:
+        _, sums = accumulators[self._softmax_slice(pool.softmax_index)]
+        value = tf.math.divide_no_nan(
+            value, _expand_to_rank(tf.cast(sums, value.dtype),
+                                   value.shape.rank))
+      elif pool.reduce_type == "mean":
+        value = tf.math.divide_no_nan(
+            value, _expand_to_rank(tf.cast(degree, value.dtype),
+                                   value.shape.rank))
+      elif pool.reduce_type == "max_no_inf":
+        value = tf.where(value <= value.dtype.min, tf.zeros_like(value), value)
+      elif pool.reduce_type == "min_no_inf":
+        value = tf.where(value >= value.dtype.max, tf.zeros_like(value), value)
+      results.append(tf.cast(value, pool.dtype))
+    return results
+
+
+def _expand_to_rank(value, rank):
+  """Appends dimensions of size 1 to `value` up to the given rank."""
+  return tf.reshape(
+      value, tf.concat([tf.shape(value), [1] * (rank - value.shape.rank)], 0))
+
 
 def _get_init_or_call_arg(class_name, arg_name, init_value, call_value):
   """Returns unified value for arg that can be set at init or call time."""
@@ -405,3 +879,12 @@ def _get_init_or_call_arg(class_name, arg_name, init_value, call_value):
           f"{class_name}(..., {arg_name}={init_value})"
           f"was called with contradictory value {arg_name}={call_value}")
     return call_value
+
+
+def _maybe_autocast(layer, value):
+  """Casts a float `value` to the compute dtype of a mixed precision `layer`."""
+  policy = layer.dtype_policy
+  if (value is None or not value.dtype.is_floating
+      or policy.compute_dtype == policy.variable_dtype):
+    return value
+  return tf.cast(value, policy.compute_dtype)
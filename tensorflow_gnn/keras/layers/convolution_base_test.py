@@ -63,6 +63,21 @@ def ExampleEdgePool(*args, sender_feature=const.HIDDEN_STATE, **kwargs):  # To b
                             sender_edge_feature=sender_feature, **kwargs)
 
 
+class DropoutConvolution(ExampleConvolution):
+
+  def __init__(self, units, *, rate=0.5, **kwargs):
+    super().__init__(units, **kwargs)
+    self._dropout = tf.keras.layers.Dropout(rate)
+
+  def convolve(self, *, sender_node_input, broadcast_from_sender_node,
+               pool_to_receiver, training, **kwargs):
+    messages = self._dropout(broadcast_from_sender_node(sender_node_input),
+                             training=training)
+    return super().convolve(
+        sender_node_input=messages, broadcast_from_sender_node=lambda x: x,
+        pool_to_receiver=pool_to_receiver, training=training, **kwargs)
+
+
 class SoftmaxBySumConvolution(convolution_base.AnyToAnyConvolutionBase):
 
   def __init__(self, **kwargs):
@@ -314,6 +329,102 @@ class AnyToAnyConvolutionBaseTest(tf.test.TestCase, parameterized.TestCase):
         [0.4*log2, 0.6*log3, 0.]])
     self.assertAllClose(expected, actual)
 
+  @parameterized.named_parameters(
+      ("Example", ExampleConvolution, 7, False),
+      ("ExampleOneChunk", ExampleConvolution, 100, False),
+      ("ExampleTFFunction", ExampleConvolution, 5, True),
+      ("Softmax", SoftmaxBySumConvolution, 7, False),
+      ("SoftmaxTFFunction", SoftmaxBySumConvolution, 3, True))
+  def testEdgeChunks(self, conv_class, edge_chunk_size, use_tf_function):
+    graph = _make_random_test_graph(num_nodes=10, num_edges=40)
+    node_states = graph.node_sets["nodes"][const.HIDDEN_STATE]
+    edge_states = graph.edge_sets["edges"][const.HIDDEN_STATE]
+    kwargs = {}
+    if conv_class is ExampleConvolution:
+      kwargs = dict(units=3, sender_edge_feature=const.HIDDEN_STATE)
+    conv = conv_class(receiver_tag=const.TARGET, **kwargs)
+    chunked_conv = conv_class(receiver_tag=const.TARGET,
+                              edge_chunk_size=edge_chunk_size, **kwargs)
+    self.assertEqual(edge_chunk_size,
+                     chunked_conv.get_config()["edge_chunk_size"])
+    _ = conv(graph, edge_set_name="edges")
+    _ = chunked_conv(graph, edge_set_name="edges")
+    chunked_conv.set_weights(conv.get_weights())
+
+    def results_and_gradients(layer):
+      def fn(node_states, edge_states):
+        with tf.GradientTape() as tape:
+          tape.watch([node_states, edge_states])
+          result = layer(graph.replace_features(
+              node_sets={"nodes": {const.HIDDEN_STATE: node_states}},
+              edge_sets={"edges": {const.HIDDEN_STATE: edge_states}}),
+                         edge_set_name="edges")
+          loss = tf.reduce_sum(tf.square(result))
+        sources = [node_states, edge_states] + layer.trainable_weights
+        return result, [tf.convert_to_tensor(g) if g is not None
+                        else tf.zeros_like(s)
+                        for g, s in zip(tape.gradient(loss, sources), sources)]
+      if use_tf_function:
+        fn = tf.function(fn)
+      return fn(node_states, edge_states)
+
+    expected, expected_grads = results_and_gradients(conv)
+    actual, actual_grads = results_and_gradients(chunked_conv)
+    self.assertAllClose(expected, actual, rtol=1e-5, atol=1e-5)
+    for expected_grad, actual_grad in zip(expected_grads, actual_grads):
+      self.assertAllClose(expected_grad, actual_grad, rtol=1e-4, atol=1e-4)
+
+  @parameterized.named_parameters(
+      ("Inference", False, 0.5),
+      ("TrainingWithoutDropout", True, 0.0))
+  def testEdgeChunksWithDropout(self, training, rate):
+    graph = _make_random_test_graph(num_nodes=10, num_edges=40)
+    node_states = graph.node_sets["nodes"][const.HIDDEN_STATE]
+    conv = DropoutConvolution(3, rate=rate, receiver_tag=const.TARGET)
+    chunked_conv = DropoutConvolution(3, rate=rate, receiver_tag=const.TARGET,
+                                      edge_chunk_size=7)
+    _ = conv(graph, edge_set_name="edges")
+    _ = chunked_conv(graph, edge_set_name="edges")
+    chunked_conv.set_weights(conv.get_weights())
+
+    def results_and_gradients(layer):
+      with tf.GradientTape() as tape:
+        tape.watch(node_states)
+        result = layer(graph.replace_features(
+            node_sets={"nodes": {const.HIDDEN_STATE: node_states}}),
+                       edge_set_name="edges", training=training)
+        loss = tf.reduce_sum(tf.square(result))
+      sources = [node_states] + layer.trainable_weights
+      return result, [tf.convert_to_tensor(g)
+                      for g in tape.gradient(loss, sources)]
+
+    expected, expected_grads = results_and_gradients(conv)
+    actual, actual_grads = results_and_gradients(chunked_conv)
+    self.assertAllClose(expected, actual, rtol=1e-5, atol=1e-5)
+    for expected_grad, actual_grad in zip(expected_grads, actual_grads):
+      self.assertAllClose(expected_grad, actual_grad, rtol=1e-4, atol=1e-4)
+
+  def testEdgeChunksDropoutInTrainingError(self):
+    graph = _make_random_test_graph(num_nodes=10, num_edges=40)
+    conv = DropoutConvolution(3, receiver_tag=const.TARGET, edge_chunk_size=7)
+    with self.assertRaisesRegex(ValueError, r"training=True.*dropout"):
+      conv(graph, edge_set_name="edges", training=True)
+
+  def testEdgeChunksToContext(self):
+    graph = _make_random_test_graph(num_nodes=10, num_edges=40)
+    conv = ExampleConvolution(2, receiver_tag=const.CONTEXT,
+                              receiver_feature=None, edge_chunk_size=3)
+    result = conv(graph, node_set_name="nodes")
+    self.assertEqual([1, 2], result.shape.as_list())
+
+  def testEdgeChunksErrors(self):
+    with self.assertRaisesRegex(ValueError, "must be positive"):
+      ExampleConvolution(1, edge_chunk_size=0)
+    with self.assertRaisesRegex(ValueError, r"extra_receiver_ops\['max'\]"):
+      convolution_base.AnyToAnyConvolutionBase.__init__(
+          ExampleConvolution(1), edge_chunk_size=10,
+          extra_receiver_ops={"max": normalization_ops.softmax_edges_per_node})
+
   # Like testExampleNodeToNode(use_sender_edge_input=False,
   #                            use_receiver_input=False, ...)
   # but with receiver tag set in different places.
@@ -369,6 +480,25 @@ def _make_test_graph_01into2(values):
   return graph
 
 
+def _make_random_test_graph(num_nodes, num_edges, seed=0):
+  """Returns GraphTensor with random edges among nodes, and random states."""
+  rng = np.random.default_rng(seed)
+  return gt.GraphTensor.from_pieces(
+      node_sets={"nodes": gt.NodeSet.from_fields(
+          sizes=tf.constant([num_nodes]),
+          features={const.HIDDEN_STATE: tf.constant(
+              rng.normal(size=[num_nodes, 2]), tf.float32)})},
+      edge_sets={"edges": gt.EdgeSet.from_fields(
+          sizes=tf.constant([num_edges]),
+          # The last node receives no edges.
+          adjacency=adj.Adjacency.from_indices(
+              ("nodes", tf.constant(rng.integers(0, num_nodes, num_edges))),
+              ("nodes", tf.constant(
+                  rng.integers(0, num_nodes - 1, num_edges)))),
+          features={const.HIDDEN_STATE: tf.constant(
+              rng.normal(size=[num_edges, 3]), tf.float32)})})
+
+
 def _drop_prefix_re(prefix_re, string):
   new_string, subs_made = re.subn("^" + prefix_re, "", string, count=1)
   assert subs_made == 1, f"Missing prefix '{prefix_re}' in '{string}'"
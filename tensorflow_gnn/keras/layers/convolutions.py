@@ -81,6 +81,13 @@ class SimpleConv(convolution_base.AnyToAnyConvolutionBase):
       this input.
       IMPORTANT: Must be set for use with `receiver_tag=tfgnn.CONTEXT` on an
       edge set.
+    use_sparse_matmul: If true, message_fn is applied to the sender node states
+      (instead of the messages on each edge), and the results are pooled by
+      `tfgnn.pool_neighbors_to_node()`, without materializing a value for each
+      edge. This is equivalent for the row-wise message_fn of typical Keras
+      layers, but requires `receiver_tag=tfgnn.SOURCE` or `tfgnn.TARGET`,
+      `reduce_type` "sum" or "mean", input from sender nodes only (that is,
+      `receiver_feature=None`), and no dropout per edge inside message_fn.
 
   Call returns:
     A Tensor whose leading dimension is indexed by receivers, with the
@@ -98,7 +105,25 @@ class SimpleConv(convolution_base.AnyToAnyConvolutionBase):
       sender_node_feature: Optional[
           const.FieldName] = const.HIDDEN_STATE,
       sender_edge_feature: Optional[const.FieldName] = None,
+      use_sparse_matmul: bool = False,
       **kwargs):
+    if use_sparse_matmul:
+      if receiver_tag not in (const.SOURCE, const.TARGET):
+        raise ValueError(
+            "SimpleConv(use_sparse_matmul=True) requires receiver_tag "
+            f"SOURCE or TARGET, got {receiver_tag}")
+      if reduce_type not in ("sum", "mean"):
+        raise ValueError(
+            "SimpleConv(use_sparse_matmul=True) requires reduce_type "
+            f"'sum' or 'mean', got '{reduce_type}'")
+      if (receiver_feature is not None or sender_edge_feature is not None
+          or sender_node_feature is None):
+        raise ValueError(
+            "SimpleConv(use_sparse_matmul=True) requires input from "
+            "sender_node_feature only, with receiver_feature=None and "
+            "sender_edge_feature=None")
+      kwargs["extra_receiver_ops"] = {
+          "pool_neighbors": ops.pool_neighbors_to_node}
     super().__init__(
         receiver_tag=receiver_tag,
         receiver_feature=receiver_feature,
@@ -109,12 +134,14 @@ class SimpleConv(convolution_base.AnyToAnyConvolutionBase):
     self._message_fn = message_fn
     self._reduce_type = reduce_type
     self._combine_type = combine_type
+    self._use_sparse_matmul = use_sparse_matmul
 
   def get_config(self):
     return dict(
         message_fn=self._message_fn,
         reduce_type=self._reduce_type,
         combine_type=self._combine_type,
+        use_sparse_matmul=self._use_sparse_matmul,
         **super().get_config())
 
   def convolve(self, *,
@@ -126,6 +153,12 @@ class SimpleConv(convolution_base.AnyToAnyConvolutionBase):
                pool_to_receiver: Callable[..., tf.Tensor],
                extra_receiver_ops: Any = None,
                training: bool) -> tf.Tensor:
+    if self._use_sparse_matmul:
+      # Compute messages per sender node, then pool them along the edges.
+      messages = self._message_fn(
+          ops.combine_values([sender_node_input], self._combine_type))
+      return extra_receiver_ops["pool_neighbors"](
+          messages, reduce_type=self._reduce_type)
     assert extra_receiver_ops is None, "Internal error: bad super().__init__()"
     # Collect inputs, suitably broadcast.
     inputs = []
@@ -124,6 +124,63 @@ class SimpleConvTest(tf.test.TestCase, parameterized.TestCase):
         [0.]])  # No edges.
     self.assertAllEqual(expected, actual)
 
+  @parameterized.named_parameters(
+      ("SumTarget", "sum", const.TARGET),
+      ("MeanTarget", "mean", const.TARGET),
+      ("SumSource", "sum", const.SOURCE),
+      ("MeanSource", "mean", const.SOURCE))
+  def testSparseMatmul(self, reduce_type, receiver_tag):
+    values = dict(nodes=tf.constant([[1., 2.], [3., 4.], [5., 6.]]))
+    input_graph = _make_test_graph_01into2(values)
+
+    def make_conv(use_sparse_matmul):
+      return convolutions.SimpleConv(
+          tf.keras.layers.Dense(3, "relu", kernel_initializer="ones",
+                                bias_initializer="ones"),
+          reduce_type=reduce_type, receiver_feature=None,
+          receiver_tag=receiver_tag, use_sparse_matmul=use_sparse_matmul)
+
+    expected = make_conv(False)(input_graph, edge_set_name="edges")
+    conv = make_conv(True)
+    actual = conv(input_graph, edge_set_name="edges")
+    self.assertAllClose(expected, actual)
+    self.assertTrue(conv.get_config()["use_sparse_matmul"])
+
+  @parameterized.named_parameters(
+      ("ReduceType", dict(reduce_type="max"), "reduce_type"),
+      ("ReceiverFeature", dict(), "receiver_feature"),
+      ("EdgeFeature", dict(receiver_feature=None,
+                           sender_edge_feature=const.HIDDEN_STATE),
+       "sender_edge_feature"))
+  def testSparseMatmulErrors(self, kwargs, regex):
+    with self.assertRaisesRegex(ValueError, regex):
+      convolutions.SimpleConv(
+          tf.keras.layers.Dense(1), receiver_tag=const.TARGET,
+          use_sparse_matmul=True, **kwargs)
+
+  @parameterized.named_parameters(
+      ("Sum", "sum"), ("Mean", "mean"), ("Max", "max"),
+      ("MaxNoInf", "max_no_inf"), ("MinNoInf", "min_no_inf"))
+  def testEdgeChunks(self, reduce_type):
+    values = dict(nodes=tf.constant([[1., 2.], [3., -4.], [5., 6.]]),
+                  edges=tf.constant([[1.], [-1.]]))
+    input_graph = _make_test_graph_01into2(values)
+
+    def make_conv(edge_chunk_size):
+      return convolutions.SimpleConv(
+          tf.keras.layers.Dense(3, kernel_initializer="glorot_uniform"),
+          reduce_type=reduce_type, sender_edge_feature=const.HIDDEN_STATE,
+          receiver_tag=const.TARGET, edge_chunk_size=edge_chunk_size)
+
+    conv = make_conv(None)
+    expected = conv(input_graph, edge_set_name="edges")
+    chunked_conv = convolutions.SimpleConv.from_config(
+        make_conv(1).get_config())
+    _ = chunked_conv(input_graph, edge_set_name="edges")
+    chunked_conv.set_weights(conv.get_weights())
+    actual = chunked_conv(input_graph, edge_set_name="edges")
+    self.assertAllClose(expected, actual)
+
   def testTFLite(self):
     self.skipTest(
         "SimpleConv TFLite functionality is tested in models/mt_albis")
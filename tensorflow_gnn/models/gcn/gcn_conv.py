@@ -91,6 +91,9 @@ class GCNConv(tf.keras.layers.Layer):
       it as the edge's entry in the adjacency matrix, instead of the default 1.
     degree_normalization: Can be set to `"none"`, `"in"`, `"out"`, `"in_out"`,
       or `"in_in"`, as explained above.
+    use_sparse_matmul: If true, the normalized sender node features are pooled
+      by `tfgnn.pool_neighbors_to_node()`, that is, by multiplication with a
+      sparse adjacency matrix, without materializing them for each edge.
     **kwargs: additional arguments for the Layer.
 
   Call arguments:
@@ -141,6 +144,7 @@ class GCNConv(tf.keras.layers.Layer):
       kernel_regularizer: Any = None,
       edge_weight_feature_name: Optional[tfgnn.FieldName] = None,
       degree_normalization: str = 'in_out',
+      use_sparse_matmul: bool = False,
       **kwargs,
   ):
     super().__init__(**kwargs)
@@ -156,6 +160,7 @@ class GCNConv(tf.keras.layers.Layer):
     self._sender = tfgnn.reverse_tag(receiver_tag)
     self._edge_weight_feature_name = edge_weight_feature_name
     self._degree_normalization = degree_normalization
+    self._use_sparse_matmul = use_sparse_matmul
 
   def get_config(self):
     filter_config = self._filter.get_config()
@@ -170,6 +175,7 @@ class GCNConv(tf.keras.layers.Layer):
         kernel_regularizer=filter_config['kernel_regularizer'],
         edge_weight_feature_name=self._edge_weight_feature_name,
         degree_normalization=self._degree_normalization,
+        use_sparse_matmul=self._use_sparse_matmul,
         **super().get_config(),
     )
 
@@ -189,6 +195,11 @@ class GCNConv(tf.keras.layers.Layer):
                        f'for edge set {edge_set_name} ')
 
     edge_set = graph.edge_sets[edge_set_name]
+    node_values = graph.node_sets[sender_name][self._node_feature]
+    # Degrees are accumulated in float32 even if the node features are of
+    # a half-precision type (as under a Keras mixed precision policy).
+    degree_dtype = (tf.float64 if node_values.dtype == tf.float64
+                    else tf.float32)
     if self._edge_weight_feature_name is not None:
       try:
         edge_weights = graph.edge_sets[edge_set_name][
@@ -206,10 +217,10 @@ class GCNConv(tf.keras.layers.Layer):
             f'{edge_weights.shape.rank}.'
         )
       edge_weights = tf.expand_dims(
-          edge_weights, axis=1
+          tf.cast(edge_weights, degree_dtype), axis=1
       )  # Align with state feature.
     else:
-      edge_weights = tf.ones([edge_set.total_size, 1])
+      edge_weights = tf.ones([edge_set.total_size, 1], dtype=degree_dtype)
 
     def get_degree(node_tag: tfgnn.IncidentNodeTag):
       # If node_tag is receiver, this function computes the in_degree of nodes
@@ -231,6 +242,9 @@ class GCNConv(tf.keras.layers.Layer):
         node_degree = tf.maximum(node_degree, 1)
       return node_degree
 
+    def to_feature_dtype(scale):
+      return None if scale is None else tf.cast(scale, node_values.dtype)
+
     if self._degree_normalization == 'none':
       sender_scale = receiver_scale = None
     elif self._degree_normalization == 'in':
@@ -250,23 +264,35 @@ class GCNConv(tf.keras.layers.Layer):
           ' `in_out`, or `in_in`.'
       )
 
+    sender_scale = to_feature_dtype(sender_scale)
+    receiver_scale = to_feature_dtype(receiver_scale)
     if sender_scale is not None:
-      normalized_values = (
-          sender_scale * graph.node_sets[sender_name][self._node_feature]
-      )
+      normalized_values = sender_scale * node_values
     else:
-      normalized_values = graph.node_sets[sender_name][self._node_feature]
+      normalized_values = node_values
 
-    source_bcast = tfgnn.broadcast_node_to_edges(
-        graph,
-        edge_set_name,
-        self._sender,
-        feature_value=normalized_values,
-    )
-    if self._edge_weight_feature_name is not None:
-      source_bcast = source_bcast * edge_weights
-    pooled = tfgnn.pool_edges_to_node(
-        graph, edge_set_name, self._receiver, 'sum', feature_value=source_bcast)
+    if self._use_sparse_matmul:
+      pooled = tfgnn.pool_neighbors_to_node(
+          graph,
+          self._receiver,
+          edge_set_name=edge_set_name,
+          feature_value=normalized_values,
+          edge_weights=(edge_weights[:, 0]
+                        if self._edge_weight_feature_name is not None
+                        else None),
+      )
+    else:
+      source_bcast = tfgnn.broadcast_node_to_edges(
+          graph,
+          edge_set_name,
+          self._sender,
+          feature_value=normalized_values,
+      )
+      if self._edge_weight_feature_name is not None:
+        source_bcast = source_bcast * to_feature_dtype(edge_weights)
+      pooled = tfgnn.pool_edges_to_node(
+          graph, edge_set_name, self._receiver, 'sum',
+          feature_value=source_bcast)
     if receiver_scale is not None:
       pooled = receiver_scale * pooled
 
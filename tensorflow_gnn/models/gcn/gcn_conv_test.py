@@ -21,6 +21,7 @@ from absl.testing import parameterized
 import tensorflow as tf
 import tensorflow_gnn as tfgnn
 from tensorflow_gnn.models.gcn import gcn_conv
+from tensorflow_gnn.utils import mixed_precision_test_utils
 
 
 class ReloadModel(int, enum.Enum):
@@ -626,6 +627,56 @@ class GcnConvTest(tf.test.TestCase, parameterized.TestCase):
         atol=1e-06,
     )
 
+  @parameterized.product(
+      degree_normalization=['none', 'in', 'out', 'in_out', 'in_in'],
+      add_self_loops=[False, True],
+      edge_weight_feature_name=[None, 'weights'],
+      receiver_tag=[tfgnn.SOURCE, tfgnn.TARGET],
+  )
+  def test_gcnconv_sparse_matmul(
+      self, degree_normalization, add_self_loops, edge_weight_feature_name,
+      receiver_tag
+  ):
+    """Tests that use_sparse_matmul=True does not change the result."""
+    graph = tfgnn.GraphTensor.from_pieces(
+        node_sets={
+            tfgnn.NODES: tfgnn.NodeSet.from_fields(
+                sizes=[5],
+                features={
+                    tfgnn.HIDDEN_STATE: tf.random.uniform([5, 3], seed=1)
+                },
+            )
+        },
+        edge_sets={
+            tfgnn.EDGES: tfgnn.EdgeSet.from_fields(
+                sizes=[6],
+                features={
+                    'weights': tf.constant([2.0, 1.0, 3.0, 0.5, 1.0, 4.0])
+                },
+                adjacency=tfgnn.Adjacency.from_indices(
+                    source=(tfgnn.NODES, tf.constant([0, 1, 2, 2, 4, 0])),
+                    target=(tfgnn.NODES, tf.constant([1, 2, 0, 3, 3, 1])),
+                ),
+            )
+        },
+    )
+    kwargs = dict(
+        units=4,
+        receiver_tag=receiver_tag,
+        add_self_loops=add_self_loops,
+        edge_weight_feature_name=edge_weight_feature_name,
+        degree_normalization=degree_normalization,
+    )
+    conv = gcn_conv.GCNConv(**kwargs)
+    sparse_conv = gcn_conv.GCNConv(use_sparse_matmul=True, **kwargs)
+    expected = conv(graph, edge_set_name=tfgnn.EDGES)
+    sparse_conv(graph, edge_set_name=tfgnn.EDGES)
+    sparse_conv.set_weights(conv.get_weights())
+    self.assertAllClose(
+        expected, sparse_conv(graph, edge_set_name=tfgnn.EDGES),
+        rtol=1e-06, atol=1e-06,
+    )
+
   def test_gcnconv_symmetric_adj(self):
     """Tests that gcn_conv returns the same values for a symmetric adjacency with in_in and in_out normalizations."""
     graph = tfgnn.GraphTensor.from_pieces(
@@ -829,6 +880,21 @@ class GcnConvTest(tf.test.TestCase, parameterized.TestCase):
     # Although no leading connections, there should be 0's rather than NaNs.
     self.assertAllClose(second_row, tf.zeros_like(second_row))
 
+  @parameterized.named_parameters(('Float16', 'mixed_float16'),
+                                  ('BFloat16', 'mixed_bfloat16'))
+  def testMixedPrecision(self, policy_name):
+    input_graph = tfgnn.homogeneous(
+        source=tf.constant([0, 1, 2, 0, 2, 1]),
+        target=tf.constant([1, 2, 0, 2, 1, 0]),
+        node_features=tf.constant(
+            [[1., 0., 2.], [0., 1., -1.], [-2., 1., 0.]]),
+        edge_features={'weight': tf.constant([1., 2., 3., .5, .25, 1.])})
+    def make_layer():
+      return gcn_conv.GCNHomGraphUpdate(
+          units=3, add_self_loops=True, edge_weight_feature_name='weight')
+    mixed_precision_test_utils.assert_mixed_precision_close_to_float32(
+        self, policy_name, make_layer, input_graph, 'nodes')
+
 
 class GCNTFLiteTest(tf.test.TestCase, parameterized.TestCase):
 
@@ -49,6 +49,7 @@ class GraphSAGEAggregatorConv(tfgnn.keras.layers.AnyToAnyConvolutionBase):
       sender_node_feature: Optional[tfgnn.FieldName] = tfgnn.HIDDEN_STATE,
       units: int,
       dropout_rate: float = 0.,
+      use_sparse_matmul: bool = False,
       **kwargs):
     """Initializes the `GraphSAGEAggregatorConv` convolution layer.
 
@@ -67,6 +68,10 @@ class GraphSAGEAggregatorConv(tfgnn.keras.layers.AnyToAnyConvolutionBase):
         sender node features.
       dropout_rate: Can be set to a dropout rate that will be applied to sender
         node features (independently on each edge).
+      use_sparse_matmul: If true, sender node features are aggregated by
+        `tfgnn.pool_neighbors_to_node()` without materializing them for each
+        edge. This requires `reduce_type` "sum" or "mean", and applies dropout
+        to sender node features once per node instead of once per edge.
       **kwargs: Additional arguments for the Layer.
     """
     kwargs.setdefault("name", "graph_sage_aggregator_conv")
@@ -80,6 +85,13 @@ class GraphSAGEAggregatorConv(tfgnn.keras.layers.AnyToAnyConvolutionBase):
       raise ValueError(
           "sender_node_feature should be specified for GraphSAGEAggregatorConv."
       )
+    if use_sparse_matmul:
+      if reduce_type not in ("sum", "mean"):
+        raise ValueError(
+            "GraphSAGEAggregatorConv(use_sparse_matmul=True) requires "
+            f"reduce_type 'sum' or 'mean', got '{reduce_type}'.")
+      kwargs["extra_receiver_ops"] = {
+          "pool_neighbors": tfgnn.pool_neighbors_to_node}
     super().__init__(
         receiver_tag=receiver_tag,
         receiver_feature=None,
@@ -88,6 +100,7 @@ class GraphSAGEAggregatorConv(tfgnn.keras.layers.AnyToAnyConvolutionBase):
         **kwargs)
 
     self._units = units
+    self._use_sparse_matmul = use_sparse_matmul
     self._transform_neighbor_fn = tf.keras.layers.Dense(units, use_bias=False)
     self._dropout_rate = dropout_rate
     self._dropout = tf.keras.layers.Dropout(dropout_rate)
@@ -104,7 +117,8 @@ class GraphSAGEAggregatorConv(tfgnn.keras.layers.AnyToAnyConvolutionBase):
         **config,
         units=self._units,
         dropout_rate=self._dropout_rate,
-        reduce_type=self._reduce_type)
+        reduce_type=self._reduce_type,
+        use_sparse_matmul=self._use_sparse_matmul)
 
   def convolve(self, *, sender_node_input: Optional[tf.Tensor],
                sender_edge_input: Optional[tf.Tensor],
@@ -115,11 +129,17 @@ class GraphSAGEAggregatorConv(tfgnn.keras.layers.AnyToAnyConvolutionBase):
                extra_receiver_ops: Any = None,
                training: bool) -> tf.Tensor:
     """Overridden internal method of the base class."""
-    assert extra_receiver_ops is None, "Internal error: bad super().__init__()"
     assert sender_node_input is not None, "sender_node_input can't be None."
-    result = broadcast_from_sender_node(sender_node_input)
-    result = self._dropout(result, training=training)
-    result = pool_to_receiver(result, reduce_type=self._reduce_type)
+    if self._use_sparse_matmul:
+      result = self._dropout(sender_node_input, training=training)
+      result = extra_receiver_ops["pool_neighbors"](
+          result, reduce_type=self._reduce_type)
+    else:
+      assert extra_receiver_ops is None, (
+          "Internal error: bad super().__init__()")
+      result = broadcast_from_sender_node(sender_node_input)
+      result = self._dropout(result, training=training)
+      result = pool_to_receiver(result, reduce_type=self._reduce_type)
     result = self._transform_neighbor_fn(result)
     return result
 
@@ -463,8 +483,9 @@ class GCNGraphSAGENodeSetUpdate(tf.keras.layers.Layer):
     summed_node_values = tf.math.add_n(pooled_node_states_list)
     if self._reduce_type == "mean":
       total_in_degrees = tf.math.add_n(edge_set_in_degrees_list)
-      result = tf.math.divide_no_nan(summed_node_values,
-                                     total_in_degrees[:, tf.newaxis])
+      result = tf.math.divide_no_nan(
+          summed_node_values,
+          tf.cast(total_in_degrees[:, tf.newaxis], summed_node_values.dtype))
     else:
       result = summed_node_values
     if self._use_bias:
@@ -23,6 +23,7 @@ import tensorflow as tf
 import tensorflow_gnn as tfgnn
 
 from tensorflow_gnn.models.graph_sage import layers as graph_sage
+from tensorflow_gnn.utils import mixed_precision_test_utils
 
 _FEATURE_NAME = "f"
 
@@ -164,6 +165,31 @@ class GraphsageTest(tf.test.TestCase, parameterized.TestCase):
     ])
     self.assertAllEqual(expected_output, actual)
 
+  @parameterized.named_parameters(("Mean", "mean"), ("Sum", "sum"))
+  def testSparseMatmul(self, reduce_type):
+    graph = _get_test_graph()
+    def make_conv(use_sparse_matmul):
+      return graph_sage.GraphSAGEAggregatorConv(
+          receiver_tag=tfgnn.TARGET,
+          sender_node_feature=_FEATURE_NAME,
+          reduce_type=reduce_type,
+          units=2,
+          use_sparse_matmul=use_sparse_matmul)
+    conv = make_conv(False)
+    expected = conv(graph, edge_set_name="written")
+    sparse_conv = make_conv(True)
+    _ = sparse_conv(graph, edge_set_name="written")  # Build weights.
+    sparse_conv.set_weights(conv.get_weights())
+    actual = sparse_conv(graph, edge_set_name="written")
+    self.assertAllClose(expected, actual)
+    self.assertTrue(sparse_conv.get_config()["use_sparse_matmul"])
+
+  def testSparseMatmulError(self):
+    with self.assertRaisesRegex(ValueError, "reduce_type"):
+      graph_sage.GraphSAGEAggregatorConv(
+          receiver_tag=tfgnn.TARGET, units=1, reduce_type="max",
+          use_sparse_matmul=True)
+
   @parameterized.named_parameters(
       ("NoDropoutMeanAggKeras", 0.0, ReloadModel.KERAS),
       ("NoDropoutMeanAggSavedModel", 0.0, ReloadModel.SAVED_MODEL),
@@ -576,6 +602,24 @@ class GraphsageTest(tf.test.TestCase, parameterized.TestCase):
                            r".* isn't supported, please instead use any of .*",
                            lambda: conv(graph, node_set_name="author"))
 
+  @parameterized.named_parameters(("Float16", "mixed_float16"),
+                                  ("BFloat16", "mixed_bfloat16"))
+  def testMixedPrecision(self, policy_name):
+    input_graph = _get_test_graph()
+    def make_layer():
+      return tfgnn.keras.layers.GraphUpdate(node_sets={
+          "author": graph_sage.GCNGraphSAGENodeSetUpdate(
+              edge_set_names=["written", "affiliated_with"],
+              receiver_tag=tfgnn.TARGET,
+              self_node_feature=_FEATURE_NAME,
+              sender_node_feature=_FEATURE_NAME,
+              reduce_type="mean",
+              units=2,
+              add_self_loop=True)})
+    mixed_precision_test_utils.assert_mixed_precision_close_to_float32(
+        self, policy_name, make_layer, input_graph, "author",
+        _FEATURE_NAME)
+
 
 class GraphSAGETFLiteTest(tf.test.TestCase, parameterized.TestCase):
 
@@ -22,6 +22,7 @@ import numpy as np
 import tensorflow as tf
 import tensorflow_gnn as tfgnn
 from tensorflow_gnn.models.hgt import layers
+from tensorflow_gnn.utils import mixed_precision_test_utils
 
 
 class ReloadModel(int, enum.Enum):
@@ -727,6 +728,19 @@ class HgtConvTest(tf.test.TestCase, parameterized.TestCase):
         ],
     )
 
+  @parameterized.named_parameters(("Float16", "mixed_float16"),
+                                  ("BFloat16", "mixed_bfloat16"))
+  def testMixedPrecision(self, policy_name):
+    self._skip_if_unsupported()
+    input_graph = _homogeneous_cycle_graph(
+        tf.constant([[1., 0., 2.], [0., 1., -1.], [-2., 1., 0.]]))
+    def make_layer():
+      return layers.HGTGraphUpdate(
+          num_heads=3, per_head_channels=1, receiver_tag=tfgnn.TARGET,
+          dropout_rate=0.)
+    mixed_precision_test_utils.assert_mixed_precision_close_to_float32(
+        self, policy_name, make_layer, input_graph, "nodes")
+
 
 class HGTTFLiteTest(tf.test.TestCase, parameterized.TestCase):
 
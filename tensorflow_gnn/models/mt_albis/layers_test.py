@@ -23,6 +23,7 @@ import numpy as np
 import tensorflow as tf
 import tensorflow_gnn as tfgnn
 from tensorflow_gnn.models.mt_albis import layers
+from tensorflow_gnn.utils import mixed_precision_test_utils
 
 
 class ReloadModel(int, enum.Enum):
@@ -240,6 +241,18 @@ class MtAlbisGraphUpdateTest(tf.test.TestCase, parameterized.TestCase):
           "GNN>models>multi_head_attention>MultiHeadAttentionConv",
       )
 
+  @parameterized.named_parameters(("Float16", "mixed_float16"),
+                                  ("BFloat16", "mixed_bfloat16"))
+  def testMixedPrecision(self, policy_name):
+    input_graph = _make_test_graph_abuv()
+    def make_layer():
+      return layers.MtAlbisGraphUpdate(
+          units=4, message_dim=4, receiver_tag=tfgnn.SOURCE,
+          attention_type="gat_v2", attention_num_heads=2,
+          next_state_type="residual")
+    mixed_precision_test_utils.assert_mixed_precision_close_to_float32(
+        self, policy_name, make_layer, input_graph, "a")
+
 
 class MtAlbisTFLiteTest(tf.test.TestCase, parameterized.TestCase):
 
@@ -463,7 +463,7 @@ class MultiHeadAttentionConv(tfgnn.keras.layers.AnyToAnyConvolutionBase):
       pass
     elif self._score_scaling == "rsqrt_dim":
       attention_coefficients *= tf.math.rsqrt(
-          tf.cast(tf.shape(keys)[-1], tf.float32))
+          tf.cast(tf.shape(keys)[-1], attention_coefficients.dtype))
     elif self._score_scaling == "trainable_sigmoid":
       if self._score_scaling_weight is None:
         self._score_scaling_weight = self.add_weight(
@@ -23,6 +23,7 @@ from absl.testing import parameterized
 import tensorflow as tf
 import tensorflow_gnn as tfgnn
 from tensorflow_gnn.models import multi_head_attention
+from tensorflow_gnn.utils import mixed_precision_test_utils
 
 
 class ReloadModel(int, enum.Enum):
@@ -1177,6 +1178,17 @@ class MultiHeadAttentionTest(tf.test.TestCase, parameterized.TestCase):
     # remaining scores are not all identical.
     self.assertGreater(tf.math.reduce_std(outputs), 0.0)
 
+  @parameterized.named_parameters(("Float16", "mixed_float16"),
+                                  ("BFloat16", "mixed_bfloat16"))
+  def testMixedPrecision(self, policy_name):
+    input_graph = _get_test_bidi_cycle_graph(
+        tf.constant([[1., 0., 2.], [0., 1., -1.], [-2., 1., 0.]]))
+    def make_layer():
+      return multi_head_attention.MultiHeadAttentionHomGraphUpdate(
+          num_heads=3, per_head_channels=1, receiver_tag=tfgnn.TARGET)
+    mixed_precision_test_utils.assert_mixed_precision_close_to_float32(
+        self, policy_name, make_layer, input_graph, "nodes")
+
 
 def _get_test_bidi_cycle_graph(node_state, edge_state=None):
   return tfgnn.GraphTensor.from_pieces(
@@ -17,6 +17,7 @@ from absl.testing import parameterized
 import tensorflow as tf
 import tensorflow_gnn as tfgnn
 from tensorflow_gnn.models import vanilla_mpnn
+from tensorflow_gnn.utils import mixed_precision_test_utils
 
 
 # The components of VanillaMPNNGraphUpdate have been tested elsewhere.
@@ -72,6 +73,18 @@ class VanillaMPNNTest(tf.test.TestCase, parameterized.TestCase):
       want = [[60., 20.]]
     self.assertAllClose(want, graph.node_sets["b"][tfgnn.HIDDEN_STATE])
 
+  @parameterized.named_parameters(("Float16", "mixed_float16"),
+                                  ("BFloat16", "mixed_bfloat16"))
+  def testMixedPrecision(self, policy_name):
+    input_graph = _make_test_graph_abc()
+    def make_layer():
+      return vanilla_mpnn.VanillaMPNNGraphUpdate(
+          units=1, message_dim=2, receiver_tag=tfgnn.TARGET,
+          node_set_names=["b"], edge_feature="fab",
+          use_layer_normalization=True)
+    mixed_precision_test_utils.assert_mixed_precision_close_to_float32(
+        self, policy_name, make_layer, input_graph, "b")
+
 
 class VanillaMPNNTFLiteTest(tf.test.TestCase, parameterized.TestCase):
 
@@ -0,0 +1,63 @@
+# Copyright 2023 The TensorFlow GNN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Test utilities for Keras layers under mixed precision."""
+
+from typing import Callable
+
+import tensorflow as tf
+from tensorflow_gnn.graph import graph_constants as const
+from tensorflow_gnn.graph import graph_tensor as gt
+
+
+def assert_mixed_precision_close_to_float32(
+    test_case: tf.test.TestCase,
+    policy_name: str,
+    layer_fn: Callable[[], tf.keras.layers.Layer],
+    input_graph: gt.GraphTensor,
+    node_set_name: str,
+    feature_name: str = const.HIDDEN_STATE):
+  """Checks a graph update layer under a mixed precision policy.
+
+  The layer from `layer_fn()` is applied twice to `input_graph`, once as
+  created under the float32 policy and once as created under `policy_name`
+  with the same weights. The resulting `feature_name` of `node_set_name` must
+  have the compute dtype of the mixed precision layer and be close to the
+  float32 result. The global policy is reset to float32 when `test_case` is
+  cleaned up.
+
+  Args:
+    test_case: The test case running the check.
+    policy_name: A mixed precision policy, like 'mixed_float16'.
+    layer_fn: Returns a new layer that maps graphs to graphs.
+    input_graph: The graph to which layers are applied.
+    node_set_name: The node set whose states are compared.
+    feature_name: The feature of `node_set_name` that is compared.
+  """
+  def get_states(layer):
+    graph = layer(layer(input_graph))
+    return graph.node_sets[node_set_name][feature_name]
+
+  layer = layer_fn()
+  want = get_states(layer)
+
+  tf.keras.mixed_precision.set_global_policy(policy_name)
+  test_case.addCleanup(tf.keras.mixed_precision.set_global_policy, 'float32')
+  mixed_layer = layer_fn()
+  _ = get_states(mixed_layer)  # Build the layer.
+  mixed_layer.set_weights(layer.get_weights())
+  got = get_states(mixed_layer)
+  test_case.assertEqual(got.dtype, mixed_layer.compute_dtype)
+  test_case.assertAllClose(want, tf.cast(got, tf.float32),
+                           rtol=0.05, atol=0.05)